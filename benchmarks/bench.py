@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+'''
+    Synthesis benchmark
+    Times and tracemalloc-profiles the constructor and app.synth() of every stack
+    (services) and StackSet(cfn-services) separately.
+
+    - Each target runs --runs times, each run in a fresh python process(jsii kernel, module cache and
+      the app of app.py), the median time and the largest memory peak of the runs are kept.
+    - Context is read from cdk.json and the cached cdk.context.json, no AWS call is made.
+    - tracemalloc only sees python allocations, objects living in the jsii(node) kernel are not counted.
+
+    Usage(from the repository root):
+        python3 benchmarks/bench.py                          # run all, compare with baseline
+        python3 benchmarks/bench.py services:eks cfn-services:usdev
+        python3 benchmarks/bench.py --update-baseline        # store current results as baseline
+        python3 benchmarks/bench.py --runs 9 services:s3     # more runs for a noisy target
+        python3 benchmarks/bench.py --python .venv/bin/python3 --output results.json
+        python3 benchmarks/bench.py --project-python cfn-services=cfn-services/.venv/bin/python3
+'''
+import argparse
+import json
+import os
+import runpy
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT          = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BASELINE_FILE = os.path.join(ROOT, "benchmarks", "baseline.json")
+RESULT_MARK   = "BENCHMARK-RESULT "
+
+# Regions of cfn-services/app.py, one StackSet each
+CFN_REGIONS_FILE = os.path.join(ROOT, "cfn-services", "regions.json")
+
+
+def load_context(project_dir: str) -> dict:
+    '''
+        Same context as the cdk CLI passes: cdk.json "context" + cdk.context.json
+    '''
+    context = dict()
+    for name in ("cdk.json", "cdk.context.json"):
+        path = os.path.join(project_dir, name)
+        if not os.path.exists(path):
+            continue
+        with open(path) as file:
+            data = json.load(file)
+        context.update(data.get("context", dict()) if name == "cdk.json" else data)
+    return context
+
+
+def measure(function) -> tuple:
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = function()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 1024
+
+
+'''
+    Worker side: runs inside the project directory
+'''
+def run_services_target(name: str, project_dir: str) -> tuple:
+    from aws_cdk import App
+    namespace = runpy.run_path(os.path.join(project_dir, "app.py"), run_name="benchmark")
+    registry  = namespace["registry"]
+    context   = load_context(project_dir)
+    with tempfile.TemporaryDirectory() as outdir:
+        app    = App(outdir=outdir, context=context)
+        stacks = dict()
+        for dependency in registry.resolve([name]):
+            spec        = registry.specs[dependency]
+            stack_class = registry.profiler.load(spec.stack_class)
+            deps        = { key: stacks[key] for key in spec.depends_on }
+            build       = lambda: spec.factory(stack_class, app, spec.construct_id, deps)
+            if dependency == name:
+                stacks[dependency], construct_seconds, construct_peak = measure(build)
+            else:
+                stacks[dependency] = build()
+        _, synth_seconds, synth_peak = measure(app.synth)
+    return (construct_seconds, construct_peak, synth_seconds, synth_peak)
+
+
+def run_cfn_target(name: str, project_dir: str) -> tuple:
+    from aws_cdk import App, Environment
+    from regions import StackSet, get_region
+    context = load_context(project_dir)
+    region  = get_region(name)
+    with tempfile.TemporaryDirectory() as outdir:
+        app = App(outdir=outdir, context=context)
+        _, construct_seconds, construct_peak = measure(
+            lambda: StackSet(app, region, Environment(region=region.region)))
+        _, synth_seconds, synth_peak = measure(app.synth)
+    return (construct_seconds, construct_peak, synth_seconds, synth_peak)
+
+
+def summarize(samples: list) -> dict:
+    # median run for time(one slow or fast process does not move the baseline), largest run for memory
+    return {
+        "construct_seconds":  round(statistics.median(sample[0] for sample in samples), 4),
+        "construct_peak_kib": round(max(sample[1] for sample in samples), 1),
+        "synth_seconds":      round(statistics.median(sample[2] for sample in samples), 4),
+        "synth_peak_kib":     round(max(sample[3] for sample in samples), 1),
+    }
+
+
+def worker(target: str) -> None:
+    project, name = target.split(":", 1)
+    project_dir = os.path.join(ROOT, project)
+    # stacks open their input files(userdata, policy json, lambda source) relative to the project
+    os.chdir(project_dir)
+    sys.path.insert(0, project_dir)
+    # tools/ is shared by every project of the repository
+    sys.path.append(ROOT)
+    if project == "services":
+        result = run_services_target(name, project_dir)
+    elif project == "cfn-services":
+        result = run_cfn_target(name, project_dir)
+    else:
+        raise ValueError(f"unknown project '{project}'")
+    print(RESULT_MARK + json.dumps(result), flush=True)
+
+
+def list_targets() -> list:
+    services_dir = os.path.join(ROOT, "services")
+    sys.path.insert(0, services_dir)
+    cwd = os.getcwd()
+    os.chdir(services_dir)
+    try:
+        registry = runpy.run_path(os.path.join(services_dir, "app.py"), run_name="benchmark")["registry"]
+    finally:
+        os.chdir(cwd)
+    with open(CFN_REGIONS_FILE) as file:
+        regions = json.load(file)["regions"]
+    return [ f"services:{name}" for name in registry.specs ] + \
+           [ f"cfn-services:{region['name']}" for region in regions ]
+
+
+'''
+    Driver side
+'''
+def run_once(python: str, target: str) -> tuple:
+    completed = subprocess.run(
+        [python, os.path.abspath(__file__), "--worker", target],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_MARK):
+            return tuple(json.loads(line[len(RESULT_MARK):]))
+    raise RuntimeError(f"{target} failed:\n{completed.stderr[-4000:]}")
+
+
+def run_target(python: str, target: str, runs: int) -> dict:
+    return summarize([ run_once(python, target) for _ in range(runs) ])
+
+
+def compare(results: dict, baseline: dict, tolerance: float, min_seconds: float, min_kib: float) -> list:
+    '''
+        A metric regresses when it is worse than baseline by more than tolerance(ratio)
+        and by more than the absolute floor, so tiny stacks do not fail on noise.
+    '''
+    regressions = list()
+    for target, metrics in results.items():
+        if target not in baseline:
+            continue
+        for metric, value in metrics.items():
+            base = baseline[target].get(metric)
+            if base is None:
+                continue
+            floor = min_seconds if metric.endswith("_seconds") else min_kib
+            if value > base * (1 + tolerance) and value - base > floor:
+                regressions.append(f"{target} {metric}: {value} > baseline {base}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CDK synthesis benchmark")
+    parser.add_argument("targets", nargs="*", help="project:name, e.g. services:eks cfn-services:usdev(default: all)")
+    parser.add_argument("--python", default=sys.executable, help="interpreter with aws-cdk-lib installed")
+    parser.add_argument("--project-python", action="append", default=[], metavar="PROJECT=PYTHON",
+                        help="interpreter for one project(cfn-services pins a different aws-cdk-lib)")
+    parser.add_argument("--runs", type=int, default=5, help="fresh processes per target, the median time is kept")
+    parser.add_argument("--output", default=None, help="write results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed ratio over baseline")
+    parser.add_argument("--min-seconds", type=float, default=0.05, help="ignore time regressions below this")
+    parser.add_argument("--min-kib", type=float, default=512, help="ignore memory regressions below this")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.worker)
+        return 0
+
+    os.environ.setdefault("JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION", "1")
+    pythons = dict(item.split("=", 1) for item in args.project_python)
+    targets = args.targets or list_targets()
+    results = dict()
+    for target in targets:
+        python = pythons.get(target.split(":", 1)[0], args.python)
+        results[target] = run_target(python, target, args.runs)
+        metrics = results[target]
+        print(f"{target:32} construct {metrics['construct_seconds']:8.4f}s {metrics['construct_peak_kib']:10.1f}KiB"
+              f"  synth {metrics['synth_seconds']:8.4f}s {metrics['synth_peak_kib']:10.1f}KiB")
+
+    document = { "python": sys.version.split()[0], "runs": args.runs, "results": results }
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(document, file, indent=2, sort_keys=True)
+
+    if args.update_baseline:
+        baseline = dict()
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                baseline = json.load(file)["results"]
+        baseline.update(results)
+        document["results"] = baseline
+        with open(args.baseline, "w") as file:
+            json.dump(document, file, indent=2, sort_keys=True)
+            file.write("\n")
+        print(f"baseline updated: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"no baseline at {args.baseline}, run with --update-baseline")
+        return 0
+    with open(args.baseline) as file:
+        baseline = json.load(file)["results"]
+    regressions = compare(results, baseline, args.tolerance, args.min_seconds, args.min_kib)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,25 @@
 #!/usr/bin/env python3
+# Startup profiler(--profile-startup), it must be created before the CDK import to time it.
+# tools/ is shared by every project of the repository
+import os
+import sys
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPOSITORY_DIR not in sys.path:
+    sys.path.append(REPOSITORY_DIR)
+from tools.startup import StartupProfiler
+profiler = StartupProfiler()
+
 from aws_cdk import (
     App, Environment
 )
-import usdev
 
 # CDK App
 app = App()
 
 # Stacks per vpc
-usdev.StackSet(app, "usdev", Environment(region="us-east-1"))
+# StackSet packages are imported lazily by profiler.load()
+profiler.load("usdev:StackSet")(app, "usdev", Environment(region="us-east-1"), profiler)
 
 # Synthesize
-app.synth()
+profiler.construct("app.synth", app.synth)
+profiler.report()
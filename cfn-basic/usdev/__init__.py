@@ -1,12 +1,13 @@
 
-# Import service stack modules
-from usdev.vpc import VPCStack
+# Service stack modules are imported lazily by profiler.load() right before construction.
+from tools.startup import StartupProfiler
 
 
 class StackSet:
 
-    def __init__(self, app, construct_prefix, environment):
-        self.vpcStack = VPCStack(
+    def __init__(self, app, construct_prefix, environment, profiler=None):
+        profiler = profiler or StartupProfiler(enabled=False)
+        self.vpcStack = profiler.construct(f"{construct_prefix}--vpc", profiler.load("usdev.vpc:VPCStack"),
             scope        = app,
             env          = environment,
             construct_id = f"{construct_prefix}--vpc")
\ No newline at end of file
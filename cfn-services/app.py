@@ -1,18 +1,37 @@
 #!/usr/bin/env python3
-from aws_cdk import (
-    App, Environment
-)
-import usdev
-import apdev
-import uswsi
+# Startup profiler(--profile-startup), it must be created before the CDK import to time it.
+# tools/ is shared by every project of the repository
+import os
+import sys
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPOSITORY_DIR not in sys.path:
+    sys.path.append(REPOSITORY_DIR)
+from tools.startup import StartupProfiler
+profiler = StartupProfiler()
 
-# CDK App
-app = App()
+from parallel_synth import parallel_workers, synth_parallel
+from regions import load_spec
 
-# Stacks per vpc
-usdev.StackSet(app, "usdev", Environment(region="us-east-1"))
-uswsi.StackSet(app, "uswsi", Environment(region="us-east-1"))
-apdev.StackSet(app, "apdev", Environment(region="ap-northeast-2"))
+# Stacks per vpc, declared in regions.json
+REGIONS = load_spec()
 
-# Synthesize
-app.synth()
+# Worker processes of parallel_synth.py import this module again, they must not synthesize it.
+if __name__ == "__main__":
+    workers = parallel_workers(REGIONS)
+    if workers:
+        synth_parallel(REGIONS, workers, profiler)
+    else:
+        from aws_cdk import (
+            App, Environment
+        )
+        from regions import StackSet
+
+        # CDK App
+        app = App()
+
+        for region in REGIONS:
+            profiler.construct(region.name, StackSet, app, region, Environment(region=region.region), profiler)
+
+        # Synthesize
+        profiler.construct("app.synth", app.synth)
+    profiler.report()
@@ -0,0 +1,74 @@
+'''
+    Parallel synth
+    Regions(regions.json) share nothing, so the StackSet of each one is synthesized by its own
+    worker process with its own App, and the outputs are merged into one cloud assembly.
+
+    Enable with context:
+        cdk synth -c parallel-synth=true      # one worker per cpu
+        cdk synth -c parallel-synth=2         # at most 2 workers
+
+    Workers are started with "spawn", a forked jsii kernel can not be shared.
+    The parent process does not import aws_cdk at all.
+'''
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+from tools.assembly import merge_assemblies
+from tools.startup import StartupProfiler
+
+CONTEXT_KEY = "parallel-synth"
+
+
+def _context() -> dict:
+    # Same context the cdk CLI passes to the App.
+    return json.loads(os.environ.get("CDK_CONTEXT_JSON", "{}"))
+
+
+def parallel_workers(regions: list) -> int:
+    '''
+        Number of workers requested by the "parallel-synth" context, 0 if disabled.
+    '''
+    value = _context().get(CONTEXT_KEY)
+    if value in (None, False, "", "false", "0", 0):
+        return 0
+    if value in (True, "true"):
+        value = os.cpu_count() or 1
+    return max(1, min(int(value), len(regions)))
+
+
+def _synth_stack_set(args: tuple) -> dict:
+    '''
+        Worker: builds the StackSet of one region in its own App and synthesizes it to outdir.
+    '''
+    name, outdir, profile = args
+    profiler = StartupProfiler(enabled=profile)
+    from aws_cdk import App, Environment
+    from regions import StackSet, get_region
+    app    = App(outdir=outdir)
+    region = get_region(name)
+    StackSet(app, region, Environment(region=region.region), profiler)
+    profiler.construct(f"{name}--synth", app.synth)
+    return { "load_times": profiler.load_times, "stack_times": profiler.stack_times }
+
+
+def synth_parallel(regions: list, workers: int, profiler: StartupProfiler = None) -> None:
+    '''
+        regions: RegionSpec list(regions.load_spec())
+    '''
+    profiler = profiler or StartupProfiler(enabled=False)
+    outdir   = os.environ.get("CDK_OUTDIR", "cdk.out")
+    os.makedirs(outdir, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".parallel-", dir=outdir) as staging:
+        parts = [ os.path.join(staging, region.name) for region in regions ]
+        jobs  = [ (region.name, part, profiler.enabled) for region, part in zip(regions, parts) ]
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes=workers) as pool:
+            results = profiler.construct("parallel.workers", pool.map, _synth_stack_set, jobs, 1)
+        for result in results:
+            profiler.load_times.extend(result["load_times"])
+            profiler.stack_times.extend(result["stack_times"])
+        profiler.construct("parallel.merge", merge_assemblies, parts, outdir, "StackSet")
+    print(f"parallel-synth: {len(regions)} region(s), {workers} worker(s)", file=sys.stderr)
@@ -0,0 +1,219 @@
+'''
+    Region fan-out
+    Every vpc(region) is declared in regions.json and compiled by regions.vpc:RegionVPCStack,
+    a new region is one more entry in that file.
+
+    regions.json
+        defaults: azs(suffixes), subnet_prefix and tiers, a region entry can override each of them,
+                  pool(vpc cidrs of regions without a cidr, default 10.0.0.0/8), vpc_prefix(default 16),
+                  secondary_pool(secondary cidrs, default 100.64.0.0/10)
+        tiers:    name, tag(used in Name tags), offset(index of the first subnet of the tier
+                  in the vpc cidr, one subnet per az), public(route to the internet gateway),
+                  nat(route to the nat gateway of the same az, one route table per az)
+                  a tier without offset is sized(ipam.py) from the addresses of one subnet:
+                  hosts(ENIs) or pods({ "nodes": per az, "enis": per node, "addresses_per_eni" }),
+                  plus SUBNET_HEADROOM, and placed in the first free block after the offset tiers;
+                  secondary(subnets in the secondary cidr of the vpc, e.g. pods of the VPC CNI)
+                  a region can also list default tiers by name: "tiers": ["public", "private"]
+        regions:  name, region, cidr(allocated from the pool when missing), secondary_cidr(allocated
+                  from the secondary pool when a tier is secondary), vpc_name(default: upper case name)
+                  services(StackSet package built on top of the vpc, e.g. "usdev")
+                  endpoints(interface endpoint presets of vpc_endpoints.py, e.g. ["asg"])
+                  and nat(topology mode of nat_topology.py: "per-az"(default), "single", "instance")
+    Region names must be unique and vpc cidrs must not overlap. Declared cidrs are reserved first,
+    allocated cidrs follow in file order: write an allocated cidr into the file once it is deployed,
+    so declaring another region cannot move it.
+
+    This module does not import aws_cdk, parallel_synth.py reads the spec in the parent process.
+'''
+import functools
+import ipaddress
+import json
+import os
+
+from tools.startup import StartupProfiler
+from tools.ipam import SECONDARY_POOL, CidrPool, pod_addresses, prefix_for_hosts
+from tools.vpc_endpoints import parse_presets
+from tools.nat_topology import parse_mode
+
+SPEC_FILE       = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "regions.json")
+DEFAULT_POOL    = "10.0.0.0/8"
+VPC_PREFIX      = 16
+SUBNET_HEADROOM = 0.25
+
+
+class Tier:
+    def __init__(self, name: str, tag: str, offset: int = None, public: bool = False, nat: bool = False,
+                 hosts: int = None, pods: dict = None, secondary: bool = False) -> None:
+        self.name      = name
+        self.tag       = tag
+        self.offset    = offset
+        self.public    = public
+        self.nat       = nat
+        self.secondary = secondary
+        self.hosts     = pod_addresses(**pods) if pods else hosts
+        if (offset is None) == (self.hosts is None):
+            raise ValueError(f"tier '{name}' needs either an offset or hosts/pods")
+        if secondary and offset is not None:
+            raise ValueError(f"secondary tier '{name}' is sized from hosts/pods, not an offset")
+
+    @property
+    def prefix(self) -> int:
+        # None: subnet_prefix of the region
+        return None if self.hosts is None else prefix_for_hosts(self.hosts, SUBNET_HEADROOM)
+
+
+class RegionSpec:
+    def __init__(self, name: str, region: str, cidr: str, azs: list, subnet_prefix: int, tiers: list,
+                 vpc_name: str = None, services: str = None, endpoints: list = None,
+                 nat: str = None, secondary_cidr: str = None) -> None:
+        self.name           = name
+        self.region         = region
+        self.cidr           = cidr
+        self.secondary_cidr = secondary_cidr
+        self.azs            = tuple(azs)
+        self.subnet_prefix  = subnet_prefix
+        self.tiers          = [ tier if isinstance(tier, Tier) else Tier(**tier) for tier in tiers ]
+        self.vpc_name       = vpc_name or name.upper()
+        self.services       = services
+        self.endpoints      = parse_presets(endpoints)
+        self.nat            = parse_mode(nat)
+        if self.secondary_tiers and not secondary_cidr:
+            raise ValueError(f"region '{name}' has secondary tiers but no secondary_cidr")
+
+    @property
+    def secondary_tiers(self) -> list:
+        return [ tier for tier in self.tiers if tier.secondary ]
+
+    @property
+    def availability_zones(self) -> tuple:
+        return availability_zones(self.region, self.azs)
+
+    @property
+    def subnet_cidrs(self) -> dict:
+        '''
+            { "public-a": "10.10.1.0/24", ... } in tier order, then az order.
+        '''
+        tiers = tuple((tier.offset, tier.prefix, tier.secondary) for tier in self.tiers)
+        cidrs = tier_cidrs(self.cidr, self.secondary_cidr, self.subnet_prefix, tiers, len(self.azs))
+        plan  = dict()
+        for tier, cidrs_of_tier in zip(self.tiers, cidrs):
+            for az, cidr in zip(self.azs, cidrs_of_tier):
+                plan[f"{tier.name}-{az}"] = cidr
+        return plan
+
+
+'''
+    CIDR plans and AZ maps are pure functions of the spec, each is computed once per process.
+'''
+@functools.lru_cache(maxsize=None)
+def subnet_cidrs(cidr: str, prefix: int, offsets: tuple, az_count: int) -> tuple:
+    network = ipaddress.ip_network(cidr)
+    if prefix < network.prefixlen:
+        raise ValueError(f"subnet prefix /{prefix} is larger than vpc {cidr}")
+    capacity = 2 ** (prefix - network.prefixlen)
+    plan = list()
+    for offset in offsets:
+        if offset + az_count > capacity:
+            raise ValueError(f"subnets {offset}..{offset + az_count - 1} do not fit in {cidr} as /{prefix}")
+        first = int(network.network_address) + offset * 2 ** (network.max_prefixlen - prefix)
+        plan.append(tuple(
+            str(ipaddress.ip_network((first + index * 2 ** (network.max_prefixlen - prefix), prefix)))
+            for index in range(az_count)
+        ))
+    used = [ cidr for tier in plan for cidr in tier ]
+    if len(set(used)) != len(used):
+        raise ValueError(f"subnet tiers of {cidr} overlap: offsets {offsets}")
+    return tuple(plan)
+
+
+@functools.lru_cache(maxsize=None)
+def tier_cidrs(cidr: str, secondary_cidr: str, subnet_prefix: int, tiers: tuple, az_count: int) -> tuple:
+    '''
+        Subnet cidrs of every tier, tiers are (offset, prefix, secondary): offset tiers are placed
+        by subnet_cidrs, the others get the first free /prefix of the vpc(or secondary) cidr per az.
+    '''
+    offset_tiers = [ offset for offset, _, _ in tiers if offset is not None ]
+    placed       = iter(subnet_cidrs(cidr, subnet_prefix, tuple(offset_tiers), az_count))
+    pools        = { False: CidrPool(cidr), True: CidrPool(secondary_cidr) if secondary_cidr else None }
+    plan         = list()
+    for offset, _, _ in tiers:
+        plan.append(next(placed) if offset is not None else None)
+    for cidrs in plan:
+        for subnet in cidrs or ():
+            pools[False].reserve(subnet)
+    for index, (offset, prefix, secondary) in enumerate(tiers):
+        if offset is None:
+            plan[index] = tuple(str(pools[secondary].allocate(prefix)) for _ in range(az_count))
+    return tuple(plan)
+
+
+@functools.lru_cache(maxsize=None)
+def availability_zones(region: str, suffixes: tuple) -> tuple:
+    return tuple(f"{region}{suffix}" for suffix in suffixes)
+
+
+@functools.lru_cache(maxsize=None)
+def load_spec(path: str = SPEC_FILE) -> tuple:
+    '''
+        Returns the RegionSpec of every region in the file, in file order.
+    '''
+    with open(path) as file:
+        document = json.load(file)
+    defaults = dict(document.get("defaults", dict()))
+    pools    = {
+        "cidr":           CidrPool(defaults.pop("pool", DEFAULT_POOL)),
+        "secondary_cidr": CidrPool(defaults.pop("secondary_pool", SECONDARY_POOL)),
+    }
+    prefix   = defaults.pop("vpc_prefix", VPC_PREFIX)
+    tiers    = { tier["name"]: tier for tier in defaults.get("tiers", list()) }
+    entries  = list()
+    for entry in document["regions"]:
+        values = dict(defaults)
+        values.update(entry)
+        # a region can list default tiers by name
+        values["tiers"] = [ tiers[tier] if isinstance(tier, str) else tier for tier in values["tiers"] ]
+        entries.append(values)
+    names = [ values["name"] for values in entries ]
+    for name in names:
+        if names.count(name) > 1:
+            raise ValueError(f"region '{name}' is declared more than once in {path}")
+    # declared cidrs first, every cidr once in the address space(overlaps raise ValueError)
+    declared = CidrPool("0.0.0.0/0")
+    for values in entries:
+        for key, pool in pools.items():
+            if values.get(key):
+                declared.reserve(values[key], values["name"])
+                if ipaddress.ip_network(values[key]).subnet_of(pool.network):
+                    pool.reserve(values[key], values["name"])
+    for values in entries:
+        secondary = any(tier.get("secondary") for tier in values["tiers"])
+        for key, needed in (("cidr", True), ("secondary_cidr", secondary)):
+            if needed and not values.get(key):
+                values[key] = str(declared.reserve(pools[key].allocate(prefix, values["name"]), values["name"]))
+    regions = [ RegionSpec(**values) for values in entries ]
+    return tuple(regions)
+
+
+def get_region(name: str, path: str = SPEC_FILE) -> RegionSpec:
+    for region in load_spec(path):
+        if region.name == name:
+            return region
+    raise KeyError(f"region '{name}' is not declared in {path}")
+
+
+class StackSet:
+    '''
+        VPC stack of the region and, if the region declares services, the service StackSet on top of it.
+    '''
+    def __init__(self, app, region: RegionSpec, environment, profiler=None):
+        profiler = profiler or StartupProfiler(enabled=False)
+        self.vpcStack = profiler.construct(f"{region.name}--vpc", profiler.load("regions.vpc:RegionVPCStack"),
+            scope        = app,
+            env          = environment,
+            construct_id = f"{region.name}--vpc",
+            region_spec  = region)
+        self.services = None
+        if region.services:
+            self.services = profiler.load(f"{region.services}:StackSet")(
+                app, region.name, environment, self.vpcStack, profiler)
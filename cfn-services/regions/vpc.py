@@ -0,0 +1,165 @@
+from constructs import Construct
+from aws_cdk import (
+    Stack,
+    Annotations,
+    CfnTag,
+    Fn,
+    aws_ec2
+)
+from tools.nat_topology import NAT_INSTANCE_TYPE, NAT_INSTANCE_USERDATA, egress_zones
+
+# Amazon Linux 2, resolved at deploy time(no AMI lookup at synth)
+NAT_INSTANCE_IMAGE = "{{resolve:ssm:/aws/service/ami-amazon-linux-latest/amzn2-ami-hvm-x86_64-gp2}}"
+
+
+def _title(name: str) -> str:
+    # "private-a" -> "PrivateA", used in logical ids
+    return "".join(part.capitalize() for part in name.split("-"))
+
+
+class RegionVPCStack(Stack):
+    '''
+        Compiles a RegionSpec(regions/__init__.py) into vpc, subnets, internet gateway,
+        nat gateways(or nat instances), route tables, routes and subnet associations.
+        Every nat tier has a route table per az, spec.nat(nat_topology.py) decides which NAT it routes to,
+        a route to the NAT of another az is reported as a synth warning.
+        Logical ids are the ones of the former per-region VPCStack packages.
+    '''
+    def __init__(self, scope: Construct, construct_id: str, region_spec, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+        spec      = region_spec
+        self.spec = spec
+        prefix    = spec.name
+        zones     = dict(zip(spec.azs, spec.availability_zones))
+        cidrs     = spec.subnet_cidrs
+
+        # vpc
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnVPC.html
+        self.vpc = aws_ec2.CfnVPC(self, "vpc",
+            cidr_block=spec.cidr,
+            enable_dns_hostnames=True,
+            enable_dns_support=True,
+            instance_tenancy="default", # "default", "dedicated"
+            tags=[ CfnTag(key="Name", value=spec.vpc_name) ])
+
+        # secondary cidr(subnets of secondary tiers, e.g. pods)
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnVPCCidrBlock.html
+        secondary_cidr = None
+        if spec.secondary_cidr:
+            secondary_cidr = aws_ec2.CfnVPCCidrBlock(self, "VpcSecondaryCidr",
+                vpc_id=self.vpc.ref,
+                cidr_block=spec.secondary_cidr)
+
+        # subnet
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnSubnet.html
+        self.subnets = dict()
+        for tier in spec.tiers:
+            for az in spec.azs:
+                key = f"{tier.name}-{az}"
+                self.subnets[key] = aws_ec2.CfnSubnet(self, f"subnet-{key}",
+                    vpc_id=self.vpc.ref,
+                    cidr_block=cidrs[key],
+                    availability_zone=zones[az],
+                    map_public_ip_on_launch=tier.public,
+                    tags=[ CfnTag(key="Name", value=f"{prefix}-{tier.tag}-{az}") ])
+                if tier.secondary:
+                    self.subnets[key].add_depends_on(secondary_cidr)
+
+        # internet gateway
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnInternetGateway.html
+        public_tiers = [ tier for tier in spec.tiers if tier.public ]
+        nat_tiers    = [ tier for tier in spec.tiers if tier.nat ]
+        internet_gateway = None
+        if public_tiers:
+            internet_gateway = aws_ec2.CfnInternetGateway(self, "InternetGateway",
+                tags=[ CfnTag(key="Name", value=f"{prefix}-igw") ])
+            aws_ec2.CfnVPCGatewayAttachment(self, "InternetGatewayAttachment",
+                vpc_id=self.vpc.ref,
+                internet_gateway_id=internet_gateway.ref)
+
+        # eip, nat gateway(in the first public tier, one per az or one in the first az) or nat instance(one per az)
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnEIP.html
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnNatGateway.html
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnInstance.html
+        egress       = egress_zones(spec.nat, spec.azs)
+        nat_gateways = dict()
+        nat_route    = dict()     # az of the nat -> route target
+        if nat_tiers:
+            if not public_tiers:
+                raise ValueError(f"region '{spec.name}' has nat tiers but no public tier")
+            nat_azs = [ az for az in spec.azs if az in egress.values() ]
+            if spec.nat == "instance":
+                nat_security_group = aws_ec2.CfnSecurityGroup(self, "NatInstanceSecurityGroup",
+                    group_description="NAT instances, all traffic from the vpc",
+                    vpc_id=self.vpc.ref,
+                    security_group_ingress=[
+                        aws_ec2.CfnSecurityGroup.IngressProperty(ip_protocol="-1", cidr_ip=spec.cidr)
+                    ],
+                    tags=[ CfnTag(key="Name", value=f"{prefix}-nat-sg") ])
+                for az in nat_azs:
+                    instance = aws_ec2.CfnInstance(self, f"NatInstance{az.upper()}",
+                        image_id=NAT_INSTANCE_IMAGE,
+                        instance_type=NAT_INSTANCE_TYPE,
+                        subnet_id=self.subnets[f"{public_tiers[0].name}-{az}"].ref,
+                        security_group_ids=[ nat_security_group.ref ],
+                        source_dest_check=False,
+                        user_data=Fn.base64(NAT_INSTANCE_USERDATA),
+                        tags=[ CfnTag(key="Name", value=f"{prefix}-nat-{az}") ])
+                    nat_route[az] = { "instance_id": instance.ref }
+            else:
+                eip = dict()
+                for az in nat_azs:
+                    eip[az] = aws_ec2.CfnEIP(self, f"EipNatGateway{az.upper()}",
+                        tags=[ CfnTag(key="Name", value=f"{prefix}-natgw-{az}-eip") ])
+                for az in nat_azs:
+                    nat_gateways[az] = aws_ec2.CfnNatGateway(self, f"NatGateway{az.upper()}",
+                        subnet_id=self.subnets[f"{public_tiers[0].name}-{az}"].ref,
+                        allocation_id=eip[az].attr_allocation_id,
+                        tags=[ CfnTag(key="Name", value=f"{prefix}-natgw-{az}") ])
+                    nat_route[az] = { "nat_gateway_id": nat_gateways[az].ref }
+
+        # route table(one per az for nat tiers, one per tier otherwise)
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnRouteTable.html
+        self.route_tables = dict()
+        subnet_route_table = dict()
+        for tier in spec.tiers:
+            if tier.nat:
+                for az in spec.azs:
+                    key = f"{tier.name}-{az}"
+                    self.route_tables[key] = aws_ec2.CfnRouteTable(self, f"RoutTable{_title(key)}",
+                        vpc_id=self.vpc.ref,
+                        tags=[ CfnTag(key="Name", value=f"{prefix}-{tier.tag}-{az}-rt") ])
+                    subnet_route_table[key] = key
+            else:
+                self.route_tables[tier.name] = aws_ec2.CfnRouteTable(self, f"RoutTable{_title(tier.name)}",
+                    vpc_id=self.vpc.ref,
+                    tags=[ CfnTag(key="Name", value=f"{prefix}-{tier.tag}-rt") ])
+                for az in spec.azs:
+                    subnet_route_table[f"{tier.name}-{az}"] = tier.name
+
+        # route
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnRoute.html
+        for tier in public_tiers:
+            aws_ec2.CfnRoute(self, f"RouteDefault{_title(tier.name)}",
+                route_table_id=self.route_tables[tier.name].ref,
+                destination_cidr_block="0.0.0.0/0",
+                gateway_id=internet_gateway.ref)
+        for tier in nat_tiers:
+            for az in spec.azs:
+                key = f"{tier.name}-{az}"
+                route = aws_ec2.CfnRoute(self, f"RouteDefault{_title(key)}",
+                    route_table_id=self.route_tables[key].ref,
+                    destination_cidr_block="0.0.0.0/0",
+                    **nat_route[egress[az]])
+                if egress[az] != az:
+                    Annotations.of(route).add_warning(
+                        f"egress of {key} crosses to the NAT in az {egress[az]}(nat: {spec.nat}), "
+                        "inter-AZ latency and data charges")
+
+        # subnet route table association
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnSubnetRouteTableAssociation.html
+        for key, subnet in self.subnets.items():
+            aws_ec2.CfnSubnetRouteTableAssociation(self,
+                f"SubnetRouteTableAssociation{_title(key)}",
+                route_table_id=self.route_tables[subnet_route_table[key]].ref,
+                subnet_id=subnet.ref)
@@ -1,56 +1,44 @@
 
-# Import service stack modules
-from usdev.vpc import VPCStack
-from usdev.vpc.private_link import PrivateLinkStack
-from usdev.security.security_group import SecurityGroupStack
-from usdev.ec2.instance import EC2InstanceStack
-from usdev.ec2.auto_scaling_group import AutoScalingGroupStack
-from usdev.elbv2 import ElasticLoadBalancerStack
-from usdev.security.nacl import NaclStack
-from usdev.route53 import Route53Stack
-from usdev.cloudfront import CloudfrontStack
-from usdev._lambda import LambdaStack
-from usdev.apigateway import ApiGatewayStack
-from usdev.efs import EFSStack
-from usdev.s3 import S3Stack
+# Service stack modules are imported lazily by profiler.load() right before construction.
+from tools.startup import StartupProfiler
 
 class StackSet:
 
-    def __init__(self, app, construct_prefix, environment):
-        self.vpcStack = VPCStack(
-            scope        = app,
-            env          = environment,
-            construct_id = f"{construct_prefix}--vpc")
+    def __init__(self, app, construct_prefix, environment, vpc_stack, profiler=None):
+        # vpc_stack is compiled from regions.json(regions.vpc:RegionVPCStack)
+        profiler = profiler or StartupProfiler(enabled=False)
+        self.vpcStack = vpc_stack
 
-        self.route53Stack = Route53Stack(
+        self.route53Stack = profiler.construct(f"{construct_prefix}--route53", profiler.load("usdev.route53:Route53Stack"),
             scope        = app,
             env          = environment,
             construct_id = f"{construct_prefix}--route53",
             vpc          = self.vpcStack.vpc)
 
-        self.securityGroupStack = SecurityGroupStack(
+        self.securityGroupStack = profiler.construct(f"{construct_prefix}--security-group", profiler.load("usdev.security.security_group:SecurityGroupStack"),
             scope        = app,
             env          = environment,
             construct_id = f"{construct_prefix}--security-group",
             vpc          = self.vpcStack.vpc)
         
-        self.naclStack = NaclStack(
+        self.naclStack = profiler.construct(f"{construct_prefix}--nacl", profiler.load("usdev.security.nacl:NaclStack"),
             scope        = app,
             env          = environment,
             construct_id = f"{construct_prefix}--nacl",
             vpc          = self.vpcStack.vpc,
             subnets      = self.vpcStack.subnets,)
 
-        self.privateLinkStack = PrivateLinkStack(
+        self.privateLinkStack = profiler.construct(f"{construct_prefix}--private-link", profiler.load("usdev.vpc.private_link:PrivateLinkStack"),
             scope           = app,
             env             = environment,
             construct_id    = f"{construct_prefix}--private-link",
             vpc             = self.vpcStack.vpc,
             subnets         = self.vpcStack.subnets,
             route_tables    = self.vpcStack.route_tables,
-            security_groups = self.securityGroupStack.security_groups,)
+            security_groups = self.securityGroupStack.security_groups,
+            region_spec     = self.vpcStack.spec,)
 
-        self.elasticLoadBalancerStack = ElasticLoadBalancerStack(
+        self.elasticLoadBalancerStack = profiler.construct(f"{construct_prefix}--elbv2", profiler.load("usdev.elbv2:ElasticLoadBalancerStack"),
             scope           = app,
             env             = environment,
             construct_id    = f"{construct_prefix}--elbv2",
@@ -58,14 +46,14 @@ class StackSet:
             subnets         = self.vpcStack.subnets,
             security_groups = self.securityGroupStack.security_groups,)
 
-        self.ec2InstanceStack = EC2InstanceStack(
+        self.ec2InstanceStack = profiler.construct(f"{construct_prefix}--ec2-instance", profiler.load("usdev.ec2.instance:EC2InstanceStack"),
             scope           = app,
             env             = environment,
             construct_id    = f"{construct_prefix}--ec2-instance",
             subnets         = self.vpcStack.subnets,
             security_groups = self.securityGroupStack.security_groups,)
 
-        self.autoScalingGroupStack = AutoScalingGroupStack(
+        self.autoScalingGroupStack = profiler.construct(f"{construct_prefix}--ec2-asg", profiler.load("usdev.ec2.auto_scaling_group:AutoScalingGroupStack"),
             scope           = app,
             env             = environment,
             construct_id    = f"{construct_prefix}--ec2-asg",
@@ -73,30 +61,30 @@ class StackSet:
             security_groups = self.securityGroupStack.security_groups,
             target_groups   = self.elasticLoadBalancerStack.target_groups,)
         
-        self.cloudfrontStack = CloudfrontStack(
+        self.cloudfrontStack = profiler.construct(f"{construct_prefix}--cloudfront", profiler.load("usdev.cloudfront:CloudfrontStack"),
             scope        = app,
             env          = environment,
             construct_id = f"{construct_prefix}--cloudfront",
             elb          = self.elasticLoadBalancerStack.elb,)
 
-        self.lambdaStack = LambdaStack(
+        self.lambdaStack = profiler.construct(f"{construct_prefix}--lambda", profiler.load("usdev._lambda:LambdaStack"),
             scope        = app,
             env          = environment,
             construct_id = f"{construct_prefix}--lambda",)
         
-        self.apiGatewayStack = ApiGatewayStack(
+        self.apiGatewayStack = profiler.construct(f"{construct_prefix}--api-gateway", profiler.load("usdev.apigateway:ApiGatewayStack"),
             scope        = app,
             env          = environment,
             construct_id = f"{construct_prefix}--api-gateway",)
             
-        self.efsStack = EFSStack(
+        self.efsStack = profiler.construct(f"{construct_prefix}--efs", profiler.load("usdev.efs:EFSStack"),
             scope           = app,
             env             = environment,
             construct_id    = f"{construct_prefix}--efs",
             security_groups = self.securityGroupStack.security_groups,
             subnets         = self.vpcStack.subnets,)
         
-        self.s3Stack = S3Stack(
+        self.s3Stack = profiler.construct(f"{construct_prefix}--s3", profiler.load("usdev.s3:S3Stack"),
             scope           = app,
             env             = environment,
             construct_id    = f"{construct_prefix}--s3",)
\ No newline at end of file
@@ -1,14 +1,24 @@
+import json
+import os
+
 from constructs import Construct
 from aws_cdk import (
     Stack,
     CfnTag,
     aws_ec2
 )
+from tools.nacl_compiler import PORTED, compile_acl
+
+# Rule spec of the NACLs, compiled by nacl_compiler.py(merged, ordered by weight, numbered, checked against its flows)
+RULES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nacl.json")
+NAMES      = { "any": [ "0.0.0.0/0" ] }
 
 class NaclStack(Stack):
 
     def __init__(self, scope: Construct, construct_id: str, vpc, subnets, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
+        with open(RULES_FILE) as file:
+            rules = json.load(file)
 
         # NACL
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnNetworkAcl.html
@@ -24,90 +34,23 @@ class NaclStack(Stack):
 
         # NACL Entry
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnNetworkAclEntry.html
-        aws_ec2.CfnNetworkAclEntry(self, "nacl-public-i1",
-            network_acl_id=nacl["public"].ref,
-            egress=False,
-            rule_number=10,
-            cidr_block="0.0.0.0/0",
-            protocol=6, # -1 (all) , 1 (ICMP) , 6 (TCP) , 17 (UDP) ...
-            port_range=aws_ec2.CfnNetworkAclEntry.PortRangeProperty(
-                from_=80,
-                to=80),
-            rule_action="allow", # allow , deny
-            icmp=None,
-            ipv6_cidr_block=None,)
-        aws_ec2.CfnNetworkAclEntry(self, "nacl-public-i2",
-            network_acl_id=nacl["public"].ref,
-            egress=False,
-            rule_number=20,
-            cidr_block="0.0.0.0/0",
-            protocol=6, # -1 (all) , 1 (ICMP) , 6 (TCP) , 17 (UDP) ...
-            port_range=aws_ec2.CfnNetworkAclEntry.PortRangeProperty(
-                from_=22,
-                to=22),
-            rule_action="allow", # allow , deny
-            icmp=None,
-            ipv6_cidr_block=None,)
-        aws_ec2.CfnNetworkAclEntry(self, "nacl-public-i3",
-            network_acl_id=nacl["public"].ref,
-            egress=False,
-            rule_number=30,
-            cidr_block="0.0.0.0/0",
-            protocol=6, # -1 (all) , 1 (ICMP) , 6 (TCP) , 17 (UDP) ...
-            port_range=aws_ec2.CfnNetworkAclEntry.PortRangeProperty(
-                from_=1024,
-                to=65535),
-            rule_action="allow", # allow , deny
-            icmp=None,
-            ipv6_cidr_block=None,)
-        aws_ec2.CfnNetworkAclEntry(self, "nacl-public-i4",
-            network_acl_id=nacl["public"].ref,
-            egress=False,
-            rule_number=40,
-            cidr_block="0.0.0.0/0",
-            protocol=1, # -1 (all) , 1 (ICMP) , 6 (TCP) , 17 (UDP) ...
-            rule_action="allow", # allow , deny
-            icmp=aws_ec2.CfnNetworkAclEntry.IcmpProperty(
-                # 0 (echo-reply) , 8 (echo) , 11 (TimeExceeded - traceroute reply)
-                # 3 (Destination unreachable - traceroute-reply) , 30 (traceroute)
-                type=0,
-                code=-1,),
-            ipv6_cidr_block=None,)
-        aws_ec2.CfnNetworkAclEntry(self, "nacl-public-i5",
-            network_acl_id=nacl["public"].ref,
-            egress=False,
-            rule_number=50,
-            cidr_block="0.0.0.0/0",
-            protocol=1, # -1 (all) , 1 (ICMP) , 6 (TCP) , 17 (UDP) ...
-            rule_action="allow", # allow , deny
-            icmp=aws_ec2.CfnNetworkAclEntry.IcmpProperty(
-                # 0 (echo-reply) , 8 (echo) , 11 (TimeExceeded - traceroute reply)
-                # 3 (Destination unreachable - traceroute-reply) , 30 (traceroute)
-                type=3,
-                code=-1,),
-            ipv6_cidr_block=None,)
-        aws_ec2.CfnNetworkAclEntry(self, "nacl-public-i6",
-            network_acl_id=nacl["public"].ref,
-            egress=False,
-            rule_number=60,
-            cidr_block="0.0.0.0/0",
-            protocol=1, # -1 (all) , 1 (ICMP) , 6 (TCP) , 17 (UDP) ...
-            rule_action="allow", # allow , deny
-            icmp=aws_ec2.CfnNetworkAclEntry.IcmpProperty(
-                # 0 (echo-reply) , 8 (echo) , 11 (TimeExceeded - traceroute reply)
-                # 3 (Destination unreachable - traceroute-reply) , 30 (traceroute)
-                type=11,
-                code=-1,),
-            ipv6_cidr_block=None,)
-        aws_ec2.CfnNetworkAclEntry(self, "nacl-public-e1",
-            network_acl_id=nacl["public"].ref,
-            egress=True,
-            rule_number=10,
-            cidr_block="0.0.0.0/0",
-            protocol=-1, # -1 (all) , 1 (ICMP) , 6 (TCP) , 17 (UDP) ...
-            rule_action="allow", # allow , deny
-            icmp=None,
-            ipv6_cidr_block=None,)
+        compiled = compile_acl(rules["public"], NAMES, first=10, step=10)
+        for direction, entries in compiled.items():
+            for index, entry in enumerate(entries, start=1):
+                aws_ec2.CfnNetworkAclEntry(self, f"nacl-public-{direction[0]}{index}",
+                    network_acl_id=nacl["public"].ref,
+                    egress=entry.egress,
+                    rule_number=entry.rule_number,
+                    cidr_block=str(entry.cidr),
+                    protocol=entry.protocol, # -1 (all) , 1 (ICMP) , 6 (TCP) , 17 (UDP) ...
+                    port_range=aws_ec2.CfnNetworkAclEntry.PortRangeProperty(
+                        from_=(entry.ports or (0, 65535))[0],
+                        to=(entry.ports or (0, 65535))[1]) if entry.protocol in PORTED else None,
+                    rule_action=entry.action, # allow , deny
+                    icmp=aws_ec2.CfnNetworkAclEntry.IcmpProperty(
+                        type=-1 if entry.icmp_type is None else entry.icmp_type,
+                        code=-1,) if entry.protocol == 1 else None,
+                    ipv6_cidr_block=None,)
         
         # Subnet NACL Association
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnSubnetNetworkAclAssociation.html
@@ -2,31 +2,33 @@
 from constructs import Construct
 from aws_cdk import (
     Stack,
+    CfnTag,
     aws_ec2
 )
+from tools.vpc_endpoints import endpoint_services, logical_name, service_name
 
 class PrivateLinkStack(Stack):
-
+    '''
+        Gateway endpoints(S3, DynamoDB) on every route table and the interface endpoints of
+        region_spec.endpoints(regions.json) with private dns and one shared security group.
+    '''
     def __init__(self, scope: Construct, construct_id: str,  vpc, subnets, 
-                       route_tables, security_groups, **kwargs) -> None:
+                       route_tables, security_groups, region_spec, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
+        spec = region_spec
 
         # vpc endpoint
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnVPCEndpoint.html
         # !! tag is not working !!
         vpc_endpoint = dict()
         vpc_endpoint['dynamodb'] = aws_ec2.CfnVPCEndpoint(self, "VPCEndpointDynamoDB",
-            service_name="com.amazonaws.us-east-1.dynamodb",
+            service_name=service_name(spec.region, "dynamodb"),
             vpc_id=vpc.ref,
             policy_document=None,
-            route_table_ids=[
-                route_tables["public"].ref,
-                route_tables["private-a"].ref,
-                route_tables["private-b"].ref
-            ],
+            route_table_ids=[ route_table.ref for route_table in route_tables.values() ],
             vpc_endpoint_type="Gateway")
         vpc_endpoint['s3'] = aws_ec2.CfnVPCEndpoint(self, "VPCEndpointS3",
-            service_name="com.amazonaws.us-east-1.s3",
+            service_name=service_name(spec.region, "s3"),
             vpc_id=vpc.ref,
             policy_document=None,
             private_dns_enabled=None, # s3 can not support private dns enabled.
@@ -37,4 +39,40 @@ class PrivateLinkStack(Stack):
             security_group_ids=[
                 security_groups["example"].ref,
             ],
-            vpc_endpoint_type="Interface")
\ No newline at end of file
+            vpc_endpoint_type="Interface")
+        # s3 traffic of the subnets goes through the route table entry(no charge), not the interface endpoint
+        vpc_endpoint['s3-gateway'] = aws_ec2.CfnVPCEndpoint(self, "VPCEndpointS3Gateway",
+            service_name=service_name(spec.region, "s3"),
+            vpc_id=vpc.ref,
+            route_table_ids=[ route_table.ref for route_table in route_tables.values() ],
+            vpc_endpoint_type="Gateway")
+
+        services = endpoint_services(spec.endpoints)
+        if not services:
+            return
+        # one security group shared by every interface endpoint, https from the vpc
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnSecurityGroup.html
+        endpoint_security_group = aws_ec2.CfnSecurityGroup(self, "VPCEndpointSecurityGroup",
+            group_description="Interface VPC endpoints",
+            group_name=f"{spec.name}-vpce-sg",
+            vpc_id=vpc.ref,
+            security_group_ingress=[
+                aws_ec2.CfnSecurityGroup.IngressProperty(
+                    ip_protocol="tcp", from_port=443, to_port=443, cidr_ip=spec.cidr,
+                    description="https from the vpc")
+            ],
+            security_group_egress=[
+                aws_ec2.CfnSecurityGroup.EgressProperty(
+                    ip_protocol="-1", cidr_ip="127.0.0.1/32", description="no outbound")
+            ],
+            tags=[ CfnTag(key="Name", value=f"{spec.name}-vpce-sg") ])
+        # one network interface per az in the subnets of the first nat tier
+        tier = next((tier for tier in spec.tiers if tier.nat), spec.tiers[-1])
+        for service in services:
+            vpc_endpoint[service] = aws_ec2.CfnVPCEndpoint(self, f"VPCEndpoint{logical_name(service)}Interface",
+                service_name=service_name(spec.region, service),
+                vpc_id=vpc.ref,
+                private_dns_enabled=True,
+                subnet_ids=[ subnets[f"{tier.name}-{az}"].ref for az in spec.azs ],
+                security_group_ids=[ endpoint_security_group.ref ],
+                vpc_endpoint_type="Interface")
@@ -1,184 +1,319 @@
 #!/usr/bin/env python3
 '''
     Initial cdk project information
-    1. Import CDK modules
-    2. Import Services modules in this project
-    3. Project information
-    4. cdk Construct
+    1. Startup profiler
+    2. Import CDK modules
+    3. Import project modules(service stacks are imported lazily)
+    4. Project information
+    5. Stack registry
+    6. cdk Construct
+
+    Only the stacks selected by context(and their dependencies) are built.
+        cdk deploy -c stacks=s3 dev-cdkworkshop-s3
+    Without "stacks" context, every stack is built except the examples(service-tier), which are opt-in.
+        cdk deploy -c stacks=service-tier dev-cdkworkshop-service-tier
+    With "synth-cache" context, unchanged stacks are copied from the synth cache.
+        cdk synth -c synth-cache=true
+    With "tree-stats" context, construct tree statistics are written to cdk.out.
+        cdk synth -c tree-stats=true
+    With "matrix" context, every (env, region) pair of config/matrix.json is built.
+        cdk synth -c matrix=true
+    The synthesized templates are checked against config/budget/<env>.json, a violation fails the synth.
+        cdk synth -c performance-budget=false      # skip the check
 '''
+# Startup profiler(--profile-startup), it must be created before the CDK import to time it.
+# tools/ is shared by every project of the repository
+import os
+import sys
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPOSITORY_DIR not in sys.path:
+    sys.path.append(REPOSITORY_DIR)
+from tools.startup import StartupProfiler
+profiler = StartupProfiler()
+
 # Import CDK modules
 from aws_cdk import App, Environment
 
-# Import service stacks modules
-from vpc.vpc_stack import VpcStack
-from security.iam.iam_stack import IamStack
-from security.kms.kms_stack import KmsStack
-from s3.s3_stack import S3Stack
-from ecr.ecr_stack import EcrStack
-from lambda_.lambda_stack import LambdaStack
-from security.security_group.security_group_stack import SecurityGroupStack
-from security.nacl.nacl_stack import NaclStack
-from eks.eks_stack import EksStack
-from ec2.instance_stack import EC2InstanceStack
-from elb.elb_stack import ElasticLoadBalancerStack
-from ecs.ecs_stack import EcsStack
-from ec2.asg_stack import AutoScalingGroupStack
-from rds.rds_stack import RdsStack
-from efs.efs_stack import EfsStack
-from elasticache.elasticache_stack import ElasticacheStack
-from cloudfront.cloudfront_stack import CloudFrontStack
-from cicd.cicd_stack import CiCdStack
-
-# Information of project
-project = dict()
-project['account'] = "242593025403"
-project['region']  = "us-west-2"
-project['env']     = "dev"
-project['name']    = "cdkworkshop"
-project['prefix']  = f"{project['env']}-{project['name']}"
-project['keypair'] = "dev-uswest2"
+# Import project modules
+# Service stack modules are imported lazily by the registry.
+from registry import StackRegistry
+from synth_cache import cache_dir_option, synth_with_cache
+from tree_stats import TreeStats
+from tools.project_config import load_config, load_matrix
+from matrix_synth import matrix_environments, synth_matrix
+from shared_resources import SharedResources, shared_kms_enabled
+from capacity import load_plan
+from tools.vpc_endpoints import context_presets
+from tools.nat_topology import context_mode
+from tools.ipam import context_pod_cidr
+from budget_gate import budget_enabled, enforce_budget
+
+# Information of project(config/<env>.json, selected by "env" context: cdk synth -c env=dev)
+project = load_config()
 
 # Environment
 cdk_environment = Environment(
-    account=project['account'],
-    region=project['region'])
+    account=project.account,
+    region=project.region)
+
+# Stack registry
+def create_registry(project, cdk_environment, profiler: StartupProfiler = profiler) -> StackRegistry:
+    '''
+        Stack graph of one environment, matrix synth(matrix_synth.py) creates one per (env, region).
+    '''
+    registry = StackRegistry(profiler)
+    # KMS keys and managed policies handed out to the stacks, "shared-kms" context moves
+    # the data plane keys into the kms stack
+    shared = SharedResources(project, shared_kms_enabled())
+    data_plane = ["kms"] if shared.shared_kms else []
+    # Scaling bounds, shards and connection limits from the load of the env(config/load/<env>.json)
+    capacity = load_plan(project.env)
+
+    # Interface endpoint presets of the vpc("vpc-endpoints" context), AWS API traffic bypasses the NAT gateways
+    endpoints = context_presets()
+    # NAT topology of the vpc("nat-topology" context), per-az keeps egress in the az of the subnet
+    nat       = context_mode()
+    # Secondary cidr of the vpc for pod subnets("pod-cidr" context)
+    pod_cidr  = context_pod_cidr()
+
+    @registry.stack("vpc", project.prefix, "vpc.vpc_stack:VpcStack")
+    def vpc_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope        = scope,
+            env          = cdk_environment,
+            construct_id = construct_id,
+            project      = project,
+            endpoints    = endpoints,
+            nat          = nat,
+            pod_cidr     = pod_cidr)
+
+    @registry.stack("iam", project.resource_name("iam"), "security.iam.iam_stack:IamStack")
+    def iam_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope        = scope,
+            env          = cdk_environment,
+            construct_id = construct_id,
+            project      = project,
+            shared       = shared)
+
+    @registry.stack("kms", project.resource_name("kms"), "security.kms.kms_stack:KmsStack")
+    def kms_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope        = scope,
+            env          = cdk_environment,
+            construct_id = construct_id,
+            project      = project,
+            shared       = shared)
+
+    @registry.stack("s3", project.resource_name("s3"), "s3.s3_stack:S3Stack", depends_on=data_plane)
+    def s3_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope        = scope,
+            env          = cdk_environment,
+            construct_id = construct_id,
+            project      = project,
+            shared       = shared)
+
+    @registry.stack("ecr", project.resource_name("ecr"), "ecr.ecr_stack:EcrStack")
+    def ecr_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            construct_id   = construct_id,
+            env            = cdk_environment)
+
+    @registry.stack("lambda", project.resource_name("lambda"), "lambda_.lambda_stack:LambdaStack",
+        inputs=["lambda_/source"])
+    def lambda_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope        = scope,
+            env          = cdk_environment,
+            construct_id = construct_id,
+            project      = project,
+            shared       = shared)
+
+    @registry.stack("security-group", project.resource_name("security-group"), "security.security_group.security_group_stack:SecurityGroupStack", depends_on=["vpc"])
+    def security_group_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope        = scope,
+            env          = cdk_environment,
+            construct_id = construct_id,
+            project      = project,
+            vpc          = deps['vpc'].vpc)
+
+    @registry.stack("nacl", project.resource_name("nacl"), "security.nacl.nacl_stack:NaclStack", depends_on=["vpc"],
+        inputs=["security/nacl/rules.json"])
+    def nacl_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope        = scope,
+            env          = cdk_environment,
+            construct_id = construct_id,
+            project      = project,
+            vpc          = deps['vpc'].vpc)
+
+    @registry.stack("eks", project.resource_name("eks"), "eks.eks_stack:EksStack", depends_on=["vpc", "security-group"],
+        inputs=["eks/policy"])
+    def eks_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            env            = cdk_environment,
+            construct_id   = construct_id,
+            project        = project,
+            shared         = shared,
+            vpc            = deps['vpc'].vpc,
+            security_group = deps['security-group'].security_group)
+
+    @registry.stack("ec2-instance", project.resource_name("ec2-instance"), "ec2.instance_stack:EC2InstanceStack", depends_on=["vpc", "security-group"])
+    def ec2_instance_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            env            = cdk_environment,
+            construct_id   = construct_id,
+            project        = project,
+            shared         = shared,
+            vpc            = deps['vpc'].vpc,
+            security_group = deps['security-group'].security_group)
+
+    @registry.stack("elb", project.resource_name("elb"), "elb.elb_stack:ElasticLoadBalancerStack", depends_on=["vpc", "security-group"])
+    def elb_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            env            = cdk_environment,
+            construct_id   = construct_id,
+            project        = project,
+            vpc            = deps['vpc'].vpc,
+            security_group = deps['security-group'].security_group)
+
+    @registry.stack("ecs", project.resource_name("ecs"), "ecs.ecs_stack:EcsStack", depends_on=["vpc", "security-group", "elb"])
+    def ecs_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            construct_id   = construct_id,
+            env            = cdk_environment,
+            project        = project,
+            shared         = shared,
+            capacity       = capacity,
+            vpc            = deps['vpc'].vpc,
+            security_group = deps['security-group'].security_group,
+            target_group   = deps['elb'].target_group)
+
+    @registry.stack("asg", project.resource_name("asg"), "ec2.asg_stack:AutoScalingGroupStack", depends_on=["vpc", "security-group", "elb"],
+        inputs=["ec2/userdata.sh"])
+    def asg_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            env            = cdk_environment,
+            construct_id   = construct_id,
+            project        = project,
+            shared         = shared,
+            capacity       = capacity,
+            vpc            = deps['vpc'].vpc,
+            security_group = deps['security-group'].security_group,
+            target_group   = deps['elb'].target_group)
+
+    # Example of service_tier.py, a second web tier: built only when selected(-c stacks=service-tier)
+    @registry.stack("service-tier", project.resource_name("service-tier"), "service_tier.service_tier_stack:ServiceTierStack", depends_on=["vpc"],
+        inputs=["ec2/userdata.sh"], default=False)
+    def service_tier_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            env            = cdk_environment,
+            construct_id   = construct_id,
+            project        = project,
+            shared         = shared,
+            capacity       = capacity,
+            vpc            = deps['vpc'].vpc)
+
+    @registry.stack("rds", project.resource_name("rds"), "rds.rds_stack:RdsStack", depends_on=["vpc", "security-group"] + data_plane)
+    def rds_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            env            = cdk_environment,
+            construct_id   = construct_id,
+            project        = project,
+            shared         = shared,
+            capacity       = capacity,
+            vpc            = deps['vpc'].vpc,
+            security_group = deps['security-group'].security_group)
+
+    @registry.stack("efs", project.resource_name("efs"), "efs.efs_stack:EfsStack", depends_on=["vpc", "security-group"] + data_plane)
+    def efs_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            env            = cdk_environment,
+            construct_id   = construct_id,
+            project        = project,
+            shared         = shared,
+            vpc            = deps['vpc'].vpc,
+            security_group = deps['security-group'].security_group)
+
+    @registry.stack("elasticache", project.resource_name("elasticache"), "elasticache.elasticache_stack:ElasticacheStack", depends_on=["vpc", "security-group"] + data_plane)
+    def elasticache_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            env            = cdk_environment,
+            construct_id   = construct_id,
+            project        = project,
+            shared         = shared,
+            capacity       = capacity,
+            vpc            = deps['vpc'].vpc,
+            security_group = deps['security-group'].security_group)
+
+    @registry.stack("cloudfront", project.resource_name("cloudfront"), "cloudfront.cloudfront_stack:CloudFrontStack", depends_on=["s3"])
+    def cloudfront_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope        = scope,
+            env          = cdk_environment,
+            construct_id = construct_id,
+            project      = project,
+            origin       = {
+                's3': deps['s3'].s3_bucket,
+                'elb': None,
+            })
+
+    @registry.stack("cicd", project.resource_name("cicd"), "cicd.cicd_stack:CiCdStack", depends_on=["vpc", "security-group"] + data_plane,
+        inputs=["cicd/codebuild_s3_policy.json", "cicd/codebuild_ecr_policy.json"])
+    def cicd_stack(stack_class, scope, construct_id, deps):
+        return stack_class(
+            scope          = scope,
+            env            = cdk_environment,
+            construct_id   = construct_id,
+            project        = project,
+            shared         = shared,
+            vpc            = deps['vpc'].vpc,
+            security_group = deps['security-group'].security_group)
+
+    return registry
+
+registry = create_registry(project, cdk_environment)
 
 # Construct
-app = App()
-
-# Service stack
-vpc_stack = VpcStack(
-    scope        = app,
-    env          = cdk_environment,
-    construct_id = f"{project['prefix']}",
-    project      = project)
-
-iam_stack = IamStack(
-    scope        = app,
-    env          = cdk_environment,
-    construct_id = f"{project['prefix']}-iam",
-    project      = project)
-
-kms_stack = KmsStack(
-    scope        = app,
-    env          = cdk_environment,
-    construct_id = f"{project['prefix']}-kms",
-    project      = project)
-
-s3_stack = S3Stack(
-    scope        = app,
-    env          = cdk_environment,
-    construct_id = f"{project['prefix']}-s3",
-    project      = project)
-
-ecr_stack = EcrStack(
-    scope          = app,
-    construct_id   = f"{project['prefix']}-ecr",
-    env            = cdk_environment)
-
-lambda_stack = LambdaStack(
-    scope        = app,
-    env          = cdk_environment,
-    construct_id = f"{project['prefix']}-lambda",
-    project      = project)
-
-security_group_stack = SecurityGroupStack(
-    scope        = app,
-    env          = cdk_environment,
-    construct_id = f"{project['prefix']}-security-group",
-    project      = project,
-    vpc          = vpc_stack.vpc)
-
-nacl_stack = NaclStack(
-    scope        = app,
-    env          = cdk_environment,
-    construct_id = f"{project['prefix']}-nacl",
-    project      = project,
-    vpc          = vpc_stack.vpc)
-
-eks_stack = EksStack(
-    scope          = app,
-    env            = cdk_environment,
-    construct_id   = f"{project['prefix']}-eks",
-    project        = project,
-    vpc            = vpc_stack.vpc,
-    security_group = security_group_stack.security_group)
-
-ec2_instance_stack = EC2InstanceStack(
-    scope          = app,
-    env            = cdk_environment,
-    construct_id   = f"{project['prefix']}-ec2-instance",
-    project        = project,
-    vpc            = vpc_stack.vpc,
-    security_group = security_group_stack.security_group)
-
-elb_stack = ElasticLoadBalancerStack(
-    scope          = app,
-    env            = cdk_environment,
-    construct_id   = f"{project['prefix']}-elb",
-    project        = project,
-    vpc            = vpc_stack.vpc,
-    security_group = security_group_stack.security_group)
-
-ecs_stack = EcsStack(
-    scope          = app,
-    construct_id   = f"{project['prefix']}-ecs",
-    env            = cdk_environment,
-    project        = project,
-    vpc            = vpc_stack.vpc,
-    security_group = security_group_stack.security_group,
-    target_group   = elb_stack.target_group)
-
-asg_stack = AutoScalingGroupStack(
-    scope          = app,
-    env            = cdk_environment,
-    construct_id   = f"{project['prefix']}-asg",
-    project        = project,
-    vpc            = vpc_stack.vpc,
-    security_group = security_group_stack.security_group,
-    target_group   = elb_stack.target_group)
-
-rds_stack = RdsStack(
-    scope          = app,
-    env            = cdk_environment,
-    construct_id   = f"{project['prefix']}-rds",
-    project        = project,
-    vpc            = vpc_stack.vpc,
-    security_group = security_group_stack.security_group)
-
-efs_stack = EfsStack(
-    scope          = app,
-    env            = cdk_environment,
-    construct_id   = f"{project['prefix']}-efs",
-    project        = project,
-    vpc            = vpc_stack.vpc,
-    security_group = security_group_stack.security_group)
-
-elasticache_stack = ElasticacheStack(
-    scope          = app,
-    env            = cdk_environment,
-    construct_id   = f"{project['prefix']}-elasticache",
-    project        = project,
-    vpc            = vpc_stack.vpc,
-    security_group = security_group_stack.security_group)
-
-cloudfront_stack = CloudFrontStack(
-    scope        = app,
-    env          = cdk_environment,
-    construct_id = f"{project['prefix']}-cloudfront",
-    project      = project,
-    origin       = {
-        's3': s3_stack.s3_bucket,
-        'elb': None,
-    })
-
-cicd_stack = CiCdStack(
-    scope          = app,
-    env            = cdk_environment,
-    construct_id   = f"{project['prefix']}-cicd",
-    project        = project,
-    vpc            = vpc_stack.vpc,
-    security_group = security_group_stack.security_group)
-
-# app synth -> cloudformation template
-app.synth()
\ No newline at end of file
+# The registry can be loaded without synthesizing(benchmarks, tests).
+if __name__ == "__main__":
+    app = App()
+    selected = registry.parse_selection(app.node.try_get_context("stacks"))
+    matrix = matrix_environments(app.node.try_get_context("matrix"))
+    tree_stats = TreeStats.from_context(app) if matrix is None else None
+    if tree_stats:
+        registry.class_hooks.append(tree_stats.instrument)
+
+    if matrix is not None:
+        # Service stacks of every (env, region) pair, one worker process per env
+        synth_matrix(load_matrix(matrix), selected, profiler, budget=budget_enabled(app))
+    elif cache_dir_option(app.node.try_get_context("synth-cache")):
+        # Service stack + app synth, unchanged stacks are reused from the synth cache
+        stacks = synth_with_cache(app, registry, selected, cdk_environment, profiler)
+    else:
+        # Service stack
+        stacks = registry.build(
+            scope    = app,
+            selected = selected)
+
+        # app synth -> cloudformation template
+        profiler.construct("app.synth", app.synth)
+
+    # Performance budget of the env(matrix synth checks every env in its worker)
+    if matrix is None and budget_enabled(app):
+        enforce_budget(app.outdir, project.env)
+    if tree_stats:
+        tree_stats.report(app, profiler.stack_times[-1][1])
+    profiler.report()
@@ -0,0 +1,49 @@
+'''
+    Deploy-time performance budget gate
+    After app.synth, every template in cdk.out is checked against config/budget/<env>.json
+    (tools/performance_budget.py), a violation fails the synth with the resource path:
+        BUDGET /dev-cdkworkshop-asg/foo-app-asg/ASG(fooappasgASGDC740807) Properties.HealthCheckGracePeriod: 300s exceeds 120s
+
+    Envs without a budget file are not checked. Skip the gate with context:
+        cdk synth -c performance-budget=false
+'''
+import os
+import sys
+
+CONTEXT_KEY    = "performance-budget"
+BUDGET_DIR     = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "budget")
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def budget_enabled(app) -> bool:
+    return str(app.node.try_get_context(CONTEXT_KEY)).lower() not in ("false", "0", "no")
+
+
+def budget_path(env: str, directory: str = None) -> str:
+    return os.path.join(directory or BUDGET_DIR, f"{env}.json")
+
+
+def check_budget(outdir: str, env: str, directory: str = None) -> list:
+    '''
+        Violations of cdk.out against the budget of env, [] without a budget file.
+    '''
+    path = budget_path(env, directory)
+    if not os.path.exists(path):
+        return list()
+    # tools/ is shared by every project of the repository
+    if REPOSITORY_DIR not in sys.path:
+        sys.path.append(REPOSITORY_DIR)
+    from tools.assembly import CloudAssembly
+    from tools.performance_budget import check_assembly, load_budget
+    return check_assembly(CloudAssembly(outdir), load_budget(path))
+
+
+def enforce_budget(outdir: str, env: str) -> None:
+    violations = check_budget(outdir, env)
+    if not violations:
+        return
+    for violation in violations:
+        print(f"BUDGET {violation}", file=sys.stderr)
+    print(f"{len(violations)} violation(s) of {budget_path(env)}, "
+          f"synth failed(-c {CONTEXT_KEY}=false skips the check)", file=sys.stderr)
+    sys.exit(1)
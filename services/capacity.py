@@ -0,0 +1,203 @@
+'''
+    Capacity planning
+    Scaling bounds, shard counts and connection limits are derived from the expected load
+    of the environment, config/load/<env>.json:
+        {
+            "peak_rps":              1500,   requests per second the services must serve
+            "baseline_rps":          150,    requests per second outside of peaks
+            "p99_latency_ms":        200,    latency budget of a request
+            "request_kb":            2,      average payload sizes
+            "response_kb":           16,
+            "dataset_gb":            3,      data held in the cache
+            "cache_ops_per_request": 4       cache reads/writes per request
+        }
+
+    Formulas(UnitCapacity holds the per instance/task/node limits):
+        in flight requests   = rps * p99 latency(Little's law)
+        instances, tasks     = max(in flight / (concurrency per unit * utilization),
+                                   rps * payload / (bandwidth per unit * utilization)), rounded up
+                               peak load gives the maximum, baseline load the minimum(at least one per az)
+        requests per target  = requests a task(requests_per_target) or an instance(instance_requests_per_target)
+                               serves per minute at the target utilization
+                               (ALBRequestCountPerTarget is a per minute sum)
+        cache shards         = max(dataset / usable node memory, cache ops / ops per shard)
+        cache replicas       = max(minimum replicas, read ops per shard / ops per node - 1)
+        db max_connections   = (instances + tasks of every service) at maximum
+                               * connection pool per unit * (1 + headroom)
+
+    Usage:
+        capacity = load_plan("dev")
+        capacity.asg_max, capacity.requests_per_target, capacity.db_max_connections
+'''
+import functools
+import json
+import math
+import os
+
+LOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config", "load")
+
+
+class LoadProfile:
+    __slots__ = (
+        "peak_rps", "baseline_rps", "p99_latency_ms", "request_kb", "response_kb",
+        "dataset_gb", "cache_ops_per_request",
+    )
+
+    def __init__(self, peak_rps: float, baseline_rps: float, p99_latency_ms: float, request_kb: float = 0,
+                 response_kb: float = 0, dataset_gb: float = 0, cache_ops_per_request: float = 0) -> None:
+        if peak_rps <= 0 or p99_latency_ms <= 0:
+            raise ValueError("peak_rps and p99_latency_ms must be positive")
+        if not 0 <= baseline_rps <= peak_rps:
+            raise ValueError(f"baseline_rps {baseline_rps} must be between 0 and peak_rps {peak_rps}")
+        self.peak_rps              = peak_rps
+        self.baseline_rps          = baseline_rps
+        self.p99_latency_ms        = p99_latency_ms
+        self.request_kb            = request_kb
+        self.response_kb           = response_kb
+        self.dataset_gb            = dataset_gb
+        self.cache_ops_per_request = cache_ops_per_request
+
+    @property
+    def payload_kb(self) -> float:
+        return self.request_kb + self.response_kb
+
+
+class UnitCapacity:
+    '''
+        What one unit sustains, defaults are the instance/node types of the stacks:
+        t3.xlarge(asg), ecs tasks of 1 vcpu, cache.t3.small(redis).
+    '''
+    __slots__ = (
+        "utilization", "instance_concurrency", "instance_mbps", "task_concurrency", "task_mbps",
+        "cache_node_memory_gb", "cache_memory_fraction", "cache_ops_per_node", "min_cache_replicas",
+        "db_pool_per_unit", "db_headroom",
+    )
+
+    def __init__(self, utilization: float = 0.5, instance_concurrency: int = 30, instance_mbps: float = 1000,
+                 task_concurrency: int = 20, task_mbps: float = 100, cache_node_memory_gb: float = 1.37,
+                 cache_memory_fraction: float = 0.75, cache_ops_per_node: float = 25000, min_cache_replicas: int = 2,
+                 db_pool_per_unit: int = 15, db_headroom: float = 0.25) -> None:
+        self.utilization           = utilization
+        self.instance_concurrency  = instance_concurrency
+        self.instance_mbps         = instance_mbps
+        self.task_concurrency      = task_concurrency
+        self.task_mbps             = task_mbps
+        self.cache_node_memory_gb  = cache_node_memory_gb
+        self.cache_memory_fraction = cache_memory_fraction
+        self.cache_ops_per_node    = cache_ops_per_node
+        self.min_cache_replicas    = min_cache_replicas
+        self.db_pool_per_unit      = db_pool_per_unit
+        self.db_headroom           = db_headroom
+
+
+class CapacityPlan:
+    __slots__ = (
+        "asg_min", "asg_max", "asg_desired",
+        "ecs_min_tasks", "ecs_max_tasks", "ecs_desired_tasks", "requests_per_target", "instance_requests_per_target",
+        "cache_shards", "cache_replicas", "db_max_connections",
+    )
+
+    def __init__(self, asg_min: int, asg_max: int, ecs_min_tasks: int, ecs_max_tasks: int,
+                 requests_per_target: int, instance_requests_per_target: int, cache_shards: int, cache_replicas: int,
+                 db_max_connections: int) -> None:
+        self.asg_min             = asg_min
+        self.asg_max             = asg_max
+        self.asg_desired         = asg_min
+        self.ecs_min_tasks       = ecs_min_tasks
+        self.ecs_max_tasks       = ecs_max_tasks
+        self.ecs_desired_tasks   = ecs_min_tasks
+        self.requests_per_target = requests_per_target
+        self.instance_requests_per_target = instance_requests_per_target
+        self.cache_shards        = cache_shards
+        self.cache_replicas      = cache_replicas
+        self.db_max_connections  = db_max_connections
+
+    def __repr__(self) -> str:
+        return "CapacityPlan(" + ", ".join(f"{name}={getattr(self, name)}" for name in self.__slots__) + ")"
+
+
+'''
+    Formulas
+'''
+def _ceil(value: float) -> int:
+    # 30.000000000000004 is 30 units, not 31
+    return math.ceil(round(value, 6))
+
+
+def in_flight(rps: float, latency_ms: float) -> float:
+    return rps * latency_ms / 1000
+
+
+def units_for(rps: float, latency_ms: float, payload_kb: float, concurrency: float, mbps: float,
+              utilization: float) -> int:
+    by_concurrency = in_flight(rps, latency_ms) / (concurrency * utilization)
+    by_bandwidth   = rps * payload_kb * 8 / 1000 / (mbps * utilization)
+    return _ceil(max(by_concurrency, by_bandwidth))
+
+
+def requests_per_target(concurrency: float, latency_ms: float, utilization: float) -> int:
+    return int(concurrency * utilization / (latency_ms / 1000) * 60)
+
+
+def cache_shards(dataset_gb: float, ops: float, node_memory_gb: float, memory_fraction: float,
+                 ops_per_node: float) -> int:
+    by_memory = dataset_gb / (node_memory_gb * memory_fraction)
+    by_ops    = ops / ops_per_node
+    return max(1, _ceil(max(by_memory, by_ops)))
+
+
+def cache_replicas(ops_per_shard: float, ops_per_node: float, min_replicas: int) -> int:
+    return max(min_replicas, _ceil(ops_per_shard / ops_per_node) - 1)
+
+
+def db_max_connections(units: int, pool_per_unit: int, headroom: float) -> int:
+    return _ceil(units * pool_per_unit * (1 + headroom))
+
+
+def plan_capacity(load: LoadProfile, units: UnitCapacity = None, az_count: int = 2,
+                  ecs_services: int = 2) -> CapacityPlan:
+    '''
+        ecs_services: services sized for the whole load(service-foo and service-bar share the target group)
+    '''
+    units = units or UnitCapacity()
+
+    def instances(rps: float) -> int:
+        return units_for(rps, load.p99_latency_ms, load.payload_kb,
+            units.instance_concurrency, units.instance_mbps, units.utilization)
+
+    def tasks(rps: float) -> int:
+        return units_for(rps, load.p99_latency_ms, load.payload_kb,
+            units.task_concurrency, units.task_mbps, units.utilization)
+
+    asg_max = max(az_count, instances(load.peak_rps))
+    ecs_max = max(az_count, tasks(load.peak_rps))
+    cache_ops = load.peak_rps * load.cache_ops_per_request
+    shards    = cache_shards(load.dataset_gb, cache_ops,
+        units.cache_node_memory_gb, units.cache_memory_fraction, units.cache_ops_per_node)
+    return CapacityPlan(
+        asg_min             = min(asg_max, max(az_count, instances(load.baseline_rps))),
+        asg_max             = asg_max,
+        ecs_min_tasks       = min(ecs_max, max(az_count, tasks(load.baseline_rps))),
+        ecs_max_tasks       = ecs_max,
+        requests_per_target = requests_per_target(units.task_concurrency, load.p99_latency_ms, units.utilization),
+        instance_requests_per_target = requests_per_target(units.instance_concurrency, load.p99_latency_ms,
+            units.utilization),
+        cache_shards        = shards,
+        cache_replicas      = cache_replicas(cache_ops / shards, units.cache_ops_per_node, units.min_cache_replicas),
+        db_max_connections  = db_max_connections(asg_max + ecs_services * ecs_max,
+            units.db_pool_per_unit, units.db_headroom),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def load_plan(env: str, directory: str = None, az_count: int = 2) -> CapacityPlan:
+    path = os.path.join(directory or LOAD_DIR, f"{env}.json")
+    if not os.path.exists(path):
+        raise ValueError(f"no load profile for env '{env}': {path}")
+    with open(path) as file:
+        values = json.load(file)
+    try:
+        load = LoadProfile(**values)
+    except TypeError as error:
+        raise ValueError(f"{path}: {error}") from None
+    return plan_capacity(load, az_count=az_count)
@@ -6,13 +6,16 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, Duration, RemovalPolicy, aws_ec2, aws_kms, aws_s3, aws_iam, aws_codecommit, aws_codebuild
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
 import json
 
 class CiCdStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.project        = project
+        self.shared         = shared
         self.vpc            = vpc
         self.security_group = security_group
 
@@ -48,10 +51,10 @@ class CiCdStack(Stack):
                     value="account-app",
                     type=aws_codebuild.BuildEnvironmentVariableType.PLAINTEXT),
                 "AWS_DEFAULT_REGION": aws_codebuild.BuildEnvironmentVariable(
-                    value=self.project["region"],
+                    value=self.project.region,
                     type=aws_codebuild.BuildEnvironmentVariableType.PLAINTEXT),
                 "AWS_ACCOUNT_ID": aws_codebuild.BuildEnvironmentVariable(
-                    value=self.project["account"],
+                    value=self.project.account,
                     type=aws_codebuild.BuildEnvironmentVariableType.PLAINTEXT),
             },
             # network options
@@ -85,8 +88,8 @@ class CiCdStack(Stack):
     def create_artifact_s3_bucket(self, bucket_name):
         # KMS
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_kms/Key.html
-        kms_key = aws_kms.Key(self, f"kms-s3-{bucket_name}",
-            alias                    = f"alias/{self.project['prefix']}-s3-{bucket_name}",
+        kms_key = self.shared.key(self, f"kms-s3-{bucket_name}", "s3",
+            alias                    = f"alias/{self.project.prefix}-s3-{bucket_name}",
             description              = "",
             admins                   = None,
             enabled                  = True,
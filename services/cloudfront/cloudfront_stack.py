@@ -12,9 +12,10 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, aws_cloudfront, aws_cloudfront_origins, aws_certificatemanager
+from tools.project_config import ProjectConfig
 
 class CloudFrontStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, origin, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, origin, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.project = project
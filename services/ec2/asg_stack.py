@@ -3,12 +3,17 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, Duration, Tags, aws_iam, aws_ec2, aws_autoscaling
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
+from capacity import CapacityPlan
 
 class AutoScalingGroupStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group, target_group, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, capacity: CapacityPlan, vpc, security_group, target_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.project        = project
+        self.shared         = shared
+        self.capacity       = capacity
         self.vpc            = vpc
         self.security_group = security_group
         self.target_group   = target_group
@@ -17,11 +22,11 @@ class AutoScalingGroupStack(Stack):
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_iam/Role.html
         self.role = dict()
         self.role['foo-app'] = aws_iam.Role(self, "foo-app-role",
-            role_name   = f"{self.project['prefix']}-foo-app-role",
+            role_name   = self.project.resource_name("foo-app-role"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("ec2.amazonaws.com"),
             managed_policies=[
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AmazonEC2RoleforSSM")
+                self.shared.managed_policy("service-role/AmazonEC2RoleforSSM")
             ])
         # AMI
         # https://github.com/aws/aws-cdk/blob/master/packages/%40aws-cdk/aws-ec2/test/example.images.lit.ts
@@ -43,7 +48,7 @@ class AutoScalingGroupStack(Stack):
         # Auto Scaling Group
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_autoscaling/AutoScalingGroup.html
         aws_autoscaling.AutoScalingGroup(self, "foo-app-asg",
-            auto_scaling_group_name=f"{self.project['prefix']}-foo-app-asg",
+            auto_scaling_group_name=self.project.resource_name("foo-app-asg"),
             # tpye of instance
             instance_type=aws_ec2.InstanceType("t3.xlarge"),
             machine_image=ami,
@@ -53,7 +58,7 @@ class AutoScalingGroupStack(Stack):
             security_group=self.security_group['foo-app'],
             vpc_subnets=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PRIVATE_WITH_NAT),
             # advanced options
-            key_name=self.project['keypair'],
+            key_name=self.project.keypair,
             role=self.role['foo-app'],
             # ebs
             block_devices=[
@@ -64,7 +69,7 @@ class AutoScalingGroupStack(Stack):
                         ebs_device=aws_autoscaling.EbsDeviceProps(
                             delete_on_termination=True,
                             iops=None,
-                            volume_type=aws_autoscaling.EbsDeviceVolumeType.GP2,
+                            volume_type=aws_autoscaling.EbsDeviceVolumeType.GP3,
                             volume_size=20,
                             snapshot_id=None
                         )
@@ -74,9 +79,9 @@ class AutoScalingGroupStack(Stack):
             # user-data
             user_data=aws_ec2.UserData.custom(userdata),
             # asg options
-            desired_capacity=2,
-            min_capacity=2,
-            max_capacity=20,
+            desired_capacity=self.capacity.asg_desired,
+            min_capacity=self.capacity.asg_min,
+            max_capacity=self.capacity.asg_max,
             health_check=aws_autoscaling.HealthCheck.elb(grace=Duration.seconds(120)),
             cooldown=Duration.seconds(300),
             group_metrics=None,
@@ -95,9 +100,9 @@ class AutoScalingGroupStack(Stack):
         # Demostration code, Recommend create from security_group stack.
         self.security_group['foo-app'] = aws_ec2.SecurityGroup(self, 'foo-app-sg',
             vpc                 = self.vpc,
-            security_group_name = f"{self.project['prefix']}-foo-app-sg",
+            security_group_name = self.project.resource_name("foo-app-sg"),
             description         = "",
             allow_all_outbound  = True)
         Tags.of(self.security_group['foo-app']).add(
             "Name",
-            f"{self.project['prefix']}-foo-app-sg")
\ No newline at end of file
+            self.project.resource_name("foo-app-sg"))
\ No newline at end of file
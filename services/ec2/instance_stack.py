@@ -3,12 +3,15 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, Tags, aws_iam, aws_ec2
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
 
 class EC2InstanceStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Initial
         self.project        = project
+        self.shared         = shared
         self.vpc            = vpc
         self.security_group = security_group
         self.create_security_group() # Demostration code, Recommend create from security-group stack
@@ -16,11 +19,11 @@ class EC2InstanceStack(Stack):
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_iam/Role.html
         self.role = dict()
         self.role['foo-app'] = aws_iam.Role(self, "foo-app-role",
-            role_name   = f"{self.project['prefix']}-foo-app-role",
+            role_name   = self.project.resource_name("foo-app-role"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("ec2.amazonaws.com"),
             managed_policies=[
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AmazonEC2RoleforSSM")
+                self.shared.managed_policy("service-role/AmazonEC2RoleforSSM")
             ],
             inline_policies={
                 "s3-read-only": aws_iam.PolicyDocument(
@@ -91,8 +94,8 @@ class EC2InstanceStack(Stack):
             ],
             init=None,
             init_options=None,
-            instance_name=f"{self.project['prefix']}-foo-app-ec2",
-            key_name=self.project['keypair'],
+            instance_name=self.project.resource_name("foo-app-ec2"),
+            key_name=self.project.keypair,
             private_ip_address=None,
             resource_signal_timeout=None,
             role=self.role['foo-app'],
@@ -107,9 +110,9 @@ class EC2InstanceStack(Stack):
         # Demostration code, Recommend create from security_group stack.
         self.security_group['foo-app'] = aws_ec2.SecurityGroup(self, 'foo-app-sg',
             vpc                 = self.vpc,
-            security_group_name = f"{self.project['prefix']}-foo-app-sg",
+            security_group_name = self.project.resource_name("foo-app-sg"),
             description         = "",
             allow_all_outbound  = True)
         Tags.of(self.security_group['foo-app']).add(
             "Name",
-            f"{self.project['prefix']}-foo-app-sg")
\ No newline at end of file
+            self.project.resource_name("foo-app-sg"))
\ No newline at end of file
@@ -3,9 +3,10 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, aws_iam, aws_ec2
+from tools.project_config import ProjectConfig
 
 class LaunchTemplateStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.project        = project
@@ -51,8 +52,8 @@ class LaunchTemplateStack(Stack):
             hibernation_configured=None,
             instance_initiated_shutdown_behavior=None,
             instance_type=aws_ec2.InstanceType("t3.xlarge"),
-            key_name=self.project['keypair'],
-            launch_template_name=f"{self.project['prefix']}-lt-foo-app",
+            key_name=self.project.keypair,
+            launch_template_name=self.project.resource_name("lt-foo-app"),
             machine_image=ami,
             nitro_enclave_enabled=None,
             role=self.role['foo-app'],
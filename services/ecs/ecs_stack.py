@@ -3,11 +3,16 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, Duration, aws_ec2, aws_autoscaling, aws_iam, aws_ecr, aws_ecs
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
+from capacity import CapacityPlan
 
 class EcsStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group, target_group, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, capacity: CapacityPlan, vpc, security_group, target_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         self.project = project
+        self.shared = shared
+        self.capacity = capacity
         self.vpc = vpc
         self.security_group = security_group
         self.target_group = target_group
@@ -65,7 +70,7 @@ class EcsStack(Stack):
             health_check=None,
             ignore_unmodified_size_properties=None,
             instance_monitoring=None,
-            key_name=self.project['keypair'],
+            key_name=self.project.keypair,
             min_capacity=3,
             max_capacity=20,
             desired_capacity=None,
@@ -80,12 +85,12 @@ class EcsStack(Stack):
     def create_ec2_task_definition(self):
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_iam/Role.html
         self.role['foo'] = aws_iam.Role(self, "role-foo",
-            role_name   = f"{self.project['prefix']}-role-foo",
+            role_name   = self.project.resource_name("role-foo"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("ecs-tasks.amazonaws.com"),
             managed_policies=[
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AmazonEC2ContainerRegistryReadOnly"),
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AmazonS3ReadOnlyAccess")
+                self.shared.managed_policy("AmazonEC2ContainerRegistryReadOnly"),
+                self.shared.managed_policy("AmazonS3ReadOnlyAccess")
             ])
         
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ecs/Ec2TaskDefinition.html
@@ -162,7 +167,7 @@ class EcsStack(Stack):
             cloud_map_options=None,
             cluster=self.ecs_cluster,
             deployment_controller=None,
-            desired_count=3,
+            desired_count=self.capacity.ecs_desired_tasks,
             enable_ecs_managed_tags=None,
             enable_execute_command=None,
             health_check_grace_period=None,
@@ -177,8 +182,8 @@ class EcsStack(Stack):
         
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ecs/ScalableTaskCount.html#aws_cdk.aws_ecs.ScalableTaskCount
         self.scalableTask['foo'] = self.service['foo'].auto_scale_task_count(
-            max_capacity=30,
-            min_capacity=3)
+            max_capacity=self.capacity.ecs_max_tasks,
+            min_capacity=self.capacity.ecs_min_tasks)
         self.scalableTask['foo'].scale_on_cpu_utilization("foo-scale-on-cpu",
             target_utilization_percent=60,
             disable_scale_in=False,
@@ -189,12 +194,12 @@ class EcsStack(Stack):
     def create_fargate_task_definition(self):
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_iam/Role.html
         self.role['bar'] = aws_iam.Role(self, "role-bar",
-            role_name   = f"{self.project['prefix']}-role-bar",
+            role_name   = self.project.resource_name("role-bar"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("ecs-tasks.amazonaws.com"),
             managed_policies=[
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AmazonEC2ContainerRegistryReadOnly"),
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AmazonS3ReadOnlyAccess")
+                self.shared.managed_policy("AmazonEC2ContainerRegistryReadOnly"),
+                self.shared.managed_policy("AmazonS3ReadOnlyAccess")
             ])
 
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ecs/FargateTaskDefinition.html
@@ -267,7 +272,7 @@ class EcsStack(Stack):
             cloud_map_options=None,
             cluster=self.ecs_cluster,
             deployment_controller=None,
-            desired_count=3,
+            desired_count=self.capacity.ecs_desired_tasks,
             enable_ecs_managed_tags=None,
             enable_execute_command=None,
             health_check_grace_period=None,
@@ -282,10 +287,10 @@ class EcsStack(Stack):
         
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ecs/ScalableTaskCount.html#aws_cdk.aws_ecs.ScalableTaskCount
         self.scalableTask['bar'] = self.service['bar'].auto_scale_task_count(
-            max_capacity=30,
-            min_capacity=3)
+            max_capacity=self.capacity.ecs_max_tasks,
+            min_capacity=self.capacity.ecs_min_tasks)
         self.scalableTask['bar'].scale_on_request_count("bar-scale-on-request-count",
-            requests_per_target=3000,
+            requests_per_target=self.capacity.requests_per_target,
             target_group=self.target_group['foo-app'],
             disable_scale_in=False,
             policy_name=None,
@@ -2,21 +2,24 @@
     Dependency: vpc, security-group
 '''
 from constructs import Construct
-from aws_cdk import Stack, Duration, RemovalPolicy, aws_ec2, aws_iam, aws_kms, aws_efs
+from aws_cdk import Stack, Duration, RemovalPolicy, aws_ec2, aws_iam, aws_efs
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
 
 class EfsStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.vpc = vpc
         self.project = project
+        self.shared = shared
         self.security_group = security_group
         self.role = dict()
         self.kms_key = dict()
 
         # kms
-        self.kms_key['efs'] = aws_kms.Key(self, "efs_cmk",
-            alias               = f"alias/{project['prefix']}-efs",
+        self.kms_key['efs'] = self.shared.key(self, "efs_cmk", "efs",
+            alias               = project.alias("efs"),
             description         = "",
             admins              = None,
             enabled             = True,
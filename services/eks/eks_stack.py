@@ -3,14 +3,29 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, Duration, RemovalPolicy, Tags, aws_ec2, aws_iam, aws_kms, aws_eks
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
+from tools.sg_graph import SecurityGroupGraph
+from security.security_group.security_group_stack import add_graph_rules
 import json
 
+# Port string representations of the deployed rules, the last part of their logical ids(add_graph_rules)
+RULE_REPRESENTATIONS = {
+    ("eks-cluster-controlplane", "ingress", "eks-nodegroup", "tcp", (443, 443)):           "eks-cluster-controlplane-1",
+    ("eks-cluster-controlplane", "egress",  "eks-nodegroup", "tcp", (1025, 65535)):        "eks-cluster-controlplane-2",
+    ("eks-cluster-controlplane", "egress",  "eks-nodegroup", "tcp", (443, 443)):           "eks-cluster-controlplane-3",
+    ("eks-nodegroup", "ingress", "eks-nodegroup",            "all", None):                 "eks-nodegroup-1",
+    ("eks-nodegroup", "ingress", "eks-cluster-controlplane", "tcp", (443, 443)):           "eks-nodegroup-2",
+    ("eks-nodegroup", "ingress", "eks-cluster-controlplane", "tcp", (1025, 65535)):        "eks-nodegroup-3",
+}
+
 class EksStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group: dict, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, vpc, security_group: dict, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.vpc            = vpc
         self.project        = project
+        self.shared         = shared
         self.security_group = security_group
         # Create resource
         # It needs a long time about 30~60 minutes to is created EKS cluster
@@ -28,8 +43,8 @@ class EksStack(Stack):
         # KMS CMK for EKS
         # https://docs.aws.amazon.com/cdk/api/latest/python/aws_cdk.aws_kms/Key.html
         self.kms_key = dict()
-        self.kms_key['eks-cluster'] = aws_kms.Key(self, "cmk-eks-cluster",
-            alias                    = f"alias/{self.project['prefix']}-cmk-eks-cluster",
+        self.kms_key['eks-cluster'] = self.shared.key(self, "cmk-eks-cluster", "eks-cluster",
+            alias                    = self.project.alias("cmk-eks-cluster"),
             description              = "description in this field",
             admins                   = None,
             enabled                  = True,
@@ -50,8 +65,8 @@ class EksStack(Stack):
                         not_resources=None,
                         principals=[
                             aws_iam.AccountRootPrincipal(),
-                            aws_iam.ArnPrincipal(arn="arn:aws:iam::242593025403:role/AdministratorRole"),
-                            aws_iam.ArnPrincipal(arn="arn:aws:iam::242593025403:role/PowerUserRole")
+                            aws_iam.ArnPrincipal(arn=self.project.role_arn("AdministratorRole")),
+                            aws_iam.ArnPrincipal(arn=self.project.role_arn("PowerUserRole"))
                         ],
                         resources=["*"]
                     )
@@ -65,24 +80,24 @@ class EksStack(Stack):
         self.role = dict()
         # Existing role
         self.role['admin'] = aws_iam.Role.from_role_arn(self, "role-admin",
-            role_arn="arn:aws:iam::242593025403:role/AdministratorRole",
+            role_arn=self.project.role_arn("AdministratorRole"),
             mutable=True)
         # Create role
         self.role['eks-cluster'] = aws_iam.Role(self, "role-eks-cluster",
-            role_name   = f"{self.project['prefix']}-role-eks-cluster",
+            role_name   = self.project.resource_name("role-eks-cluster"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("eks.amazonaws.com"),
             managed_policies=[
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AmazonEKSClusterPolicy")
+                self.shared.managed_policy("AmazonEKSClusterPolicy")
             ])
         self.role['nodegroup'] = aws_iam.Role(self, "role-nodegroup",
-            role_name   = f"{self.project['prefix']}-role-nodegroup",
+            role_name   = self.project.resource_name("role-nodegroup"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("ec2.amazonaws.com"),
             managed_policies=[
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AmazonEC2ContainerRegistryReadOnly"),
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AmazonEKS_CNI_Policy"),
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AmazonEKSWorkerNodePolicy")                
+                self.shared.managed_policy("AmazonEC2ContainerRegistryReadOnly"),
+                self.shared.managed_policy("AmazonEKS_CNI_Policy"),
+                self.shared.managed_policy("AmazonEKSWorkerNodePolicy")                
             ])
 
     def create_eks_cluster(self):
@@ -104,7 +119,7 @@ class EksStack(Stack):
             # prune=None,
             secrets_encryption_key=self.kms_key['eks-cluster'],
             version=aws_eks.KubernetesVersion.V1_19,
-            cluster_name=f"{self.project['prefix']}-eks-cluster",
+            cluster_name=self.project.resource_name("eks-cluster"),
             output_cluster_name=True,
             output_config_command=True,
             role=self.role['eks-cluster'],
@@ -131,8 +146,8 @@ class EksStack(Stack):
                 )
             ],
             instance_type=aws_ec2.InstanceType("t3.xlarge"),
-            key_name=self.project['keypair'],
-            launch_template_name=f"{self.project['prefix']}-nodegroup-core-lt",
+            key_name=self.project.keypair,
+            launch_template_name=self.project.resource_name("nodegroup-core-lt"),
             security_group=self.security_group['eks-nodegroup'])
         
     def create_nodegroup(self):
@@ -141,9 +156,9 @@ class EksStack(Stack):
         self.nodegroup = dict()
         self.nodegroup['core'] = aws_eks.Nodegroup(self, "nodegroup-core", 
             cluster=self.eks_cluster,
-            nodegroup_name=f"{self.project['prefix']}-nodegroup-core",
+            nodegroup_name=self.project.resource_name("nodegroup-core"),
             tags={
-                "Name": f"{self.project['prefix']}-nodegroup-core"
+                "Name": self.project.resource_name("nodegroup-core")
             },
             labels={
                 "Key1": "Value1"
@@ -191,21 +206,21 @@ class EksStack(Stack):
             name        = "aws-cloudwatch-metrics",
             namespace   = "kube-system",
             managed_policies = [
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("CloudWatchAgentServerPolicy")
+                self.shared.managed_policy("CloudWatchAgentServerPolicy")
             ])
         self.add_service_account(
             name        = "appmesh-controller",
             namespace   = "kube-system",
             managed_policies = [
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AWSAppMeshFullAccess"),
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AWSCloudMapFullAccess")
+                self.shared.managed_policy("AWSAppMeshFullAccess"),
+                self.shared.managed_policy("AWSCloudMapFullAccess")
             ])
         self.add_service_account(
             name        = "appmesh-application",
             namespace   = "kube-system",
             managed_policies = [
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AWSAppMeshEnvoyAccess"),
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("AWSXrayWriteOnlyAccess")
+                self.shared.managed_policy("AWSAppMeshEnvoyAccess"),
+                self.shared.managed_policy("AWSXrayWriteOnlyAccess")
             ])
 
     def add_service_account(self, name, namespace, policy_file=None, managed_policies=[]):
@@ -268,7 +283,7 @@ class EksStack(Stack):
                 'autoDiscovery': {
                     'clusterName': self.eks_cluster.cluster_name,
                 },
-                'awsRegion': self.project['region'],
+                'awsRegion': self.project.region,
                 'rbac': {
                     'serviceAccount': {
                         'create': False,
@@ -333,6 +348,11 @@ class EksStack(Stack):
             wait=None)
 
     def create_security_group(self):
+        # Flows between the control plane and the nodes, compiled by sg_graph.py
+        # https://docs.aws.amazon.com/eks/latest/userguide/sec-group-reqs.html
+        # The rules between the groups stay separate resources with the logical ids they were deployed with
+        # (RULE_REPRESENTATIONS), inlining or renaming them would create duplicates of the deployed rules.
+        self.graph = SecurityGroupGraph(names={ "any": [ "0.0.0.0/0" ] }, inline_groups=False)
          # Security Group
         self.add_security_group(
             name = "eks-cluster-controlplane",
@@ -342,71 +362,23 @@ class EksStack(Stack):
             name = "eks-nodegroup",
             description = "",
             allow_all_outbound = True)
-        # eks-cluster-controlplane
-        self.security_group['eks-cluster-controlplane'].add_ingress_rule(
-            peer = self.security_group['eks-nodegroup'],
-            connection = aws_ec2.Port(
-                protocol=aws_ec2.Protocol.TCP,
-                string_representation="eks-cluster-controlplane-1",
-                from_port=443,
-                to_port=443),
-            description = "")
-        self.security_group['eks-cluster-controlplane'].add_egress_rule(
-            peer = self.security_group['eks-nodegroup'],
-            connection = aws_ec2.Port(
-                protocol=aws_ec2.Protocol.TCP,
-                string_representation="eks-cluster-controlplane-2",
-                from_port=1025,
-                to_port=65535),
-            description = "")
-        # eks nodegroup
-        self.security_group['eks-nodegroup'].add_ingress_rule(
-            peer = self.security_group['eks-nodegroup'],
-            connection = aws_ec2.Port(
-                protocol=aws_ec2.Protocol.ALL,
-                string_representation="eks-nodegroup-1",
-                from_port=None,
-                to_port=None),
-            description = "")
-        self.security_group['eks-nodegroup'].add_ingress_rule(
-            peer = self.security_group['eks-cluster-controlplane'],
-            connection = aws_ec2.Port(
-                protocol=aws_ec2.Protocol.TCP,
-                string_representation="eks-nodegroup-2",
-                from_port=443,
-                to_port=443),
-            description = "")
-        self.security_group['eks-nodegroup'].add_ingress_rule(
-            peer = self.security_group['eks-cluster-controlplane'],
-            connection=aws_ec2.Port(
-                protocol=aws_ec2.Protocol.TCP,
-                string_representation="eks-nodegroup-3",
-                from_port=1025,
-                to_port=65535),
-            description = "",)
-        self.security_group['eks-nodegroup'].add_egress_rule(
-            peer = self.security_group['eks-nodegroup'],
-            connection=aws_ec2.Port(
-                protocol=aws_ec2.Protocol.ALL,
-                string_representation="eks-nodegroup-4",
-                from_port=None,
-                to_port=None),
-            description = "",)
-        self.security_group['eks-nodegroup'].add_egress_rule(
-            peer = aws_ec2.Peer.ipv4('0.0.0.0/0'),
-            connection=aws_ec2.Port(
-                protocol=aws_ec2.Protocol.TCP,
-                string_representation="eks-nodegroup-5",
-                from_port=443,
-                to_port=443),
-            description = "",)
+        # nodes -> cluster API
+        self.graph.flow("eks-nodegroup", "eks-cluster-controlplane", 443)
+        # control plane -> kubelet, pods and extension API servers
+        self.graph.flow("eks-cluster-controlplane", "eks-nodegroup", 443)
+        self.graph.flow("eks-cluster-controlplane", "eks-nodegroup", [1025, 65535])
+        # node to node
+        self.graph.flow("eks-nodegroup", "eks-nodegroup", protocol="all")
+        self.graph.flow("eks-nodegroup", "any", 443)
+        add_graph_rules(self.security_group, self.graph, RULE_REPRESENTATIONS)
 
     def add_security_group(self, name: str, description: str, allow_all_outbound: bool):
         self.security_group[name] = aws_ec2.SecurityGroup(self, name,
             vpc                 = self.vpc,
-            security_group_name = f"{self.project['prefix']}-{name}-sg",
+            security_group_name = f"{self.project.prefix}-{name}-sg",
             description         = description,
             allow_all_outbound  = allow_all_outbound)
+        self.graph.tier(name, allow_all_outbound=allow_all_outbound)
         Tags.of(self.security_group[name]).add(
             "Name",
-            f"{self.project['prefix']}-{name}-sg")
\ No newline at end of file
+            f"{self.project.prefix}-{name}-sg")
\ No newline at end of file
@@ -2,28 +2,33 @@
     Dependency: vpc, security-group
 '''
 from constructs import Construct
-from aws_cdk import Stack, Duration, RemovalPolicy, aws_ec2, aws_iam, aws_kms, aws_elasticache
+from aws_cdk import Stack, Duration, RemovalPolicy, aws_ec2, aws_iam, aws_elasticache
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
+from capacity import CapacityPlan
 
 class ElasticacheStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, capacity: CapacityPlan, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.vpc = vpc
         self.project = project
+        self.shared = shared
+        self.capacity = capacity
         self.security_group = security_group
         self.role = dict()
         self.kms_key = dict()
 
         # subnet group
         self.subnet_group = aws_elasticache.CfnSubnetGroup(self, "redis_subnet_group",
-            cache_subnet_group_name=f"{self.project['prefix']}-redis-subnetgroup",
+            cache_subnet_group_name=self.project.resource_name("redis-subnetgroup"),
             description="",
             subnet_ids=[ subnet.subnet_id for subnet in self.vpc.isolated_subnets ]
         )
 
         # kms
-        self.kms_key['redis'] = aws_kms.Key(self, "kms-redis",
-            alias               = f"alias/{project['prefix']}-redis",
+        self.kms_key['redis'] = self.shared.key(self, "kms-redis", "redis",
+            alias               = project.alias("redis"),
             description         = "",
             admins              = None,
             enabled             = True,
@@ -39,7 +44,7 @@ class ElasticacheStack(Stack):
     def add_redis(self):
         aws_elasticache.CfnReplicationGroup(self, "redis-cluster",
             #identify
-            replication_group_id=f"{self.project['prefix']}-redis-cluster",
+            replication_group_id=self.project.resource_name("redis-cluster"),
             global_replication_group_id=None,
             primary_cluster_id=None,
             replication_group_description="",
@@ -47,8 +52,8 @@ class ElasticacheStack(Stack):
             cache_node_type="cache.t3.small",
             engine="redis",
             engine_version=None,
-            num_node_groups=3, # number of shard
-            replicas_per_node_group=2, # number of replica
+            num_node_groups=self.capacity.cache_shards, # number of shard
+            replicas_per_node_group=self.capacity.cache_replicas, # number of replica
             port=6379,
             multi_az_enabled=True,
             automatic_failover_enabled=True,
@@ -79,7 +84,7 @@ class ElasticacheStack(Stack):
     def add_memcached(self):
         aws_elasticache.CfnCacheCluster(self, "memcached-cluster",
             #identify
-            cluster_name=f"{self.project['prefix']}-memcached-cluster",
+            cluster_name=self.project.resource_name("memcached-cluster"),
             #specify
             cache_node_type="cache.t3.small",
             engine="memcached",
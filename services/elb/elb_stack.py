@@ -3,9 +3,10 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, Duration, Tags, aws_ec2, aws_elasticloadbalancingv2, aws_certificatemanager
+from tools.project_config import ProjectConfig
 
 class ElasticLoadBalancerStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.project = project
@@ -36,7 +37,7 @@ class ElasticLoadBalancerStack(Stack):
                 port="5000",
                 protocol=aws_elasticloadbalancingv2.Protocol.HTTP,
                 timeout=Duration.seconds(5)),
-            target_group_name=f"{self.project['prefix']}-tg-foo-app",
+            target_group_name=self.project.resource_name("tg-foo-app"),
             target_type=aws_elasticloadbalancingv2.TargetType.IP,
             vpc=self.vpc)
         # ALB
@@ -49,7 +50,7 @@ class ElasticLoadBalancerStack(Stack):
             vpc=self.vpc,
             deletion_protection=None,
             internet_facing=True,
-            load_balancer_name=f"{self.project['prefix']}-ext-alb",
+            load_balancer_name=self.project.resource_name("ext-alb"),
             vpc_subnets=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PUBLIC))
         self.elb['ext-alb'].add_listener("listener-ext-alb",
             # certificates=[
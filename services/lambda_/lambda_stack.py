@@ -3,17 +3,21 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, aws_iam, aws_lambda
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
+from tools.lambda_bundle import bundle_codes
 
 class LambdaStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.project = project
+        self.shared = shared
         self.role = dict()
         # IAM role
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_iam/Role.html
         self.role['functionA'] = aws_iam.Role(self, "functionA-role",
-            role_name   = f"{project['prefix']}-role-lambda-functionA",
+            role_name   = project.resource_name("role-lambda-functionA"),
             description = "",
             assumed_by  = aws_iam.CompositePrincipal(
                 aws_iam.ServicePrincipal("lambda.amazonaws.com"),
@@ -26,14 +30,18 @@ class LambdaStack(Stack):
             # path=None,
             # permissions_boundary=None,
             managed_policies=[
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AWSLambdaBasicExecutionRole")
+                self.shared.managed_policy("service-role/AWSLambdaBasicExecutionRole")
             ]
         )
+        # Function code, zipped once per source content(lambda_bundle.py)
+        code = bundle_codes({
+            'functionA': ("./lambda_/source", aws_lambda.Runtime.NODEJS_14_X),
+        })
         # Functions
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_lambda/Function.html
         functionA = aws_lambda.Function(self, "lambda-functionA",
-            function_name=f"{self.project['prefix']}-lambda-functionA",
-            code=aws_lambda.Code.from_asset("./lambda_/source"),
+            function_name=self.project.resource_name("lambda-functionA"),
+            code=code['functionA'],
             handler="index.handler",
             runtime=aws_lambda.Runtime.NODEJS_14_X,
             role=self.role['functionA'],
@@ -0,0 +1,99 @@
+'''
+    Matrix synth
+    Builds the full stack graph of app.py(create_registry) for every (env, region) pair
+    of config/matrix.json and writes all of them into one cloud assembly.
+    Stack ids carry the env and a region code(project_config.py), so they do not collide.
+
+        cdk synth -c matrix=true                 # every pair
+        cdk synth -c matrix=dev,prod             # pairs of these environments
+        cdk synth -c matrix=true -c stacks=s3    # stack selection applies to every pair
+        cdk deploy -c matrix=dev "dev-cdkworkshop-use1*"
+
+    Each environment is synthesized by its own worker process. A worker imports aws_cdk and
+    the stack modules once and builds all regions of its environment into one App, so
+    a region costs construction + synth only. Configs are frozen and shared with the
+    workers as they are, context(cdk.context.json lookups) comes from the cdk CLI.
+
+    Workers are started with "spawn", a forked jsii kernel can not be shared.
+    Each worker checks its assembly against the performance budget of its env(budget_gate.py).
+'''
+import importlib
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+
+from budget_gate import budget_path, check_budget
+from tools.assembly import merge_assemblies
+from tools.startup import StartupProfiler
+
+CONTEXT_KEY = "matrix"
+
+
+def matrix_environments(value) -> list:
+    '''
+        Environments selected by the "matrix" context value:
+        None if matrix synth is disabled, an empty list for every environment.
+    '''
+    if value in (None, False, "", "false", "0", 0):
+        return None
+    if value in (True, "true"):
+        return list()
+    return [ env.strip() for env in str(value).split(",") if env.strip() ]
+
+
+def _synth_environment(args: tuple) -> dict:
+    '''
+        Worker: builds every region of one environment in one App and synthesizes it to outdir.
+    '''
+    env, configs, selected, outdir, profile, budget = args
+    profiler = StartupProfiler(enabled=profile)
+    from aws_cdk import App, Environment
+    # app.py is importable, its synth runs under the __main__ guard only
+    services = importlib.import_module("app")
+    app = App(outdir=outdir)
+    for project in configs:
+        environment = Environment(account=project.account, region=project.region)
+        services.create_registry(project, environment, profiler).build(app, selected)
+    profiler.construct(f"{env}--synth", app.synth)
+    violations = [ str(violation) for violation in check_budget(outdir, env) ] if budget else list()
+    return { "load_times": profiler.load_times, "stack_times": profiler.stack_times, "violations": violations,
+             "env": env }
+
+
+def synth_matrix(configs: list, selected: list = None, profiler: StartupProfiler = None,
+                 budget: bool = True) -> None:
+    '''
+        configs: ProjectConfig list(project_config.load_matrix()), one worker per environment.
+        budget:  check every environment against its performance budget, exit 1 on a violation.
+    '''
+    profiler = profiler or StartupProfiler(enabled=False)
+    outdir   = os.environ.get("CDK_OUTDIR", "cdk.out")
+    groups   = dict()
+    for config in configs:
+        groups.setdefault(config.env, list()).append(config)
+    workers = max(1, min(len(groups), os.cpu_count() or 1))
+    os.makedirs(outdir, exist_ok=True)
+    with tempfile.TemporaryDirectory(prefix=".matrix-", dir=outdir) as staging:
+        parts = [ os.path.join(staging, env) for env in groups ]
+        jobs  = [
+            (env, env_configs, selected, part, profiler.enabled, budget)
+            for (env, env_configs), part in zip(groups.items(), parts)
+        ]
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(processes=workers) as pool:
+            results = profiler.construct("matrix.workers", pool.map, _synth_environment, jobs, 1)
+        for result in results:
+            profiler.load_times.extend(result["load_times"])
+            profiler.stack_times.extend(result["stack_times"])
+        profiler.construct("matrix.merge", merge_assemblies, parts, outdir, "environment")
+    print(f"matrix: {len(configs)} (env, region) pair(s), {len(groups)} environment(s), {workers} worker(s)",
+          file=sys.stderr)
+    failed = [ result for result in results if result["violations"] ]
+    for result in failed:
+        for violation in result["violations"]:
+            print(f"BUDGET {violation}", file=sys.stderr)
+        print(f"{len(result['violations'])} violation(s) of {budget_path(result['env'])}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
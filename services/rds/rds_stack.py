@@ -2,21 +2,26 @@
     Dependency: vpc, security-group
 '''
 from constructs import Construct
-from aws_cdk import Stack, Duration, RemovalPolicy, aws_iam, aws_kms, aws_ec2, aws_logs, aws_rds
+from aws_cdk import Stack, Duration, RemovalPolicy, aws_iam, aws_ec2, aws_logs, aws_rds
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
+from capacity import CapacityPlan
 
 class RdsStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, capacity: CapacityPlan, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.vpc = vpc
         self.project = project
+        self.shared = shared
+        self.capacity = capacity
         self.security_group = security_group
         self.role = dict()
         self.kms_key = dict()
         
         # subnet group
         self.subnet_group = aws_rds.SubnetGroup(self, "rds-subnetgroup",
-            subnet_group_name=f"{self.project['prefix']}-rds-subnetgroup",
+            subnet_group_name=self.project.resource_name("rds-subnetgroup"),
             description="vpc's description",
             vpc=self.vpc,
             vpc_subnets=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PRIVATE_ISOLATED),
@@ -24,7 +29,7 @@ class RdsStack(Stack):
         
         # IAM role for cloudwatch to monitoring and logging
         self.role['monitoring'] = aws_iam.Role(self, "rds-monitoring-role",
-            role_name   = f"{project['prefix']}-role-rds-monitoring",
+            role_name   = project.resource_name("role-rds-monitoring"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("monitoring.rds.amazonaws.com"),
             external_ids=None,
@@ -33,13 +38,13 @@ class RdsStack(Stack):
             path=None,
             permissions_boundary=None,
             managed_policies=[
-                aws_iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AmazonRDSEnhancedMonitoringRole")
+                self.shared.managed_policy("service-role/AmazonRDSEnhancedMonitoringRole")
             ]
         )
         
         # kms
-        self.kms_key['rds'] = aws_kms.Key(self, "cmk-rds",
-            alias               = f"alias/{project['prefix']}-rds",
+        self.kms_key['rds'] = self.shared.key(self, "cmk-rds", "rds",
+            alias               = project.alias("rds"),
             description         = "",
             admins              = None,
             enabled             = True,
@@ -62,11 +67,11 @@ class RdsStack(Stack):
                 version=aws_rds.AuroraMysqlEngineVersion.VER_2_09_2),
             description="aurora-mysql's paramter-group",
             parameters={
-                "max_connections": "1500"
+                "max_connections": str(self.capacity.db_max_connections)
             })
         # database cluster
         aws_rds.DatabaseCluster(self, "aurora_mysql",
-            cluster_identifier=f"{self.project['prefix']}-rds-aurora-mysql",
+            cluster_identifier=self.project.resource_name("rds-aurora-mysql"),
             instance_identifier_base=None,
             engine=aws_rds.DatabaseClusterEngine.aurora_mysql(
                 version=aws_rds.AuroraMysqlEngineVersion.VER_2_09_2),
@@ -121,11 +126,11 @@ class RdsStack(Stack):
                 version=aws_rds.AuroraPostgresEngineVersion.VER_12_4),
             description="aurora-postgres's paramter-group",
             parameters={
-                "max_connections": "1500"
+                "max_connections": str(self.capacity.db_max_connections)
             })
         # database cluster
         aws_rds.DatabaseCluster(self, "aurora_postgres",
-            cluster_identifier=f"{self.project['prefix']}-rds-aurora-postgres",
+            cluster_identifier=self.project.resource_name("rds-aurora-postgres"),
             instance_identifier_base=None,
             engine=aws_rds.DatabaseClusterEngine.aurora_postgres(
                 version=aws_rds.AuroraPostgresEngineVersion.VER_12_4),
@@ -179,7 +184,7 @@ class RdsStack(Stack):
                 version=aws_rds.AuroraMysqlEngineVersion.VER_2_07_1),
             description="aurora-mysql's paramter-group",
             parameters={
-                "max_connections": "1500"
+                "max_connections": str(self.capacity.db_max_connections)
             })
         # serverless cluster
         aws_rds.ServerlessCluster(self, "aurora_mysql_serverless",
@@ -187,7 +192,7 @@ class RdsStack(Stack):
                 version=aws_rds.AuroraMysqlEngineVersion.VER_2_07_1),
             vpc=self.vpc,
             backup_retention=None,
-            cluster_identifier=f"{self.project['prefix']}-aurora-mysql-serverless",
+            cluster_identifier=self.project.resource_name("aurora-mysql-serverless"),
             credentials=None,
             default_database_name="db",
             deletion_protection=None,
@@ -210,13 +215,13 @@ class RdsStack(Stack):
                 version=aws_rds.MysqlEngineVersion.VER_8_0_21),
             description="mysql paramter-group",
             parameters={
-                "max_connections": "1500"
+                "max_connections": str(self.capacity.db_max_connections)
             })
         # database instance
         mysql_instance = aws_rds.DatabaseInstance(self, "mysql",
             engine=aws_rds.DatabaseInstanceEngine.mysql(
                 version=aws_rds.MysqlEngineVersion.VER_8_0_21),
-            instance_identifier=f"{self.project['prefix']}-mysql",
+            instance_identifier=self.project.resource_name("mysql"),
             instance_type=aws_ec2.InstanceType.of(
                 instance_class=aws_ec2.InstanceClass.BURSTABLE3,
                 instance_size=aws_ec2.InstanceSize.MICRO
@@ -277,7 +282,7 @@ class RdsStack(Stack):
         # read-replica        
         # aws_rds.DatabaseInstanceReadReplica(self, "mysql-read-replica",
         #     source_database_instance=mysql_instance,
-        #     instance_identifier=f"{self.project['prefix']}-mysql-rr1",
+        #     instance_identifier=self.project.resource_name("mysql-rr1"),
         #     instance_type=aws_ec2.InstanceType.of(
         #         instance_class=aws_ec2.InstanceClass.BURSTABLE3,
         #         instance_size=aws_ec2.InstanceSize.MICRO
@@ -334,13 +339,13 @@ class RdsStack(Stack):
                 version=aws_rds.PostgresEngineVersion.VER_13_1),
             description="postgres paramter-group",
             parameters={
-                "max_connections": "1500"
+                "max_connections": str(self.capacity.db_max_connections)
             })
         # database instance
         aws_rds.DatabaseInstance(self, "postgres",
             engine=aws_rds.DatabaseInstanceEngine.postgres(
                 version=aws_rds.PostgresEngineVersion.VER_13_1),
-            instance_identifier=f"{self.project['prefix']}-postgres",
+            instance_identifier=self.project.resource_name("postgres"),
             instance_type=aws_ec2.InstanceType.of(
                 instance_class=aws_ec2.InstanceClass.BURSTABLE3,
                 instance_size=aws_ec2.InstanceSize.MICRO
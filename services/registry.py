@@ -0,0 +1,115 @@
+'''
+    Stack registry
+    Each stack is registered with its name, construct id and the stacks it depends on.
+    The app builds only the selected stacks and their dependencies.
+
+    Selection example:
+        cdk deploy -c stacks=s3 dev-cdkworkshop-s3
+        cdk synth  -c stacks=ecs,cloudfront
+    If nothing is selected, every registered stack is built except the ones registered
+    with default=False(examples), which are built only when selected.
+
+    Stack classes are given as "package.module:Class" and imported only when
+    the stack is built(see tools/startup.py).
+'''
+from tools.startup import StartupProfiler
+
+class StackSpec:
+    def __init__(self, name: str, construct_id: str, stack_class: str, depends_on: list, factory, inputs: list = (),
+                 default: bool = True) -> None:
+        self.name         = name
+        self.construct_id = construct_id
+        self.stack_class  = stack_class
+        self.depends_on   = list(depends_on)
+        self.factory      = factory
+        # files/directories read by the stack(userdata, policy json, lambda source), used by synth_cache.py
+        self.inputs       = list(inputs)
+        # part of the default selection(nothing selected, "cdk deploy --all")
+        self.default      = default
+
+
+class StackRegistry:
+    def __init__(self, profiler: StartupProfiler = None) -> None:
+        # Registration order is kept, so the build order is the same as before.
+        self.specs    = dict()
+        self.profiler = profiler or StartupProfiler(enabled=False)
+        # Called with each stack class after it is loaded, may return a wrapped class(tree_stats.py).
+        self.class_hooks = list()
+
+    def stack(self, name: str, construct_id: str, stack_class: str, depends_on: list = (), inputs: list = (),
+              default: bool = True):
+        '''
+            Decorator for registering a factory function.
+            The factory is called as factory(stack_class, scope, construct_id, deps),
+            where stack_class is the lazily imported class and
+            deps is a dict of the already built dependency stacks.
+            inputs are the files the stack reads, relative to the project directory.
+            default=False leaves the stack out unless it is selected.
+        '''
+        def decorator(factory):
+            self.register(name, construct_id, stack_class, depends_on, factory, inputs, default)
+            return factory
+        return decorator
+
+    def register(self, name: str, construct_id: str, stack_class: str, depends_on: list, factory, inputs: list = (),
+                 default: bool = True) -> None:
+        if name in self.specs:
+            raise ValueError(f"stack '{name}' is already registered")
+        for dependency in depends_on:
+            if dependency not in self.specs:
+                raise ValueError(f"stack '{name}' depends on unregistered stack '{dependency}'")
+        self.specs[name] = StackSpec(name, construct_id, stack_class, depends_on, factory, inputs, default)
+
+    def parse_selection(self, value) -> list:
+        '''
+            Context value can be a comma separated string("s3,eks") or a list(cdk.json).
+            Both registry names and construct ids are accepted.
+        '''
+        if not value:
+            return list()
+        if isinstance(value, str):
+            value = value.split(",")
+        by_construct_id = { spec.construct_id: name for name, spec in self.specs.items() }
+        selected = list()
+        for item in value:
+            item = item.strip()
+            if not item:
+                continue
+            if item in self.specs:
+                selected.append(item)
+            elif item in by_construct_id:
+                selected.append(by_construct_id[item])
+            else:
+                raise ValueError(
+                    f"unknown stack '{item}', registered stacks: {', '.join(self.specs)}")
+        return selected
+
+    def resolve(self, selected: list = None) -> list:
+        '''
+            Returns the selected stacks and all of their dependencies in build order.
+            Nothing selected means every default stack.
+        '''
+        if not selected:
+            selected = [ name for name, spec in self.specs.items() if spec.default ]
+        required = set()
+        pending  = list(selected)
+        while pending:
+            name = pending.pop()
+            if name in required:
+                continue
+            required.add(name)
+            pending.extend(self.specs[name].depends_on)
+        # dependencies are always registered before their dependents
+        return [ name for name in self.specs if name in required ]
+
+    def build(self, scope, selected: list = None) -> dict:
+        stacks = dict()
+        for name in self.resolve(selected):
+            spec = self.specs[name]
+            deps = { dependency: stacks[dependency] for dependency in spec.depends_on }
+            stack_class = self.profiler.load(spec.stack_class)
+            for hook in self.class_hooks:
+                stack_class = hook(stack_class)
+            stacks[name] = self.profiler.construct(
+                name, spec.factory, stack_class, scope, spec.construct_id, deps)
+        return stacks
@@ -3,18 +3,21 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, Duration, RemovalPolicy, aws_iam, aws_kms, aws_s3
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
 
 class S3Stack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.project = project
+        self.shared = shared
         self.kms_key = dict()
         self.s3_bucket = dict()
         # KMS
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_kms/Key.html
-        self.kms_key['s3-bucket'] = aws_kms.Key(self, "kms-s3-bucket",
-            alias                    = f"alias/{project['prefix']}-s3-bucket",
+        self.kms_key['s3-bucket'] = self.shared.key(self, "kms-s3-bucket", "s3",
+            alias                    = project.alias("s3-bucket"),
             description              = "",
             admins                   = None,
             enabled                  = True,
@@ -5,9 +5,11 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, aws_iam
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
 
 class IamStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # initial
         self.policy = dict()
@@ -15,7 +17,7 @@ class IamStack(Stack):
         # AWS Custom Policy
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_iam/ManagedPolicy.html
         self.policy["sample"] = aws_iam.ManagedPolicy(self, "policy-sample",
-            managed_policy_name = f"{project['prefix']}-policy-sample",
+            managed_policy_name = project.resource_name("policy-sample"),
             description         = "",
             statements=[
                 aws_iam.PolicyStatement(
@@ -48,12 +50,12 @@ class IamStack(Stack):
         # Existing Role
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_iam/Role.html
         self.role['team'] = aws_iam.Role.from_role_arn(self, "team",
-            role_arn="arn:aws:iam::242593025403:role/AdministratorRole",
+            role_arn=project.role_arn("AdministratorRole"),
             mutable=True)
         # AWS Custom Role
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_iam/Role.html
         self.role['foo-app'] = aws_iam.Role(self, "foo-app",
-            role_name   = f"{project['prefix']}-role-foo-app",
+            role_name   = project.resource_name("role-foo-app"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("ec2.amazonaws.com"),
             # assumed_by  = aws_iam.CompositePrincipal(
@@ -100,7 +102,7 @@ class IamStack(Stack):
         )
         # Attach AWS Managed Policy
         self.role['foo-app'].add_managed_policy(
-            aws_iam.ManagedPolicy.from_aws_managed_policy_name("service-role/AmazonEC2RoleforSSM"))
+            shared.managed_policy("service-role/AmazonEC2RoleforSSM"))
         # Attach Custom Managed Policy
         self.role['foo-app'].add_managed_policy(
             self.policy['sample'])
\ No newline at end of file
@@ -5,16 +5,18 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, Duration, RemovalPolicy, aws_iam, aws_kms
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
 
 class KmsStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.kms_key = dict()
         # KMS CMK for EKS
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_kms/Key.html
-        self.kms_key['eks-cluster'] = aws_kms.Key(self, "eks-cluster",
-            alias                    = f"alias/{project['prefix']}-eks-cluster",
+        self.kms_key['eks-cluster'] = shared.key(self, "eks-cluster", "eks-cluster",
+            alias                    = project.alias("eks-cluster"),
             description              = "",
             admins                   = None,
             enabled                  = True,
@@ -35,11 +37,15 @@ class KmsStack(Stack):
                         not_resources=None,
                         principals=[
                             aws_iam.AccountRootPrincipal(),
-                            aws_iam.ArnPrincipal(arn="arn:aws:iam::242593025403:role/AdministratorRole"),
-                            aws_iam.ArnPrincipal(arn="arn:aws:iam::242593025403:role/PowerUserRole")
+                            aws_iam.ArnPrincipal(arn=project.role_arn("AdministratorRole")),
+                            aws_iam.ArnPrincipal(arn=project.role_arn("PowerUserRole"))
                         ],
                         resources=["*"]
                     )
                 ]
             )
-        )
\ No newline at end of file
+        )
+        # Shared CMK of data plane services, only with "shared-kms" context(shared_resources.py)
+        data_plane_key = shared.data_plane_key(self)
+        if data_plane_key:
+            self.kms_key['data-plane'] = data_plane_key
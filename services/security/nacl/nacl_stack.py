@@ -2,12 +2,16 @@
     Dependency: vpc
     VPC Recommended Network ACL Rules
     -> https://docs.aws.amazon.com/ko_kr/vpc/latest/userguide/VPC_Scenario2.html#nacl-rules-scenario-2
+    Rules: security/nacl/rules.json, compiled by nacl_compiler.py and checked against its reference flows
 '''
 from constructs import Construct
 from aws_cdk import Stack, Tags, aws_ec2
+from tools.project_config import ProjectConfig
+from tools.nacl_compiler import ALL_PORTS, PROTOCOLS, compile_acl
+import json
 
 class NaclStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, vpc, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.vpc = vpc
@@ -45,171 +49,50 @@ class NaclStack(Stack):
                 subnet_type=aws_ec2.SubnetType.PRIVATE_ISOLATED))
         # Define NACL Rule
         # https://docs.aws.amazon.com/cdk/api/latest/python/aws_cdk.aws_ec2/NetworkAclEntry.html
-        '''
-            private subnets nacl
-        '''
-        #Ingress
-        self.add_ingress_rule(
-            name='public',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(80,80),
-            cidr_blocks=aws_ec2.AclCidr.ipv4('0.0.0.0/0'),
-            subnets=None)
-        self.add_ingress_rule(
-            name='public',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(443,443),
-            cidr_blocks=aws_ec2.AclCidr.ipv4('0.0.0.0/0'),
-            subnets=None)
-        self.add_ingress_rule(
-            name='public',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(1024,65535),
-            cidr_blocks=aws_ec2.AclCidr.ipv4('0.0.0.0/0'),
-            subnets=None)
-        #Egress
-        self.add_egress_rule(
-            name='public',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(80,80),
-            cidr_blocks=aws_ec2.AclCidr.ipv4('0.0.0.0/0'),
-            subnets=None)
-        self.add_egress_rule(
-            name='public',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(443,443),
-            cidr_blocks=aws_ec2.AclCidr.ipv4('0.0.0.0/0'),
-            subnets=None)
-        self.add_egress_rule(
-            name='public',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(1024,65535),
-            cidr_blocks=aws_ec2.AclCidr.ipv4('0.0.0.0/0'),
-            subnets=None)
-        self.add_egress_rule(
-            name='public',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(8080,8080),
-            cidr_blocks=None,
-            subnets=self.vpc.private_subnets)
-        
-        '''
-            private subnets nacl
-        '''
-        #Ingress
-        self.add_ingress_rule(
-            name='private',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(8080,8080),
-            cidr_blocks=None,
-            subnets=self.vpc.public_subnets)
-        self.add_ingress_rule(
-            name='private',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(1024,65535),
-            cidr_blocks=aws_ec2.AclCidr.ipv4('0.0.0.0/0'),
-            subnets=None)
-        #Egress
-        self.add_egress_rule(
-            name='private',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(80,80),
-            cidr_blocks=aws_ec2.AclCidr.ipv4('0.0.0.0/0'),
-            subnets=None)
-        self.add_egress_rule(
-            name='private',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(443,443),
-            cidr_blocks=aws_ec2.AclCidr.ipv4('0.0.0.0/0'),
-            subnets=None)
-        self.add_egress_rule(
-            name='private',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(1024,65535),
-            cidr_blocks=None,
-            subnets=self.vpc.public_subnets)
-        self.add_egress_rule(
-            name='private',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(2049,2049),
-            cidr_blocks=None,
-            subnets=self.vpc.isolated_subnets)
-        self.add_egress_rule(
-            name='private',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(3306,3306),
-            cidr_blocks=None,
-            subnets=self.vpc.isolated_subnets)
-        self.add_egress_rule(
-            name='private',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(6379,6379),
-            cidr_blocks=None,
-            subnets=self.vpc.isolated_subnets)
+        # rules.json is compiled(nacl_compiler.py): merged ranges and cidrs, ordered by weight, numbered
+        with open("./security/nacl/rules.json") as f:
+            rules = json.load(f)
+        names = {
+            "any":     [ "0.0.0.0/0" ],
+            "public":  [ subnet.ipv4_cidr_block for subnet in self.vpc.public_subnets ],
+            "private": [ subnet.ipv4_cidr_block for subnet in self.vpc.private_subnets ],
+            "data":    [ subnet.ipv4_cidr_block for subnet in self.vpc.isolated_subnets ],
+        }
+        for name in self.nacl:
+            self.add_rules(name, compile_acl(rules[name], names))
 
-        '''
-            data subnets nacls
-        '''
-        #Ingress
-        self.add_ingress_rule(
-            name='data',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(2049,2049),
-            cidr_blocks=None,
-            subnets=self.vpc.private_subnets)
-        self.add_ingress_rule(
-            name='data',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(3306,3306),
-            cidr_blocks=None,
-            subnets=self.vpc.private_subnets)
-        self.add_ingress_rule(
-            name='data',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(6379,6379),
-            cidr_blocks=None,
-            subnets=self.vpc.private_subnets)
-        #Egress
-        self.add_egress_rule(
-            name='data',
-            tcp_port_range=aws_ec2.AclTraffic.tcp_port_range(1024,65535),
-            cidr_blocks=None,
-            subnets=self.vpc.private_subnets)
-
-    def add_ingress_rule(self, name, tcp_port_range, cidr_blocks=None, subnets=None):
-        if cidr_blocks:
-            self.rule_number[name]+=5
-            aws_ec2.NetworkAclEntry(self, f"nacl-{name}-ingress-{self.rule_number[name]}",
-                network_acl=self.nacl[name],
-                cidr=cidr_blocks,
-                rule_number=self.rule_number[name],
-                traffic=tcp_port_range,
-                direction=aws_ec2.TrafficDirection.INGRESS,
-                network_acl_entry_name=None,
-                rule_action=aws_ec2.Action.ALLOW)
-        if subnets:
-            for subnet in subnets:
-                self.rule_number[name]+=5
-                aws_ec2.NetworkAclEntry(self, f"nacl-{name}-ingress-{self.rule_number[name]}",
+    def add_rules(self, name, compiled: dict):
+        for direction, entries in compiled.items():
+            for entry in entries:
+                aws_ec2.NetworkAclEntry(self, f"nacl-{name}-{direction}-{entry.rule_number}",
                     network_acl=self.nacl[name],
-                    cidr=aws_ec2.AclCidr.ipv4(subnet.ipv4_cidr_block),
-                    rule_number=self.rule_number[name],
-                    traffic=tcp_port_range,
-                    direction=aws_ec2.TrafficDirection.INGRESS,
+                    cidr=aws_ec2.AclCidr.ipv4(str(entry.cidr)),
+                    rule_number=entry.rule_number,
+                    traffic=self.traffic(entry),
+                    direction=aws_ec2.TrafficDirection.EGRESS if entry.egress else aws_ec2.TrafficDirection.INGRESS,
                     network_acl_entry_name=None,
-                    rule_action=aws_ec2.Action.ALLOW)
+                    rule_action=aws_ec2.Action.ALLOW if entry.action == "allow" else aws_ec2.Action.DENY)
+                self.rule_number[name] = max(self.rule_number[name], entry.rule_number)
 
-    def add_egress_rule(self, name, tcp_port_range, cidr_blocks=None, subnets=None):
-        if cidr_blocks:
-            self.rule_number[name]+=5
-            aws_ec2.NetworkAclEntry(self, f"nacl-{name}-ingress-{self.rule_number[name]}",
-                network_acl=self.nacl[name],
-                cidr=cidr_blocks,
-                rule_number=self.rule_number[name],
-                traffic=tcp_port_range,
-                direction=aws_ec2.TrafficDirection.EGRESS,
-                network_acl_entry_name=None,
-                rule_action=aws_ec2.Action.ALLOW)
-        if subnets:
-            for subnet in subnets:
-                self.rule_number[name]+=5
-                aws_ec2.NetworkAclEntry(self, f"nacl-{name}-ingress-{self.rule_number[name]}",
-                    network_acl=self.nacl[name],
-                    cidr=aws_ec2.AclCidr.ipv4(subnet.ipv4_cidr_block),
-                    rule_number=self.rule_number[name],
-                    traffic=tcp_port_range,
-                    direction=aws_ec2.TrafficDirection.EGRESS,
-                    network_acl_entry_name=None,
-                    rule_action=aws_ec2.Action.ALLOW)
+    @staticmethod
+    def traffic(entry) -> aws_ec2.AclTraffic:
+        ports = entry.ports or ALL_PORTS
+        if entry.protocol == PROTOCOLS["tcp"]:
+            return aws_ec2.AclTraffic.tcp_port_range(*ports)
+        if entry.protocol == PROTOCOLS["udp"]:
+            return aws_ec2.AclTraffic.udp_port_range(*ports)
+        if entry.protocol == PROTOCOLS["icmp"]:
+            return aws_ec2.AclTraffic.icmp(code=-1, type=-1 if entry.icmp_type is None else entry.icmp_type)
+        if entry.protocol == PROTOCOLS["all"]:
+            return aws_ec2.AclTraffic.all_traffic()
+        raise ValueError(f"protocol {entry.protocol} is not supported by AclTraffic")
 
     def add_nacl(self, name, subnet_selection):
         self.rule_number[name] = 0
         self.nacl[name] = aws_ec2.NetworkAcl(self, f"nacl-{name}",
             vpc=self.vpc,
-            network_acl_name=f"{self.project['prefix']}-nacl-{name}",
+            network_acl_name=f"{self.project.prefix}-nacl-{name}",
             subnet_selection=subnet_selection)
         Tags.of(self.nacl[name]).add(
             "Name",
-            f"{self.project['prefix']}-nacl-{name}")
\ No newline at end of file
+            f"{self.project.prefix}-nacl-{name}")
\ No newline at end of file
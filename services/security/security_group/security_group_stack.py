@@ -1,78 +1,118 @@
 '''
     Dependncy: VpcStack
+    Security groups are tiers of a SecurityGroupGraph(sg_graph.py), rules are declared as flows between tiers
 '''
 from constructs import Construct
 from aws_cdk import Stack, Tags, aws_ec2
+from tools.project_config import ProjectConfig
+from tools.sg_graph import ALL_PORTS, PROTOCOLS, SecurityGroupGraph
 
 class SecurityGroupStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, vpc, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.vpc = vpc
         self.project = project
         self.security_group = dict()
+        self.graph = SecurityGroupGraph(names={ "any": [ "0.0.0.0/0" ] })
         # Security Group
         self.add_security_group(
             name = "example",
             description = "",
             allow_all_outbound = True)
         '''
-            Security Group Rules
-            1. Ingress
-            1-1. TCP, Chained Security Group
-            1-2. All Traffic, IPv4 CIDR
-            2. Egress
-            2-1. TCP, Chained Security Group
-            2-2. All Traffic, IPv4 CIDR for Specific address
+            Security Group Flows(sg_graph.py derives the ingress and egress rules of both ends)
+            1. TCP, Chained Security Group
+            2. All Traffic, IPv4 CIDR
+            3. All Traffic, IPv4 CIDR for Specific address
+            Rules covered by a broader rule are dropped: 2 covers the ingress of 1, allow_all_outbound covers
+            the egress rules. Rules added by the other stacks(elb, ecs, ...) are not part of the graph.
         '''
-        # 1-1. TCP, Chained Security Group
-        self.security_group['example'].add_ingress_rule(
-            peer = self.security_group['example'],
-            connection = aws_ec2.Port(
-                protocol=aws_ec2.Protocol.TCP,
-                string_representation="1", # Unique value
-                from_port=443,
-                to_port=443),
-            description = "")
-        
-        # 1-2. All Traffic, IPv4 CIDR
-        self.security_group['example'].add_ingress_rule(
-            peer = aws_ec2.Peer.ipv4('0.0.0.0/0'),
-            connection = aws_ec2.Port(
-                protocol=aws_ec2.Protocol.ALL,
-                string_representation="2", # Unique value
-                from_port=None,
-                to_port=None),
-            description = "")
-
-        # 2-1. TCP, Chained Security Group
-        self.security_group['example'].add_egress_rule(
-            peer = self.security_group['example'],
-            connection = aws_ec2.Port(
-                protocol=aws_ec2.Protocol.TCP,
-                string_representation="3", # Unique value
-                from_port=3306,
-                to_port=3306),
-            description = "")
-
-        # 2-2. All Traffic, IPv4 CIDR
-        self.security_group['example'].add_egress_rule(
-            peer = aws_ec2.Peer.ipv4('8.8.8.8/32'),
-            connection = aws_ec2.Port(
-                protocol=aws_ec2.Protocol.ALL,
-                string_representation="4", # Unique value
-                from_port=None,
-                to_port=None),
-            description = "")
+        # 1. TCP, Chained Security Group
+        self.graph.flow("example", "example", 443, protocol="tcp")
+        # 2. All Traffic, IPv4 CIDR
+        self.graph.flow("any", "example", protocol="all")
+        # 3. All Traffic, IPv4 CIDR for Specific address
+        self.graph.flow("example", "8.8.8.8/32", protocol="all")
+        add_graph_rules(self.security_group, self.graph)
     '''
         This function create security group, It also tagging for operate efficient.
     '''
     def add_security_group(self, name: str, description: str, allow_all_outbound: bool):
         self.security_group[name] = aws_ec2.SecurityGroup(self, name,
             vpc                 = self.vpc,
-            security_group_name = f"{self.project['prefix']}-{name}-sg",
+            security_group_name = f"{self.project.prefix}-{name}-sg",
             description         = description,
             allow_all_outbound  = allow_all_outbound)
+        self.graph.tier(name, allow_all_outbound=allow_all_outbound)
         Tags.of(self.security_group[name]).add(
             "Name",
-            f"{self.project['prefix']}-{name}-sg")
\ No newline at end of file
+            f"{self.project.prefix}-{name}-sg")
+
+
+'''
+    Compiled rules of a SecurityGroupGraph on the security groups of its tiers(name -> aws_ec2.SecurityGroup).
+    Inline rules with a tier peer reference the group id(Peer.security_group_id), the other tier peers are the
+    security group itself and CDK creates a SecurityGroupIngress/SecurityGroupEgress resource.
+    The logical id of such a resource ends with the string representation of its Port. representations maps
+    rule_key(rule) to the representation of a rule that is already deployed, so it keeps its logical id:
+    a new id would make CloudFormation create the same rule again before deleting the old one(InvalidPermission.Duplicate).
+'''
+PORT_PROTOCOLS = {
+    PROTOCOLS["all"]:  aws_ec2.Protocol.ALL,
+    PROTOCOLS["icmp"]: aws_ec2.Protocol.ICMP,
+    PROTOCOLS["tcp"]:  aws_ec2.Protocol.TCP,
+    PROTOCOLS["udp"]:  aws_ec2.Protocol.UDP,
+}
+
+
+def add_graph_rules(security_group: dict, graph: SecurityGroupGraph, representations: dict = None) -> None:
+    representations = representations or dict()
+    for name, directions in graph.compiled.items():
+        for rule in directions["ingress"]:
+            security_group[name].add_ingress_rule(
+                peer = graph_peer(security_group, rule),
+                connection = graph_port(rule, representations.get(rule_key(rule))),
+                description = rule.description)
+        for rule in directions["egress"]:
+            security_group[name].add_egress_rule(
+                peer = graph_peer(security_group, rule),
+                connection = graph_port(rule, representations.get(rule_key(rule))),
+                description = rule.description)
+
+
+def rule_key(rule) -> tuple:
+    '''
+        (group, direction, peer, protocol name, ports or None)
+        e.g. ("eks-nodegroup", "ingress", "eks-cluster-controlplane", "tcp", (443, 443))
+    '''
+    protocol = next(name for name, number in PROTOCOLS.items() if number == rule.protocol)
+    return (rule.group, rule.direction, str(rule.peer), protocol, rule.ports)
+
+
+def graph_peer(security_group: dict, rule) -> aws_ec2.IPeer:
+    if not isinstance(rule.peer, str):
+        return aws_ec2.Peer.ipv4(str(rule.peer))
+    if rule.inline:
+        return aws_ec2.Peer.security_group_id(security_group[rule.peer].security_group_id)
+    return security_group[rule.peer]
+
+
+def graph_port(rule, representation: str = None) -> aws_ec2.Port:
+    ports = rule.ports or ALL_PORTS
+    if representation:
+        ported = rule.protocol not in (PROTOCOLS["all"], PROTOCOLS["icmp"])
+        return aws_ec2.Port(
+            protocol=PORT_PROTOCOLS[rule.protocol],
+            string_representation=representation,
+            from_port=ports[0] if ported else None,
+            to_port=ports[1] if ported else None)
+    if rule.protocol == PROTOCOLS["tcp"]:
+        return aws_ec2.Port.tcp(ports[0]) if ports[0] == ports[1] else aws_ec2.Port.tcp_range(*ports)
+    if rule.protocol == PROTOCOLS["udp"]:
+        return aws_ec2.Port.udp(ports[0]) if ports[0] == ports[1] else aws_ec2.Port.udp_range(*ports)
+    if rule.protocol == PROTOCOLS["icmp"]:
+        return aws_ec2.Port.all_icmp()
+    if rule.protocol == PROTOCOLS["all"]:
+        return aws_ec2.Port.all_traffic()
+    raise ValueError(f"protocol {rule.protocol} is not supported by Port")
\ No newline at end of file
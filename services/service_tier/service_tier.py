@@ -0,0 +1,360 @@
+'''
+    Service tier(L3 construct)
+    ALB + tuned target group + ASG or ECS service + target tracking scaling + alarms + optional CloudFront,
+    tuned by a performance profile:
+        latency-sensitive  least outstanding requests, short health checks and drain, scales early(CPU 50%),
+                           tight p99 alarm, CDN with a short TTL
+        throughput         round robin, scales on requests per target at the planned rate(CPU 70%), CDN
+        batch              long idle timeout and drain, scales on CPU only(80%), no CDN
+
+    Scaling bounds and requests per target come from the capacity plan of the env(capacity.py).
+    An ASG is created unless a task_definition is given, then an ECS service(Fargate or EC2) is created.
+
+    Usage:
+        tier = ServiceTier(self, "web",
+            project           = self.project,
+            capacity          = self.capacity,
+            vpc               = self.vpc,
+            profile           = "throughput",
+            port              = 5000,
+            health_check_path = "/healthcheck",
+            instance_type     = aws_ec2.InstanceType("t3.large"),
+            machine_image     = ami,
+            user_data         = aws_ec2.UserData.custom(userdata))
+        tier.load_balancer, tier.target_group, tier.auto_scaling_group / tier.service, tier.distribution
+'''
+from constructs import Construct
+from aws_cdk import (
+    Duration, aws_autoscaling, aws_cloudfront, aws_cloudfront_origins, aws_cloudwatch, aws_ec2, aws_ecs,
+    aws_elasticloadbalancingv2,
+)
+from tools.project_config import ProjectConfig
+from capacity import CapacityPlan
+
+class PerformanceProfile:
+    __slots__ = (
+        "name", "load_balancing", "deregistration_delay", "slow_start", "idle_timeout",
+        "health_check_interval", "health_check_timeout", "healthy_threshold", "unhealthy_threshold",
+        "health_check_grace", "cpu_target", "request_target_ratio", "scale_in_cooldown", "scale_out_cooldown",
+        "p99_latency_alarm_ms", "error_alarm_count", "cdn_ttl",
+    )
+
+    def __init__(self, name: str, load_balancing: str, deregistration_delay: int, slow_start: int, idle_timeout: int,
+                 health_check_interval: int, health_check_timeout: int, healthy_threshold: int, unhealthy_threshold: int,
+                 health_check_grace: int, cpu_target: int, request_target_ratio: float, scale_in_cooldown: int,
+                 scale_out_cooldown: int, p99_latency_alarm_ms: int, error_alarm_count: int, cdn_ttl: int) -> None:
+        '''
+            Durations in seconds.
+            request_target_ratio: share of the planned requests per target(capacity.py) a target is scaled at,
+                                  None scales on CPU only
+            cdn_ttl:              default TTL of the CDN, None creates no CDN by default
+        '''
+        if health_check_timeout >= health_check_interval:
+            raise ValueError(f"{name}: health_check_timeout must be shorter than health_check_interval")
+        if not 0 < cpu_target <= 100:
+            raise ValueError(f"{name}: cpu_target {cpu_target} must be a percentage")
+        self.name                  = name
+        self.load_balancing        = load_balancing
+        self.deregistration_delay  = deregistration_delay
+        self.slow_start            = slow_start
+        self.idle_timeout          = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout  = health_check_timeout
+        self.healthy_threshold     = healthy_threshold
+        self.unhealthy_threshold   = unhealthy_threshold
+        self.health_check_grace    = health_check_grace
+        self.cpu_target            = cpu_target
+        self.request_target_ratio  = request_target_ratio
+        self.scale_in_cooldown     = scale_in_cooldown
+        self.scale_out_cooldown    = scale_out_cooldown
+        self.p99_latency_alarm_ms  = p99_latency_alarm_ms
+        self.error_alarm_count     = error_alarm_count
+        self.cdn_ttl               = cdn_ttl
+
+
+PROFILES = {
+    "latency-sensitive": PerformanceProfile("latency-sensitive",
+        load_balancing        = "LEAST_OUTSTANDING_REQUESTS",
+        deregistration_delay  = 30,
+        slow_start            = 30,
+        idle_timeout          = 60,
+        health_check_interval = 10,
+        health_check_timeout  = 5,
+        healthy_threshold     = 2,
+        unhealthy_threshold   = 2,
+        health_check_grace    = 60,
+        cpu_target            = 50,
+        request_target_ratio  = 0.8,
+        scale_in_cooldown     = 300,
+        scale_out_cooldown    = 60,
+        p99_latency_alarm_ms  = 300,
+        error_alarm_count     = 5,
+        cdn_ttl               = 3600),
+    "throughput": PerformanceProfile("throughput",
+        load_balancing        = "ROUND_ROBIN",
+        deregistration_delay  = 60,
+        slow_start            = 30,
+        idle_timeout          = 60,
+        health_check_interval = 10,
+        health_check_timeout  = 5,
+        healthy_threshold     = 2,
+        unhealthy_threshold   = 2,
+        health_check_grace    = 120,
+        cpu_target            = 70,
+        request_target_ratio  = 1.0,
+        scale_in_cooldown     = 180,
+        scale_out_cooldown    = 60,
+        p99_latency_alarm_ms  = 1000,
+        error_alarm_count     = 20,
+        cdn_ttl               = 86400),
+    "batch": PerformanceProfile("batch",
+        load_balancing        = "ROUND_ROBIN",
+        deregistration_delay  = 300,
+        slow_start            = None,
+        idle_timeout          = 300,
+        health_check_interval = 30,
+        health_check_timeout  = 10,
+        healthy_threshold     = 3,
+        unhealthy_threshold   = 3,
+        health_check_grace    = 120,
+        cpu_target            = 80,
+        request_target_ratio  = None,
+        scale_in_cooldown     = 300,
+        scale_out_cooldown    = 120,
+        p99_latency_alarm_ms  = 30000,
+        error_alarm_count     = 50,
+        cdn_ttl               = None),
+}
+
+
+def get_profile(profile) -> PerformanceProfile:
+    if isinstance(profile, PerformanceProfile):
+        return profile
+    if profile not in PROFILES:
+        raise ValueError(f"unknown performance profile '{profile}', profiles: {', '.join(PROFILES)}")
+    return PROFILES[profile]
+
+
+def _seconds(value):
+    return Duration.seconds(value) if value is not None else None
+
+
+class ServiceTier(Construct):
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, capacity: CapacityPlan, vpc,
+                 profile = "throughput", port: int = 80, health_check_path: str = "/", security_group = None,
+                 internet_facing: bool = True, cdn: bool = None,
+                 instance_type = None, machine_image = None, user_data = None, role = None, key_name: str = None,
+                 cluster = None, task_definition = None, container_name: str = None) -> None:
+        '''
+            construct_id is the tier name, resource names are <prefix>-<construct_id>-*
+            security_group: of the targets(instances or tasks), the ALB gets its own
+            cdn:            CloudFront in front of the ALB, the profile decides when None
+            ASG:            instance_type, machine_image, user_data, role, key_name
+            ECS service:    cluster, task_definition, container_name(default container when None)
+        '''
+        super().__init__(scope, construct_id)
+        # Init
+        self.project            = project
+        self.capacity           = capacity
+        self.vpc                = vpc
+        self.profile            = get_profile(profile)
+        self.port               = port
+        self.security_group     = security_group
+        self.auto_scaling_group = None
+        self.service            = None
+        self.distribution       = None
+        self.alarm              = dict()
+        if task_definition is None and (instance_type is None or machine_image is None):
+            raise ValueError(f"{construct_id}: an ASG tier needs instance_type and machine_image, an ECS tier task_definition")
+
+        # Resources
+        self.create_load_balancer(internet_facing)
+        self.create_target_group(health_check_path, "IP" if task_definition is not None else "INSTANCE")
+        if task_definition is None:
+            self.create_auto_scaling_group(instance_type, machine_image, user_data, role, key_name)
+        else:
+            self.create_service(cluster, task_definition, container_name)
+        self.create_alarms()
+        if cdn is None:
+            cdn = self.profile.cdn_ttl is not None
+        if cdn:
+            self.create_distribution()
+
+    def resource_name(self, suffix: str) -> str:
+        return self.project.resource_name(f"{self.node.id}-{suffix}")
+
+    def request_target(self, requests_per_target: int) -> int:
+        '''
+            Request count target of the profile for a task or an instance target of the capacity plan.
+        '''
+        if self.profile.request_target_ratio is None:
+            return None
+        return int(requests_per_target * self.profile.request_target_ratio)
+
+    def create_load_balancer(self, internet_facing: bool):
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_elasticloadbalancingv2/ApplicationLoadBalancer.html
+        self.load_balancer = aws_elasticloadbalancingv2.ApplicationLoadBalancer(self, "alb",
+            http2_enabled=True,
+            idle_timeout=_seconds(self.profile.idle_timeout),
+            ip_address_type=aws_elasticloadbalancingv2.IpAddressType.IPV4,
+            vpc=self.vpc,
+            internet_facing=internet_facing,
+            load_balancer_name=self.resource_name("alb"),
+            vpc_subnets=aws_ec2.SubnetSelection(
+                subnet_type=aws_ec2.SubnetType.PUBLIC if internet_facing else aws_ec2.SubnetType.PRIVATE_WITH_NAT))
+        self.listener = self.load_balancer.add_listener("listener",
+            port=80,
+            open=True)
+
+    def create_target_group(self, health_check_path: str, target_type: str):
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_elasticloadbalancingv2/ApplicationTargetGroup.html
+        self.target_group = aws_elasticloadbalancingv2.ApplicationTargetGroup(self, "tg",
+            port=self.port,
+            protocol=aws_elasticloadbalancingv2.ApplicationProtocol.HTTP,
+            protocol_version=aws_elasticloadbalancingv2.ApplicationProtocolVersion.HTTP1,
+            load_balancing_algorithm_type=getattr(
+                aws_elasticloadbalancingv2.TargetGroupLoadBalancingAlgorithmType, self.profile.load_balancing),
+            slow_start=_seconds(self.profile.slow_start),
+            deregistration_delay=_seconds(self.profile.deregistration_delay),
+            health_check=aws_elasticloadbalancingv2.HealthCheck(
+                enabled=True,
+                healthy_threshold_count=self.profile.healthy_threshold,
+                unhealthy_threshold_count=self.profile.unhealthy_threshold,
+                interval=_seconds(self.profile.health_check_interval),
+                timeout=_seconds(self.profile.health_check_timeout),
+                path=health_check_path,
+                port=str(self.port),
+                protocol=aws_elasticloadbalancingv2.Protocol.HTTP),
+            target_group_name=self.resource_name("tg"),
+            target_type=getattr(aws_elasticloadbalancingv2.TargetType, target_type),
+            vpc=self.vpc)
+        self.listener.add_target_groups("forward",
+            target_groups=[self.target_group])
+
+    def create_auto_scaling_group(self, instance_type, machine_image, user_data, role, key_name):
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_autoscaling/AutoScalingGroup.html
+        self.auto_scaling_group = aws_autoscaling.AutoScalingGroup(self, "asg",
+            auto_scaling_group_name=self.resource_name("asg"),
+            instance_type=instance_type,
+            machine_image=machine_image,
+            vpc=self.vpc,
+            security_group=self.security_group,
+            vpc_subnets=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PRIVATE_WITH_NAT),
+            key_name=key_name,
+            role=role,
+            block_devices=[
+                aws_autoscaling.BlockDevice(
+                    device_name="/dev/xvda",
+                    volume=aws_autoscaling.BlockDeviceVolume.ebs(
+                        volume_type=aws_autoscaling.EbsDeviceVolumeType.GP3,
+                        volume_size=20,
+                        delete_on_termination=True))
+            ],
+            user_data=user_data,
+            desired_capacity=self.capacity.asg_desired,
+            min_capacity=self.capacity.asg_min,
+            max_capacity=self.capacity.asg_max,
+            health_check=aws_autoscaling.HealthCheck.elb(grace=_seconds(self.profile.health_check_grace)),
+            cooldown=_seconds(self.profile.scale_out_cooldown))
+        self.auto_scaling_group.attach_to_application_target_group(self.target_group)
+        # Target tracking, the ASG cooldown applies to both directions
+        self.auto_scaling_group.scale_on_cpu_utilization("scale-on-cpu",
+            target_utilization_percent=self.profile.cpu_target,
+            estimated_instance_warmup=_seconds(self.profile.health_check_grace))
+        requests_per_target = self.request_target(self.capacity.instance_requests_per_target)
+        if requests_per_target is not None:
+            self.auto_scaling_group.scale_on_request_count("scale-on-request-count",
+                target_requests_per_minute=requests_per_target,
+                estimated_instance_warmup=_seconds(self.profile.health_check_grace))
+
+    def create_service(self, cluster, task_definition, container_name):
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ecs/FargateService.html
+        service_class = aws_ecs.FargateService if isinstance(task_definition, aws_ecs.FargateTaskDefinition) else aws_ecs.Ec2Service
+        self.service = service_class(self, "service",
+            task_definition=task_definition,
+            cluster=cluster,
+            security_groups=[self.security_group] if self.security_group else None,
+            vpc_subnets=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PRIVATE_WITH_NAT),
+            desired_count=self.capacity.ecs_desired_tasks,
+            health_check_grace_period=_seconds(self.profile.health_check_grace),
+            # every task stays in service during a deployment
+            min_healthy_percent=100,
+            max_healthy_percent=200,
+            circuit_breaker=aws_ecs.DeploymentCircuitBreaker(rollback=True),
+            service_name=self.resource_name("service"))
+        self.target_group.add_target(self.service.load_balancer_target(
+            container_name=container_name or task_definition.default_container.container_name,
+            container_port=self.port))
+        scalable_task = self.service.auto_scale_task_count(
+            max_capacity=self.capacity.ecs_max_tasks,
+            min_capacity=self.capacity.ecs_min_tasks)
+        scalable_task.scale_on_cpu_utilization("scale-on-cpu",
+            target_utilization_percent=self.profile.cpu_target,
+            scale_in_cooldown=_seconds(self.profile.scale_in_cooldown),
+            scale_out_cooldown=_seconds(self.profile.scale_out_cooldown))
+        requests_per_target = self.request_target(self.capacity.requests_per_target)
+        if requests_per_target is not None:
+            scalable_task.scale_on_request_count("scale-on-request-count",
+                requests_per_target=requests_per_target,
+                target_group=self.target_group,
+                scale_in_cooldown=_seconds(self.profile.scale_in_cooldown),
+                scale_out_cooldown=_seconds(self.profile.scale_out_cooldown))
+
+    def create_alarms(self):
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_cloudwatch/Alarm.html
+        period = Duration.minutes(1)
+        self.alarm['p99-latency'] = aws_cloudwatch.Alarm(self, "p99-latency",
+            alarm_name=self.resource_name("p99-latency"),
+            metric=self.target_group.metric_target_response_time(statistic="p99", period=period),
+            threshold=self.profile.p99_latency_alarm_ms / 1000,
+            evaluation_periods=3,
+            datapoints_to_alarm=3,
+            comparison_operator=aws_cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            treat_missing_data=aws_cloudwatch.TreatMissingData.NOT_BREACHING)
+        self.alarm['target-5xx'] = aws_cloudwatch.Alarm(self, "target-5xx",
+            alarm_name=self.resource_name("target-5xx"),
+            metric=self.target_group.metric_http_code_target(
+                aws_elasticloadbalancingv2.HttpCodeTarget.TARGET_5XX_COUNT, statistic="Sum", period=period),
+            threshold=self.profile.error_alarm_count,
+            evaluation_periods=3,
+            datapoints_to_alarm=2,
+            comparison_operator=aws_cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            treat_missing_data=aws_cloudwatch.TreatMissingData.NOT_BREACHING)
+        self.alarm['unhealthy-hosts'] = aws_cloudwatch.Alarm(self, "unhealthy-hosts",
+            alarm_name=self.resource_name("unhealthy-hosts"),
+            metric=self.target_group.metric_unhealthy_host_count(statistic="Maximum", period=period),
+            threshold=0,
+            evaluation_periods=3,
+            datapoints_to_alarm=3,
+            comparison_operator=aws_cloudwatch.ComparisonOperator.GREATER_THAN_THRESHOLD,
+            treat_missing_data=aws_cloudwatch.TreatMissingData.NOT_BREACHING)
+
+    def create_distribution(self):
+        ttl = self.profile.cdn_ttl or PROFILES["throughput"].cdn_ttl
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_cloudfront/CachePolicy.html
+        cache_policy = aws_cloudfront.CachePolicy(self, "cache-policy",
+            cache_policy_name=self.resource_name("cache-policy"),
+            cookie_behavior=aws_cloudfront.CacheCookieBehavior.none(),
+            header_behavior=aws_cloudfront.CacheHeaderBehavior.none(),
+            query_string_behavior=aws_cloudfront.CacheQueryStringBehavior.all(),
+            default_ttl=Duration.seconds(ttl),
+            min_ttl=Duration.seconds(0),
+            max_ttl=Duration.days(365),
+            enable_accept_encoding_brotli=True,
+            enable_accept_encoding_gzip=True)
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_cloudfront/Distribution.html
+        self.distribution = aws_cloudfront.Distribution(self, "cdn",
+            default_behavior=aws_cloudfront.BehaviorOptions(
+                origin=aws_cloudfront_origins.LoadBalancerV2Origin(self.load_balancer,
+                    protocol_policy=aws_cloudfront.OriginProtocolPolicy.HTTP_ONLY,
+                    keepalive_timeout=Duration.seconds(60)),
+                allowed_methods=aws_cloudfront.AllowedMethods.ALLOW_ALL,
+                cached_methods=aws_cloudfront.CachedMethods.CACHE_GET_HEAD,
+                viewer_protocol_policy=aws_cloudfront.ViewerProtocolPolicy.REDIRECT_TO_HTTPS,
+                cache_policy=cache_policy,
+                origin_request_policy=aws_cloudfront.OriginRequestPolicy.ALL_VIEWER,
+                compress=True),
+            enabled=True,
+            enable_ipv6=True,
+            http_version=aws_cloudfront.HttpVersion.HTTP2,
+            price_class=aws_cloudfront.PriceClass.PRICE_CLASS_ALL)
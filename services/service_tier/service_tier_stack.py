@@ -0,0 +1,76 @@
+'''
+    Dependency: vpc
+    Example tiers of service_tier.py:
+        web  ASG, throughput profile, CloudFront in front
+        api  Fargate service, latency-sensitive profile, no CloudFront
+'''
+from constructs import Construct
+from aws_cdk import Stack, aws_ec2, aws_ecr, aws_ecs, aws_iam
+from tools.project_config import ProjectConfig
+from shared_resources import SharedResources
+from capacity import CapacityPlan
+from service_tier.service_tier import ServiceTier
+
+class ServiceTierStack(Stack):
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, shared: SharedResources, capacity: CapacityPlan, vpc, **kwargs) -> None:
+        super().__init__(scope, construct_id, **kwargs)
+        # Init
+        self.project  = project
+        self.shared   = shared
+        self.capacity = capacity
+        self.vpc      = vpc
+        self.tier     = dict()
+
+        # Resources
+        self.create_web_tier()
+        self.create_api_tier()
+
+    def create_web_tier(self):
+        role = aws_iam.Role(self, "web-role",
+            role_name   = self.project.resource_name("web-role"),
+            assumed_by  = aws_iam.ServicePrincipal("ec2.amazonaws.com"),
+            managed_policies=[
+                self.shared.managed_policy("service-role/AmazonEC2RoleforSSM")
+            ])
+        with open("./ec2/userdata.sh") as f:
+            userdata = f.read()
+        self.tier['web'] = ServiceTier(self, "web",
+            project           = self.project,
+            capacity          = self.capacity,
+            vpc               = self.vpc,
+            profile           = "throughput",
+            port              = 5000,
+            health_check_path = "/healthcheck",
+            instance_type     = aws_ec2.InstanceType("t3.xlarge"),
+            machine_image     = aws_ec2.MachineImage.latest_amazon_linux(
+                generation=aws_ec2.AmazonLinuxGeneration.AMAZON_LINUX_2),
+            user_data         = aws_ec2.UserData.custom(userdata),
+            role              = role,
+            key_name          = self.project.keypair)
+
+    def create_api_tier(self):
+        cluster = aws_ecs.Cluster(self, "api-cluster",
+            cluster_name       = self.project.resource_name("api-cluster"),
+            container_insights = True,
+            vpc                = self.vpc)
+        task_definition = aws_ecs.FargateTaskDefinition(self, "td-api",
+            cpu              = 1024,
+            memory_limit_mib = 2048,
+            family           = self.project.resource_name("api"))
+        task_definition.add_container("api-container",
+            container_name = "api-container",
+            image          = aws_ecs.ContainerImage.from_ecr_repository(
+                repository = aws_ecr.Repository.from_repository_name(self, "ecr-helloworld-app",
+                    repository_name="helloworld-app"),
+                tag = "20211227.163900"),
+            port_mappings  = [ aws_ecs.PortMapping(container_port=5000) ])
+        self.tier['api'] = ServiceTier(self, "api",
+            project           = self.project,
+            capacity          = self.capacity,
+            vpc               = self.vpc,
+            profile           = "latency-sensitive",
+            port              = 5000,
+            health_check_path = "/healthcheck",
+            cdn               = False,
+            cluster           = cluster,
+            task_definition   = task_definition)
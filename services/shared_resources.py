@@ -0,0 +1,82 @@
+'''
+    Shared KMS keys and IAM managed policies
+    Stacks ask this registry for their KMS keys and AWS managed policies instead of creating them.
+
+    Managed policies:
+        ManagedPolicy.from_aws_managed_policy_name(name) is looked up once per name,
+        every stack and role gets the same object.
+    KMS keys, per (purpose, region):
+        default       each stack keeps its own key, created in the calling stack with the
+                      construct id it passes(the logical ids and templates do not change).
+        shared-kms    data plane purposes(s3, rds, efs, redis) share one CMK per region,
+                      created in the kms stack. Buckets encrypted with it use S3 bucket keys,
+                      so S3 calls KMS once per bucket key instead of once per object.
+
+        cdk synth -c shared-kms=true
+
+    Usage(in a stack):
+        self.kms_key['efs'] = shared.key(self, "efs_cmk", "efs", alias=..., ...)
+        managed_policies=[ shared.managed_policy("service-role/AmazonEC2RoleforSSM") ]
+'''
+import json
+import os
+
+from aws_cdk import Duration, RemovalPolicy, Stack, aws_iam, aws_kms
+
+CONTEXT_KEY = "shared-kms"
+# Purposes that use the shared CMK with "shared-kms" context
+DATA_PLANE_PURPOSES = ("s3", "rds", "efs", "redis")
+
+
+def shared_kms_enabled() -> bool:
+    '''
+        "shared-kms" context(cdk -c shared-kms=true), read before App() is created.
+    '''
+    value = json.loads(os.environ.get("CDK_CONTEXT_JSON", "{}")).get(CONTEXT_KEY)
+    return value not in (None, False, "", "false", "0", 0)
+
+
+class SharedResources:
+    def __init__(self, project, shared_kms: bool = False) -> None:
+        self.project    = project
+        self.shared_kms = shared_kms
+        self._keys      = dict()
+        self._policies  = dict()
+
+    def managed_policy(self, name: str) -> aws_iam.IManagedPolicy:
+        if name not in self._policies:
+            self._policies[name] = aws_iam.ManagedPolicy.from_aws_managed_policy_name(name)
+        return self._policies[name]
+
+    def key(self, scope, construct_id: str, purpose: str, **props) -> aws_kms.IKey:
+        '''
+            KMS key of the purpose for the calling stack, props are the aws_kms.Key props of its own key.
+        '''
+        stack = Stack.of(scope)
+        if self.shared_kms and purpose in DATA_PLANE_PURPOSES:
+            shared = self._keys.get(("data-plane", stack.region))
+            if shared is None:
+                raise ValueError(f"shared-kms: '{stack.node.id}' needs the data plane key, build the kms stack first")
+            return shared
+        memo = (purpose, stack.region, stack.node.path, construct_id)
+        if memo not in self._keys:
+            self._keys[memo] = aws_kms.Key(scope, construct_id, **props)
+        return self._keys[memo]
+
+    def data_plane_key(self, stack: Stack) -> aws_kms.IKey:
+        '''
+            Creates the shared data plane CMK in the stack(kms stack), None without "shared-kms" context.
+        '''
+        if not self.shared_kms:
+            return None
+        memo = ("data-plane", stack.region)
+        if memo not in self._keys:
+            # the key policy trusts the account, grants of other stacks go to their roles' policies
+            self._keys[memo] = aws_kms.Key(stack, "data-plane",
+                alias               = self.project.alias("data-plane"),
+                description         = f"data plane services({', '.join(DATA_PLANE_PURPOSES)})",
+                enabled             = True,
+                enable_key_rotation = True,
+                pending_window      = Duration.days(7),
+                removal_policy      = RemovalPolicy.DESTROY)
+        return self._keys[memo]
@@ -0,0 +1,289 @@
+'''
+    Content-addressed synth cache
+    A stack is rebuilt only when its key changes, otherwise its previous
+    template(and assets) are copied into cdk.out from the cache.
+
+    Stack key:
+        input hash = stack module source + project modules it imports + declared input files
+                     + app.py/registry.py and the project modules they import(tools/ included)
+                     + config/*.json + context + env + aws-cdk-lib version
+                     + input hashes of the stacks it depends on
+        key        = input hash + input hashes of the selected stacks that depend on it
+    Dependents are part of the key because cross-stack references add Outputs/Exports
+    to the producing stack's template. For the same reason a stack is never restored when
+    a stack it depends on is rebuilt: the rebuilt template only exports what the stacks built
+    in the same run import.
+
+    Enable with context:
+        cdk synth -c synth-cache=true
+        cdk synth -c synth-cache=/path/to/cache
+    "false", "0" and "no" turn it off, like the other context switches.
+'''
+import ast
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+DEFAULT_CACHE_DIR = ".synth-cache"
+# Context keys that only control the app itself, they don't change any template.
+IGNORED_CONTEXT   = ("stacks", "synth-cache", "performance-budget")
+CONTEXT_KEY       = "synth-cache"
+OFF_VALUES        = ("", "false", "0", "no", "none")
+
+
+def cache_dir_option(option):
+    '''
+        Cache directory of the "synth-cache" context value: None when the cache is off,
+        DEFAULT_CACHE_DIR for true, the value itself for a path.
+    '''
+    if option is None or str(option).lower() in OFF_VALUES:
+        return None
+    if option is True or str(option).lower() in ("true", "1", "yes"):
+        return DEFAULT_CACHE_DIR
+    return str(option)
+
+
+def _hash_path(digest, path: str) -> None:
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode())
+                _hash_path(digest, file_path)
+    elif os.path.exists(path):
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(65536), b""):
+                digest.update(chunk)
+    else:
+        digest.update(b"<missing>")
+
+
+class SynthCache:
+    def __init__(self, registry, project_dir: str, cache_dir: str = None, salt: dict = None) -> None:
+        self.registry    = registry
+        self.project_dir = os.path.abspath(project_dir)
+        # tools/ is shared by every project of the repository
+        self.search_dirs = (self.project_dir, os.path.dirname(self.project_dir))
+        self.cache_dir   = os.path.join(self.project_dir, cache_dir or DEFAULT_CACHE_DIR)
+        self.salt        = json.dumps(salt or dict(), sort_keys=True, default=str)
+        self._module_files = dict()
+        self._input_hashes = dict()
+
+    @staticmethod
+    def context_salt(context: dict) -> dict:
+        return { key: value for key, value in context.items() if key not in IGNORED_CONTEXT }
+
+    '''
+        Key calculation
+    '''
+    def _module_path(self, module_name: str) -> str:
+        for directory in self.search_dirs:
+            base = os.path.join(directory, *module_name.split("."))
+            for candidate in (base + ".py", os.path.join(base, "__init__.py")):
+                if os.path.exists(candidate):
+                    return candidate
+        return None
+
+    def _local_modules(self, module_name: str) -> list:
+        '''
+            Source files of the module and of every project module it imports(transitively).
+            aws_cdk and other installed packages are covered by the library version in the salt.
+        '''
+        if module_name in self._module_files:
+            return self._module_files[module_name]
+        files   = list()
+        seen    = set()
+        pending = [ module_name ]
+        while pending:
+            name = pending.pop()
+            path = self._module_path(name)
+            if path is None or path in seen:
+                continue
+            seen.add(path)
+            files.append(path)
+            with open(path) as file:
+                tree = ast.parse(file.read(), filename=path)
+            for node in ast.walk(tree):
+                if isinstance(node, ast.Import):
+                    pending.extend(alias.name for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+                    pending.append(node.module)
+                    pending.extend(f"{node.module}.{alias.name}" for alias in node.names)
+        self._module_files[module_name] = sorted(files)
+        return self._module_files[module_name]
+
+    def input_hash(self, name: str) -> str:
+        if name in self._input_hashes:
+            return self._input_hashes[name]
+        spec   = self.registry.specs[name]
+        digest = hashlib.sha256()
+        digest.update(self.salt.encode())
+        digest.update(f"{name}|{spec.construct_id}|{spec.stack_class}".encode())
+        module_name = spec.stack_class.partition(":")[0]
+        # app.py imports shared_resources, capacity, vpc_endpoints, ... every stack is built with them
+        files = self._local_modules(module_name) + self._local_modules("registry") + self._local_modules("app") + [
+            # project values(prefix, keypair, ...) live in the config files, not in app.py
+            os.path.join(self.project_dir, "config"),
+        ]
+        for path in files:
+            digest.update(os.path.relpath(path, self.project_dir).encode())
+            _hash_path(digest, path)
+        for path in spec.inputs:
+            digest.update(path.encode())
+            _hash_path(digest, os.path.join(self.project_dir, path))
+        for dependency in spec.depends_on:
+            digest.update(self.input_hash(dependency).encode())
+        self._input_hashes[name] = digest.hexdigest()
+        return self._input_hashes[name]
+
+    def keys(self, names: list) -> dict:
+        keys = dict()
+        for name in names:
+            dependents = [
+                other for other in names
+                if name in self.registry.resolve([other]) and other != name
+            ]
+            digest = hashlib.sha256(self.input_hash(name).encode())
+            for dependent in sorted(dependents):
+                digest.update(self.input_hash(dependent).encode())
+            keys[name] = digest.hexdigest()
+        return keys
+
+    '''
+        Plan / restore / store
+    '''
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    def plan(self, selected: list = None) -> tuple:
+        '''
+            Returns (names to build, names to restore from cache, keys).
+            Clean stacks that a dirty stack depends on are built too, because the dirty stack
+            needs their constructs, and so is every stack that depends on a built stack:
+            a restored dependent would import exports the rebuilt template no longer has.
+        '''
+        names = self.registry.resolve(selected)
+        keys  = self.keys(names)
+        dirty = [ name for name in names if not os.path.isdir(self._entry_dir(keys[name])) ]
+        build = set(self.registry.resolve(dirty)) if dirty else set()
+        while True:
+            dependents = [
+                name for name in names
+                if name not in build and build & set(self.registry.resolve([name]))
+            ]
+            if not dependents:
+                break
+            build |= set(self.registry.resolve(dependents))
+        restore = [ name for name in names if name not in build ]
+        return [ name for name in names if name in build ], restore, keys
+
+    @staticmethod
+    def _stack_files(outdir: str, manifest: dict, artifact_id: str) -> tuple:
+        '''
+            Manifest entries and files of one stack: template, asset manifest
+            and every file asset it publishes(nested templates, lambda code, ...).
+        '''
+        artifacts = dict()
+        files     = list()
+        stack     = manifest["artifacts"][artifact_id]
+        artifacts[artifact_id] = stack
+        files.append(stack["properties"]["templateFile"])
+        for dependency in stack.get("dependencies", list()):
+            entry = manifest["artifacts"].get(dependency)
+            if entry is None or entry["type"] != "cdk:asset-manifest":
+                continue
+            artifacts[dependency] = entry
+            files.append(entry["properties"]["file"])
+            with open(os.path.join(outdir, entry["properties"]["file"])) as file:
+                assets = json.load(file)
+            for asset in assets.get("files", dict()).values():
+                files.append(asset["source"]["path"])
+            for asset in assets.get("dockerImages", dict()).values():
+                files.append(asset["source"]["directory"])
+        return artifacts, sorted(set(files))
+
+    def store(self, outdir: str, names: list, keys: dict) -> None:
+        with open(os.path.join(outdir, "manifest.json")) as file:
+            manifest = json.load(file)
+        for name in names:
+            construct_id = self.registry.specs[name].construct_id
+            if construct_id not in manifest["artifacts"]:
+                continue
+            artifacts, files = self._stack_files(outdir, manifest, construct_id)
+            entry_dir = self._entry_dir(keys[name])
+            staging   = entry_dir + ".tmp"
+            shutil.rmtree(staging, ignore_errors=True)
+            os.makedirs(staging)
+            for path in files:
+                source = os.path.join(outdir, path)
+                target = os.path.join(staging, path)
+                if os.path.isdir(source):
+                    shutil.copytree(source, target)
+                else:
+                    shutil.copy2(source, target)
+            with open(os.path.join(staging, "artifacts.json"), "w") as file:
+                json.dump({ "artifacts": artifacts, "files": files }, file, indent=1)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(staging, entry_dir)
+
+    def restore(self, outdir: str, names: list, keys: dict) -> None:
+        manifest_path = os.path.join(outdir, "manifest.json")
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+        for name in names:
+            entry_dir = self._entry_dir(keys[name])
+            with open(os.path.join(entry_dir, "artifacts.json")) as file:
+                entry = json.load(file)
+            for path in entry["files"]:
+                source = os.path.join(entry_dir, path)
+                target = os.path.join(outdir, path)
+                if os.path.isdir(source):
+                    # asset directories are content addressed, an existing one is identical
+                    if not os.path.exists(target):
+                        shutil.copytree(source, target)
+                else:
+                    shutil.copy2(source, target)
+            manifest["artifacts"].update(entry["artifacts"])
+        with open(manifest_path, "w") as file:
+            json.dump(manifest, file, indent=2)
+
+
+def _cdk_version() -> str:
+    try:
+        from importlib import metadata
+        return metadata.version("aws-cdk-lib")
+    except Exception:
+        return "unknown"
+
+
+def synth_with_cache(app, registry, selected: list, environment, profiler=None) -> dict:
+    '''
+        Builds only the stacks whose key changed, synthesizes them and
+        copies the unchanged ones from the cache into the same cloud assembly.
+    '''
+    cache_dir = cache_dir_option(app.node.try_get_context(CONTEXT_KEY)) or DEFAULT_CACHE_DIR
+    context   = json.loads(os.environ.get("CDK_CONTEXT_JSON", "{}"))
+    salt      = {
+        "context": SynthCache.context_salt(context),
+        "account": environment.account,
+        "region":  environment.region,
+        "aws-cdk-lib": _cdk_version(),
+    }
+    # this module lives in the project directory, next to app.py
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+    cache = SynthCache(registry, project_dir, cache_dir, salt)
+    build, restore, keys = cache.plan(selected)
+
+    # An empty selection means "all" for the registry, so build nothing explicitly.
+    stacks = registry.build(app, build) if build else dict()
+    if profiler:
+        profiler.construct("app.synth", app.synth)
+    else:
+        app.synth()
+    cache.store(app.outdir, build, keys)
+    cache.restore(app.outdir, restore, keys)
+    print(f"synth-cache: built {len(build)} stack(s), reused {len(restore)} stack(s)", file=sys.stderr)
+    return stacks
@@ -0,0 +1,87 @@
+'''
+    Offline test harness
+    The stack graph of app.py is built once per session with the same context the cdk CLI
+    passes(cdk.json + cdk.context.json), so lookups come from the context file and
+    no AWS credentials are needed.
+
+        cd services && python3 -m pytest -q tests
+        UPDATE_SNAPSHOTS=1 python3 -m pytest -q tests      # rewrite tests/snapshots
+'''
+import importlib
+import json
+import os
+import sys
+
+import pytest
+
+SERVICES_DIR  = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+REPOSITORY_DIR = os.path.dirname(SERVICES_DIR)
+SNAPSHOT_DIR  = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+UPDATE_SNAPSHOTS = os.environ.get("UPDATE_SNAPSHOTS", "") not in ("", "0", "false")
+
+sys.path.insert(0, SERVICES_DIR)
+# tools/ is shared by every project of the repository
+if REPOSITORY_DIR not in sys.path:
+    sys.path.append(REPOSITORY_DIR)
+os.environ.setdefault("JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION", "1")
+
+
+def load_context() -> dict:
+    '''
+        Same context as the cdk CLI passes: cdk.json "context" + cdk.context.json
+    '''
+    context = dict()
+    for name in ("cdk.json", "cdk.context.json"):
+        path = os.path.join(SERVICES_DIR, name)
+        if not os.path.exists(path):
+            continue
+        with open(path) as file:
+            data = json.load(file)
+        context.update(data.get("context", dict()) if name == "cdk.json" else data)
+    return context
+
+
+def load_app():
+    # app.py reads the context(env, shared-kms) before App() exists, like under the cdk CLI
+    os.environ["CDK_CONTEXT_JSON"] = json.dumps(load_context())
+    return importlib.import_module("app")
+
+
+def stack_names() -> list:
+    return list(load_app().registry.specs)
+
+
+@pytest.fixture(scope="session")
+def assembly_dir(tmp_path_factory) -> str:
+    '''
+        cdk.out of the session synth(stacks fixture).
+    '''
+    return str(tmp_path_factory.mktemp("cdk.out"))
+
+
+@pytest.fixture(scope="session")
+def stacks(assembly_dir) -> dict:
+    '''
+        { registry name: Stack } of every registered stack(opt-in ones included), synthesized once.
+    '''
+    from aws_cdk import App
+    services = load_app()
+    cwd = os.getcwd()
+    # stacks read their input files(userdata, policies, lambda source) relative to the project
+    os.chdir(SERVICES_DIR)
+    try:
+        app   = App(outdir=assembly_dir)
+        built = services.registry.build(app, list(services.registry.specs))
+        app.synth()
+    finally:
+        os.chdir(cwd)
+    return built
+
+
+@pytest.fixture(scope="session")
+def templates(stacks) -> dict:
+    '''
+        { registry name: aws_cdk.assertions.Template }
+    '''
+    from aws_cdk.assertions import Template
+    return { name: Template.from_stack(stack) for name, stack in stacks.items() }
@@ -0,0 +1,93 @@
+'''
+    Performance budget gate(budget_gate.py, tools/performance_budget.py)
+'''
+import json
+import sys
+
+import pytest
+
+from budget_gate import REPOSITORY_DIR, budget_path, check_budget
+
+sys.path.append(REPOSITORY_DIR)
+from tools.performance_budget import check_template, load_budget   # noqa: E402
+
+
+def _subnet(zone: str) -> dict:
+    return { "Type": "AWS::EC2::Subnet", "Properties": { "AvailabilityZone": zone } }
+
+
+def _nat_template(nat_subnet: str) -> dict:
+    return { "Resources": {
+        "PublicA":  _subnet("us-west-2a"),
+        "PrivateA": _subnet("us-west-2a"),
+        "PublicB":  _subnet("us-west-2b"),
+        "NatA": { "Type": "AWS::EC2::NatGateway", "Properties": { "SubnetId": { "Ref": "PublicA" } } },
+        "NatB": { "Type": "AWS::EC2::NatGateway", "Properties": { "SubnetId": { "Ref": "PublicB" } } },
+        "Table": { "Type": "AWS::EC2::RouteTable", "Properties": {} },
+        "Association": { "Type": "AWS::EC2::SubnetRouteTableAssociation", "Properties": {
+            "RouteTableId": { "Ref": "Table" }, "SubnetId": { "Ref": "PrivateA" } } },
+        "Default": { "Type": "AWS::EC2::Route", "Properties": {
+            "RouteTableId": { "Ref": "Table" }, "DestinationCidrBlock": "0.0.0.0/0",
+            "NatGatewayId": { "Ref": nat_subnet } } },
+    } }
+
+
+@pytest.mark.parametrize("env", ["dev", "stage", "prod"])
+def test_budget_files_are_valid(env):
+    load_budget(budget_path(env))
+
+
+def test_services_meet_dev_budget(stacks, assembly_dir):
+    assert [ str(violation) for violation in check_budget(assembly_dir, "dev") ] == []
+
+
+def test_no_budget_file(assembly_dir, tmp_path):
+    assert check_budget(assembly_dir, "dev", directory=str(tmp_path)) == []
+
+
+def test_unknown_limit(tmp_path):
+    path = tmp_path / "dev.json"
+    path.write_text(json.dumps({ "max_cold_start": 1 }))
+    with pytest.raises(ValueError):
+        load_budget(str(path))
+
+
+def test_cross_az_nat_hop():
+    budget = { "max_nat_hops": 1 }
+    assert check_template(_nat_template("NatA"), budget) == []
+    [(logical_id, property, _)] = check_template(_nat_template("NatB"), budget)
+    assert (logical_id, property) == ("Default", "Properties.NatGatewayId")
+
+
+def test_az_local_egress():
+    budget = { "az_local_egress": True }
+    assert check_template(_nat_template("NatA"), budget) == []
+    [(logical_id, _, message)] = check_template(_nat_template("NatB"), budget)
+    assert logical_id == "Default" and message == "egress of us-west-2a crosses to the NAT in us-west-2b"
+
+
+def test_az_local_egress_nat_instance():
+    template = _nat_template("NatB")
+    template["Resources"]["NatB"] = { "Type": "AWS::EC2::Instance", "Properties": {
+        "SubnetId": { "Ref": "PublicB" }, "SourceDestCheck": False } }
+    route = template["Resources"]["Default"]["Properties"]
+    route["InstanceId"] = route.pop("NatGatewayId")
+    [(_, property, _)] = check_template(template, { "az_local_egress": True })
+    assert property == "Properties.InstanceId"
+
+
+def test_ecs_healthy_tasks_during_deployment():
+    template = { "Resources": { "Service": { "Type": "AWS::ECS::Service", "Properties": {
+        "DesiredCount": 2, "LoadBalancers": [{}],
+        "DeploymentConfiguration": { "MinimumHealthyPercent": 50 } } } } }
+    [(logical_id, property, _)] = check_template(template, { "min_healthy_hosts": 2 })
+    assert property == "Properties.DeploymentConfiguration.MinimumHealthyPercent"
+
+
+def test_lambda_memory_default():
+    template = { "Resources": { "Function": { "Type": "AWS::Lambda::Function", "Properties": {
+        "Code": { "ZipFile": "def handler(event, context): pass" } } } } }
+    assert check_template(template, { "lambda_max_memory_mb": 128, "lambda_max_package_kb": 1 }) == []
+    template["Resources"]["Function"]["Properties"]["MemorySize"] = 3008
+    [(_, property, _)] = check_template(template, { "lambda_max_memory_mb": 1024 })
+    assert property == "Properties.MemorySize"
@@ -0,0 +1,92 @@
+'''
+    Capacity planning formulas(capacity.py), no CDK involved.
+'''
+import pytest
+
+from capacity import (
+    LoadProfile, UnitCapacity, cache_replicas, cache_shards, db_max_connections,
+    in_flight, load_plan, plan_capacity, requests_per_target, units_for,
+)
+
+
+def test_in_flight_is_littles_law():
+    assert in_flight(1000, 200) == 200
+    assert in_flight(50, 20) == 1
+
+
+def test_units_for_concurrency_bound():
+    # 300 in flight / (30 per unit * 0.5) = 20
+    assert units_for(1500, 200, 0, concurrency=30, mbps=1000, utilization=0.5) == 20
+    # rounds up
+    assert units_for(1501, 200, 0, concurrency=30, mbps=1000, utilization=0.5) == 21
+
+
+def test_units_for_bandwidth_bound():
+    # 1000 rps * 100 KB * 8 = 800 Mbps, 100 Mbps per unit at 50% -> 16 units
+    assert units_for(1000, 1, 100, concurrency=1000, mbps=100, utilization=0.5) == 16
+
+
+def test_requests_per_target_is_per_minute():
+    # 20 concurrent * 0.5 / 0.2s = 50 rps per task = 3000 per minute
+    assert requests_per_target(20, 200, 0.5) == 3000
+
+
+def test_cache_shards():
+    # memory bound: 3 GB / (1.37 * 0.75) = 2.9
+    assert cache_shards(3, 6000, 1.37, 0.75, 25000) == 3
+    # ops bound: 100k ops / 25k per node
+    assert cache_shards(0.1, 100000, 1.37, 0.75, 25000) == 4
+    assert cache_shards(0, 0, 1.37, 0.75, 25000) == 1
+
+
+def test_cache_replicas():
+    assert cache_replicas(2000, 25000, min_replicas=2) == 2
+    # 100k reads need 4 nodes per shard, the primary and 3 replicas
+    assert cache_replicas(100000, 25000, min_replicas=1) == 3
+
+
+def test_db_max_connections():
+    assert db_max_connections(80, 15, 0.25) == 1500
+    assert db_max_connections(1, 10, 0.0) == 10
+
+
+def test_plan_minimums():
+    plan = plan_capacity(LoadProfile(peak_rps=10, baseline_rps=0, p99_latency_ms=50), az_count=3)
+    assert plan.asg_min == plan.asg_max == 3
+    assert plan.ecs_min_tasks == plan.ecs_max_tasks == 3
+    assert plan.cache_shards == 1
+    assert plan.cache_replicas == UnitCapacity().min_cache_replicas
+
+
+def test_plan_scales_with_load():
+    small = plan_capacity(LoadProfile(peak_rps=1500, baseline_rps=150, p99_latency_ms=200))
+    large = plan_capacity(LoadProfile(peak_rps=6000, baseline_rps=600, p99_latency_ms=200))
+    assert large.asg_max == 4 * small.asg_max
+    assert large.ecs_max_tasks == 4 * small.ecs_max_tasks
+    assert large.db_max_connections > small.db_max_connections
+    # the per task target depends on latency and utilization only
+    assert large.requests_per_target == small.requests_per_target
+
+
+def test_instance_and_task_targets_differ():
+    plan = plan_capacity(LoadProfile(peak_rps=1500, baseline_rps=150, p99_latency_ms=200),
+                         UnitCapacity(instance_concurrency=30, task_concurrency=20))
+    assert plan.requests_per_target == requests_per_target(20, 200, 0.5)
+    assert plan.instance_requests_per_target == requests_per_target(30, 200, 0.5)
+    assert plan.instance_requests_per_target > plan.requests_per_target
+
+
+def test_load_profile_validation():
+    with pytest.raises(ValueError):
+        LoadProfile(peak_rps=0, baseline_rps=0, p99_latency_ms=100)
+    with pytest.raises(ValueError):
+        LoadProfile(peak_rps=100, baseline_rps=200, p99_latency_ms=100)
+
+
+def test_dev_plan():
+    # config/load/dev.json reproduces the bounds the stacks used to hardcode
+    plan = load_plan("dev")
+    assert (plan.asg_min, plan.asg_max, plan.asg_desired) == (2, 20, 2)
+    assert (plan.ecs_min_tasks, plan.ecs_max_tasks, plan.requests_per_target) == (3, 30, 3000)
+    assert (plan.cache_shards, plan.cache_replicas) == (3, 2)
+    assert plan.db_max_connections == 1500
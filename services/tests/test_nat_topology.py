@@ -0,0 +1,27 @@
+'''
+    NAT topology modes(nat_topology.py) of the vpc stack
+'''
+import pytest
+from aws_cdk import App
+from aws_cdk.assertions import Template
+
+from tools.nat_topology import cross_az_egress, egress_zones, nat_count, parse_mode
+
+
+def test_egress_zones():
+    assert egress_zones("per-az", ["a", "b", "c"]) == { "a": "a", "b": "b", "c": "c" }
+    assert egress_zones("instance", ["a", "b"]) == { "a": "a", "b": "b" }
+    assert cross_az_egress("single", ["a", "b", "c"]) == [("b", "a"), ("c", "a")]
+    assert nat_count("single", 3) == 1 and nat_count(None, 3) == 3
+    with pytest.raises(ValueError):
+        parse_mode("shared")
+
+
+@pytest.mark.parametrize("mode, nat_type", [("per-az", "AWS::EC2::NatGateway"), ("instance", "AWS::EC2::Instance")])
+def test_nat_per_az(stacks, mode, nat_type):
+    from vpc.vpc_stack import VpcStack
+    stack    = VpcStack(App(), "nat", project=stacks["vpc"].project, nat=mode)
+    template = Template.from_stack(stack)
+    template.resource_count_is(nat_type, len(stacks["vpc"].project.azs))
+    # one route table per subnet, private routes stay in their az
+    template.resource_count_is("AWS::EC2::RouteTable", 3 * len(stacks["vpc"].project.azs))
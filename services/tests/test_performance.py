@@ -0,0 +1,112 @@
+'''
+    Throughput settings the services rely on, asserted on the synthesized templates.
+    The snapshots catch any change, these tests name the settings that must not regress.
+'''
+from aws_cdk.assertions import Match
+
+
+def _block_device_mappings(value) -> list:
+    # BlockDeviceMappings of instances, launch configurations and launch templates
+    mappings = list()
+    if isinstance(value, list):
+        for item in value:
+            mappings.extend(_block_device_mappings(item))
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key == "BlockDeviceMappings":
+                mappings.extend(item)
+            else:
+                mappings.extend(_block_device_mappings(item))
+    return mappings
+
+
+def test_ebs_volumes_are_gp3(templates):
+    volumes = list()
+    for name, template in templates.items():
+        for logical_id, resource in template.to_json().get("Resources", dict()).items():
+            for mapping in _block_device_mappings(resource.get("Properties", dict())):
+                if "Ebs" in mapping:
+                    volumes.append((name, logical_id, mapping["Ebs"].get("VolumeType")))
+    assert volumes
+    assert [ volume for volume in volumes if volume[2] != "gp3" ] == []
+
+
+def test_alb_http2_enabled(templates):
+    load_balancers = templates["elb"].find_resources("AWS::ElasticLoadBalancingV2::LoadBalancer")
+    assert load_balancers
+    for resource in load_balancers.values():
+        attributes = resource["Properties"].get("LoadBalancerAttributes", list())
+        # http2 is on unless the attribute turns it off
+        assert { "Key": "routing.http2.enabled", "Value": "false" } not in attributes
+
+
+def test_cloudfront_http2_and_compression(templates):
+    templates["cloudfront"].has_resource_properties("AWS::CloudFront::Distribution", {
+        "DistributionConfig": Match.object_like({
+            "HttpVersion": Match.string_like_regexp("^http2"),
+            "DefaultCacheBehavior": Match.object_like({ "Compress": True }),
+        }),
+    })
+    templates["cloudfront"].has_resource_properties("AWS::CloudFront::CachePolicy", {
+        "CachePolicyConfig": Match.object_like({
+            "ParametersInCacheKeyAndForwardedToOrigin": Match.object_like({
+                "EnableAcceptEncodingBrotli": True,
+                "EnableAcceptEncodingGzip":   True,
+            }),
+        }),
+    })
+
+
+def test_cloudfront_cache_ttls(templates):
+    templates["cloudfront"].has_resource_properties("AWS::CloudFront::CachePolicy", {
+        "CachePolicyConfig": Match.object_like({
+            "MinTTL":     0,
+            "DefaultTTL": 86400,
+            "MaxTTL":     31536000,
+        }),
+    })
+
+
+def test_target_group_health_check(templates):
+    templates["elb"].has_resource_properties("AWS::ElasticLoadBalancingV2::TargetGroup", {
+        "HealthCheckEnabled":         True,
+        "HealthCheckIntervalSeconds": 10,
+        "HealthCheckTimeoutSeconds":  5,
+        "HealthyThresholdCount":      2,
+        "UnhealthyThresholdCount":    2,
+        "HealthCheckPath":            "/healthcheck",
+    })
+
+
+def test_asg_elb_health_check(templates):
+    templates["asg"].has_resource_properties("AWS::AutoScaling::AutoScalingGroup", {
+        "HealthCheckType":        "ELB",
+        "HealthCheckGracePeriod": 120,
+    })
+
+
+def test_ecs_scaling_policy_targets(templates):
+    template = templates["ecs"]
+    template.resource_count_is("AWS::ApplicationAutoScaling::ScalingPolicy", 2)
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalingPolicy", {
+        "PolicyType": "TargetTrackingScaling",
+        "TargetTrackingScalingPolicyConfiguration": Match.object_like({
+            "PredefinedMetricSpecification": Match.object_like({
+                "PredefinedMetricType": "ECSServiceAverageCPUUtilization",
+            }),
+            "TargetValue":      60,
+            "ScaleInCooldown":  180,
+            "ScaleOutCooldown": 60,
+        }),
+    })
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalingPolicy", {
+        "PolicyType": "TargetTrackingScaling",
+        "TargetTrackingScalingPolicyConfiguration": Match.object_like({
+            "PredefinedMetricSpecification": Match.object_like({
+                "PredefinedMetricType": "ALBRequestCountPerTarget",
+            }),
+            "TargetValue":      3000,
+            "ScaleInCooldown":  180,
+            "ScaleOutCooldown": 60,
+        }),
+    })
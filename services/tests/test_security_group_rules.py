@@ -0,0 +1,18 @@
+'''
+    Security group rules add_graph_rules() puts on the stacks
+'''
+
+
+def test_eks_rules_keep_deployed_logical_ids(templates):
+    # renamed rule resources are created before the old ones are deleted, EC2 rejects the duplicate
+    resources = templates["eks"].to_json()["Resources"]
+    for logical_id in (
+        "eksclustercontrolplanefromdevcdkworkshopekseksnodegroup4451FD4Aeksclustercontrolplane11D25EF89",
+        "eksclustercontrolplanetodevcdkworkshopekseksnodegroup4451FD4Aeksclustercontrolplane27675CECF",
+        "eksnodegroupfromdevcdkworkshopekseksclustercontrolplane9EA83182eksnodegroup23409E676",
+        "eksnodegroupfromdevcdkworkshopekseksclustercontrolplane9EA83182eksnodegroup31FFD8C46",
+        "eksnodegroupfromdevcdkworkshopekseksnodegroup4451FD4Aeksnodegroup1DDDF528F",
+    ):
+        assert logical_id in resources
+    security_group = resources["eksclustercontrolplaneCEA76514"]["Properties"]
+    assert "SecurityGroupIngress" not in security_group and "SecurityGroupEgress" not in security_group
@@ -0,0 +1,84 @@
+'''
+    Service tier construct(service_tier/service_tier.py)
+'''
+import pytest
+from aws_cdk.assertions import Match
+
+from conftest import load_app
+from service_tier.service_tier import PROFILES, PerformanceProfile, get_profile
+
+
+def test_service_tier_is_opt_in():
+    registry = load_app().registry
+    # "cdk deploy --all" without stacks context does not deploy the example web tier
+    assert "service-tier" not in registry.resolve()
+    assert registry.resolve(["service-tier"]) == [ "vpc", "service-tier" ]
+
+
+def test_get_profile():
+    assert get_profile("batch") is PROFILES["batch"]
+    assert get_profile(PROFILES["throughput"]) is PROFILES["throughput"]
+    with pytest.raises(ValueError):
+        get_profile("fast")
+
+
+def test_profile_validation():
+    values = dict(
+        load_balancing="ROUND_ROBIN", deregistration_delay=30, slow_start=None, idle_timeout=60,
+        health_check_interval=10, health_check_timeout=10, healthy_threshold=2, unhealthy_threshold=2,
+        health_check_grace=60, cpu_target=50, request_target_ratio=None, scale_in_cooldown=60,
+        scale_out_cooldown=60, p99_latency_alarm_ms=100, error_alarm_count=1, cdn_ttl=None)
+    with pytest.raises(ValueError):
+        PerformanceProfile("custom", **values)
+
+
+def test_latency_sensitive_target_group(templates):
+    template = templates["service-tier"]
+    template.has_resource_properties("AWS::ElasticLoadBalancingV2::TargetGroup", {
+        "Name": "dev-cdkworkshop-api-tg",
+        "TargetType": "ip",
+        "TargetGroupAttributes": Match.array_with([
+            { "Key": "deregistration_delay.timeout_seconds", "Value": "30" },
+            { "Key": "load_balancing.algorithm.type", "Value": "least_outstanding_requests" },
+        ]),
+    })
+
+
+def test_tiers_scale_on_cpu_and_requests(templates):
+    template = templates["service-tier"]
+    # web: ASG, throughput profile
+    template.has_resource_properties("AWS::AutoScaling::ScalingPolicy", {
+        "TargetTrackingConfiguration": Match.object_like({
+            "PredefinedMetricSpecification": { "PredefinedMetricType": "ASGAverageCPUUtilization" },
+            "TargetValue": 70,
+        }),
+    })
+    template.has_resource_properties("AWS::AutoScaling::ScalingPolicy", {
+        "TargetTrackingConfiguration": Match.object_like({
+            "PredefinedMetricSpecification": Match.object_like({ "PredefinedMetricType": "ALBRequestCountPerTarget" }),
+            # an instance serves more requests than a 1 vCPU task(instance_concurrency)
+            "TargetValue": 4500,
+        }),
+    })
+    # api: Fargate, latency-sensitive profile scales at 80% of the planned requests per target
+    template.has_resource_properties("AWS::ApplicationAutoScaling::ScalingPolicy", {
+        "TargetTrackingScalingPolicyConfiguration": Match.object_like({
+            "PredefinedMetricSpecification": Match.object_like({ "PredefinedMetricType": "ALBRequestCountPerTarget" }),
+            "TargetValue": 2400,
+        }),
+    })
+
+
+def test_alarms_and_cdn(templates):
+    template = templates["service-tier"]
+    template.resource_count_is("AWS::CloudWatch::Alarm", 6)
+    template.has_resource_properties("AWS::CloudWatch::Alarm", {
+        "AlarmName":         "dev-cdkworkshop-api-p99-latency",
+        "ExtendedStatistic": "p99",
+        "Threshold":         0.3,
+    })
+    # only the web tier has a CDN
+    template.resource_count_is("AWS::CloudFront::Distribution", 1)
+    template.has_resource_properties("AWS::CloudFront::CachePolicy", {
+        "CachePolicyConfig": Match.object_like({ "DefaultTTL": 86400 }),
+    })
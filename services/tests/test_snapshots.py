@@ -0,0 +1,42 @@
+'''
+    Template snapshot of every stack, tests/snapshots/<registry name>.json
+    A change in a template fails here until the snapshot is rewritten(UPDATE_SNAPSHOTS=1),
+    so every template change shows up in the diff of the snapshot files.
+'''
+import json
+import os
+
+import pytest
+
+from conftest import SNAPSHOT_DIR, UPDATE_SNAPSHOTS, stack_names
+
+
+def _changed_resources(expected: dict, actual: dict) -> list:
+    expected = expected.get("Resources", dict())
+    actual   = actual.get("Resources", dict())
+    return sorted(
+        logical_id for logical_id in set(expected) | set(actual)
+        if expected.get(logical_id) != actual.get(logical_id)
+    )
+
+
+@pytest.mark.parametrize("name", stack_names())
+def test_snapshot(templates, name):
+    actual = templates[name].to_json()
+    path   = os.path.join(SNAPSHOT_DIR, f"{name}.json")
+    if UPDATE_SNAPSHOTS:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        with open(path, "w") as file:
+            json.dump(actual, file, indent=1, sort_keys=True)
+            file.write("\n")
+        return
+    if not os.path.exists(path):
+        pytest.fail(f"no snapshot for '{name}', run with UPDATE_SNAPSHOTS=1")
+    with open(path) as file:
+        expected = json.load(file)
+    if actual != expected:
+        changed = _changed_resources(expected, actual)
+        pytest.fail(
+            f"template of '{name}' differs from its snapshot, "
+            f"resources: {changed or 'none(outputs/parameters/metadata)'}, "
+            "rewrite it with UPDATE_SNAPSHOTS=1 if the change is intended")
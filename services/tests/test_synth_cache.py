@@ -0,0 +1,62 @@
+'''
+    Synth cache plan(synth_cache.py) and its context switch.
+'''
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from registry import StackRegistry
+from synth_cache import DEFAULT_CACHE_DIR, SynthCache, cache_dir_option
+
+
+def chain_registry() -> StackRegistry:
+    # vpc <- security-group <- eks, vpc <- rds
+    registry = StackRegistry()
+    registry.register("vpc", "vpc", "vpc.vpc_stack:VpcStack", [], None)
+    registry.register("security-group", "sg", "security.security_group.security_group_stack:SecurityGroupStack",
+                      ["vpc"], None)
+    registry.register("eks", "eks", "eks.eks_stack:EksStack", ["vpc", "security-group"], None)
+    registry.register("rds", "rds", "rds.rds_stack:RdsStack", ["vpc", "security-group"], None)
+    return registry
+
+
+def test_dependents_of_a_rebuilt_stack_are_rebuilt(tmp_path):
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cache = SynthCache(chain_registry(), project_dir, str(tmp_path))
+    _, _, keys = cache.plan()
+    for name in ("vpc", "security-group", "rds"):
+        os.makedirs(os.path.join(str(tmp_path), keys[name]))
+    build, restore, _ = cache.plan()
+    # eks is dirty, vpc and security-group are built for it, rds imports their exports
+    assert build == [ "vpc", "security-group", "eks", "rds" ]
+    assert restore == list()
+
+
+def test_key_covers_modules_imported_by_app():
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    cache = SynthCache(chain_registry(), project_dir)
+    files = { os.path.basename(path) for path in cache._local_modules("app") }
+    assert { "shared_resources.py", "capacity.py", "budget_gate.py", "startup.py" } <= files
+
+
+@pytest.mark.parametrize("option, expected", [
+    (None, None), (False, None), ("false", None), ("0", None), ("no", None),
+    (True, DEFAULT_CACHE_DIR), ("true", DEFAULT_CACHE_DIR), ("/tmp/cache", "/tmp/cache"),
+])
+def test_cache_dir_option(option, expected):
+    assert cache_dir_option(option) == expected
+
+
+def test_synth_cache_false_takes_the_normal_build(tmp_path):
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    context = { "stacks": "ecr", "synth-cache": "false", "performance-budget": "false" }
+    environment = dict(os.environ, CDK_OUTDIR=str(tmp_path), CDK_CONTEXT_JSON=json.dumps(context),
+                       JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION="1")
+    completed = subprocess.run([ sys.executable, "app.py" ], cwd=project_dir, env=environment,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    assert completed.returncode == 0, completed.stderr
+    assert "synth-cache:" not in completed.stderr
+    assert not os.path.exists(os.path.join(project_dir, "false"))
@@ -0,0 +1,49 @@
+'''
+    VPC endpoint presets(vpc_endpoints.py) and the endpoints of the vpc stack
+'''
+import pytest
+from aws_cdk import App
+from aws_cdk.assertions import Template
+
+from tools.vpc_endpoints import PRESETS, endpoint_services, logical_name, parse_presets
+
+
+def test_parse_presets():
+    assert parse_presets(None) == []
+    assert parse_presets("ecs, lambda") == ["ecs", "lambda"]
+    assert parse_presets(["eks"]) == ["eks"]
+    assert parse_presets("all") == list(PRESETS)
+    with pytest.raises(ValueError):
+        parse_presets("ecs,fargate")
+
+
+def test_endpoint_services_union():
+    services = endpoint_services("ecs,lambda")
+    assert len(services) == len(set(services))
+    assert services[:2] == ["ecr.api", "ecr.dkr"]
+    assert "lambda" in services and "xray" in services
+    assert logical_name("ecr.api") == "EcrApi"
+
+
+def test_gateway_endpoints_by_default(templates):
+    template = templates["vpc"]
+    template.resource_count_is("AWS::EC2::VPCEndpoint", 2)
+    template.resource_count_is("AWS::EC2::SecurityGroup", 0)
+
+
+def test_interface_endpoints_of_presets(stacks):
+    from vpc.vpc_stack import VpcStack
+    vpc = stacks["vpc"]
+    stack = VpcStack(App(), "endpoints", project=vpc.project, endpoints=["ecs"])
+    template = Template.from_stack(stack)
+    template.resource_count_is("AWS::EC2::VPCEndpoint", 2 + len(PRESETS["ecs"]))
+    template.resource_count_is("AWS::EC2::SecurityGroup", 1)
+    template.has_resource_properties("AWS::EC2::VPCEndpoint", {
+        "VpcEndpointType": "Interface",
+        "PrivateDnsEnabled": True,
+    })
+    template.has_resource_properties("AWS::EC2::SecurityGroup", {
+        "SecurityGroupIngress": [{ "IpProtocol": "tcp", "FromPort": 443, "ToPort": 443,
+                                   "CidrIp": { "Fn::GetAtt": [ "vpcA2121C38", "CidrBlock" ] },
+                                   "Description": "https from the vpc" }],
+    })
@@ -0,0 +1,14 @@
+'''
+    Pod subnets of the vpc stack(secondary cidr allocated by tools/ipam.py)
+'''
+from aws_cdk import App
+from aws_cdk.assertions import Template
+
+from vpc.vpc_stack import VpcStack
+
+
+def test_pod_subnets(stacks):
+    stack    = VpcStack(App(), "pods", project=stacks["vpc"].project, pod_cidr="100.64.0.0/16")
+    template = Template.from_stack(stack)
+    template.has_resource_properties("AWS::EC2::VPCCidrBlock", { "CidrBlock": "100.64.0.0/16" })
+    template.has_resource_properties("AWS::EC2::Subnet", { "CidrBlock": "100.64.128.0/17" })
@@ -0,0 +1,185 @@
+'''
+    Construct tree statistics
+    Instruments the app when "tree-stats" context is set:
+        - construct counts by type and tree depth, per stack(an aspect visits every construct at synth)
+        - time spent in each stack __init__ and in each of its add_* helpers
+        - token resolution counts per stack(intrinsics in the synthesized template,
+          every Ref/Fn::* is a resolved token)
+    and writes two files:
+        tree-stats.json    statistics
+        tree-stats.folded  folded stacks(flamegraph.pl, speedscope, inferno), self time in microseconds
+
+    Usage:
+        cdk synth -c tree-stats=true           # files in cdk.out
+        cdk synth -c tree-stats=/tmp/stats     # files in /tmp/stats
+'''
+import functools
+import json
+import os
+import sys
+import time
+
+import jsii
+from aws_cdk import Aspects, CfnResource, IAspect
+
+CONTEXT_KEY = "tree-stats"
+HELPER_PREFIX = "add_"
+
+
+@jsii.implements(IAspect)
+class _TreeStatsAspect:
+    def __init__(self, stats) -> None:
+        self.stats = stats
+
+    def visit(self, node) -> None:
+        self.stats.visit(node)
+
+
+def _count_tokens(value, counts: dict) -> None:
+    if isinstance(value, list):
+        for item in value:
+            _count_tokens(item, counts)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key == "Ref" or key.startswith("Fn::"):
+                counts[key] = counts.get(key, 0) + 1
+            _count_tokens(item, counts)
+
+
+class TreeStats:
+    def __init__(self, output_dir: str = None) -> None:
+        self.output_dir = output_dir
+        self.stacks     = dict()
+        self.folded     = dict()
+        self._calls     = list()
+        self._wrapped   = set()
+
+    @classmethod
+    def from_context(cls, app):
+        '''
+            Returns a TreeStats attached to the app, or None when "tree-stats" context is not set.
+        '''
+        option = app.node.try_get_context(CONTEXT_KEY)
+        if not option or str(option).lower() == "false":
+            return None
+        stats = cls(option if isinstance(option, str) and option.lower() != "true" else None)
+        Aspects.of(app).add(_TreeStatsAspect(stats))
+        return stats
+
+    def _stack(self, stack_id: str) -> dict:
+        if stack_id not in self.stacks:
+            self.stacks[stack_id] = {
+                "constructs": 0, "max_depth": 0, "by_type": dict(),
+                "init_seconds": 0.0, "helpers": dict(), "tokens": dict(),
+            }
+        return self.stacks[stack_id]
+
+    '''
+        Timing: stack classes are instrumented when the registry loads them.
+    '''
+    def instrument(self, stack_class):
+        if stack_class in self._wrapped:
+            return stack_class
+        self._wrapped.add(stack_class)
+        for name, member in list(vars(stack_class).items()):
+            if callable(member) and (name == "__init__" or name.startswith(HELPER_PREFIX)):
+                setattr(stack_class, name, self._timed(stack_class.__name__, name, member))
+        return stack_class
+
+    def _timed(self, class_name: str, name: str, function):
+        stats = self
+
+        @functools.wraps(function)
+        def wrapper(instance, *args, **kwargs):
+            if name == "__init__":
+                # the node does not exist before Stack.__init__ runs
+                stack_id = kwargs.get("construct_id", args[1] if len(args) > 1 else "?")
+            else:
+                stack_id = instance.node.id
+            frame = f"{class_name}.{name}"
+            stats._calls.append([ frame, time.perf_counter(), 0.0 ])
+            try:
+                return function(instance, *args, **kwargs)
+            finally:
+                frame, start, child_seconds = stats._calls.pop()
+                seconds = time.perf_counter() - start
+                path    = ";".join([ stack_id ] + [ call[0] for call in stats._calls ] + [ frame ])
+                stats.folded[path] = stats.folded.get(path, 0.0) + seconds - child_seconds
+                if stats._calls:
+                    stats._calls[-1][2] += seconds
+                record = stats._stack(stack_id)
+                if name == "__init__" and not stats._calls:
+                    record["init_seconds"] += seconds
+                elif name != "__init__":
+                    helper = record["helpers"].setdefault(frame, { "calls": 0, "seconds": 0.0 })
+                    helper["calls"]   += 1
+                    helper["seconds"] += seconds
+        return wrapper
+
+    '''
+        Tree: called by the aspect for every construct
+    '''
+    def visit(self, node) -> None:
+        path = node.node.path
+        if not path:
+            return
+        record = self._stack(path.split("/", 1)[0])
+        depth  = path.count("/") + 1
+        if CfnResource.is_cfn_resource(node):
+            construct_type = node.cfn_resource_type
+        else:
+            construct_type = f"{type(node).__module__}.{type(node).__name__}"
+        record["constructs"] += 1
+        record["max_depth"]   = max(record["max_depth"], depth)
+        record["by_type"][construct_type] = record["by_type"].get(construct_type, 0) + 1
+
+    def report(self, app, synth_seconds: float = None) -> dict:
+        '''
+            Collects token counts from the synthesized templates and writes the output files.
+        '''
+        outdir = app.outdir
+        with open(os.path.join(outdir, "manifest.json")) as file:
+            manifest = json.load(file)
+        for artifact_id, artifact in manifest.get("artifacts", dict()).items():
+            if artifact.get("type") != "aws:cloudformation:stack":
+                continue
+            with open(os.path.join(outdir, artifact["properties"]["templateFile"])) as file:
+                _count_tokens(json.load(file), self._stack(artifact_id)["tokens"])
+        if synth_seconds is not None:
+            self.folded["app.synth"] = synth_seconds
+
+        by_type = dict()
+        for record in self.stacks.values():
+            for construct_type, count in record["by_type"].items():
+                by_type[construct_type] = by_type.get(construct_type, 0) + count
+        document = {
+            "constructs":    sum(record["constructs"] for record in self.stacks.values()),
+            "max_depth":     max((record["max_depth"] for record in self.stacks.values()), default=0),
+            "by_type":       dict(sorted(by_type.items(), key=lambda item: item[1], reverse=True)),
+            "synth_seconds": synth_seconds,
+            "stacks":        self.stacks,
+        }
+        output_dir = self.output_dir or outdir
+        os.makedirs(output_dir, exist_ok=True)
+        with open(os.path.join(output_dir, "tree-stats.json"), "w") as file:
+            json.dump(document, file, indent=2)
+        with open(os.path.join(output_dir, "tree-stats.folded"), "w") as file:
+            for path, seconds in sorted(self.folded.items()):
+                file.write(f"{path} {max(1, round(seconds * 1e6))}\n")
+        self._print_hot_spots(document)
+        return document
+
+    def _print_hot_spots(self, document: dict, top: int = 10) -> None:
+        stream = sys.stderr
+        print(f"== tree stats: {document['constructs']} constructs, max depth {document['max_depth']} ==", file=stream)
+        print("-- construct types --", file=stream)
+        for construct_type, count in list(document["by_type"].items())[:top]:
+            print(f"{count:7}  {construct_type}", file=stream)
+        print("-- slowest stack __init__ and add_* helpers --", file=stream)
+        timings = list()
+        for stack_id, record in self.stacks.items():
+            timings.append((record["init_seconds"], f"{stack_id} __init__"))
+            for helper, values in record["helpers"].items():
+                timings.append((values["seconds"], f"{stack_id} {helper} x{values['calls']}"))
+        for seconds, name in sorted(timings, reverse=True)[:top]:
+            print(f"{seconds:9.3f}s  {name}", file=stream)
@@ -1,19 +1,33 @@
 '''
     Dependency: None
+    endpoints: interface endpoint presets(vpc_endpoints.py), S3/DynamoDB gateway endpoints are always created
+    nat:       NAT topology mode(nat_topology.py), every private subnet has a route table of its own az
+    pod_cidr:  secondary cidr split into one Pods subnet per az(ipam.py), routed like the private subnet of the az
 '''
 from constructs import Construct
-from aws_cdk import Stack, aws_ec2
+from aws_cdk import Stack, Tags, aws_ec2
+from tools.project_config import ProjectConfig
+from tools.vpc_endpoints import GATEWAY_SERVICES, endpoint_services
+from tools.nat_topology import NAT_INSTANCE_TYPE, NAT_INSTANCE_USERDATA, nat_count, parse_mode
+from tools.ipam import CidrPool, split_prefix
 
 class VpcStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, endpoints: list = (), nat: str = None,
+                 pod_cidr: str = None, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
+        # Init
+        self.project        = project
+        self.security_group = dict()
+        self.endpoint       = dict()
+        self.nat            = parse_mode(nat)
+        self.pod_subnets    = list()
         # Vpc
         # https://docs.aws.amazon.com/cdk/api/latest/python/aws_cdk.aws_ec2/Vpc.html
         self.vpc = aws_ec2.Vpc(self, "vpc",
             cidr="10.0.0.0/16",
-            max_azs=2,
-            nat_gateways=2,
-            # nat_gateway_provider=ec2.NatProvider.gateway(),
+            max_azs=len(project.azs),
+            nat_gateways=nat_count(self.nat, len(project.azs)),
+            nat_gateway_provider=self.nat_provider(),
             # configuration will create 3 groups in 3 AZs = 9 subnets.
             subnet_configuration=[
                 aws_ec2.SubnetConfiguration(
@@ -31,23 +45,70 @@ class VpcStack(Stack):
                 )
             ]
         )
-        # self.vpc.add_flow_log(id=f"{project['prefix']}-vpc-flow-log")
-        # self.add_vpc_endpoint()
+        # self.vpc.add_flow_log(id=project.resource_name("vpc-flow-log"))
+        self.add_vpc_endpoints(endpoints)
+        if pod_cidr:
+            self.add_pod_subnets(pod_cidr)
 
-    def add_vpc_endpoint(self):
-        # Vpc endpoint(Gateway)
+    def nat_provider(self) -> aws_ec2.NatProvider:
+        if self.nat != "instance":
+            return aws_ec2.NatProvider.gateway()
+        # Nat instance(dev), Amazon Linux 2 configured by user data, no AMI lookup
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/NatInstanceProvider.html
+        return aws_ec2.NatProvider.instance(
+            instance_type = aws_ec2.InstanceType(NAT_INSTANCE_TYPE),
+            machine_image = aws_ec2.MachineImage.latest_amazon_linux(
+                generation = aws_ec2.AmazonLinuxGeneration.AMAZON_LINUX_2,
+                user_data  = aws_ec2.UserData.custom(NAT_INSTANCE_USERDATA)),
+            key_name      = self.project.keypair)
+
+    def add_pod_subnets(self, pod_cidr: str):
+        # Secondary cidr for pods(VPC CNI custom networking), pod density is not bound by the private subnets
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/CfnVPCCidrBlock.html
+        secondary_cidr = aws_ec2.CfnVPCCidrBlock(self, "vpc-pod-cidr",
+            vpc_id     = self.vpc.vpc_id,
+            cidr_block = pod_cidr)
+        pool   = CidrPool(pod_cidr)
+        prefix = split_prefix(pod_cidr, len(self.vpc.private_subnets))
+        for index, private_subnet in enumerate(self.vpc.private_subnets, start=1):
+            subnet = aws_ec2.CfnSubnet(self, f"pod-subnet-{index}",
+                vpc_id            = self.vpc.vpc_id,
+                cidr_block        = str(pool.allocate(prefix, f"Pods{index}")),
+                availability_zone = private_subnet.availability_zone)
+            subnet.add_depends_on(secondary_cidr)
+            Tags.of(subnet).add("Name", self.project.resource_name(f"pods-{index}"))
+            # same route table as the private subnet of the az, egress stays in the az
+            aws_ec2.CfnSubnetRouteTableAssociation(self, f"pod-subnet-{index}-rt",
+                subnet_id      = subnet.ref,
+                route_table_id = private_subnet.route_table.route_table_id)
+            self.pod_subnets.append(subnet)
+
+    def add_vpc_endpoints(self, presets: list):
+        # Vpc endpoint(Gateway), route table entries of every subnet
         # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/GatewayVpcEndpointAwsService.html
-        aws_ec2.GatewayVpcEndpoint(self, "vpc-endpoint-s3-gateway",
-            vpc=self.vpc,
-            service=aws_ec2.GatewayVpcEndpointAwsService.S3,
-            subnets=self.vpc.private_subnets)
-        # Vpc endpoint(Interface)
-        # https://docs.aws.amazon.com/cdk/api/latest/python/aws_cdk.aws_ec2/InterfaceVpcEndpointAwsService.html
-        aws_ec2.InterfaceVpcEndpoint(self, "vpc-endpoint-ssm-interface",
-            vpc=self.vpc,
-            service=aws_ec2.InterfaceVpcEndpointAwsService.SSM,
-            lookup_supported_azs=None,
-            open=None,
-            private_dns_enabled=None,
-            security_groups=None,
-            subnets=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PRIVATE_WITH_NAT))
\ No newline at end of file
+        for service in GATEWAY_SERVICES:
+            self.endpoint[service] = self.vpc.add_gateway_endpoint(f"vpc-endpoint-{service}-gateway",
+                service=aws_ec2.GatewayVpcEndpointAwsService(service))
+        services = endpoint_services(presets)
+        if not services:
+            return
+        # One security group shared by every interface endpoint, https from the vpc
+        self.security_group['vpc-endpoint'] = aws_ec2.SecurityGroup(self, "vpc-endpoint-sg",
+            vpc                 = self.vpc,
+            security_group_name = self.project.resource_name("vpc-endpoint-sg"),
+            description         = "Interface VPC endpoints",
+            allow_all_outbound  = False)
+        self.security_group['vpc-endpoint'].add_ingress_rule(
+            peer        = aws_ec2.Peer.ipv4(self.vpc.vpc_cidr_block),
+            connection  = aws_ec2.Port.tcp(443),
+            description = "https from the vpc")
+        Tags.of(self.security_group['vpc-endpoint']).add("Name", self.project.resource_name("vpc-endpoint-sg"))
+        # Vpc endpoint(Interface), one network interface per az, private dns replaces the public endpoint
+        # https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/InterfaceVpcEndpointAwsService.html
+        for service in services:
+            self.endpoint[service] = self.vpc.add_interface_endpoint(f"vpc-endpoint-{service}-interface",
+                service=aws_ec2.InterfaceVpcEndpointAwsService(service),
+                private_dns_enabled=True,
+                open=False,
+                security_groups=[self.security_group['vpc-endpoint']],
+                subnets=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PRIVATE_WITH_NAT, one_per_az=True))
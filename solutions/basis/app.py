@@ -1,39 +1,47 @@
 #!/usr/bin/env python3
 '''
     Initial cdk project information
-    1. Import CDK modules
-    2. Import Services modules in this project
-    3. Project information
-    4. cdk Construct
+    1. Startup profiler
+    2. Import CDK modules
+    3. Import Services modules in this project(lazily)
+    4. Project information
+    5. cdk Construct
 '''
+# Startup profiler(--profile-startup), it must be created before the CDK import to time it.
+# tools/ is shared by every project of the repository
+import os
+import sys
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPOSITORY_DIR not in sys.path:
+    sys.path.append(REPOSITORY_DIR)
+from tools.startup import StartupProfiler
+profiler = StartupProfiler()
+
 # Import CDK modules
 from aws_cdk import App, Environment
 
 # Import Services modules
-from vpc.vpc_stack import VpcStack
+# Stack modules are imported lazily by profiler.load() right before construction.
+from tools.project_config import load_config
 
-# Information of project
-project = dict()
-project['account'] = "242593025403"
-project['region']  = "us-east-1"
-project['env']     = "dev"
-project['name']    = "cdkworkshop"
-project['prefix']  = f"{project['env']}-{project['name']}"
+# Information of project(config/<env>.json, selected by "env" context: cdk synth -c env=dev)
+project = load_config()
 
 # cdk environment
 cdk_environment = Environment(
-    account=project['account'],
-    region=project['region'])
+    account=project.account,
+    region=project.region)
 
 # cdk construct
 app = App()
 
 # VPC
-vpc_stack = VpcStack(
+vpc_stack = profiler.construct("vpc", profiler.load("vpc.vpc_stack:VpcStack"),
     scope        = app,
-    construct_id = f"{project['prefix']}",
+    construct_id = project.prefix,
     env          = cdk_environment,
     project      = project)
 
 # app synth -> cloudformation template
-app.synth()
\ No newline at end of file
+profiler.construct("app.synth", app.synth)
+profiler.report()
\ No newline at end of file
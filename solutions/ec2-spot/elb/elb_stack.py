@@ -4,10 +4,11 @@
 from aws_cdk import (
     core, aws_ec2, aws_elasticloadbalancingv2
 )
+from tools.project_config import ProjectConfig
 
 class ElasticLoadBalancerStack(core.Stack):
 
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         
         # initial
@@ -39,7 +40,7 @@ class ElasticLoadBalancerStack(core.Stack):
                 port="80",
                 protocol=aws_elasticloadbalancingv2.Protocol.HTTP,
                 timeout=core.Duration.seconds(5)),
-            target_group_name=f"{self.project['prefix']}-tg-app",
+            target_group_name=self.project.resource_name("tg-app"),
             target_type=aws_elasticloadbalancingv2.TargetType.INSTANCE,
             vpc=self.vpc)
         
@@ -53,7 +54,7 @@ class ElasticLoadBalancerStack(core.Stack):
             vpc=self.vpc,
             deletion_protection=None,
             internet_facing=True,
-            load_balancer_name=f"{self.project['prefix']}-ext-alb",
+            load_balancer_name=self.project.resource_name("ext-alb"),
             vpc_subnets=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PUBLIC))
         self.elb['ext-alb'].add_listener("listener-ext-alb",
             certificate_arns=None,
@@ -4,9 +4,11 @@
 from aws_cdk import (
     core, aws_iam, aws_lambda
 )
+from tools.project_config import ProjectConfig
+from tools.lambda_bundle import bundle_codes
 
 class LambdaStack(core.Stack):
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # Init
@@ -15,7 +17,7 @@ class LambdaStack(core.Stack):
         
         # IAM
         self.role['deregister-function'] = aws_iam.Role(self, "deregister-function-role",
-            role_name   = f"{project['prefix']}-role-lambda-deregister-function",
+            role_name   = project.resource_name("role-lambda-deregister-function"),
             description = "",
             assumed_by  = aws_iam.CompositePrincipal(
                 aws_iam.ServicePrincipal("lambda.amazonaws.com")
@@ -46,7 +48,7 @@ class LambdaStack(core.Stack):
                                 "elasticloadbalancing:DeregisterTargets",
                             ],
                             resources=[
-                                f"arn:aws:elasticloadbalancing:*:{self.project['account']}:targetgroup/*/*"
+                                self.project.arn("elasticloadbalancing", "targetgroup/*/*", region="*")
                             ]
                             # principals=None,
                             # conditions=None
@@ -62,10 +64,15 @@ class LambdaStack(core.Stack):
             ]
         )
 
+        # Function code, zipped once per source content(lambda_bundle.py)
+        code = bundle_codes({
+            'deregister-function': ("./lambda_/source", aws_lambda.Runtime.PYTHON_3_8),
+        })
+
         # Functions
         function = aws_lambda.Function(self, "lambda-deregister-function",
-            function_name=f"{self.project['prefix']}-lambda-deregister-function",
-            code=aws_lambda.Code.asset("./lambda_/source"),
+            function_name=self.project.resource_name("lambda-deregister-function"),
+            code=code['deregister-function'],
             handler="index.handler",
             runtime=aws_lambda.Runtime.PYTHON_3_8,
             role=self.role['deregister-function'],
@@ -4,7 +4,7 @@
     
     security_group_stack = SecurityGroupStack(
         scope        = app,
-        construct_id = f"{project['prefix']}-security-group",
+        construct_id = project.resource_name("security-group"),
         project      = project,
         vpc          = vpc_stack.vpc,
         env          = cdk_environment)
@@ -12,10 +12,11 @@
 from aws_cdk import (
     core, aws_ec2
 )
+from tools.project_config import ProjectConfig
 
 class SecurityGroupStack(core.Stack):
 
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, vpc, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, vpc, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # Init
@@ -76,9 +77,9 @@ class SecurityGroupStack(core.Stack):
     def add_security_group(self, name: str, description: str, allow_all_outbound: bool):
         self.security_group[name] = aws_ec2.SecurityGroup(self, name,
             vpc                 = self.vpc,
-            security_group_name = f"{self.project['prefix']}-sg-{name}",
+            security_group_name = f"{self.project.prefix}-sg-{name}",
             description         = description,
             allow_all_outbound  = allow_all_outbound)
         core.Tags.of(self.security_group[name]).add(
             "Name",
-            f"{self.project['prefix']}-sg-{name}")
\ No newline at end of file
+            f"{self.project.prefix}-sg-{name}")
\ No newline at end of file
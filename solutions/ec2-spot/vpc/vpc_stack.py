@@ -1,10 +1,11 @@
 from aws_cdk import (
     core, aws_ec2
 )
+from tools.project_config import ProjectConfig
 
 class VpcStack(core.Stack):
 
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         self.vpc = aws_ec2.Vpc(self, "vpc",
@@ -3,10 +3,11 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, Duration, RemovalPolicy, Tags, aws_ec2, aws_iam, aws_kms, aws_eks
+from tools.project_config import ProjectConfig
 import json
 
 class EksStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, security_group: dict, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, vpc, security_group: dict, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.vpc            = vpc
@@ -28,7 +29,7 @@ class EksStack(Stack):
         # https://docs.aws.amazon.com/cdk/api/latest/python/aws_cdk.aws_kms/Key.html
         self.kms_key = dict()
         self.kms_key['eks-cluster'] = aws_kms.Key(self, "cmk-eks-cluster",
-            alias                    = f"alias/{self.project['prefix']}-cmk-eks-cluster",
+            alias                    = self.project.alias("cmk-eks-cluster"),
             description              = "description in this field",
             admins                   = None,
             enabled                  = True,
@@ -43,18 +44,18 @@ class EksStack(Stack):
         self.role = dict()
         # Existing role
         self.role['admin'] = aws_iam.Role.from_role_arn(self, "role-admin",
-            role_arn="arn:aws:iam::242593025403:role/AdministratorRole",
+            role_arn=self.project.role_arn("AdministratorRole"),
             mutable=True)
         # Create role
         self.role['eks-cluster'] = aws_iam.Role(self, "role-eks-cluster",
-            role_name   = f"{self.project['prefix']}-role-eks-cluster",
+            role_name   = self.project.resource_name("role-eks-cluster"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("eks.amazonaws.com"),
             managed_policies=[
                 aws_iam.ManagedPolicy.from_aws_managed_policy_name("AmazonEKSClusterPolicy")
             ])
         self.role['nodegroup'] = aws_iam.Role(self, "role-nodegroup",
-            role_name   = f"{self.project['prefix']}-role-nodegroup",
+            role_name   = self.project.resource_name("role-nodegroup"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("ec2.amazonaws.com"),
             managed_policies=[
@@ -82,7 +83,7 @@ class EksStack(Stack):
             # prune=None,
             secrets_encryption_key=self.kms_key['eks-cluster'],
             version=aws_eks.KubernetesVersion.V1_21,
-            cluster_name=f"{self.project['prefix']}-eks-cluster",
+            cluster_name=self.project.resource_name("eks-cluster"),
             output_cluster_name=True,
             output_config_command=True,
             role=self.role['eks-cluster'],
@@ -111,8 +112,8 @@ class EksStack(Stack):
                 )
             ],
             instance_type=aws_ec2.InstanceType("t3.xlarge"),
-            key_name=self.project['keypair'],
-            launch_template_name=f"{self.project['prefix']}-nodegroup-core-lt",
+            key_name=self.project.keypair,
+            launch_template_name=self.project.resource_name("nodegroup-core-lt"),
             security_group=self.security_group['eks-nodegroup'])
         
     def create_nodegroup(self):
@@ -121,9 +122,9 @@ class EksStack(Stack):
         self.nodegroup = dict()
         self.nodegroup['core'] = aws_eks.Nodegroup(self, "nodegroup-core", 
             cluster=self.eks_cluster,
-            nodegroup_name=f"{self.project['prefix']}-nodegroup-core",
+            nodegroup_name=self.project.resource_name("nodegroup-core"),
             tags={
-                "Name": f"{self.project['prefix']}-nodegroup-core"
+                "Name": self.project.resource_name("nodegroup-core")
             },
             labels={
                 "management": "core"
@@ -307,7 +308,7 @@ class EksStack(Stack):
         #         'autoDiscovery': {
         #             'clusterName': self.eks_cluster.cluster_name,
         #         },
-        #         'awsRegion': self.project['region'],
+        #         'awsRegion': self.project.region,
         #         'rbac': {
         #             'serviceAccount': {
         #                 'create': False,
@@ -3,9 +3,10 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, Tags, aws_ec2
+from tools.project_config import ProjectConfig
 
 class SecurityGroupStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, vpc, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, vpc, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Init
         self.vpc = vpc
@@ -78,9 +79,9 @@ class SecurityGroupStack(Stack):
     def add_security_group(self, name: str, description: str, allow_all_outbound: bool):
         self.security_group[name] = aws_ec2.SecurityGroup(self, name,
             vpc                 = self.vpc,
-            security_group_name = f"{self.project['prefix']}-{name}-sg",
+            security_group_name = f"{self.project.prefix}-{name}-sg",
             description         = description,
             allow_all_outbound  = allow_all_outbound)
         Tags.of(self.security_group[name]).add(
             "Name",
-            f"{self.project['prefix']}-{name}-sg")
\ No newline at end of file
+            f"{self.project.prefix}-{name}-sg")
\ No newline at end of file
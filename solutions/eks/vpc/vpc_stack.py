@@ -3,9 +3,10 @@
 '''
 from constructs import Construct
 from aws_cdk import Stack, aws_ec2
+from tools.project_config import ProjectConfig
 
 class VpcStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, project: ProjectConfig, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         # Vpc
         # https://docs.aws.amazon.com/cdk/api/latest/python/aws_cdk.aws_ec2/Vpc.html
@@ -31,7 +32,7 @@ class VpcStack(Stack):
                 )
             ]
         )
-        # self.vpc.add_flow_log(id=f"{project['prefix']}-vpc-flow-log")
+        # self.vpc.add_flow_log(id=project.resource_name("vpc-flow-log"))
         # self.add_vpc_endpoint()
 
     def add_vpc_endpoint(self):
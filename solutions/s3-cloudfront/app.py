@@ -1,50 +1,55 @@
 #!/usr/bin/env python3
 '''
     Initial cdk project information
-    1. Import CDK modules
-    2. Import Services modules in this project
-    3. Project information
-    4. cdk Construct
+    1. Startup profiler
+    2. Import CDK modules
+    3. Import Services modules in this project(lazily)
+    4. Project information
+    5. cdk Construct
 '''
+# Startup profiler(--profile-startup), it must be created before the CDK import to time it.
+# tools/ is shared by every project of the repository
+import os
+import sys
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPOSITORY_DIR not in sys.path:
+    sys.path.append(REPOSITORY_DIR)
+from tools.startup import StartupProfiler
+profiler = StartupProfiler()
+
 # Import CDK modules
 from aws_cdk import core
 
 # Import Services modules
-from s3.s3_stack import S3Stack
-from cloudfront.cloudfront_stack import CloudFrontStack
-from lambda_.lambda_stack import LambdaStack
-
-# Information of project
-project = dict()
-project['account'] = "242593025403"
-project['region']  = "us-east-1"
-project['env']     = "dev"
-project['name']    = "cdkworkshop"
-project['prefix']  = f"{project['env']}-{project['name']}"
+# Stack modules are imported lazily by profiler.load() right before construction.
+from tools.project_config import load_config
+
+# Information of project(config/<env>.json, selected by "env" context: cdk synth -c env=dev)
+project = load_config()
 
 # cdk environment
 cdk_environment = core.Environment(
-    account=project['account'],
-    region=project['region'])
+    account=project.account,
+    region=project.region)
 
 # cdk construct
 app = core.App()
 
-s3_stack = S3Stack(
+s3_stack = profiler.construct("s3", profiler.load("s3.s3_stack:S3Stack"),
     scope        = app,
-    construct_id = f"{project['prefix']}-s3",
+    construct_id = project.resource_name("s3"),
     project      = project,
     env          = cdk_environment)
 
-lambda_stack = LambdaStack(
+lambda_stack = profiler.construct("lambda", profiler.load("lambda_.lambda_stack:LambdaStack"),
     scope        = app,
-    construct_id = f"{project['prefix']}-lambda",
+    construct_id = project.resource_name("lambda"),
     project      = project,
     env          = cdk_environment)
 
-cloudfront_stack = CloudFrontStack(
+cloudfront_stack = profiler.construct("cloudfront", profiler.load("cloudfront.cloudfront_stack:CloudFrontStack"),
     scope        = app,
-    construct_id = f"{project['prefix']}-cloudfront",
+    construct_id = project.resource_name("cloudfront"),
     project      = project,
     origin       = {
         's3': s3_stack.s3_bucket
@@ -54,4 +59,5 @@ cloudfront_stack = CloudFrontStack(
 
 
 # app synth -> cloudformation template
-app.synth()
\ No newline at end of file
+profiler.construct("app.synth", app.synth)
+profiler.report()
\ No newline at end of file
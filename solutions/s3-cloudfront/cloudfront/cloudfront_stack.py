@@ -13,10 +13,11 @@
 from aws_cdk import (
     core, aws_cloudfront, aws_cloudfront_origins, aws_certificatemanager
 )
+from tools.project_config import ProjectConfig
 
 class CloudFrontStack(core.Stack):
 
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, origin, function, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, origin, function, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         
         # initial
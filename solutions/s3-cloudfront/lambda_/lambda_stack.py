@@ -4,9 +4,11 @@
 from aws_cdk import (
     core, aws_iam, aws_lambda
 )
+from tools.project_config import ProjectConfig
+from tools.lambda_bundle import bundle_codes
 
 class LambdaStack(core.Stack):
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # Init
@@ -16,7 +18,7 @@ class LambdaStack(core.Stack):
         
         # IAM
         self.role['sigv4-request-to-s3'] = aws_iam.Role(self, "sigv4-request-to-s3-role",
-            role_name   = f"{project['prefix']}-role-lambda-sigv4-request-to-s3",
+            role_name   = project.resource_name("role-lambda-sigv4-request-to-s3"),
             description = "",
             assumed_by  = aws_iam.CompositePrincipal(
                 aws_iam.ServicePrincipal("lambda.amazonaws.com"),
@@ -34,10 +36,15 @@ class LambdaStack(core.Stack):
             ]
         )
 
+        # Function code, zipped once per source content(lambda_bundle.py)
+        code = bundle_codes({
+            'sigv4-request-to-s3': ("./lambda_/source", aws_lambda.Runtime.NODEJS_14_X),
+        })
+
         # Functions
         self.function['sigv4-request-to-s3'] = aws_lambda.Function(self, "lambda-sigv4-request-to-s3",
-            function_name=f"{self.project['prefix']}-lambda-sigv4-request-to-s3",
-            code=aws_lambda.Code.asset("./lambda_/source"),
+            function_name=self.project.resource_name("lambda-sigv4-request-to-s3"),
+            code=code['sigv4-request-to-s3'],
             handler="index.handler",
             runtime=aws_lambda.Runtime.NODEJS_14_X,
             role=self.role['sigv4-request-to-s3'],
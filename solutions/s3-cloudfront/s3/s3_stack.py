@@ -4,9 +4,10 @@
 from aws_cdk import (
     core, aws_kms, aws_iam, aws_s3
 )
+from tools.project_config import ProjectConfig
 
 class S3Stack(core.Stack):
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # Init
@@ -16,7 +17,7 @@ class S3Stack(core.Stack):
 
         # KMS
         self.kms_key['s3-bucket'] = aws_kms.Key(self, "kms-s3-bucket",
-            alias                    = f"alias/{project['prefix']}-s3-bucket",
+            alias                    = project.alias("s3-bucket"),
             description              = "",
             admins                   = None,
             enabled                  = True,
@@ -1,111 +1,110 @@
 #!/usr/bin/env python3
 '''
     Initial cdk project information
-    1. Import CDK modules
-    2. Import Services modules in this project
-    3. Project information
-    4. cdk Construct
+    1. Startup profiler
+    2. Import CDK modules
+    3. Import Services modules in this project(lazily)
+    4. Project information
+    5. cdk Construct
 '''
+# Startup profiler(--profile-startup), it must be created before the CDK import to time it.
+# tools/ is shared by every project of the repository
+import os
+import sys
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPOSITORY_DIR not in sys.path:
+    sys.path.append(REPOSITORY_DIR)
+from tools.startup import StartupProfiler
+profiler = StartupProfiler()
+
 # Import CDK modules
 from aws_cdk import core
 
 # Import Services modules
-from vpc.vpc_stack import VpcStack
-from security_group.security_group_stack import SecurityGroupStack
-from elb.elb_stack import ElasticLoadBalancerStack
-from ec2.asg_stack import AutoScalingGroupStack
-from cloudfront.cloudfront_stack import CloudFrontStack
-from rds.rds_stack import RdsStack
-from elasticache.elasticache_stack import ElasticacheStack
-from efs.efs_stack import EfsStack
-from nacl.nacl_stack import NaclStack
+# Stack modules are imported lazily by profiler.load() right before construction.
+from tools.project_config import load_config
 
-# Information of project
-project = dict()
-project['account'] = "242593025403"
-project['region']  = "us-east-1"
-project['env']     = "dev"
-project['name']    = "samsungskills"
-project['prefix']  = f"{project['env']}-{project['name']}"
-project['keypair'] = "dev-useast1"
+# Information of project(config/<env>.json, selected by "env" context: cdk synth -c env=dev)
+project = load_config()
 
 # cdk environment
 cdk_environment = core.Environment(
-    account=project['account'],
-    region=project['region'])
+    account=project.account,
+    region=project.region)
 
 # cdk construct
 app = core.App()
 
 # Stacks
-vpc_stack = VpcStack(
+vpc_stack = profiler.construct("vpc", profiler.load("vpc.vpc_stack:VpcStack"),
     scope        = app,
-    construct_id = f"{project['prefix']}",
+    construct_id = project.prefix,
     project      = project,
     env          = cdk_environment)
 
-security_group_stack = SecurityGroupStack(
+security_group_stack = profiler.construct("security-group", profiler.load("security_group.security_group_stack:SecurityGroupStack"),
     scope        = app,
-    construct_id = f"{project['prefix']}-security-group",
+    construct_id = project.resource_name("security-group"),
     project      = project,
     vpc          = vpc_stack.vpc,
     env          = cdk_environment)
 
-rds_stack = RdsStack(
+rds_stack = profiler.construct("rds", profiler.load("rds.rds_stack:RdsStack"),
     scope          = app,
-    construct_id   = f"{project['prefix']}-rds",
+    construct_id   = project.resource_name("rds"),
     project        = project,
     vpc            = vpc_stack.vpc,
     security_group = security_group_stack.security_group,
     env            = cdk_environment)
 
-elasticache_stack = ElasticacheStack(
+elasticache_stack = profiler.construct("elasticache", profiler.load("elasticache.elasticache_stack:ElasticacheStack"),
     scope          = app,
-    construct_id   = f"{project['prefix']}-elasticache",
+    construct_id   = project.resource_name("elasticache"),
     project        = project,
     vpc            = vpc_stack.vpc,
     security_group = security_group_stack.security_group,
     env            = cdk_environment)
 
-efs_stack = EfsStack(
+efs_stack = profiler.construct("efs", profiler.load("efs.efs_stack:EfsStack"),
     scope          = app,
-    construct_id   = f"{project['prefix']}-efs",
+    construct_id   = project.resource_name("efs"),
     project        = project,
     vpc            = vpc_stack.vpc,
     security_group = security_group_stack.security_group,
     env            = cdk_environment)
 
-elb_stack = ElasticLoadBalancerStack(
+elb_stack = profiler.construct("elb", profiler.load("elb.elb_stack:ElasticLoadBalancerStack"),
     scope          = app,
-    construct_id   = f"{project['prefix']}-elb",
+    construct_id   = project.resource_name("elb"),
     project        = project,
     vpc            = vpc_stack.vpc,
     security_group = security_group_stack.security_group,
     env            = cdk_environment)
 
-asg_stack = AutoScalingGroupStack(
+asg_stack = profiler.construct("asg", profiler.load("ec2.asg_stack:AutoScalingGroupStack"),
     scope          = app,
-    construct_id   = f"{project['prefix']}-asg",
+    construct_id   = project.resource_name("asg"),
     project        = project,
     vpc            = vpc_stack.vpc,
     security_group = security_group_stack.security_group,
     target_group   = elb_stack.target_group,
     env            = cdk_environment)
 
-cloudfront_stack = CloudFrontStack(
+cloudfront_stack = profiler.construct("cloudfront", profiler.load("cloudfront.cloudfront_stack:CloudFrontStack"),
     scope          = app,
-    construct_id   = f"{project['prefix']}-cloudfront",
+    construct_id   = project.resource_name("cloudfront"),
     project        = project,
     elb            = elb_stack.elb,
     env            = cdk_environment
 ).add_dependency(elb_stack)
 
-nacl_stack = NaclStack(
+nacl_stack = profiler.construct("nacl", profiler.load("nacl.nacl_stack:NaclStack"),
     scope          = app,
-    construct_id   = f"{project['prefix']}-nacl",
+    construct_id   = project.resource_name("nacl"),
     project        = project,
     vpc            = vpc_stack.vpc,
     env            = cdk_environment)
 
 # app synth -> cloudformation template
-app.synth()
\ No newline at end of file
+profiler.construct("app.synth", app.synth)
+profiler.report()
\ No newline at end of file
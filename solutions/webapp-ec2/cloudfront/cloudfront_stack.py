@@ -4,10 +4,11 @@
 from aws_cdk import (
     core, aws_cloudfront, aws_cloudfront_origins, aws_certificatemanager
 )
+from tools.project_config import ProjectConfig
 
 class CloudFrontStack(core.Stack):
 
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, elb, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, elb, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
         
         # initial
@@ -4,10 +4,11 @@
 from aws_cdk import (
     core, aws_iam, aws_ec2, aws_kms, aws_autoscaling
 )
+from tools.project_config import ProjectConfig
 
 class AutoScalingGroupStack(core.Stack):
 
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, vpc, security_group, target_group, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, vpc, security_group, target_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # Initial
@@ -25,7 +26,7 @@ class AutoScalingGroupStack(core.Stack):
         # Create Role
         self.role = dict()
         self.role['app'] = aws_iam.Role(self, "role-app",
-            role_name   = f"{self.project['prefix']}-role-app",
+            role_name   = self.project.resource_name("role-app"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("ec2.amazonaws.com"),
             managed_policies=[
@@ -65,7 +66,7 @@ class AutoScalingGroupStack(core.Stack):
     def add_cmk(self):
         self.kms_key = dict()
         self.kms_key['ebs'] = aws_kms.Key(self, "ebs_cmk",
-            alias               = f"alias/{self.project['prefix']}-ebs",
+            alias               = self.project.alias("ebs"),
             description         = "",
             admins              = None,
             enabled             = True,
@@ -104,7 +105,7 @@ class AutoScalingGroupStack(core.Stack):
                         not_principals=None,
                         not_resources=None,
                         principals=[
-                            aws_iam.ArnPrincipal(arn="arn:aws:iam::242593025403:role/aws-service-role/autoscaling.amazonaws.com/AWSServiceRoleForAutoScaling"),
+                            aws_iam.ArnPrincipal(arn=self.project.role_arn("aws-service-role/autoscaling.amazonaws.com/AWSServiceRoleForAutoScaling")),
                         ],
                         resources=["*"]
                     ),
@@ -125,7 +126,7 @@ class AutoScalingGroupStack(core.Stack):
                         not_principals=None,
                         not_resources=None,
                         principals=[
-                            aws_iam.ArnPrincipal(arn="arn:aws:iam::242593025403:role/aws-service-role/autoscaling.amazonaws.com/AWSServiceRoleForAutoScaling"),
+                            aws_iam.ArnPrincipal(arn=self.project.role_arn("aws-service-role/autoscaling.amazonaws.com/AWSServiceRoleForAutoScaling")),
                         ],
                         resources=["*"]
                     ),
@@ -155,7 +156,7 @@ class AutoScalingGroupStack(core.Stack):
         # Auto Scaling Group
         # https://docs.aws.amazon.com/cdk/api/latest/python/aws_cdk.aws_autoscaling/AutoScalingGroup.html
         self.auto_scaling_group = aws_autoscaling.AutoScalingGroup(self, "asg-app",
-            auto_scaling_group_name=f"{self.project['prefix']}-asg-app",
+            auto_scaling_group_name=self.project.resource_name("asg-app"),
             # tpye of instance
             instance_type=aws_ec2.InstanceType("t3.xlarge"),
             machine_image=ami,
@@ -165,7 +166,7 @@ class AutoScalingGroupStack(core.Stack):
             security_group=self.security_group['app'],
             vpc_subnets=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PRIVATE_WITH_NAT),
             # advanced options
-            key_name=self.project['keypair'],
+            key_name=self.project.keypair,
             role=self.role['app'],
             # ebs
             block_devices=None,
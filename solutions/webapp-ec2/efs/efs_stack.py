@@ -4,9 +4,10 @@
 from aws_cdk import (
     core, aws_ec2, aws_iam, aws_kms, aws_efs
 )
+from tools.project_config import ProjectConfig
 
 class EfsStack(core.Stack):
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # Init
@@ -18,7 +19,7 @@ class EfsStack(core.Stack):
 
         # kms
         self.kms_key['efs'] = aws_kms.Key(self, "efs_cmk",
-            alias               = f"alias/{project['prefix']}-efs",
+            alias               = project.alias("efs"),
             description         = "",
             admins              = None,
             enabled             = True,
@@ -31,7 +32,7 @@ class EfsStack(core.Stack):
         # efs
         aws_efs.FileSystem(self, "efs",
             vpc=self.vpc,
-            file_system_name=f"{self.project['prefix']}-efs",
+            file_system_name=self.project.resource_name("efs"),
             enable_automatic_backups=True,
             encrypted=True,
             kms_key=self.kms_key['efs'],
@@ -4,9 +4,10 @@
 from aws_cdk import (
     core, aws_ec2, aws_iam, aws_kms, aws_elasticache
 )
+from tools.project_config import ProjectConfig
 
 class ElasticacheStack(core.Stack):
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # Init
@@ -18,14 +19,14 @@ class ElasticacheStack(core.Stack):
 
         # subnet group
         self.subnet_group = aws_elasticache.CfnSubnetGroup(self, "redis_subnet_group",
-            cache_subnet_group_name=f"{self.project['prefix']}-redis-subnetgroup",
+            cache_subnet_group_name=self.project.resource_name("redis-subnetgroup"),
             description="",
             subnet_ids=[ subnet.subnet_id for subnet in self.vpc.isolated_subnets ]
         )
 
         # kms cmk
         self.kms_key['redis'] = aws_kms.Key(self, "kms-elasticache",
-            alias               = f"alias/{project['prefix']}-elasticache",
+            alias               = project.alias("elasticache"),
             description         = "",
             admins              = None,
             enabled             = True,
@@ -43,7 +44,7 @@ class ElasticacheStack(core.Stack):
         # redis
         aws_elasticache.CfnReplicationGroup(self, "redis-cluster",
             #identify
-            replication_group_id=f"{self.project['prefix']}-redis-cluster",
+            replication_group_id=self.project.resource_name("redis-cluster"),
             global_replication_group_id=None,
             primary_cluster_id=None,
             replication_group_description="",
@@ -84,7 +85,7 @@ class ElasticacheStack(core.Stack):
         # memcached
         aws_elasticache.CfnCacheCluster(self, "memcached-cluster",
             #identify
-            cluster_name=f"{self.project['prefix']}-memcached-cluster",
+            cluster_name=self.project.resource_name("memcached-cluster"),
             #specify
             cache_node_type="cache.t3.small",
             engine="memcached",
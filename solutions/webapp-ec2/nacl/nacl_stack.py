@@ -6,9 +6,10 @@
 from aws_cdk import (
     core, aws_ec2
 )
+from tools.project_config import ProjectConfig
 
 class NaclStack(core.Stack):
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, vpc, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, vpc, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # Init
@@ -215,8 +216,8 @@ class NaclStack(core.Stack):
         self.rule_number[name] = 0
         self.nacl[name] = aws_ec2.NetworkAcl(self, f"nacl-{name}",
             vpc=self.vpc,
-            network_acl_name=f"{self.project['prefix']}-nacl-{name}",
+            network_acl_name=f"{self.project.prefix}-nacl-{name}",
             subnet_selection=subnet_selection)
         core.Tags.of(self.nacl[name]).add(
             "Name",
-            f"{self.project['prefix']}-nacl-{name}")
\ No newline at end of file
+            f"{self.project.prefix}-nacl-{name}")
\ No newline at end of file
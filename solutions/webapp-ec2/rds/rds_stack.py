@@ -4,9 +4,10 @@
 from aws_cdk import (
     core, aws_iam, aws_kms, aws_ec2, aws_logs, aws_rds
 )
+from tools.project_config import ProjectConfig
 
 class RdsStack(core.Stack):
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, vpc, security_group, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, vpc, security_group, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # Init
@@ -18,7 +19,7 @@ class RdsStack(core.Stack):
         
         # subnet group
         self.subnet_group = aws_rds.SubnetGroup(self, "rds-subnetgroup",
-            subnet_group_name=f"{self.project['prefix']}-rds-subnetgroup",
+            subnet_group_name=self.project.resource_name("rds-subnetgroup"),
             description="isolation subnet group",
             vpc=self.vpc,
             vpc_subnets=aws_ec2.SubnetSelection(subnet_type=aws_ec2.SubnetType.PRIVATE_ISOLATED),
@@ -26,7 +27,7 @@ class RdsStack(core.Stack):
         
         # IAM Role for cloudwatch to monitoring and logging
         self.role['monitoring'] = aws_iam.Role(self, "rds-monitoring-role",
-            role_name   = f"{project['prefix']}-role-rds-monitoring",
+            role_name   = project.resource_name("role-rds-monitoring"),
             description = "",
             assumed_by  = aws_iam.ServicePrincipal("monitoring.rds.amazonaws.com"),
             external_id=None,
@@ -42,7 +43,7 @@ class RdsStack(core.Stack):
         
         # kms
         self.kms_key['rds'] = aws_kms.Key(self, "cmk-rds",
-            alias                    = f"alias/{project['prefix']}-rds",
+            alias                    = project.alias("rds"),
             description              = "",
             admins                   = None,
             enabled                  = True,
@@ -87,7 +88,7 @@ class RdsStack(core.Stack):
             })
         # database cluster
         aws_rds.DatabaseCluster(self, "aurora_mysql",
-            cluster_identifier=f"{self.project['prefix']}-rds-aurora-mysql",
+            cluster_identifier=self.project.resource_name("rds-aurora-mysql"),
             instance_identifier_base=None,
             engine=aws_rds.DatabaseClusterEngine.aurora_mysql(
                 version=aws_rds.AuroraMysqlEngineVersion.VER_2_09_2),
@@ -146,7 +147,7 @@ class RdsStack(core.Stack):
             })
         # database cluster
         aws_rds.DatabaseCluster(self, "aurora_postgres",
-            cluster_identifier=f"{self.project['prefix']}-rds-aurora-postgres",
+            cluster_identifier=self.project.resource_name("rds-aurora-postgres"),
             instance_identifier_base=None,
             engine=aws_rds.DatabaseClusterEngine.aurora_postgres(
                 version=aws_rds.AuroraPostgresEngineVersion.VER_12_4),
@@ -206,7 +207,7 @@ class RdsStack(core.Stack):
         mysql_instance = aws_rds.DatabaseInstance(self, "mysql",
             engine=aws_rds.DatabaseInstanceEngine.mysql(
                 version=aws_rds.MysqlEngineVersion.VER_8_0_21),
-            instance_identifier=f"{self.project['prefix']}-mysql",
+            instance_identifier=self.project.resource_name("mysql"),
             instance_type=aws_ec2.InstanceType.of(
                 instance_class=aws_ec2.InstanceClass.BURSTABLE3,
                 instance_size=aws_ec2.InstanceSize.MICRO
@@ -268,7 +269,7 @@ class RdsStack(core.Stack):
         # read-replica        
         # aws_rds.DatabaseInstanceReadReplica(self, "mysql-read-replica",
         #     source_database_instance=mysql_instance,
-        #     instance_identifier=f"{self.project['prefix']}-mysql-rr1",
+        #     instance_identifier=self.project.resource_name("mysql-rr1"),
         #     instance_type=aws_ec2.InstanceType.of(
         #         instance_class=aws_ec2.InstanceClass.BURSTABLE3,
         #         instance_size=aws_ec2.InstanceSize.MICRO
@@ -332,7 +333,7 @@ class RdsStack(core.Stack):
         aws_rds.DatabaseInstance(self, "postgres",
             engine=aws_rds.DatabaseInstanceEngine.postgres(
                 version=aws_rds.PostgresEngineVersion.VER_13_1),
-            instance_identifier=f"{self.project['prefix']}-postgres",
+            instance_identifier=self.project.resource_name("postgres"),
             instance_type=aws_ec2.InstanceType.of(
                 instance_class=aws_ec2.InstanceClass.BURSTABLE3,
                 instance_size=aws_ec2.InstanceSize.MICRO
@@ -4,25 +4,49 @@
     
     security_group_stack = SecurityGroupStack(
         scope        = app,
-        construct_id = f"{project['prefix']}-security-group",
+        construct_id = project.resource_name("security-group"),
         project      = project,
         vpc          = vpc_stack.vpc,
         env          = cdk_environment)
+
+    rule은 tier 사이의 flow로 선언하고 sg_graph.py가 양쪽 security group의 rule로 compile합니다.
+    graph.can_reach('ext-alb', 'app', 8080)로 배포 없이 통신 가능 여부를 확인할 수 있습니다.
 '''
 from aws_cdk import (
     core, aws_ec2
 )
+from tools.project_config import ProjectConfig
+from tools.sg_graph import ALL_PORTS, PROTOCOLS, SecurityGroupGraph
+
+# 배포된 rule의 string_representation(CDK 1.x는 construct id에 포함합니다)
+# graph의 compile 순서와 상관없이 기존 rule의 logical id가 유지되어야 합니다.
+# 값이 바뀌면 CloudFormation이 같은 rule을 먼저 생성하고 기존 rule을 삭제하므로 InvalidPermission.Duplicate가 발생합니다.
+DEPLOYED_REPRESENTATIONS = {
+    ('ext-alb',     'ingress', '0.0.0.0/0',   (80, 80)):     '2',
+    ('ext-alb',     'egress',  'app',         (8080, 8080)): '3',
+    ('app',         'ingress', 'ext-alb',     (8080, 8080)): '4',
+    ('app',         'egress',  'rds',         (3306, 3306)): '5',
+    ('app',         'egress',  'elasticache', (6379, 6379)): '6',
+    ('app',         'egress',  'efs',         (2049, 2049)): '7',
+    ('app',         'egress',  '0.0.0.0/0',   (80, 80)):     '8',
+    ('app',         'egress',  '0.0.0.0/0',   (443, 443)):   '9',
+    ('rds',         'ingress', 'app',         (3306, 3306)): '10',
+    ('elasticache', 'ingress', 'app',         (6379, 6379)): '11',
+    ('efs',         'ingress', 'app',         (2049, 2049)): '12',
+}
 
 class SecurityGroupStack(core.Stack):
 
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, vpc, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, vpc, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # Init
         self.vpc = vpc
         self.project = project
         self.security_group = dict()
-        self.string_representation=1
+        # 새 rule은 배포된 값 다음 번호부터 사용합니다.
+        self.string_representation=max(int(value) for value in DEPLOYED_REPRESENTATIONS.values())
+        self.graph = SecurityGroupGraph(names={ 'any': [ '0.0.0.0/0' ] }, inline_groups=False)
         self.port_number = {
             'ext-alb': 80,
             'app': 8080,
@@ -53,103 +77,58 @@ class SecurityGroupStack(core.Stack):
             description = "",
             allow_all_outbound = False)
 
-        # ext-alb
-        self.security_group['ext-alb'].add_ingress_rule(
-            peer = aws_ec2.Peer.ipv4('0.0.0.0/0'),
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=self.port_number['ext-alb'],
-                to_port=self.port_number['ext-alb']),
-            description = "")
-        self.security_group['ext-alb'].add_egress_rule(
-            peer = self.security_group['app'],
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=self.port_number['app'],
-                to_port=self.port_number['app']),
-            description = "")
+        # Flows(sg_graph.py derives the ingress and egress rules of both ends)
+        self.graph.flow("any", "ext-alb", self.port_number['ext-alb'])
+        self.graph.flow("ext-alb", "app", self.port_number['app'])
+        self.graph.flow("app", "rds", self.port_number['rds'])
+        self.graph.flow("app", "elasticache", self.port_number['elasticache'])
+        self.graph.flow("app", "efs", self.port_number['efs'])
+        self.graph.flow("app", "any", 80)
+        self.graph.flow("app", "any", 443)
+        self.add_graph_rules()
 
-        # app-srv
-        self.security_group['app'].add_ingress_rule(
-            peer = self.security_group['ext-alb'],
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=self.port_number['app'],
-                to_port=self.port_number['app']),
-            description = "")
-        self.security_group['app'].add_egress_rule(
-            peer = self.security_group['rds'],
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=self.port_number['rds'],
-                to_port=self.port_number['rds']),
-            description = "")
-        self.security_group['app'].add_egress_rule(
-            peer = self.security_group['elasticache'],
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=self.port_number['elasticache'],
-                to_port=self.port_number['elasticache']),
-            description = "")
-        self.security_group['app'].add_egress_rule(
-            peer = self.security_group['efs'],
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=self.port_number['efs'],
-                to_port=self.port_number['efs']),
-            description = "")
-        self.security_group['app'].add_egress_rule(
-            peer = aws_ec2.Peer.ipv4('0.0.0.0/0'),
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=80,
-                to_port=80),
-            description = "")
-        self.security_group['app'].add_egress_rule(
-            peer = aws_ec2.Peer.ipv4('0.0.0.0/0'),
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=443,
-                to_port=443),
-            description = "")
+    '''
+        Graph의 rule을 security group에 추가합니다.
+        CDK 1.115에는 Peer.security_group_id가 없어서 security group peer는 별도 resource로 생성됩니다.
+    '''
+    def add_graph_rules(self):
+        for name, directions in self.graph.compiled.items():
+            for rule in directions['ingress']:
+                self.security_group[name].add_ingress_rule(
+                    peer = self.graph_peer(rule),
+                    connection = self.graph_port(rule),
+                    description = rule.description)
+            for rule in directions['egress']:
+                self.security_group[name].add_egress_rule(
+                    peer = self.graph_peer(rule),
+                    connection = self.graph_port(rule),
+                    description = rule.description)
 
-        # rds
-        self.security_group['rds'].add_ingress_rule(
-            peer = self.security_group['app'],
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=self.port_number['rds'],
-                to_port=self.port_number['rds']),
-            description = "")
+    def graph_peer(self, rule):
+        if isinstance(rule.peer, str):
+            return self.security_group[rule.peer]
+        return aws_ec2.Peer.ipv4(str(rule.peer))
 
-        # elasticache
-        self.security_group['elasticache'].add_ingress_rule(
-            peer = self.security_group['app'],
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=self.port_number['elasticache'],
-                to_port=self.port_number['elasticache']),
-            description = "")
+    def graph_port(self, rule):
+        ports = rule.ports or ALL_PORTS
+        if rule.protocol in (PROTOCOLS['tcp'], PROTOCOLS['udp']):
+            return aws_ec2.Port(
+                string_representation=self.rule_representation(rule), # Unique value
+                protocol=aws_ec2.Protocol.TCP if rule.protocol == PROTOCOLS['tcp'] else aws_ec2.Protocol.UDP,
+                from_port=ports[0],
+                to_port=ports[1])
+        if rule.protocol == PROTOCOLS['all']:
+            return aws_ec2.Port.all_traffic()
+        if rule.protocol == PROTOCOLS['icmp']:
+            return aws_ec2.Port.all_icmp()
+        raise ValueError(f"protocol {rule.protocol} is not supported by Port")
 
-        # efs
-        self.security_group['efs'].add_ingress_rule(
-            peer = self.security_group['app'],
-            connection = aws_ec2.Port(
-                string_representation=self.generate_string_representation(), # Unique value
-                protocol=aws_ec2.Protocol.TCP,
-                from_port=self.port_number['efs'],
-                to_port=self.port_number['efs']),
-            description = "")
+    '''
+        배포된 rule은 DEPLOYED_REPRESENTATIONS의 값을, 새 rule은 새로 생성한 값을 사용합니다.
+    '''
+    def rule_representation(self, rule):
+        key = (rule.group, rule.direction, str(rule.peer), rule.ports or ALL_PORTS)
+        return DEPLOYED_REPRESENTATIONS.get(key) or self.generate_string_representation()
 
     '''
         Unique String_represnetation 값을 생성합니다.
@@ -164,9 +143,10 @@ class SecurityGroupStack(core.Stack):
     def add_security_group(self, name: str, description: str, allow_all_outbound: bool):
         self.security_group[name] = aws_ec2.SecurityGroup(self, name,
             vpc                 = self.vpc,
-            security_group_name = f"{self.project['prefix']}-sg-{name}",
+            security_group_name = f"{self.project.prefix}-sg-{name}",
             description         = description,
             allow_all_outbound  = allow_all_outbound)
+        self.graph.tier(name, allow_all_outbound=allow_all_outbound)
         core.Tags.of(self.security_group[name]).add(
             "Name",
-            f"{self.project['prefix']}-sg-{name}")
\ No newline at end of file
+            f"{self.project.prefix}-sg-{name}")
\ No newline at end of file
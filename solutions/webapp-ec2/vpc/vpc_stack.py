@@ -1,10 +1,11 @@
 from aws_cdk import (
     core, aws_ec2
 )
+from tools.project_config import ProjectConfig
 
 class VpcStack(core.Stack):
 
-    def __init__(self, scope: core.Construct, construct_id: str, project: dict, **kwargs) -> None:
+    def __init__(self, scope: core.Construct, construct_id: str, project: ProjectConfig, **kwargs) -> None:
         super().__init__(scope, construct_id, **kwargs)
 
         # init
@@ -34,7 +35,7 @@ class VpcStack(core.Stack):
             ]
         )
 
-        self.vpc.add_flow_log(id=f"{project['prefix']}-vpc-flow-log")
+        self.vpc.add_flow_log(id=project.resource_name("vpc-flow-log"))
         self.add_vpc_endpoint()
     
     def add_vpc_endpoint(self):
@@ -48,4 +49,4 @@ class VpcStack(core.Stack):
             subnets=self.vpc.private_subnets)
         core.Tags.of(self.vpc_endpoint['s3gateway']).add(
             "Name",
-            f"{self.project['prefix']}-s3gateway-vpce")
\ No newline at end of file
+            self.project.resource_name("s3gateway-vpce"))
\ No newline at end of file
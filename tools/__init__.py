@@ -0,0 +1,10 @@
+'''
+    Post-synth tools, they read a cloud assembly(cdk.out) and never import aws_cdk.
+    Run from the repository root:
+        python3 -m tools.<tool> <project>/cdk.out
+
+    Modules shared by the projects(services, cfn-services, solutions/*), imported after app.py
+    adds the repository root to sys.path:
+        startup, project_config, ipam, vpc_endpoints, nat_topology, nacl_compiler, sg_graph, lambda_bundle
+    Only lambda_bundle imports aws_cdk, inside bundle_codes().
+'''
@@ -0,0 +1,127 @@
+'''
+    Cloud assembly reader
+    Reads manifest.json of a cdk.out directory without aws_cdk(cx-api),
+    so the tools work with every aws-cdk-lib version used in this repository.
+    merge_assemblies() writes the cloud assemblies of several Apps into one(parallel and matrix synth).
+'''
+import json
+import os
+import shutil
+
+STACK_TYPE          = "aws:cloudformation:stack"
+ASSET_MANIFEST_TYPE = "cdk:asset-manifest"
+# Files every synth writes, they are merged instead of copied.
+MERGED_FILES        = ("manifest.json", "tree.json", "cdk.out")
+
+
+class StackArtifact:
+    def __init__(self, assembly, artifact_id: str, artifact: dict) -> None:
+        self.assembly    = assembly
+        self.id          = artifact_id
+        self.artifact    = artifact
+        self.properties  = artifact.get("properties", dict())
+        self.environment = artifact.get("environment", "")
+        self.stack_name  = self.properties.get("stackName", artifact_id)
+
+    @property
+    def template_file(self) -> str:
+        return os.path.join(self.assembly.directory, self.properties["templateFile"])
+
+    @property
+    def dependencies(self) -> list:
+        # only other stacks, asset manifests are published by "cdk deploy" itself
+        return [
+            dependency for dependency in self.artifact.get("dependencies", list())
+            if dependency in self.assembly.stacks
+        ]
+
+    def template(self) -> dict:
+        with open(self.template_file) as file:
+            return json.load(file)
+
+
+class CloudAssembly:
+    def __init__(self, directory: str) -> None:
+        self.directory = os.path.abspath(directory)
+        with open(os.path.join(self.directory, "manifest.json")) as file:
+            self.manifest = json.load(file)
+        self.artifacts = self.manifest.get("artifacts", dict())
+        self.stacks    = dict()
+        for artifact_id, artifact in self.artifacts.items():
+            if artifact.get("type") == STACK_TYPE:
+                self.stacks[artifact_id] = StackArtifact(self, artifact_id, artifact)
+
+    def stack(self, name: str) -> StackArtifact:
+        '''
+            Finds a stack by artifact id or CloudFormation stack name.
+        '''
+        if name in self.stacks:
+            return self.stacks[name]
+        for stack in self.stacks.values():
+            if stack.stack_name == name:
+                return stack
+        raise KeyError(f"stack '{name}' is not in {self.directory}, stacks: {', '.join(self.stacks)}")
+
+
+'''
+    Merge
+'''
+def _merge_tree(target: dict, part: dict, label: str) -> None:
+    children = target["tree"].setdefault("children", dict())
+    for construct_id, child in part["tree"].get("children", dict()).items():
+        if construct_id in children and construct_id != "Tree":
+            raise ValueError(f"construct '{construct_id}' is synthesized by more than one {label}")
+        children[construct_id] = child
+
+
+def merge_assemblies(parts: list, outdir: str, label: str = "assembly") -> None:
+    '''
+        Moves templates and assets of every part(a cdk.out directory) into outdir and
+        writes one manifest.json/tree.json that lists all of their artifacts.
+        label names a part in the error of an artifact synthesized twice("StackSet", "environment").
+    '''
+    manifest = None
+    tree     = None
+    os.makedirs(outdir, exist_ok=True)
+    for part in parts:
+        for name in os.listdir(part):
+            if name in MERGED_FILES:
+                continue
+            source = os.path.join(part, name)
+            target = os.path.join(outdir, name)
+            # asset directories are content addressed, an existing one is identical
+            if os.path.isdir(source) and os.path.exists(target):
+                continue
+            shutil.move(source, target)
+
+        with open(os.path.join(part, "manifest.json")) as file:
+            part_manifest = json.load(file)
+        if manifest is None:
+            manifest = part_manifest
+            shutil.copy2(os.path.join(part, "cdk.out"), os.path.join(outdir, "cdk.out"))
+        else:
+            for artifact_id, artifact in part_manifest.get("artifacts", dict()).items():
+                if artifact_id in manifest["artifacts"] and artifact_id != "Tree":
+                    raise ValueError(f"artifact '{artifact_id}' is synthesized by more than one {label}")
+                manifest["artifacts"][artifact_id] = artifact
+            missing = manifest.setdefault("missing", list())
+            for entry in part_manifest.get("missing", list()):
+                if entry not in missing:
+                    missing.append(entry)
+            if not missing:
+                del manifest["missing"]
+
+        tree_path = os.path.join(part, "tree.json")
+        if os.path.exists(tree_path):
+            with open(tree_path) as file:
+                part_tree = json.load(file)
+            if tree is None:
+                tree = part_tree
+            else:
+                _merge_tree(tree, part_tree, label)
+
+    with open(os.path.join(outdir, "manifest.json"), "w") as file:
+        json.dump(manifest, file, indent=2)
+    if tree is not None:
+        with open(os.path.join(outdir, "tree.json"), "w") as file:
+            json.dump(tree, file, indent=2)
@@ -0,0 +1,290 @@
+'''
+    Cloud assembly compaction
+    Rewrites a cdk.out in place before it is deployed(cdk deploy --app cdk.out):
+        1. file assets with the same content(sha256 of the file or directory tree) are published once,
+           duplicates are removed and their references point to the kept asset
+        2. templates(and nested templates) are written as minified JSON
+        3. --strip-metadata(production builds): resource Metadata of the CDK(aws:cdk:path, aws:asset:*),
+           the CDKMetadata resource and its condition, stack traces in manifest.json and tree.json
+    Templates are content addressed: a rewritten template gets a new object key(sha256 of its content),
+    which is updated in its asset manifest, in manifest.json and in the parent template of a nested stack.
+
+    Usage(from the repository root, after cdk synth):
+        python3 -m tools.compact_assembly cfn-services/cdk.out
+        python3 -m tools.compact_assembly cfn-services/cdk.out --strip-metadata --json
+        cdk deploy --app cfn-services/cdk.out --all
+
+    Only the asset manifests of the default synthesizer are read, assets of the legacy synthesizer
+    (asset parameters, CDK v1 projects) are not deduplicated.
+    Repeated values are not moved into Mappings: Fn::FindInMap returns strings and string lists only,
+    the repeated values of the templates are objects(policy documents, tags).
+'''
+import argparse
+import hashlib
+import json
+import os
+import re
+import shutil
+import sys
+
+from tools.assembly import ASSET_MANIFEST_TYPE, CloudAssembly
+
+TEMPLATE_SUFFIX    = ".template.json"
+METADATA_TYPE      = "AWS::CDK::Metadata"
+METADATA_CONDITION = "CDKMetadataAvailable"
+METADATA_PREFIXES  = ("aws:cdk:", "aws:asset:")
+TREE_TYPE          = "cdk:tree"
+DIGEST             = re.compile(r"[0-9a-f]{64}")
+
+
+def _sha256_file(digest, path: str) -> None:
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(65536), b""):
+            digest.update(chunk)
+
+
+def content_hash(path: str) -> str:
+    '''
+        sha256 of a file, or of the relative paths and contents of a directory tree.
+    '''
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                file_path = os.path.join(root, name)
+                digest.update(os.path.relpath(file_path, path).encode() + b"\0")
+                _sha256_file(digest, file_path)
+    else:
+        _sha256_file(digest, path)
+    return digest.hexdigest()
+
+
+def _size(path: str) -> int:
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _replace(value, replacements: dict):
+    '''
+        Replaces every digest of replacements in the strings of a JSON document.
+    '''
+    if isinstance(value, str):
+        return DIGEST.sub(lambda match: replacements.get(match.group(0), match.group(0)), value)
+    if isinstance(value, list):
+        return [ _replace(item, replacements) for item in value ]
+    if isinstance(value, dict):
+        return { _replace(key, replacements): _replace(item, replacements) for key, item in value.items() }
+    return value
+
+
+def _write(path: str, document: dict, minify: bool = False) -> str:
+    if minify:
+        text = json.dumps(document, separators=(",", ":"))
+    else:
+        text = json.dumps(document, indent=1)
+    with open(path, "w") as file:
+        file.write(text)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def strip_metadata(template: dict) -> dict:
+    resources = template.get("Resources", dict())
+    for logical_id in [ name for name, resource in resources.items() if resource.get("Type") == METADATA_TYPE ]:
+        del resources[logical_id]
+    for resource in resources.values():
+        metadata = resource.get("Metadata")
+        if not isinstance(metadata, dict):
+            continue
+        for key in [ key for key in metadata if key.startswith(METADATA_PREFIXES) ]:
+            del metadata[key]
+        if not metadata:
+            del resource["Metadata"]
+    conditions = template.get("Conditions", dict())
+    if METADATA_CONDITION in conditions and METADATA_CONDITION not in json.dumps(
+            { name: value for name, value in template.items() if name != "Conditions" }):
+        del conditions[METADATA_CONDITION]
+        if not conditions:
+            del template["Conditions"]
+    return template
+
+
+class AssetManifest:
+    def __init__(self, assembly: CloudAssembly, artifact_id: str) -> None:
+        self.path = os.path.join(assembly.directory, assembly.artifacts[artifact_id]["properties"]["file"])
+        with open(self.path) as file:
+            self.document = json.load(file)
+
+    @property
+    def files(self) -> dict:
+        return self.document.setdefault("files", dict())
+
+    def save(self) -> None:
+        _write(self.path, self.document)
+
+
+'''
+    Passes
+'''
+def dedupe_assets(assembly: CloudAssembly, manifests: list) -> tuple:
+    '''
+        Returns ({ removed asset id: kept asset id }, bytes removed).
+    '''
+    kept     = dict()     # content hash -> (asset id, source path)
+    replaced = dict()
+    removed  = 0
+    unused   = set()
+    for manifest in manifests:
+        for asset_id, asset in sorted(manifest.files.items()):
+            source = asset["source"]["path"]
+            if source.endswith(TEMPLATE_SUFFIX):
+                continue
+            path = os.path.join(assembly.directory, source)
+            if not os.path.exists(path):
+                continue
+            key = (asset["source"].get("packaging", "file"), content_hash(path))
+            if key not in kept:
+                kept[key] = (asset_id, source)
+                continue
+            kept_id, kept_source = kept[key]
+            if kept_id != asset_id:
+                replaced[asset_id] = kept_id
+            if source != kept_source:
+                unused.add(source)
+            asset["source"]["path"] = kept_source
+    for manifest in manifests:
+        for asset_id in [ asset_id for asset_id in manifest.files if asset_id in replaced ]:
+            asset = manifest.files.pop(asset_id)
+            target = manifest.files.setdefault(replaced[asset_id], _replace(asset, replaced))
+            for destination_id, destination in asset["destinations"].items():
+                target["destinations"].setdefault(destination_id, _replace(destination, replaced))
+    sources = { asset["source"]["path"] for manifest in manifests for asset in manifest.files.values() }
+    for source in sorted(unused - sources):
+        path = os.path.join(assembly.directory, source)
+        removed += _size(path)
+        shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+    return replaced, removed
+
+
+def _template_order(templates: dict) -> list:
+    '''
+        Asset ids of templates, nested templates before the templates that reference them.
+    '''
+    order, visited = list(), set()
+
+    def visit(asset_id: str) -> None:
+        if asset_id in visited:
+            return
+        visited.add(asset_id)
+        for child_id in templates:
+            if child_id != asset_id and child_id in templates[asset_id]["text"]:
+                visit(child_id)
+        order.append(asset_id)
+
+    for asset_id in sorted(templates):
+        visit(asset_id)
+    return order
+
+
+def compact_templates(assembly: CloudAssembly, manifests: list, replacements: dict, strip: bool) -> dict:
+    '''
+        Rewrites every template asset, returns { old template digest: new template digest }.
+    '''
+    templates = dict()
+    for manifest in manifests:
+        for asset_id, asset in manifest.files.items():
+            if asset["source"]["path"].endswith(TEMPLATE_SUFFIX):
+                path = os.path.join(assembly.directory, asset["source"]["path"])
+                with open(path) as file:
+                    templates[asset_id] = { "manifest": manifest, "path": path, "text": file.read() }
+    digests = dict()
+    for asset_id in _template_order(templates):
+        template = _replace(json.loads(templates[asset_id]["text"]), dict(replacements, **digests))
+        if strip:
+            strip_metadata(template)
+        digest = _write(templates[asset_id]["path"], template, minify=True)
+        if digest == asset_id:
+            continue
+        digests[asset_id] = digest
+        files = templates[asset_id]["manifest"].files
+        files[digest] = _replace(files.pop(asset_id), { asset_id: digest })
+    # stacks without a template asset(legacy synthesizer)
+    listed = { os.path.abspath(template["path"]) for template in templates.values() }
+    for stack in assembly.stacks.values():
+        if os.path.abspath(stack.template_file) not in listed:
+            template = _replace(stack.template(), replacements)
+            _write(stack.template_file, strip_metadata(template) if strip else template, minify=True)
+    return digests
+
+
+def compact_manifest(assembly: CloudAssembly, replacements: dict, strip: bool) -> int:
+    '''
+        Updates template/asset digests of manifest.json, strips traces and tree.json.
+        Returns the bytes of the removed tree file.
+    '''
+    manifest = _replace(assembly.manifest, replacements)
+    removed  = 0
+    if strip:
+        for artifact_id, artifact in list(manifest.get("artifacts", dict()).items()):
+            if artifact.get("type") == TREE_TYPE:
+                path = os.path.join(assembly.directory, artifact.get("properties", dict()).get("file", "tree.json"))
+                removed += _size(path)
+                if os.path.exists(path):
+                    os.remove(path)
+                del manifest["artifacts"][artifact_id]
+                continue
+            for entries in artifact.get("metadata", dict()).values():
+                for entry in entries:
+                    entry.pop("trace", None)
+    _write(os.path.join(assembly.directory, "manifest.json"), manifest)
+    return removed
+
+
+def compact_assembly(directory: str, strip: bool = False) -> dict:
+    assembly  = CloudAssembly(directory)
+    before    = _size(assembly.directory)
+    manifests = [
+        AssetManifest(assembly, artifact_id) for artifact_id, artifact in assembly.artifacts.items()
+        if artifact.get("type") == ASSET_MANIFEST_TYPE
+    ]
+    replaced, _ = dedupe_assets(assembly, manifests)
+    digests     = compact_templates(assembly, manifests, replaced, strip)
+    for manifest in manifests:
+        manifest.save()
+    compact_manifest(assembly, dict(replaced, **digests), strip)
+    after = _size(assembly.directory)
+    return {
+        "bytes_before":        before,
+        "bytes_after":         after,
+        "duplicate_assets":    len(replaced),
+        "templates":           len(assembly.stacks),
+        "rewritten_templates": len(digests),
+        "metadata_stripped":   strip,
+    }
+
+
+'''
+    CLI
+'''
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Deduplicate assets and compact the templates of a cloud assembly")
+    parser.add_argument("assembly", help="cdk.out directory, rewritten in place")
+    parser.add_argument("--strip-metadata", action="store_true",
+                        help="remove CDK metadata, stack traces and tree.json(production builds)")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    report = compact_assembly(args.assembly, args.strip_metadata)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        saved = report["bytes_before"] - report["bytes_after"]
+        print(f"{args.assembly}: {report['bytes_before']} -> {report['bytes_after']} bytes"
+              f"({saved / max(report['bytes_before'], 1):.0%} smaller), "
+              f"{report['duplicate_assets']} duplicate asset(s), {report['rewritten_templates']} template(s) rewritten")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+'''
+    Offline context snapshot
+    Context lookups(availability zones, Vpc.from_lookup, AMI, SSM parameter, hosted zone, ...)
+    are stored per account and region with a TTL, so synth can run without any AWS call.
+
+    prefetch runs the app, collects every missing lookup from manifest.json and resolves them
+    all at once with a thread pool(boto3), then runs the app again until nothing is missing.
+    synth runs the app with cdk.json context + the snapshot and fails if a lookup is missing
+    or expired(unless --allow-expired), it never calls AWS.
+
+    Usage(from the repository root):
+        python3 -m tools.context_snapshot prefetch services [--profile dev] [--assume-lookup-role]
+        python3 -m tools.context_snapshot synth services -o services/cdk.out
+        python3 -m tools.context_snapshot import services     # seed from cdk.context.json
+        python3 -m tools.context_snapshot export services     # write the snapshot into cdk.context.json
+        python3 -m tools.context_snapshot list services
+
+    Snapshots: <project>/context-snapshots/<account>-<region>.json
+        { context key: { "provider": ..., "value": ..., "fetched_at": epoch, "ttl": seconds } }
+    boto3 is only needed by prefetch.
+'''
+import argparse
+import concurrent.futures
+import json
+import os
+import re
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+SNAPSHOT_DIR = "context-snapshots"
+DAY          = 24 * 60 * 60
+# Default TTL per lookup provider, in seconds
+PROVIDER_TTL = {
+    "availability-zones": 30 * DAY,
+    "hosted-zone":        30 * DAY,
+    "vpc-provider":       7 * DAY,
+    "security-group":     7 * DAY,
+    "load-balancer":      7 * DAY,
+    "key-provider":       7 * DAY,
+    "ami":                1 * DAY,
+    "ssm":                60 * 60,
+}
+DEFAULT_TTL  = 1 * DAY
+MAX_ROUNDS   = 5
+KEY_SCOPE    = re.compile(r":account=([^:]+):.*region=([^:]+)")
+
+
+'''
+    Snapshot store
+'''
+def _scope(key: str, props: dict = None) -> str:
+    props = props or dict()
+    if "account" in props and "region" in props:
+        return f"{props['account']}-{props['region']}"
+    match = KEY_SCOPE.search(key)
+    return f"{match.group(1)}-{match.group(2)}" if match else "global"
+
+
+class SnapshotStore:
+    def __init__(self, project_dir: str) -> None:
+        self.project_dir = os.path.abspath(project_dir)
+        self.directory   = os.path.join(self.project_dir, SNAPSHOT_DIR)
+        self.scopes      = dict()
+        if os.path.isdir(self.directory):
+            for name in sorted(os.listdir(self.directory)):
+                if name.endswith(".json"):
+                    with open(os.path.join(self.directory, name)) as file:
+                        self.scopes[name[:-len(".json")]] = json.load(file)
+
+    def put(self, key: str, provider: str, value, props: dict = None, ttl: int = None) -> None:
+        self.scopes.setdefault(_scope(key, props), dict())[key] = {
+            "provider":   provider,
+            "value":      value,
+            "fetched_at": int(time.time()),
+            "ttl":        ttl if ttl is not None else PROVIDER_TTL.get(provider, DEFAULT_TTL),
+        }
+
+    def entries(self):
+        for scope, entries in self.scopes.items():
+            for key, entry in entries.items():
+                yield scope, key, entry
+
+    @staticmethod
+    def expired(entry: dict, now: float = None) -> bool:
+        return (now or time.time()) > entry["fetched_at"] + entry["ttl"]
+
+    def context(self, allow_expired: bool = False) -> dict:
+        '''
+            Context values of the snapshot, expired ones are left out unless allowed.
+        '''
+        now = time.time()
+        return {
+            key: entry["value"] for _, key, entry in self.entries()
+            if allow_expired or not self.expired(entry, now)
+        }
+
+    def save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        for scope, entries in self.scopes.items():
+            with open(os.path.join(self.directory, f"{scope}.json"), "w") as file:
+                json.dump(dict(sorted(entries.items())), file, indent=2)
+                file.write("\n")
+
+
+'''
+    App runner
+'''
+def project_context(project_dir: str) -> dict:
+    '''
+        cdk.json context, what the app gets from the CLI besides cdk.context.json.
+    '''
+    with open(os.path.join(project_dir, "cdk.json")) as file:
+        return json.load(file).get("context", dict())
+
+
+def run_app(project_dir: str, context: dict, outdir: str) -> list:
+    '''
+        Synthesizes the app like the cdk CLI does and returns the missing lookups of manifest.json.
+    '''
+    with open(os.path.join(project_dir, "cdk.json")) as file:
+        command = json.load(file)["app"]
+    environment = dict(os.environ,
+        CDK_OUTDIR=outdir,
+        CDK_CONTEXT_JSON=json.dumps(context),
+        JSII_SILENCE_WARNING_DEPRECATED_NODE_VERSION="1")
+    completed = subprocess.run(shlex.split(command), cwd=project_dir, env=environment,
+                               stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"'{command}' failed in {project_dir}:\n{completed.stderr[-4000:]}")
+    with open(os.path.join(outdir, "manifest.json")) as file:
+        return json.load(file).get("missing", list())
+
+
+'''
+    Lookup providers(boto3), each returns the context value the CDK CLI would store
+'''
+def _image_sort_key(image: dict) -> str:
+    return image.get("CreationDate", "")
+
+
+def lookup_availability_zones(session, props: dict):
+    zones = session.client("ec2").describe_availability_zones()["AvailabilityZones"]
+    return [ zone["ZoneName"] for zone in zones if zone.get("State") == "available" ]
+
+
+def lookup_ssm(session, props: dict):
+    return session.client("ssm").get_parameter(Name=props["parameterName"])["Parameter"]["Value"]
+
+
+def lookup_ami(session, props: dict):
+    filters = [ { "Name": name, "Values": values } for name, values in props.get("filters", dict()).items() ]
+    options = { "Filters": filters }
+    if props.get("owners"):
+        options["Owners"] = props["owners"]
+    images = session.client("ec2").describe_images(**options)["Images"]
+    if not images:
+        raise LookupError(f"no AMI matches {props.get('filters')}")
+    return sorted(images, key=_image_sort_key)[-1]["ImageId"]
+
+
+def lookup_hosted_zone(session, props: dict):
+    name  = props["domainName"].rstrip(".") + "."
+    zones = session.client("route53").list_hosted_zones_by_name(DNSName=name)["HostedZones"]
+    zones = [ zone for zone in zones if zone["Name"] == name
+              and zone.get("Config", dict()).get("PrivateZone", False) == bool(props.get("privateZone")) ]
+    if len(zones) != 1:
+        raise LookupError(f"found {len(zones)} hosted zones named {name}")
+    return { "Id": zones[0]["Id"], "Name": zones[0]["Name"] }
+
+
+def lookup_key(session, props: dict):
+    aliases = session.client("kms").get_paginator("list_aliases").paginate()
+    for page in aliases:
+        for alias in page["Aliases"]:
+            if alias["AliasName"] == props["aliasName"] and "TargetKeyId" in alias:
+                return { "keyId": alias["TargetKeyId"] }
+    raise LookupError(f"kms alias {props['aliasName']} not found")
+
+
+def lookup_security_group(session, props: dict):
+    ec2     = session.client("ec2")
+    filters = list()
+    if props.get("securityGroupId"):
+        filters.append({ "Name": "group-id", "Values": [ props["securityGroupId"] ] })
+    if props.get("securityGroupName"):
+        filters.append({ "Name": "group-name", "Values": [ props["securityGroupName"] ] })
+    if props.get("vpcId"):
+        filters.append({ "Name": "vpc-id", "Values": [ props["vpcId"] ] })
+    groups = ec2.describe_security_groups(Filters=filters)["SecurityGroups"]
+    if len(groups) != 1:
+        raise LookupError(f"found {len(groups)} security groups for {filters}")
+    egress = groups[0].get("IpPermissionsEgress", list())
+    return {
+        "securityGroupId":  groups[0]["GroupId"],
+        "allowAllOutbound": any(rule.get("IpProtocol") == "-1" and
+                                any(item.get("CidrIp") == "0.0.0.0/0" for item in rule.get("IpRanges", list()))
+                                for rule in egress),
+    }
+
+
+def lookup_vpc(session, props: dict):
+    '''
+        VpcContextResponse of the cdk CLI(vpc-provider), subnet groups by aws-cdk:subnet-name tag or type.
+    '''
+    ec2     = session.client("ec2")
+    filters = [ { "Name": name, "Values": [ value ] } for name, value in props.get("filter", dict()).items() ]
+    vpcs    = ec2.describe_vpcs(Filters=filters)["Vpcs"]
+    if len(vpcs) != 1:
+        raise LookupError(f"found {len(vpcs)} vpcs for {props.get('filter')}")
+    vpc     = vpcs[0]
+    vpc_id  = vpc["VpcId"]
+    subnets = ec2.describe_subnets(Filters=[ { "Name": "vpc-id", "Values": [ vpc_id ] } ])["Subnets"]
+    tables  = ec2.describe_route_tables(Filters=[ { "Name": "vpc-id", "Values": [ vpc_id ] } ])["RouteTables"]
+    main_table    = None
+    subnet_tables = dict()
+    for table in tables:
+        for association in table.get("Associations", list()):
+            if association.get("Main"):
+                main_table = table
+            elif association.get("SubnetId"):
+                subnet_tables[association["SubnetId"]] = table
+    group_tag = props.get("subnetGroupNameTag", "aws-cdk:subnet-name")
+    groups    = dict()
+    for subnet in sorted(subnets, key=lambda item: item["AvailabilityZone"]):
+        table  = subnet_tables.get(subnet["SubnetId"], main_table) or dict()
+        routes = table.get("Routes", list())
+        tags   = { tag["Key"]: tag["Value"] for tag in subnet.get("Tags", list()) }
+        if any(route.get("GatewayId", "").startswith("igw-") for route in routes):
+            subnet_type = "Public"
+        elif any(route.get("NatGatewayId") or route.get("InstanceId") or route.get("TransitGatewayId")
+                 for route in routes):
+            subnet_type = "Private"
+        else:
+            subnet_type = "Isolated"
+        subnet_type = tags.get("aws-cdk:subnet-type", subnet_type)
+        name        = tags.get(group_tag, subnet_type)
+        groups.setdefault((name, subnet_type), list()).append({
+            "subnetId":         subnet["SubnetId"],
+            "cidr":             subnet["CidrBlock"],
+            "availabilityZone": subnet["AvailabilityZone"],
+            "routeTableId":     table.get("RouteTableId"),
+        })
+    gateways = ec2.describe_vpn_gateways(Filters=[
+        { "Name": "attachment.vpc-id", "Values": [ vpc_id ] },
+        { "Name": "attachment.state",  "Values": [ "attached" ] },
+    ])["VpnGateways"]
+    response = {
+        "vpcId":             vpc_id,
+        "vpcCidrBlock":      vpc["CidrBlock"],
+        "ownerAccountId":    vpc.get("OwnerId"),
+        "availabilityZones": list(),
+        "subnetGroups":      [
+            { "name": name, "type": subnet_type, "subnets": members }
+            for (name, subnet_type), members in groups.items()
+        ],
+    }
+    if gateways:
+        response["vpnGatewayId"] = gateways[0]["VpnGatewayId"]
+    if not props.get("returnAsymmetricSubnets"):
+        # symmetric format of older aws-cdk-lib versions
+        response["availabilityZones"] = sorted({ subnet["AvailabilityZone"] for subnet in subnets })
+        for group in response.pop("subnetGroups"):
+            prefix = group["type"].lower()
+            response.setdefault(f"{prefix}SubnetIds", list()).extend(s["subnetId"] for s in group["subnets"])
+            response.setdefault(f"{prefix}SubnetNames", list()).append(group["name"])
+            response.setdefault(f"{prefix}SubnetRouteTableIds", list()).extend(
+                s["routeTableId"] for s in group["subnets"])
+    return response
+
+
+PROVIDERS = {
+    "availability-zones": lookup_availability_zones,
+    "ssm":                lookup_ssm,
+    "ami":                lookup_ami,
+    "hosted-zone":        lookup_hosted_zone,
+    "key-provider":       lookup_key,
+    "security-group":     lookup_security_group,
+    "vpc-provider":       lookup_vpc,
+}
+
+
+class Resolver:
+    '''
+        One boto3 session per account/region, shared by every lookup of that scope.
+    '''
+    def __init__(self, profile: str = None, assume_lookup_role: bool = False) -> None:
+        try:
+            import boto3
+        except ImportError:
+            raise SystemExit("prefetch needs boto3: pip install boto3")
+        self.boto3              = boto3
+        self.profile            = profile
+        self.assume_lookup_role = assume_lookup_role
+        self.sessions           = dict()
+
+    def session(self, props: dict):
+        scope = (props.get("account"), props.get("region"))
+        if scope not in self.sessions:
+            session = self.boto3.Session(profile_name=self.profile, region_name=props.get("region"))
+            role    = props.get("lookupRoleArn")
+            if self.assume_lookup_role and role:
+                credentials = session.client("sts").assume_role(
+                    RoleArn=role.replace("${AWS::Partition}", "aws"),
+                    RoleSessionName="context-snapshot")["Credentials"]
+                session = self.boto3.Session(
+                    aws_access_key_id=credentials["AccessKeyId"],
+                    aws_secret_access_key=credentials["SecretAccessKey"],
+                    aws_session_token=credentials["SessionToken"],
+                    region_name=props.get("region"))
+            self.sessions[scope] = session
+        return self.sessions[scope]
+
+    def resolve(self, missing: dict):
+        if missing["provider"] not in PROVIDERS:
+            raise LookupError(f"unsupported lookup provider '{missing['provider']}'")
+        return PROVIDERS[missing["provider"]](self.session(missing["props"]), missing["props"])
+
+
+def prefetch(project_dir: str, store: SnapshotStore, resolver: Resolver, workers: int, ttl: int = None) -> int:
+    '''
+        Resolves every missing lookup of the app in rounds, a round resolves all of them concurrently.
+        Returns the number of fetched lookups.
+    '''
+    fetched = 0
+    for _ in range(MAX_ROUNDS):
+        context = dict(project_context(project_dir))
+        context.update(store.context())
+        with tempfile.TemporaryDirectory() as outdir:
+            missing = run_app(project_dir, context, outdir)
+        if not missing:
+            return fetched
+        print(f"resolving {len(missing)} lookup(s)", file=sys.stderr)
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = { executor.submit(resolver.resolve, item): item for item in missing }
+            for future, item in futures.items():
+                store.put(item["key"], item["provider"], future.result(), item["props"], ttl)
+                fetched += 1
+        store.save()
+    raise RuntimeError(f"lookups still missing after {MAX_ROUNDS} rounds")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Offline context snapshot of a cdk project")
+    parser.add_argument("command", choices=("prefetch", "synth", "import", "export", "list"))
+    parser.add_argument("project", help="project directory with cdk.json")
+    parser.add_argument("-o", "--output", default=None, help="synth: cdk.out directory(default: <project>/cdk.out)")
+    parser.add_argument("--allow-expired", action="store_true", help="synth/export: use expired entries too")
+    parser.add_argument("--profile", default=None, help="prefetch: AWS profile")
+    parser.add_argument("--assume-lookup-role", action="store_true", help="prefetch: use the bootstrap lookup role")
+    parser.add_argument("--workers", type=int, default=16, help="prefetch: concurrent lookups")
+    parser.add_argument("--ttl", type=int, default=None, help="prefetch/import: seconds, default per provider")
+    args  = parser.parse_args()
+    store = SnapshotStore(args.project)
+    context_file = os.path.join(store.project_dir, "cdk.context.json")
+
+    if args.command == "prefetch":
+        resolver = Resolver(args.profile, args.assume_lookup_role)
+        fetched  = prefetch(store.project_dir, store, resolver, args.workers, args.ttl)
+        print(f"fetched {fetched} lookup(s) into {store.directory}")
+    elif args.command == "synth":
+        context = dict(project_context(store.project_dir))
+        context.update(store.context(args.allow_expired))
+        outdir  = os.path.abspath(args.output or os.path.join(store.project_dir, "cdk.out"))
+        missing = run_app(store.project_dir, context, outdir)
+        for item in missing:
+            print(f"MISSING {item['key']}(run prefetch)", file=sys.stderr)
+        return 1 if missing else 0
+    elif args.command == "import":
+        with open(context_file) as file:
+            for key, value in json.load(file).items():
+                store.put(key, key.split(":", 1)[0], value, ttl=args.ttl)
+        store.save()
+    elif args.command == "export":
+        context = dict()
+        if os.path.exists(context_file):
+            with open(context_file) as file:
+                context = json.load(file)
+        context.update(store.context(args.allow_expired))
+        with open(context_file, "w") as file:
+            json.dump(context, file, indent=2)
+            file.write("\n")
+    else:
+        now = time.time()
+        for scope, key, entry in store.entries():
+            left  = entry["fetched_at"] + entry["ttl"] - now
+            state = "expired" if left < 0 else f"{left / 3600:.1f}h left"
+            print(f"{scope:28} {state:>14}  {key}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,293 @@
+'''
+    CIDR allocator
+    VPC and subnet CIDRs are carved from a pool instead of being typed by hand: explicit CIDRs are
+    reserved first(an overlap is an error), the others get the first free aligned block of their size.
+    Allocations of a pool are kept in an interval tree(AVL ordered by first address, each node holds
+    the highest last address of its subtree), overlap queries and gap searches skip whole subtrees.
+
+        pool = CidrPool("10.0.0.0/8")
+        pool.reserve("10.10.0.0/16", "usdev")
+        pool.allocate(16, "apdev")                  # 10.0.0.0/16
+        vpc  = CidrPool(pool.allocate(16, "uswsi"))
+        vpc.allocate_hosts(900, "private-a")        # /22, 1019 usable addresses
+
+    Subnet sizes(AWS reserves 5 addresses per subnet, subnets are /16 to /28):
+        hosts of a subnet   = ENIs of instances, tasks(awsvpc), endpoints, load balancers, ...
+        pods(VPC CNI)       = nodes * ENIs per node * IPv4 addresses per ENI, the CNI attaches whole ENIs
+                              and every pod gets a secondary address of one of them
+        max pods of a node  = ENIs * (addresses per ENI - 1) + 2
+    Pod subnets usually come from a secondary VPC CIDR(100.64.0.0/10, not routed outside the VPC),
+    so pod density is not bound by the primary CIDR. services takes it from context:
+        cdk synth -c pod-cidr=100.64.0.0/16
+'''
+import ipaddress
+import json
+import math
+import os
+
+POD_CIDR_CONTEXT       = "pod-cidr"
+AWS_RESERVED_ADDRESSES = 5
+MIN_SUBNET_PREFIX      = 16
+MAX_SUBNET_PREFIX      = 28
+SECONDARY_POOL         = "100.64.0.0/10"
+
+
+'''
+    Interval tree
+'''
+class _Node:
+    __slots__ = ("start", "end", "value", "max_end", "height", "left", "right")
+
+    def __init__(self, start: int, end: int, value) -> None:
+        self.start   = start
+        self.end     = end
+        self.value   = value
+        self.max_end = end
+        self.height  = 1
+        self.left    = None
+        self.right   = None
+
+
+def _height(node) -> int:
+    return node.height if node else 0
+
+
+def _update(node: _Node) -> _Node:
+    node.height  = 1 + max(_height(node.left), _height(node.right))
+    node.max_end = max([ node.end ] + [ child.max_end for child in (node.left, node.right) if child ])
+    return node
+
+
+def _rotate_right(node: _Node) -> _Node:
+    top, node.left = node.left, node.left.right
+    top.right = _update(node)
+    return _update(top)
+
+
+def _rotate_left(node: _Node) -> _Node:
+    top, node.right = node.right, node.right.left
+    top.left = _update(node)
+    return _update(top)
+
+
+def _balance(node: _Node) -> _Node:
+    _update(node)
+    skew = _height(node.left) - _height(node.right)
+    if skew > 1:
+        if _height(node.left.left) < _height(node.left.right):
+            node.left = _rotate_left(node.left)
+        return _rotate_right(node)
+    if skew < -1:
+        if _height(node.right.right) < _height(node.right.left):
+            node.right = _rotate_right(node.right)
+        return _rotate_left(node)
+    return node
+
+
+class IntervalTree:
+    '''
+        Half open integer intervals [start, end) with a value, ordered by start.
+        add/remove O(log n), overlaps O(log n + matches), iteration in start order.
+    '''
+    def __init__(self) -> None:
+        self.root = None
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __iter__(self):
+        stack, node = list(), self.root
+        while stack or node:
+            while node:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield (node.start, node.end, node.value)
+            node = node.right
+
+    def add(self, start: int, end: int, value=None) -> None:
+        if end <= start:
+            raise ValueError(f"empty interval [{start}, {end})")
+
+        def insert(node):
+            if node is None:
+                return _Node(start, end, value)
+            if start < node.start:
+                node.left = insert(node.left)
+            else:
+                node.right = insert(node.right)
+            return _balance(node)
+
+        self.root  = insert(self.root)
+        self.size += 1
+
+    def remove(self, start: int) -> None:
+        def delete(node):
+            if node is None:
+                raise KeyError(start)
+            if start < node.start:
+                node.left = delete(node.left)
+            elif start > node.start:
+                node.right = delete(node.right)
+            else:
+                if node.left is None or node.right is None:
+                    return node.left or node.right
+                # replace with the first interval of the right subtree
+                successor = node.right
+                while successor.left:
+                    successor = successor.left
+                node.start, node.end, node.value = successor.start, successor.end, successor.value
+                node.right = _delete_min(node.right)
+            return _balance(node)
+
+        self.root  = delete(self.root)
+        self.size -= 1
+
+    def overlaps(self, start: int, end: int) -> list:
+        '''
+            Intervals intersecting [start, end), in start order.
+        '''
+        found = list()
+
+        def visit(node):
+            if node is None or node.max_end <= start:
+                return
+            visit(node.left)
+            if node.start < end:
+                if node.end > start:
+                    found.append((node.start, node.end, node.value))
+                visit(node.right)
+
+        visit(self.root)
+        return found
+
+    def first_gap(self, size: int, lower: int, upper: int, align: int = 1):
+        '''
+            First start >= lower, multiple of align, with [start, start + size) free and below upper, else None.
+        '''
+        candidate = -(-lower // align) * align
+        for start, end, _ in self.overlaps(lower, upper):
+            if candidate + size <= start:
+                break
+            candidate = max(candidate, -(-end // align) * align)
+        return candidate if candidate + size <= upper else None
+
+
+def _delete_min(node: _Node):
+    if node.left is None:
+        return node.right
+    node.left = _delete_min(node.left)
+    return _balance(node)
+
+
+'''
+    Sizing
+'''
+def usable_addresses(prefix: int) -> int:
+    return 2 ** (32 - prefix) - AWS_RESERVED_ADDRESSES
+
+
+def prefix_for_hosts(hosts: int, headroom: float = 0.0) -> int:
+    '''
+        Longest prefix(smallest subnet) with room for hosts * (1 + headroom) addresses.
+    '''
+    needed = math.ceil(hosts * (1 + headroom))
+    for prefix in range(MAX_SUBNET_PREFIX, MIN_SUBNET_PREFIX - 1, -1):
+        if usable_addresses(prefix) >= needed:
+            return prefix
+    raise ValueError(f"{needed} addresses do not fit in a /{MIN_SUBNET_PREFIX} subnet")
+
+
+def max_pods(enis: int, addresses_per_eni: int) -> int:
+    return enis * (addresses_per_eni - 1) + 2
+
+
+def pod_addresses(nodes: int, enis: int, addresses_per_eni: int) -> int:
+    '''
+        Addresses the VPC CNI holds for nodes with every ENI attached.
+    '''
+    return nodes * enis * addresses_per_eni
+
+
+def split_prefix(cidr, parts: int) -> int:
+    '''
+        Prefix of the largest equal blocks that split cidr into parts.
+    '''
+    return ipaddress.ip_network(cidr).prefixlen + math.ceil(math.log2(max(parts, 1)))
+
+
+def context_pod_cidr() -> str:
+    '''
+        "pod-cidr" context(cdk -c pod-cidr=...), read before App() is created, None when not set.
+    '''
+    value = json.loads(os.environ.get("CDK_CONTEXT_JSON", "{}")).get(POD_CIDR_CONTEXT)
+    return str(ipaddress.ip_network(value)) if value else None
+
+
+'''
+    Pool
+'''
+class CidrPool:
+    '''
+        Non overlapping IPv4 allocations within one network.
+    '''
+    def __init__(self, cidr) -> None:
+        self.network = ipaddress.ip_network(cidr)
+        self.tree    = IntervalTree()
+        self._lower  = int(self.network.network_address)
+        self._upper  = self._lower + self.network.num_addresses
+
+    def __contains__(self, cidr) -> bool:
+        network = ipaddress.ip_network(cidr)
+        return bool(self.tree.overlaps(int(network.network_address),
+                                       int(network.network_address) + network.num_addresses))
+
+    @property
+    def allocations(self) -> dict:
+        '''
+            { cidr: name } in address order.
+        '''
+        return { str(_network(start, end)): name for start, end, name in self.tree }
+
+    @property
+    def free_addresses(self) -> int:
+        return self.network.num_addresses - sum(end - start for start, end, _ in self.tree)
+
+    def reserve(self, cidr, name: str = None) -> ipaddress.IPv4Network:
+        network = ipaddress.ip_network(cidr)
+        if not network.subnet_of(self.network):
+            raise ValueError(f"{network}({name}) is not within {self.network}")
+        start = int(network.network_address)
+        for other_start, other_end, other_name in self.tree.overlaps(start, start + network.num_addresses):
+            raise ValueError(f"{network}({name}) overlaps {_network(other_start, other_end)}({other_name})")
+        self.tree.add(start, start + network.num_addresses, name)
+        return network
+
+    def allocate(self, prefix: int, name: str = None) -> ipaddress.IPv4Network:
+        '''
+            First free /prefix of the pool.
+        '''
+        if prefix < self.network.prefixlen:
+            raise ValueError(f"/{prefix}({name}) is larger than {self.network}")
+        size  = 2 ** (self.network.max_prefixlen - prefix)
+        start = self.tree.first_gap(size, self._lower, self._upper, align=size)
+        if start is None:
+            raise ValueError(f"no free /{prefix} left in {self.network} for {name}, "
+                             f"{self.free_addresses} addresses free")
+        self.tree.add(start, start + size, name)
+        return ipaddress.ip_network((start, prefix))
+
+    def allocate_hosts(self, hosts: int, name: str = None, headroom: float = 0.0) -> ipaddress.IPv4Network:
+        return self.allocate(prefix_for_hosts(hosts, headroom), name)
+
+    def release(self, cidr) -> None:
+        network = ipaddress.ip_network(cidr)
+        start   = int(network.network_address)
+        if not [ other for other in self.tree.overlaps(start, start + 1) if other[0] == start ]:
+            raise KeyError(str(network))
+        self.tree.remove(start)
+
+
+def _network(start: int, end: int) -> ipaddress.IPv4Network:
+    return ipaddress.ip_network((start, 32 - (end - start).bit_length() + 1))
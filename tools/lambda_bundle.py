@@ -0,0 +1,158 @@
+'''
+    Hash-cached Lambda bundling
+    Code.from_asset(directory) fingerprints and copies the source directory into cdk.out on every synth.
+    Here each source directory is zipped once per content: the zip is cached under .lambda-cache
+    and keyed on the source tree(dependency manifests included) and the runtime.
+    A cache hit costs one hash of the source tree, the zip is given to Code.from_asset
+    with that key as custom asset hash, so cdk neither fingerprints nor re-zips it.
+
+    If the source has requirements.txt(python runtimes) or package.json(node runtimes),
+    the dependencies are installed into the bundle when it is built. Python dependencies are
+    installed as manylinux wheels of the runtime's python version, not for the machine running the synth.
+
+    Usage(in a stack):
+        from tools.lambda_bundle import bundle_codes
+        code = bundle_codes({
+            "functionA": ("./lambda_/source", aws_lambda.Runtime.NODEJS_14_X),
+            "functionB": ("./lambda_/other",  aws_lambda.Runtime.PYTHON_3_9),
+        })
+        aws_lambda.Function(self, "lambda-functionA", code=code["functionA"], ...)
+
+    Bundles that miss the cache are built in a worker pool.
+'''
+import concurrent.futures
+import hashlib
+import os
+import shutil
+import stat
+import subprocess
+import sys
+import tempfile
+import zipfile
+
+DEFAULT_CACHE_DIR = ".lambda-cache"
+# Build outputs of the source directory itself, they are not part of the function code.
+EXCLUDED_DIRS     = ("__pycache__", ".pytest_cache", "node_modules", ".venv")
+EXCLUDED_SUFFIXES = (".pyc", ".pyo")
+# Fixed timestamp, so the same source always gives the same zip bytes.
+ZIP_DATE_TIME     = (1980, 1, 1, 0, 0, 0)
+# Wheels of the Lambda execution environment(x86_64, Amazon Linux)
+PIP_PLATFORM      = "manylinux2014_x86_64"
+
+
+def _source_files(source: str) -> list:
+    files = list()
+    for root, dirs, names in os.walk(source):
+        dirs[:] = sorted(name for name in dirs if name not in EXCLUDED_DIRS)
+        for name in sorted(names):
+            if not name.endswith(EXCLUDED_SUFFIXES):
+                files.append(os.path.relpath(os.path.join(root, name), source))
+    return files
+
+
+def bundle_key(source: str, runtime_name: str) -> str:
+    digest = hashlib.sha256(runtime_name.encode())
+    if runtime_name.startswith("python"):
+        digest.update(PIP_PLATFORM.encode())
+    for path in _source_files(source):
+        digest.update(path.replace(os.sep, "/").encode() + b"\0")
+        with open(os.path.join(source, path), "rb") as file:
+            for chunk in iter(lambda: file.read(65536), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _install_dependencies(build_dir: str, runtime_name: str) -> None:
+    if runtime_name.startswith("python") and os.path.exists(os.path.join(build_dir, "requirements.txt")):
+        subprocess.check_call([
+            sys.executable, "-m", "pip", "install", "--quiet", "--disable-pip-version-check",
+            "--platform", PIP_PLATFORM, "--implementation", "cp",
+            "--python-version", runtime_name[len("python"):], "--only-binary=:all:",
+            "-r", os.path.join(build_dir, "requirements.txt"), "-t", build_dir,
+        ])
+    elif runtime_name.startswith("nodejs") and os.path.exists(os.path.join(build_dir, "package.json")):
+        subprocess.check_call([ "npm", "install", "--omit=dev", "--no-audit", "--no-fund", "--silent" ], cwd=build_dir)
+
+
+def _write_zip(build_dir: str, target: str) -> None:
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as archive:
+        for root, dirs, names in os.walk(build_dir):
+            dirs.sort()
+            for name in sorted(names):
+                path = os.path.join(root, name)
+                info = zipfile.ZipInfo(os.path.relpath(path, build_dir).replace(os.sep, "/"), ZIP_DATE_TIME)
+                executable = os.stat(path).st_mode & stat.S_IXUSR
+                info.external_attr  = (0o755 if executable else 0o644) << 16
+                info.compress_type  = zipfile.ZIP_DEFLATED
+                with open(path, "rb") as file:
+                    archive.writestr(info, file.read())
+
+
+class LambdaBundler:
+    def __init__(self, cache_dir: str = None, workers: int = None) -> None:
+        # absolute, the jsii kernel resolves relative asset paths against its own working directory
+        self.cache_dir = os.path.abspath(cache_dir or DEFAULT_CACHE_DIR)
+        self.workers   = workers or min(8, os.cpu_count() or 1)
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.zip")
+
+    def bundle(self, source: str, runtime_name: str, key: str = None) -> tuple:
+        '''
+            Returns (zip path, key), building the zip on a cache miss.
+        '''
+        key    = key or bundle_key(source, runtime_name)
+        target = self.path(key)
+        if os.path.exists(target):
+            return target, key
+        os.makedirs(self.cache_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.cache_dir) as staging:
+            build_dir = os.path.join(staging, "build")
+            shutil.copytree(source, build_dir,
+                ignore=shutil.ignore_patterns(*EXCLUDED_DIRS, *(f"*{suffix}" for suffix in EXCLUDED_SUFFIXES)))
+            _install_dependencies(build_dir, runtime_name)
+            _write_zip(build_dir, os.path.join(staging, "bundle.zip"))
+            # atomic, concurrent synths of the same key write identical bytes
+            os.replace(os.path.join(staging, "bundle.zip"), target)
+        return target, key
+
+    def bundle_all(self, functions: dict) -> dict:
+        '''
+            functions: { name: (source directory, runtime name) }
+            Returns { name: (zip path, key) }, missing bundles are built concurrently.
+        '''
+        keys    = { name: bundle_key(source, runtime) for name, (source, runtime) in functions.items() }
+        results = { name: (self.path(key), key) for name, key in keys.items() if os.path.exists(self.path(key)) }
+        missing = [ name for name in functions if name not in results ]
+        if len(missing) == 1:
+            name = missing[0]
+            results[name] = self.bundle(*functions[name], keys[name])
+        elif missing:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=self.workers) as executor:
+                futures = {
+                    name: executor.submit(self.bundle, *functions[name], keys[name]) for name in missing
+                }
+                for name, future in futures.items():
+                    results[name] = future.result()
+        return results
+
+
+def bundle_codes(functions: dict, cache_dir: str = None, workers: int = None) -> dict:
+    '''
+        functions: { name: (source directory, aws_lambda.Runtime) }
+        Returns { name: aws_lambda.Code } of the cached zip files.
+    '''
+    # aws-cdk-lib(v2) and aws-cdk.core(v1) projects share this module
+    try:
+        from aws_cdk import AssetHashType, aws_lambda
+    except ImportError:
+        from aws_cdk import aws_lambda
+        from aws_cdk.core import AssetHashType
+    bundler = LambdaBundler(cache_dir, workers)
+    bundles = bundler.bundle_all({
+        name: (source, runtime.name) for name, (source, runtime) in functions.items()
+    })
+    return {
+        name: aws_lambda.Code.from_asset(path, asset_hash=key, asset_hash_type=AssetHashType.CUSTOM)
+        for name, (path, key) in bundles.items()
+    }
@@ -0,0 +1,291 @@
+'''
+    Network ACL rule compiler
+    A declarative rule spec is compiled into the ordered, numbered entries of a network ACL:
+        1. rules are expanded to one(protocol, cidr, ports or icmp type) per entry
+        2. allow(and deny) entries with the same protocol and cidr merge overlapping or adjacent port ranges,
+           entries with the same protocol and ports merge sibling cidrs(10.0.32.0/20 + 10.0.48.0/20 -> /19),
+           entries covered by a broader entry of the same action are dropped, until nothing changes
+        3. deny entries come first in spec order, then the allow entries by weight(share of the traffic
+           expected to match, most frequent first, a NACL is evaluated in rule number order)
+        4. rule numbers are assigned from FIRST_RULE by RULE_STEP, more than RULE_LIMIT entries per
+           direction(AWS default quota) is an error
+    Spec semantics: a flow is denied if a deny rule matches, allowed if an allow rule matches, denied otherwise.
+    The compiled entries are checked against the reference flows of the spec with simulate().
+
+    Spec(JSON), cidrs are cidr strings or names resolved by the stack(e.g. "any", "private"):
+        {
+            "public": {
+                "ingress": [
+                    { "protocol": "tcp", "ports": 443, "cidrs": ["any"], "weight": 40 },
+                    { "protocol": "tcp", "ports": [1024, 65535], "cidrs": ["any"], "weight": 50 },
+                    { "protocol": "icmp", "icmp": [0, 3, 11], "cidrs": ["any"] },
+                    { "protocol": "all", "cidrs": ["198.51.100.0/24"], "action": "deny" }
+                ],
+                "egress": [ ... ],
+                "flows": [
+                    { "direction": "ingress", "protocol": "tcp", "port": 443, "address": "203.0.113.10", "expect": "allow" },
+                    { "direction": "egress", "protocol": "tcp", "port": 3306, "address": "data", "expect": "deny" }
+                ]
+            }
+        }
+    protocol: "all", "icmp", "tcp", "udp" or a protocol number, ports: a port or [from, to](tcp/udp only,
+    all ports when missing), icmp: types(all types when missing), weight: default 1, action: default "allow".
+    A flow address is an address or a name(an address inside the first cidr of the name).
+'''
+import ipaddress
+
+PROTOCOLS   = { "all": -1, "icmp": 1, "tcp": 6, "udp": 17 }
+PORTED      = (6, 17)
+DIRECTIONS  = ("ingress", "egress")
+ACTIONS     = ("allow", "deny")
+FIRST_RULE  = 100
+RULE_STEP   = 10
+RULE_LIMIT  = 20
+MAX_RULE    = 32766
+ALL_PORTS   = (0, 65535)
+
+
+class AclEntry:
+    __slots__ = ("rule_number", "egress", "protocol", "cidr", "ports", "icmp_type", "action", "weight")
+
+    def __init__(self, protocol: int, cidr, ports: tuple = None, icmp_type: int = None, action: str = "allow",
+                 weight: float = 1, egress: bool = False, rule_number: int = None) -> None:
+        self.rule_number = rule_number
+        self.egress      = egress
+        self.protocol    = protocol
+        self.cidr        = ipaddress.ip_network(cidr)
+        self.ports       = tuple(ports) if ports else None
+        self.icmp_type   = icmp_type
+        self.action      = action
+        self.weight      = weight
+
+    @property
+    def key(self) -> tuple:
+        return (self.action, self.protocol, self.cidr, self.ports, self.icmp_type)
+
+    def covers(self, other: "AclEntry") -> bool:
+        '''
+            Every flow matched by other is matched by this entry.
+        '''
+        if self.action != other.action or not other.cidr.subnet_of(self.cidr):
+            return False
+        if self.protocol == -1:
+            return True
+        if self.protocol != other.protocol:
+            return False
+        if self.protocol in PORTED:
+            ports, other_ports = self.ports or ALL_PORTS, other.ports or ALL_PORTS
+            return ports[0] <= other_ports[0] and other_ports[1] <= ports[1]
+        return self.icmp_type in (None, -1) or self.icmp_type == other.icmp_type
+
+    def matches(self, protocol: int, address, port: int = None, icmp_type: int = None) -> bool:
+        if ipaddress.ip_address(address) not in self.cidr:
+            return False
+        if self.protocol == -1:
+            return True
+        if self.protocol != protocol:
+            return False
+        if self.protocol in PORTED:
+            ports = self.ports or ALL_PORTS
+            return port is not None and ports[0] <= port <= ports[1]
+        return self.icmp_type in (None, -1) or self.icmp_type == icmp_type
+
+    def __repr__(self) -> str:
+        target = f" {self.ports[0]}-{self.ports[1]}" if self.ports else (
+            f" type {self.icmp_type}" if self.icmp_type is not None else "")
+        return (f"AclEntry({self.rule_number} {'egress' if self.egress else 'ingress'} {self.action} "
+                f"{self.protocol} {self.cidr}{target})")
+
+
+'''
+    Spec
+'''
+def _protocol(value) -> int:
+    if isinstance(value, int):
+        return value
+    if value not in PROTOCOLS:
+        raise ValueError(f"unknown protocol '{value}', protocols: {', '.join(PROTOCOLS)} or a number")
+    return PROTOCOLS[value]
+
+
+def _ports(value) -> tuple:
+    if value is None:
+        return None
+    ports = (value, value) if isinstance(value, int) else tuple(value)
+    if len(ports) != 2 or not 0 <= ports[0] <= ports[1] <= 65535:
+        raise ValueError(f"port range {value} must be a port or [from, to] within 0-65535")
+    return None if ports == ALL_PORTS else ports
+
+
+def _cidrs(values: list, names: dict) -> list:
+    cidrs = list()
+    for value in values:
+        if value in names:
+            cidrs.extend(names[value])
+        else:
+            cidrs.append(value)
+    return [ ipaddress.ip_network(cidr) for cidr in cidrs ]
+
+
+def expand(rules: list, names: dict = None, egress: bool = False) -> list:
+    '''
+        One AclEntry per(cidr, icmp type) of every rule, in spec order.
+    '''
+    names   = names or dict()
+    entries = list()
+    for rule in rules:
+        unknown = set(rule) - { "protocol", "ports", "icmp", "cidrs", "weight", "action", "description" }
+        if unknown:
+            raise ValueError(f"unknown rule fields {sorted(unknown)}")
+        protocol = _protocol(rule.get("protocol", "all"))
+        action   = rule.get("action", "allow")
+        if action not in ACTIONS:
+            raise ValueError(f"unknown action '{action}', actions: {', '.join(ACTIONS)}")
+        ports = _ports(rule.get("ports"))
+        if ports and protocol not in PORTED:
+            raise ValueError(f"ports are only valid for tcp and udp rules, not protocol {protocol}")
+        types = rule.get("icmp") or [ None ]
+        cidrs = _cidrs(rule.get("cidrs", [ "0.0.0.0/0" ]), names)
+        share = rule.get("weight", 1) / (len(cidrs) * len(types))
+        for cidr in cidrs:
+            for icmp_type in types:
+                entries.append(AclEntry(protocol, cidr, ports, icmp_type, action, share, egress))
+    return entries
+
+
+'''
+    Optimization
+'''
+def _merge_ports(entries: list) -> list:
+    groups = dict()
+    for entry in entries:
+        if entry.protocol in PORTED:
+            groups.setdefault((entry.action, entry.protocol, entry.cidr), list()).append(entry)
+    merged = [ entry for entry in entries if entry.protocol not in PORTED ]
+    for group in groups.values():
+        group.sort(key=lambda entry: (entry.ports or ALL_PORTS))
+        current = group[0]
+        for entry in group[1:]:
+            low, high = current.ports or ALL_PORTS
+            if (entry.ports or ALL_PORTS)[0] <= high + 1:
+                current = AclEntry(current.protocol, current.cidr,
+                    (low, max(high, (entry.ports or ALL_PORTS)[1])), None, current.action,
+                    current.weight + entry.weight, current.egress)
+                current.ports = None if current.ports == ALL_PORTS else current.ports
+            else:
+                merged.append(current)
+                current = entry
+        merged.append(current)
+    return merged
+
+
+def _merge_cidrs(entries: list) -> list:
+    groups = dict()
+    for entry in entries:
+        groups.setdefault((entry.action, entry.protocol, entry.ports, entry.icmp_type), list()).append(entry)
+    merged = list()
+    for group in groups.values():
+        for cidr in ipaddress.collapse_addresses(entry.cidr for entry in group):
+            first = group[0]
+            merged.append(AclEntry(first.protocol, cidr, first.ports, first.icmp_type, first.action,
+                sum(entry.weight for entry in group if entry.cidr.subnet_of(cidr)), first.egress))
+    return merged
+
+
+def _drop_covered(entries: list) -> list:
+    kept = list()
+    for entry in sorted(entries, key=lambda entry: -entry.cidr.num_addresses):
+        cover = next((other for other in kept if other.covers(entry)), None)
+        if cover:
+            cover.weight += entry.weight
+        else:
+            kept.append(entry)
+    return kept
+
+
+def optimize(entries: list) -> list:
+    '''
+        Merged entries of one direction, same flows allowed and denied as the spec.
+    '''
+    order = dict()
+    for index, entry in enumerate(entries):
+        order.setdefault(entry.key[:2], index)
+    while True:
+        size    = len(entries)
+        entries = _drop_covered(_merge_cidrs(_merge_ports(entries)))
+        if len(entries) == size:
+            break
+    # deny first in spec order, then allow by weight(most frequently matched first), then spec order
+    return sorted(entries, key=lambda entry: (entry.action != "deny",
+        0 if entry.action == "deny" else -entry.weight, order.get(entry.key[:2], 0), entry.key[1:3]))
+
+
+def number(entries: list, first: int = FIRST_RULE, step: int = RULE_STEP, limit: int = RULE_LIMIT) -> list:
+    if len(entries) > limit:
+        raise ValueError(f"{len(entries)} rules exceed the limit of {limit} rules per direction")
+    for index, entry in enumerate(entries):
+        entry.rule_number = first + index * step
+        if entry.rule_number > MAX_RULE:
+            raise ValueError(f"rule number {entry.rule_number} exceeds {MAX_RULE}")
+    return entries
+
+
+def compile_acl(spec: dict, names: dict = None, first: int = FIRST_RULE, step: int = RULE_STEP,
+                limit: int = RULE_LIMIT) -> dict:
+    '''
+        { "ingress": [ AclEntry ], "egress": [ AclEntry ] } of one NACL spec, verified against its flows.
+    '''
+    compiled = {
+        direction: number(optimize(expand(spec.get(direction, list()), names, direction == "egress")),
+                          first, step, limit)
+        for direction in DIRECTIONS
+    }
+    failures = verify(spec, compiled, names)
+    if failures:
+        raise ValueError("compiled NACL does not match its reference flows:\n  " + "\n  ".join(failures))
+    return compiled
+
+
+'''
+    Simulator
+'''
+def evaluate(entries: list, protocol: int, address, port: int = None, icmp_type: int = None) -> str:
+    '''
+        Action of the first entry(rule number order) matching the flow, "deny" when none matches(rule *).
+    '''
+    for entry in sorted(entries, key=lambda entry: entry.rule_number):
+        if entry.matches(protocol, address, port, icmp_type):
+            return entry.action
+    return "deny"
+
+
+def evaluate_spec(entries: list, protocol: int, address, port: int = None, icmp_type: int = None) -> str:
+    # reference semantics of the spec: any deny wins, then any allow
+    actions = { entry.action for entry in entries if entry.matches(protocol, address, port, icmp_type) }
+    return "deny" if "deny" in actions or not actions else "allow"
+
+
+def flow_address(value: str, names: dict = None):
+    names = names or dict()
+    if value in names:
+        network = ipaddress.ip_network(names[value][0])
+        return network.network_address + min(10, network.num_addresses - 1)
+    return ipaddress.ip_address(value)
+
+
+def verify(spec: dict, compiled: dict, names: dict = None) -> list:
+    '''
+        Reference flows of the spec where the compiled entries, the spec or the expectation disagree.
+    '''
+    failures = list()
+    for flow in spec.get("flows", list()):
+        direction = flow["direction"]
+        args      = (_protocol(flow.get("protocol", "all")), flow_address(flow["address"], names),
+                     flow.get("port"), flow.get("icmp"))
+        actual    = evaluate(compiled[direction], *args)
+        declared  = evaluate_spec(expand(spec.get(direction, list()), names), *args)
+        expected  = flow.get("expect", declared)
+        if not actual == declared == expected:
+            failures.append(f"{direction} {flow.get('protocol', 'all')} {flow['address']}:{flow.get('port', '')} "
+                            f"compiled {actual}, spec {declared}, expected {expected}")
+    return failures
@@ -0,0 +1,61 @@
+'''
+    NAT topology modes
+    Every private(NAT) subnet has a route table of its own az, the mode decides where its default route goes:
+        per-az    one NAT gateway per az, egress stays in the az of the subnet(default)
+        single    one NAT gateway in the first az, the other azs cross an az boundary to reach it
+                  (cheaper, adds latency and inter-AZ data charges, fails the az_local_egress budget)
+        instance  one NAT instance per az(dev), egress stays in the az, no NAT gateway hourly charge
+
+    Selected with context(services) or per region in regions.json(cfn-services):
+        cdk synth -c nat-topology=instance
+'''
+import json
+import os
+
+CONTEXT_KEY       = "nat-topology"
+DEFAULT_MODE      = "per-az"
+NAT_MODES         = ("per-az", "single", "instance")
+NAT_INSTANCE_TYPE = "t3.nano"
+# Amazon Linux 2 as a NAT instance: forwarding + masquerade on the primary interface
+NAT_INSTANCE_USERDATA = """#!/bin/bash
+yum install -y iptables-services
+echo 'net.ipv4.ip_forward = 1' > /etc/sysctl.d/90-nat.conf
+sysctl -p /etc/sysctl.d/90-nat.conf
+iptables -t nat -A POSTROUTING -o eth0 -j MASQUERADE
+iptables -F FORWARD
+service iptables save
+systemctl enable --now iptables
+"""
+
+
+def parse_mode(value) -> str:
+    mode = value or DEFAULT_MODE
+    if mode not in NAT_MODES:
+        raise ValueError(f"unknown nat topology '{mode}', modes: {', '.join(NAT_MODES)}")
+    return mode
+
+
+def context_mode() -> str:
+    '''
+        "nat-topology" context(cdk -c nat-topology=...), read before App() is created.
+    '''
+    return parse_mode(json.loads(os.environ.get("CDK_CONTEXT_JSON", "{}")).get(CONTEXT_KEY))
+
+
+def nat_count(mode: str, az_count: int) -> int:
+    return 1 if parse_mode(mode) == "single" else az_count
+
+
+def egress_zones(mode: str, azs: list) -> dict:
+    '''
+        { az of the subnet: az of its NAT }, the plan of the default routes.
+    '''
+    azs = list(azs)
+    return { az: azs[0] if parse_mode(mode) == "single" else az for az in azs }
+
+
+def cross_az_egress(mode: str, azs: list) -> list:
+    '''
+        [ (az of the subnet, az of the NAT) ] of the routes that leave their az.
+    '''
+    return [ (az, nat_az) for az, nat_az in egress_zones(mode, azs).items() if az != nat_az ]
@@ -0,0 +1,348 @@
+'''
+    Deploy-time performance budget
+    Checks every template of a cloud assembly(and its nested stacks) against a budget file
+    and reports each violation with the construct path, the logical id and the property.
+
+    Usage(from the repository root, after cdk synth):
+        python3 -m tools.performance_budget services/cdk.out --budget services/config/budget/dev.json
+        python3 -m tools.performance_budget services/cdk.out --budget services/config/budget/dev.json --json
+
+    Exits 1 on any violation. services/app.py runs the same check after synth(budget_gate.py).
+
+    Budget file, every limit is optional(a missing limit is not checked):
+        {
+            "lambda_max_memory_mb":           1024,   MemorySize of functions(cold start memory, 128 when unset)
+            "lambda_max_package_kb":          1024,   code asset size, zip file or directory, inline code
+            "min_healthy_hosts":              2,      ASG MinSize behind a load balancer, ECS service tasks
+                                                      kept healthy during a deployment, ECS scaling MinCapacity
+            "health_check_type":              "ELB",  HealthCheckType of ASGs behind a load balancer
+            "max_health_check_grace_seconds": 120,    ASG HealthCheckGracePeriod, ECS HealthCheckGracePeriodSeconds
+            "min_cache_ttl":                  3600,   CloudFront DefaultTTL(cache policies and legacy cache behaviors)
+            "cloudfront_compress":            true,   Compress of every cache behavior, gzip/brotli of cache policies
+            "max_nat_hops":                   1,      hops from a subnet to the internet gateway
+            "az_local_egress":                true    no default route to a NAT in another availability zone
+        }
+
+    Hops of a default route(0.0.0.0/0): internet gateway 0, NAT gateway or NAT instance 1,
+    transit gateway or peering 2(egress through another VPC), plus 1 when the NAT gateway
+    or NAT instance is in another availability zone than the subnet.
+'''
+import argparse
+import json
+import os
+import re
+import sys
+
+from tools.assembly import CloudAssembly
+from tools.template_budget import nested_templates
+
+LIMITS = {
+    "lambda_max_memory_mb":           int,
+    "lambda_max_package_kb":          int,
+    "min_healthy_hosts":              int,
+    "health_check_type":              str,
+    "max_health_check_grace_seconds": int,
+    "min_cache_ttl":                  int,
+    "cloudfront_compress":            bool,
+    "max_nat_hops":                   int,
+    "az_local_egress":                bool,
+}
+LAMBDA_DEFAULT_MEMORY = 128
+ASSET_HASH            = re.compile(r"[0-9a-f]{64}")
+ROUTE_HOPS = {
+    "GatewayId":                   0,
+    "EgressOnlyInternetGatewayId": 0,
+    "NatGatewayId":                1,
+    "InstanceId":                  1,
+    "NetworkInterfaceId":          1,
+    "TransitGatewayId":            2,
+    "VpcPeeringConnectionId":      2,
+}
+
+
+class Violation:
+    __slots__ = ("location", "property", "message")
+
+    def __init__(self, location: str, property: str, message: str) -> None:
+        self.location = location
+        self.property = property
+        self.message  = message
+
+    def to_dict(self) -> dict:
+        return { "location": self.location, "property": self.property, "message": self.message }
+
+    def __str__(self) -> str:
+        return f"{self.location} {self.property}: {self.message}"
+
+
+def load_budget(path: str) -> dict:
+    with open(path) as file:
+        budget = json.load(file)
+    for name, value in budget.items():
+        if name not in LIMITS:
+            raise ValueError(f"{path}: unknown limit '{name}', limits: {', '.join(LIMITS)}")
+        # bool is an int, a number is not a bool
+        if not isinstance(value, LIMITS[name]) or (LIMITS[name] is int and isinstance(value, bool)):
+            raise ValueError(f"{path}: '{name}' must be {LIMITS[name].__name__}, not {value!r}")
+    return budget
+
+
+'''
+    Helpers
+'''
+def _ref(value) -> str:
+    return value.get("Ref") if isinstance(value, dict) else None
+
+
+def _number(value):
+    # CloudFormation numbers may be strings("2"), tokens are not checked
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _resources(template: dict, *types) -> list:
+    return [
+        (logical_id, resource, resource.get("Properties", dict()))
+        for logical_id, resource in template.get("Resources", dict()).items()
+        if resource.get("Type") in types
+    ]
+
+
+def _asset_size(directory: str, code: dict):
+    if "ZipFile" in code:
+        return len(code["ZipFile"].encode()) if isinstance(code["ZipFile"], str) else None
+    match = ASSET_HASH.search(json.dumps(code.get("S3Key", "")))
+    if not match:
+        return None
+    path = os.path.join(directory, f"asset.{match.group(0)}")
+    if os.path.isfile(path + ".zip"):
+        return os.path.getsize(path + ".zip")
+    if os.path.isdir(path):
+        return sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(path) for name in names
+        )
+    return None
+
+
+'''
+    Checks, each one yields (logical id, property, message)
+'''
+def check_lambda(template: dict, budget: dict, directory: str):
+    for logical_id, _, properties in _resources(template, "AWS::Lambda::Function"):
+        limit  = budget.get("lambda_max_memory_mb")
+        memory = _number(properties.get("MemorySize", LAMBDA_DEFAULT_MEMORY))
+        if limit is not None and memory is not None and memory > limit:
+            yield logical_id, "Properties.MemorySize", f"{memory} MB exceeds {limit} MB"
+        limit = budget.get("lambda_max_package_kb")
+        size  = _asset_size(directory, properties.get("Code", dict()))
+        if limit is not None and size is not None and size > limit * 1024:
+            yield logical_id, "Properties.Code", f"package of {size / 1024:.0f} KB exceeds {limit} KB"
+
+
+def check_healthy_hosts(template: dict, budget: dict):
+    limit = budget.get("min_healthy_hosts")
+    for logical_id, _, properties in _resources(template, "AWS::AutoScaling::AutoScalingGroup"):
+        if not (properties.get("TargetGroupARNs") or properties.get("LoadBalancerNames")):
+            continue
+        if budget.get("health_check_type") and properties.get("HealthCheckType", "EC2") != budget["health_check_type"]:
+            yield (logical_id, "Properties.HealthCheckType",
+                   f"{properties.get('HealthCheckType', 'EC2')} is not {budget['health_check_type']}")
+        minimum = _number(properties.get("MinSize"))
+        if limit is not None and minimum is not None and minimum < limit:
+            yield logical_id, "Properties.MinSize", f"{minimum} is below {limit} healthy hosts"
+    if limit is None:
+        return
+    for logical_id, _, properties in _resources(template, "AWS::ECS::Service"):
+        desired = _number(properties.get("DesiredCount"))
+        percent = _number(properties.get("DeploymentConfiguration", dict()).get("MinimumHealthyPercent", 100))
+        if not properties.get("LoadBalancers") or desired is None or percent is None:
+            continue
+        healthy = desired * percent // 100
+        if healthy < limit:
+            yield (logical_id, "Properties.DeploymentConfiguration.MinimumHealthyPercent",
+                   f"{desired} tasks at {percent}% keep {healthy} healthy during a deployment, below {limit}")
+    for logical_id, _, properties in _resources(template, "AWS::ApplicationAutoScaling::ScalableTarget"):
+        minimum = _number(properties.get("MinCapacity"))
+        if properties.get("ServiceNamespace") == "ecs" and minimum is not None and minimum < limit:
+            yield logical_id, "Properties.MinCapacity", f"{minimum} is below {limit} healthy hosts"
+
+
+def check_health_check_grace(template: dict, budget: dict):
+    limit = budget.get("max_health_check_grace_seconds")
+    if limit is None:
+        return
+    for types, name in (
+        (("AWS::AutoScaling::AutoScalingGroup",), "HealthCheckGracePeriod"),
+        (("AWS::ECS::Service",),                  "HealthCheckGracePeriodSeconds"),
+    ):
+        for logical_id, _, properties in _resources(template, *types):
+            grace = _number(properties.get(name))
+            if grace is not None and grace > limit:
+                yield logical_id, f"Properties.{name}", f"{grace}s exceeds {limit}s"
+
+
+def check_cloudfront(template: dict, budget: dict):
+    min_ttl  = budget.get("min_cache_ttl")
+    compress = budget.get("cloudfront_compress")
+    for logical_id, _, properties in _resources(template, "AWS::CloudFront::CachePolicy"):
+        config = properties.get("CachePolicyConfig", dict())
+        ttl    = _number(config.get("DefaultTTL"))
+        if min_ttl is not None and ttl is not None and ttl < min_ttl:
+            yield logical_id, "Properties.CachePolicyConfig.DefaultTTL", f"{ttl}s is below {min_ttl}s"
+        encodings = config.get("ParametersInCacheKeyAndForwardedToOrigin", dict())
+        for name in ("EnableAcceptEncodingGzip", "EnableAcceptEncodingBrotli"):
+            if compress and encodings.get(name) is not True:
+                yield (logical_id, f"Properties.CachePolicyConfig.ParametersInCacheKeyAndForwardedToOrigin.{name}",
+                       "compressed objects are not cached")
+    for logical_id, _, properties in _resources(template, "AWS::CloudFront::Distribution"):
+        config    = properties.get("DistributionConfig", dict())
+        behaviors = [ ("DefaultCacheBehavior", config.get("DefaultCacheBehavior", dict())) ]
+        behaviors += [ (f"CacheBehaviors.{index}", behavior)
+                       for index, behavior in enumerate(config.get("CacheBehaviors", list())) ]
+        for path, behavior in behaviors:
+            if compress and behavior.get("Compress") is not True:
+                yield logical_id, f"Properties.DistributionConfig.{path}.Compress", "compression is off"
+            # legacy cache settings, cache policies are checked above
+            ttl = _number(behavior.get("DefaultTTL"))
+            if min_ttl is not None and ttl is not None and ttl < min_ttl:
+                yield logical_id, f"Properties.DistributionConfig.{path}.DefaultTTL", f"{ttl}s is below {min_ttl}s"
+
+
+def _default_routes(template: dict):
+    '''
+        (logical id, target property, hops, zones of the subnets, zone of the NAT) of every default route,
+        zones are the JSON of the AvailabilityZone values, the NAT zone is None for other targets.
+    '''
+    resources = template.get("Resources", dict())
+    subnet_zone = {
+        logical_id: json.dumps(properties.get("AvailabilityZone"), sort_keys=True)
+        for logical_id, _, properties in _resources(template, "AWS::EC2::Subnet")
+        if "AvailabilityZone" in properties
+    }
+    table_zones = dict()
+    for _, _, properties in _resources(template, "AWS::EC2::SubnetRouteTableAssociation"):
+        table, subnet = _ref(properties.get("RouteTableId")), _ref(properties.get("SubnetId"))
+        if table and subnet in subnet_zone:
+            table_zones.setdefault(table, set()).add(subnet_zone[subnet])
+    for logical_id, _, properties in _resources(template, "AWS::EC2::Route"):
+        if properties.get("DestinationCidrBlock") != "0.0.0.0/0":
+            continue
+        target = next((name for name in ROUTE_HOPS if name in properties), None)
+        if target is None:
+            continue
+        nat      = resources.get(_ref(properties[target]), dict()).get("Properties", dict())
+        nat_zone = None
+        if target in ("NatGatewayId", "InstanceId") and nat:
+            interfaces = nat.get("NetworkInterfaces") or [ dict() ]
+            nat_zone   = subnet_zone.get(_ref(nat.get("SubnetId") or interfaces[0].get("SubnetId")))
+        yield (logical_id, target, ROUTE_HOPS[target],
+               table_zones.get(_ref(properties.get("RouteTableId")), set()), nat_zone)
+
+
+def _zone_label(zone: str) -> str:
+    # "us-west-2a", { "Fn::Select": [ 1, { "Fn::GetAZs": "" } ] } -> "az 1"
+    value = json.loads(zone)
+    if isinstance(value, dict) and "Fn::Select" in value:
+        return f"az {value['Fn::Select'][0]}"
+    return str(value)
+
+
+def check_nat_hops(template: dict, budget: dict):
+    limit = budget.get("max_nat_hops")
+    if limit is None:
+        return
+    for logical_id, target, hops, zones, nat_zone in _default_routes(template):
+        cross_az = bool(nat_zone and zones - { nat_zone })
+        hops    += cross_az
+        if hops > limit:
+            yield (logical_id, f"Properties.{target}",
+                   f"{hops} hops to the internet gateway exceed {limit}"
+                   + (" (NAT in another availability zone)" if cross_az else ""))
+
+
+def check_az_local_egress(template: dict, budget: dict):
+    if not budget.get("az_local_egress"):
+        return
+    for logical_id, target, _, zones, nat_zone in _default_routes(template):
+        if nat_zone and zones - { nat_zone }:
+            subnets = ", ".join(sorted(_zone_label(zone) for zone in zones - { nat_zone }))
+            yield (logical_id, f"Properties.{target}",
+                   f"egress of {subnets} crosses to the NAT in {_zone_label(nat_zone)}")
+
+
+def check_template(template: dict, budget: dict, directory: str = "") -> list:
+    '''
+        (logical id, property, message) of every violation of one template.
+    '''
+    findings = list()
+    findings.extend(check_lambda(template, budget, directory))
+    findings.extend(check_healthy_hosts(template, budget))
+    findings.extend(check_health_check_grace(template, budget))
+    findings.extend(check_cloudfront(template, budget))
+    findings.extend(check_nat_hops(template, budget))
+    findings.extend(check_az_local_egress(template, budget))
+    return findings
+
+
+'''
+    Assembly
+'''
+def construct_paths(stack) -> dict:
+    '''
+        { logical id: [ construct path ] } from the stack metadata of manifest.json,
+        nested stack resources are listed under their parent stack.
+    '''
+    paths = dict()
+    for path, entries in stack.artifact.get("metadata", dict()).items():
+        for entry in entries:
+            if entry.get("type") == "aws:cdk:logicalId":
+                paths.setdefault(entry["data"], list()).append(path)
+    return paths
+
+
+def _location(stack, template_path: str, logical_id: str, paths: dict) -> str:
+    candidates = paths.get(logical_id, list())
+    if template_path != stack.properties["templateFile"]:
+        # nested stack: logical ids are unique per template only
+        nested = f"{stack.id}/{template_path}/{logical_id}"
+        return f"{candidates[0]}({nested})" if len(candidates) == 1 else nested
+    return f"{candidates[0]}({logical_id})" if candidates else f"{stack.id}/{logical_id}"
+
+
+def check_assembly(assembly: CloudAssembly, budget: dict) -> list:
+    violations = list()
+    for stack in assembly.stacks.values():
+        paths = construct_paths(stack)
+        for template_path in [ stack.properties["templateFile"] ] + nested_templates(stack):
+            with open(os.path.join(assembly.directory, template_path)) as file:
+                template = json.load(file)
+            for logical_id, property, message in check_template(template, budget, assembly.directory):
+                violations.append(Violation(_location(stack, template_path, logical_id, paths), property, message))
+    return violations
+
+
+'''
+    CLI
+'''
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Performance budget check of a cloud assembly")
+    parser.add_argument("assembly", help="cdk.out directory")
+    parser.add_argument("--budget", required=True, help="budget file, e.g. services/config/budget/dev.json")
+    parser.add_argument("--json", action="store_true", help="print the violations as JSON")
+    args = parser.parse_args()
+
+    violations = check_assembly(CloudAssembly(args.assembly), load_budget(args.budget))
+    if args.json:
+        print(json.dumps([ violation.to_dict() for violation in violations ], indent=2))
+    else:
+        for violation in violations:
+            print(f"BUDGET {violation}", file=sys.stderr)
+        print(f"{len(violations)} violation(s) of {args.budget}", file=sys.stderr)
+    return 1 if violations else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,248 @@
+'''
+    Project configuration
+    One file per environment, config/<env>.json of the project(next to app.py, the cdk CLI runs app.py there):
+        {
+            "account": "242593025403",
+            "region":  "us-west-2",
+            "env":     "dev",
+            "name":    "cdkworkshop",
+            "keypair": "dev-uswest2",        (optional)
+            "azs":     ["a", "b"]            (optional, az suffixes)
+        }
+    The file is validated once and loaded into a frozen ProjectConfig, derived values
+    (name prefix, partition, arn templates, az map) are computed there and shared by every stack.
+
+        project = load_config()              # env from "env" context, e.g. cdk synth -c env=prd
+        project.prefix                       # "dev-cdkworkshop"
+        project.resource_name("redis")       # "dev-cdkworkshop-redis"
+        project.alias("efs")                 # "alias/dev-cdkworkshop-efs"
+        project.role_arn("AdministratorRole")
+        project.bucket_arns("my-bucket")     # [ bucket arn, objects arn ]
+        project["prefix"]                    # dict style access of the former project dict
+        project.for_region("us-east-1")      # same env in another region, prefix "dev-cdkworkshop-use1"
+
+    A config is loaded once per (directory, env), an app building several environments
+    gets one config per environment.
+
+    config/matrix.json lists the (env, region) pairs of matrix synth(load_matrix):
+        {
+            "dev":  [ "us-west-2", "us-east-1" ],
+            "prod": [ "us-west-2", { "region": "eu-west-1", "keypair": "prod-euw1" } ]
+        }
+    A region other than the one of config/<env>.json gets a region code in the prefix,
+    so names stay unique within the account, and the keypair "<env>-<region without '-'>".
+'''
+import functools
+import json
+import os
+import re
+
+# relative to the working directory, the project directory of the app being synthesized
+CONFIG_DIR  = "config"
+CONTEXT_KEY = "env"
+DEFAULT_ENV = "dev"
+
+REQUIRED_FIELDS = ("account", "region", "env", "name")
+OPTIONAL_FIELDS = ("keypair", "azs")
+ACCOUNT_PATTERN = re.compile(r"^\d{12}$")
+REGION_PATTERN  = re.compile(r"^[a-z]{2}(-gov|-iso[a-z]*)?-[a-z]+-\d$")
+NAME_PATTERN    = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+MATRIX_FILE     = "matrix.json"
+# us-west-2 -> usw2, ap-northeast-2 -> apne2
+DIRECTION_CODES = {
+    "north": "n", "south": "s", "east": "e", "west": "w", "central": "c",
+    "northeast": "ne", "northwest": "nw", "southeast": "se", "southwest": "sw",
+}
+
+
+def _partition(region: str) -> str:
+    if region.startswith("cn-"):
+        return "aws-cn"
+    if region.startswith("us-gov-"):
+        return "aws-us-gov"
+    return "aws"
+
+
+def region_code(region: str) -> str:
+    parts = region.split("-")
+    return parts[0] + "".join(DIRECTION_CODES.get(part, part[0]) for part in parts[1:-1]) + parts[-1]
+
+
+class ProjectConfig:
+    __slots__ = (
+        "account", "region", "env", "name", "keypair", "azs", "region_code",
+        "prefix", "partition", "availability_zones", "zones", "arn_templates",
+    )
+
+    def __init__(self, account: str, region: str, env: str, name: str, keypair: str = None, azs: list = None,
+                 region_code: str = None) -> None:
+        values = {
+            "account": account, "region": region, "env": env, "name": name,
+            "keypair": keypair, "azs": tuple(azs or ("a", "b")), "region_code": region_code,
+        }
+        partition = _partition(region)
+        zones     = { suffix: f"{region}{suffix}" for suffix in values["azs"] }
+        values.update({
+            "prefix":             f"{env}-{name}-{region_code}" if region_code else f"{env}-{name}",
+            "partition":          partition,
+            "availability_zones": tuple(zones.values()),
+            "zones":              zones,
+            # format with the resource part only
+            "arn_templates": {
+                "iam-role":   f"arn:{partition}:iam::{account}:role/{{}}",
+                "iam-policy": f"arn:{partition}:iam::{account}:policy/{{}}",
+                "s3":         f"arn:{partition}:s3:::{{}}",
+                "kms-key":    f"arn:{partition}:kms:{region}:{account}:key/{{}}",
+                "kms-alias":  f"arn:{partition}:kms:{region}:{account}:alias/{{}}",
+            },
+        })
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"ProjectConfig is frozen, cannot set '{key}'")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"ProjectConfig is frozen, cannot delete '{key}'")
+
+    def __reduce__(self):
+        # frozen slots cannot be restored by the default pickle protocol(spawned synth workers)
+        return (ProjectConfig, (self.account, self.region, self.env, self.name, self.keypair, self.azs, self.region_code))
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ProjectConfig) and self.__reduce__()[1] == other.__reduce__()[1]
+
+    def __hash__(self) -> int:
+        return hash(self.__reduce__()[1])
+
+    def __repr__(self) -> str:
+        return f"ProjectConfig(prefix={self.prefix!r}, account={self.account!r}, region={self.region!r})"
+
+    '''
+        dict style access, stacks written against the former project dict keep working.
+    '''
+    def __getitem__(self, key: str):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key: str, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    '''
+        Derived names and arns
+    '''
+    def resource_name(self, suffix: str) -> str:
+        return f"{self.prefix}-{suffix}"
+
+    def alias(self, suffix: str) -> str:
+        return f"alias/{self.prefix}-{suffix}"
+
+    def arn(self, service: str, resource: str, region: str = None, account: str = None) -> str:
+        region  = self.region  if region  is None else region
+        account = self.account if account is None else account
+        return f"arn:{self.partition}:{service}:{region}:{account}:{resource}"
+
+    def role_arn(self, role_name: str) -> str:
+        return self.arn_templates["iam-role"].format(role_name)
+
+    def policy_arn(self, policy_name: str) -> str:
+        return self.arn_templates["iam-policy"].format(policy_name)
+
+    def bucket_arns(self, bucket_name: str) -> list:
+        bucket_arn = self.arn_templates["s3"].format(bucket_name)
+        return [ bucket_arn, f"{bucket_arn}/*" ]
+
+    def zone(self, suffix: str) -> str:
+        return self.zones[suffix]
+
+    def for_region(self, region: str, keypair: str = None, azs: list = None) -> "ProjectConfig":
+        '''
+            The same environment in another region.
+        '''
+        if region == self.region and keypair is None and azs is None:
+            return self
+        if region == self.region:
+            code = self.region_code
+        else:
+            code = region_code(region)
+            if keypair is None and self.keypair:
+                keypair = f"{self.env}-{region.replace('-', '')}"
+        return ProjectConfig(self.account, region, self.env, self.name,
+            keypair or self.keypair, azs or self.azs, code)
+
+
+def validate(values: dict, source: str = "config") -> dict:
+    unknown = set(values) - set(REQUIRED_FIELDS) - set(OPTIONAL_FIELDS)
+    if unknown:
+        raise ValueError(f"{source}: unknown fields {sorted(unknown)}")
+    missing = [ field for field in REQUIRED_FIELDS if not values.get(field) ]
+    if missing:
+        raise ValueError(f"{source}: missing fields {missing}")
+    if not ACCOUNT_PATTERN.match(str(values["account"])):
+        raise ValueError(f"{source}: account '{values['account']}' is not a 12 digit account id")
+    if not REGION_PATTERN.match(values["region"]):
+        raise ValueError(f"{source}: '{values['region']}' is not a region name")
+    for field in ("env", "name"):
+        if not NAME_PATTERN.match(values[field]):
+            raise ValueError(f"{source}: {field} '{values[field]}' must be lower case letters, digits and '-'")
+    azs = values.get("azs")
+    if azs is not None and (not azs or len(set(azs)) != len(azs)):
+        raise ValueError(f"{source}: azs must be a non empty list of unique suffixes")
+    return values
+
+
+def selected_env(default: str = DEFAULT_ENV) -> str:
+    '''
+        "env" context(cdk -c env=...) of the running app, read before App() is created.
+    '''
+    context = json.loads(os.environ.get("CDK_CONTEXT_JSON", "{}"))
+    return context.get(CONTEXT_KEY) or default
+
+
+@functools.lru_cache(maxsize=None)
+def _load(directory: str, env: str) -> ProjectConfig:
+    path = os.path.join(directory, f"{env}.json")
+    if not os.path.exists(path):
+        available = sorted(name[:-5] for name in os.listdir(directory) if name.endswith(".json")) \
+            if os.path.isdir(directory) else list()
+        raise ValueError(f"no config for env '{env}' in {directory}, available: {available}")
+    with open(path) as file:
+        values = validate(json.load(file), path)
+    if values["env"] != env:
+        raise ValueError(f"{path}: env is '{values['env']}', expected '{env}'")
+    return ProjectConfig(**values)
+
+
+def load_config(env: str = None, directory: str = None, default: str = DEFAULT_ENV) -> ProjectConfig:
+    return _load(os.path.abspath(directory or CONFIG_DIR), env or selected_env(default))
+
+
+def load_matrix(envs: list = None, directory: str = None) -> list:
+    '''
+        ProjectConfig of every (env, region) pair in config/matrix.json, in file order.
+        envs: only these environments(default: all)
+    '''
+    directory = os.path.abspath(directory or CONFIG_DIR)
+    path = os.path.join(directory, MATRIX_FILE)
+    with open(path) as file:
+        matrix = json.load(file)
+    unknown = set(envs or list()) - set(matrix)
+    if unknown:
+        raise ValueError(f"{path}: no environment {sorted(unknown)}")
+    configs  = list()
+    prefixes = dict()
+    for env, regions in matrix.items():
+        if envs and env not in envs:
+            continue
+        base = _load(directory, env)
+        for entry in regions:
+            entry  = { "region": entry } if isinstance(entry, str) else dict(entry)
+            config = base.for_region(entry.pop("region"), **entry)
+            if not REGION_PATTERN.match(config.region):
+                raise ValueError(f"{path}: '{config.region}' is not a region name")
+            if config.prefix in prefixes:
+                raise ValueError(f"{path}: {env}/{config.region} and {prefixes[config.prefix]} have the same prefix '{config.prefix}'")
+            prefixes[config.prefix] = f"{env}/{config.region}"
+            configs.append(config)
+    return configs
@@ -0,0 +1,341 @@
+'''
+    Security group graph compiler
+    Tiers(security groups) and the flows between them are declared once, the rules of both ends are derived:
+        flow app -> rds tcp 3306  =  egress of app to rds 3306 + ingress of rds from app 3306
+    a cidr(or a name of cidrs) as source only adds the ingress rule of the destination, as destination only
+    the egress rule of the source.
+        1. rules of a group with the same direction, protocol and peer merge overlapping or adjacent port ranges,
+           rules with the same protocol and ports merge sibling cidrs(10.0.32.0/20 + 10.0.48.0/20 -> /19)
+        2. rules covered by a broader rule are dropped(a cidr covers a tier peer when it contains the cidrs of
+           the tier, 0.0.0.0/0 covers every tier), egress rules of a tier that allows all outbound are dropped
+        3. a rule is inline(SecurityGroupIngress/SecurityGroupEgress of the group) when its peer is a cidr,
+           an external group or a tier that does not reference the group back through inline rules(the way
+           with more rules between two groups is inlined first).
+           Self references and the rules that would close a reference cycle are separate resources:
+           CloudFormation can not resolve a group id in its own properties, two groups referencing each other
+           is a circular dependency.
+    Every rule counts against the rules per security group quota(60 inbound and 60 outbound by default),
+    more than the limit is an error, quota() reports the headroom of every tier.
+    can_reach() answers "can X reach Y on port P" from the compiled rules: security groups are stateful,
+    the egress of the source and the ingress of the destination must both allow the first packet.
+
+        graph = SecurityGroupGraph(names={ "any": [ "0.0.0.0/0" ] })
+        graph.tier("alb")
+        graph.tier("app", cidrs=[ "10.0.32.0/19" ])
+        graph.flow("any", "alb", 443)
+        graph.flow("alb", "app", 8080)
+        graph.can_reach("alb", "app", 8080)             # True
+        graph.can_reach("203.0.113.10", "app", 8080)    # False
+'''
+import ipaddress
+
+# protocol numbers and port ranges are the same for NACL entries and security group rules
+from tools.nacl_compiler import ALL_PORTS, DIRECTIONS, PORTED, PROTOCOLS
+
+RULE_LIMIT  = 60
+ANY         = ipaddress.ip_network("0.0.0.0/0")
+
+
+class Tier:
+    __slots__ = ("name", "cidrs", "allow_all_outbound", "external")
+
+    def __init__(self, name: str, cidrs: list = None, allow_all_outbound: bool = False, external: bool = False) -> None:
+        self.name               = name
+        self.cidrs              = [ ipaddress.ip_network(cidr) for cidr in cidrs or list() ]
+        self.allow_all_outbound = allow_all_outbound
+        self.external           = external
+
+
+class Rule:
+    '''
+        One rule of a group, peer is a tier name or a cidr.
+    '''
+    __slots__ = ("group", "egress", "protocol", "ports", "peer", "description", "inline")
+
+    def __init__(self, group: str, egress: bool, protocol: int, ports: tuple, peer, description: str = "",
+                 inline: bool = True) -> None:
+        self.group       = group
+        self.egress      = egress
+        self.protocol    = protocol
+        self.ports       = None if not ports or tuple(ports) == ALL_PORTS else tuple(ports)
+        self.peer        = peer if isinstance(peer, str) else ipaddress.ip_network(peer)
+        self.description = description
+        self.inline      = inline
+
+    @property
+    def direction(self) -> str:
+        return "egress" if self.egress else "ingress"
+
+    def allows(self, protocol: int, port: int = None) -> bool:
+        if self.protocol == -1:
+            return True
+        if self.protocol != protocol:
+            return False
+        if self.protocol in PORTED:
+            ports = self.ports or ALL_PORTS
+            return port is None and ports == ALL_PORTS or port is not None and ports[0] <= port <= ports[1]
+        return True
+
+    def __repr__(self) -> str:
+        ports = f" {self.ports[0]}-{self.ports[1]}" if self.ports else ""
+        return (f"Rule({self.group} {self.direction} {self.protocol}{ports} {self.peer}"
+                f"{'' if self.inline else ' resource'})")
+
+
+def _protocol(value) -> int:
+    if isinstance(value, int):
+        return value
+    if value not in PROTOCOLS:
+        raise ValueError(f"unknown protocol '{value}', protocols: {', '.join(PROTOCOLS)} or a number")
+    return PROTOCOLS[value]
+
+
+def _ports(value) -> tuple:
+    if value is None:
+        return None
+    ports = (value, value) if isinstance(value, int) else tuple(value)
+    if len(ports) != 2 or not 0 <= ports[0] <= ports[1] <= 65535:
+        raise ValueError(f"port range {value} must be a port or [from, to] within 0-65535")
+    return None if ports == ALL_PORTS else ports
+
+
+class SecurityGroupGraph:
+    '''
+        Tiers and flows of one application, compile() returns the rules of every tier.
+    '''
+    def __init__(self, names: dict = None, limit: int = RULE_LIMIT, inline_groups: bool = True) -> None:
+        '''
+            inline_groups=False keeps every tier peer a separate resource(CDK v1 before Peer.security_group_id).
+        '''
+        self.names         = names or dict()
+        self.limit         = limit
+        self.inline_groups = inline_groups
+        self.tiers         = dict()
+        self.flows         = list()
+        self._compiled     = None
+
+    def tier(self, name: str, cidrs: list = None, allow_all_outbound: bool = False, external: bool = False) -> Tier:
+        '''
+            A security group, external groups(owned by another stack) are peers only, no rules are compiled for them.
+        '''
+        if name in self.tiers or name in self.names:
+            raise ValueError(f"tier '{name}' is already declared")
+        self.tiers[name] = Tier(name, cidrs, allow_all_outbound, external)
+        self._compiled   = None
+        return self.tiers[name]
+
+    def flow(self, source: str, destination: str, ports=None, protocol="tcp", description: str = "") -> None:
+        '''
+            source may reach destination, ports: a port or [from, to](tcp/udp only, all ports when missing).
+        '''
+        protocol = _protocol(protocol)
+        ports    = _ports(ports)
+        if ports and protocol not in PORTED:
+            raise ValueError(f"ports are only valid for tcp and udp flows, not protocol {protocol}")
+        if source not in self.tiers and destination not in self.tiers:
+            raise ValueError(f"flow {source} -> {destination} has no declared tier")
+        self.flows.append((self._peers(source), self._peers(destination), protocol, ports, description))
+        self._compiled = None
+
+    def _peers(self, value: str) -> list:
+        if value in self.tiers:
+            return [ value ]
+        cidrs = self.names.get(value, [ value ])
+        return [ ipaddress.ip_network(cidr) for cidr in cidrs ]
+
+    '''
+        Compile
+    '''
+    def rules(self) -> list:
+        '''
+            Rules of both ends of every flow, in flow order.
+        '''
+        rules = list()
+        for sources, destinations, protocol, ports, description in self.flows:
+            for source in sources:
+                for destination in destinations:
+                    if isinstance(source, str) and not self.tiers[source].external:
+                        rules.append(Rule(source, True, protocol, ports, destination, description))
+                    if isinstance(destination, str) and not self.tiers[destination].external:
+                        rules.append(Rule(destination, False, protocol, ports, source, description))
+        return rules
+
+    def covers(self, rule: Rule, other: Rule) -> bool:
+        '''
+            Every packet allowed by other is allowed by rule(same group and direction).
+        '''
+        if (rule.group, rule.egress) != (other.group, other.egress) or not self._peer_covers(rule.peer, other.peer):
+            return False
+        if rule.protocol == -1:
+            return True
+        if rule.protocol != other.protocol:
+            return False
+        if rule.protocol in PORTED:
+            ports, other_ports = rule.ports or ALL_PORTS, other.ports or ALL_PORTS
+            return ports[0] <= other_ports[0] and other_ports[1] <= ports[1]
+        return True
+
+    def _peer_covers(self, peer, other) -> bool:
+        if peer == other:
+            return True
+        if isinstance(peer, str):
+            return False
+        if peer == ANY:
+            return True
+        if isinstance(other, str):
+            cidrs = self.tiers[other].cidrs
+            return bool(cidrs) and all(cidr.subnet_of(peer) for cidr in cidrs)
+        return other.subnet_of(peer)
+
+    def _merge_ports(self, rules: list) -> list:
+        groups = dict()
+        for rule in rules:
+            if rule.protocol in PORTED:
+                groups.setdefault((rule.group, rule.egress, rule.protocol, rule.peer), list()).append(rule)
+        merged = [ rule for rule in rules if rule.protocol not in PORTED ]
+        for group in groups.values():
+            group.sort(key=lambda rule: rule.ports or ALL_PORTS)
+            current = group[0]
+            for rule in group[1:]:
+                low, high = current.ports or ALL_PORTS
+                if (rule.ports or ALL_PORTS)[0] <= high + 1:
+                    current = Rule(current.group, current.egress, current.protocol,
+                        (low, max(high, (rule.ports or ALL_PORTS)[1])), current.peer,
+                        current.description or rule.description)
+                else:
+                    merged.append(current)
+                    current = rule
+            merged.append(current)
+        return merged
+
+    def _merge_cidrs(self, rules: list) -> list:
+        groups = dict()
+        merged = list()
+        for rule in rules:
+            if isinstance(rule.peer, str):
+                merged.append(rule)
+            else:
+                groups.setdefault((rule.group, rule.egress, rule.protocol, rule.ports), list()).append(rule)
+        for group in groups.values():
+            for cidr in ipaddress.collapse_addresses(rule.peer for rule in group):
+                first = next(rule for rule in group if rule.peer.subnet_of(cidr))
+                merged.append(Rule(first.group, first.egress, first.protocol, first.ports, cidr, first.description))
+        return merged
+
+    def _drop_covered(self, rules: list) -> list:
+        kept = list()
+        # broader rules first: cidr peers by size, then tier peers, then all protocols and wide port ranges
+        for rule in sorted(rules, key=lambda rule: (
+                -(rule.peer.num_addresses if not isinstance(rule.peer, str) else 0),
+                rule.protocol != -1, (rule.ports or ALL_PORTS)[0] - (rule.ports or ALL_PORTS)[1])):
+            if not any(self.covers(other, rule) for other in kept):
+                kept.append(rule)
+        return kept
+
+    def _inline(self, rules: list) -> None:
+        references = { name: set() for name in self.tiers }
+
+        def reaches(start: str, target: str) -> bool:
+            stack, seen = [ start ], set()
+            while stack:
+                name = stack.pop()
+                if name == target:
+                    return True
+                if name not in seen:
+                    seen.add(name)
+                    stack.extend(references[name])
+            return False
+
+        # a pair of groups references one way only, the way with more rules between the pair goes first
+        weight = dict()
+        for rule in rules:
+            weight[(rule.group, rule.peer)] = weight.get((rule.group, rule.peer), 0) + 1
+        for rule in sorted(rules, key=lambda rule: -weight[(rule.group, rule.peer)]):
+            if not isinstance(rule.peer, str) or self.tiers[rule.peer].external:
+                rule.inline = True
+            elif not self.inline_groups or rule.peer == rule.group or reaches(rule.peer, rule.group):
+                rule.inline = False
+            else:
+                rule.inline = True
+                references[rule.group].add(rule.peer)
+
+    def compile(self) -> dict:
+        '''
+            { tier: { "ingress": [ Rule ], "egress": [ Rule ] } } of every owned tier, inline rules first.
+        '''
+        rules = [ rule for rule in self.rules()
+                  if not (rule.egress and self.tiers[rule.group].allow_all_outbound) ]
+        while True:
+            size  = len(rules)
+            rules = self._drop_covered(self._merge_cidrs(self._merge_ports(rules)))
+            if len(rules) == size:
+                break
+        self._inline(rules)
+        order    = { id(rule): index for index, rule in enumerate(rules) }
+        compiled = {
+            name: { direction: list() for direction in DIRECTIONS }
+            for name, tier in self.tiers.items() if not tier.external
+        }
+        for rule in sorted(rules, key=lambda rule: (not rule.inline, order[id(rule)])):
+            compiled[rule.group][rule.direction].append(rule)
+        for name, directions in compiled.items():
+            for direction, group_rules in directions.items():
+                if len(group_rules) > self.limit:
+                    raise ValueError(f"{len(group_rules)} {direction} rules of '{name}' exceed the limit of "
+                                     f"{self.limit} rules per security group")
+        self._compiled = compiled
+        return compiled
+
+    @property
+    def compiled(self) -> dict:
+        return self._compiled or self.compile()
+
+    '''
+        Report and queries
+    '''
+    def quota(self) -> dict:
+        '''
+            { tier: { "ingress", "egress", "inline", "resources", "headroom" } }, headroom is the number of rules
+            the fuller direction can still take.
+        '''
+        report = dict()
+        for name, directions in self.compiled.items():
+            rules = directions["ingress"] + directions["egress"]
+            report[name] = {
+                "ingress":   len(directions["ingress"]),
+                "egress":    len(directions["egress"]),
+                "inline":    sum(1 for rule in rules if rule.inline),
+                "resources": sum(1 for rule in rules if not rule.inline),
+                "headroom":  self.limit - max(len(directions["ingress"]), len(directions["egress"])),
+            }
+        return report
+
+    def _allowed(self, tier: str, egress: bool, peer, protocol: int, port: int) -> bool:
+        if self.tiers[tier].external:
+            return True
+        if egress and self.tiers[tier].allow_all_outbound:
+            return True
+        for rule in self.compiled[tier]["egress" if egress else "ingress"]:
+            if rule.allows(protocol, port) and (rule.peer == peer or self._peer_covers(rule.peer, peer)):
+                return True
+        return False
+
+    def can_reach(self, source: str, destination: str, port: int = None, protocol="tcp") -> bool:
+        '''
+            source and destination are tier names or addresses, an address is outside every security group
+            (only the rules of the tier end apply), an external tier allows everything on its side.
+        '''
+        protocol = _protocol(protocol)
+        ends     = list()
+        for value in (source, destination):
+            if value in self.tiers:
+                ends.append(value)
+            else:
+                address = self.names[value][0] if value in self.names else value
+                ends.append(ipaddress.ip_network(address, strict=False))
+        source, destination = ends
+        if isinstance(source, str) and not self._allowed(source, True, destination, protocol, port):
+            return False
+        if isinstance(destination, str) and not self._allowed(destination, False, source, protocol, port):
+            return False
+        return isinstance(source, str) or isinstance(destination, str)
@@ -0,0 +1,116 @@
+'''
+    Startup profiler
+    load() imports a stack module right before the stack is constructed, so the import of the module
+    and its construction are timed per stack. It does not skip aws_cdk submodules in aws-cdk-lib 2.x
+    projects: importing the top-level aws_cdk package already loads most submodules(aws_eks, aws_ecs,
+    aws_rds, ...), that fixed cost shows up in the report instead of being deferred. In CDK v1 projects
+    every aws_cdk.aws_* is a package of its own and is only imported with the stack module that uses it.
+
+    Profiling mode reports per-module import time and per-stack construction time to stderr.
+        python3 app.py --profile-startup
+        cdk synth --app "python3 app.py --profile-startup"
+        CDK_PROFILE_STARTUP=1 cdk synth
+
+    Shared by every project of the repository, app.py puts the repository root on sys.path before importing it.
+'''
+import importlib
+import importlib.abc
+import os
+import sys
+import time
+
+PROFILE_FLAG = "--profile-startup"
+PROFILE_ENV  = "CDK_PROFILE_STARTUP"
+
+
+class _TimedLoader(importlib.abc.Loader):
+    '''
+        Wraps the real loader and records how long executing the module takes.
+        Time includes the modules imported by this module(cumulative).
+    '''
+    def __init__(self, loader, name: str, timings: dict) -> None:
+        self.loader  = loader
+        self.name    = name
+        self.timings = timings
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timings[self.name] = time.perf_counter() - start
+
+    def __getattr__(self, attr):
+        return getattr(self.loader, attr)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    def __init__(self, timings: dict) -> None:
+        self.timings = timings
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            # another profiler's timer would call this one again
+            if isinstance(finder, _ImportTimer) or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                spec.loader = _TimedLoader(spec.loader, fullname, self.timings)
+            return spec
+        return None
+
+
+class StartupProfiler:
+    def __init__(self, enabled: bool = None) -> None:
+        if enabled is None:
+            enabled = PROFILE_FLAG in sys.argv or os.environ.get(PROFILE_ENV, "") not in ("", "0", "false")
+        self.enabled      = enabled
+        self.started      = time.perf_counter()
+        self.module_times = dict()
+        self.load_times   = list()
+        self.stack_times  = list()
+        self._timer       = None
+        if self.enabled:
+            self._timer = _ImportTimer(self.module_times)
+            sys.meta_path.insert(0, self._timer)
+
+    def load(self, path: str):
+        '''
+            Imports "package.module:Attribute" on first use and returns the attribute.
+        '''
+        module_name, _, attribute = path.partition(":")
+        start  = time.perf_counter()
+        module = importlib.import_module(module_name)
+        self.load_times.append((path, time.perf_counter() - start))
+        return getattr(module, attribute) if attribute else module
+
+    def construct(self, name: str, factory, *args, **kwargs):
+        start = time.perf_counter()
+        result = factory(*args, **kwargs)
+        self.stack_times.append((name, time.perf_counter() - start))
+        return result
+
+    def report(self, stream=None, top: int = 25) -> None:
+        if not self.enabled:
+            return
+        stream = stream or sys.stderr
+        if self._timer in sys.meta_path:
+            sys.meta_path.remove(self._timer)
+        total = time.perf_counter() - self.started
+        print("== startup profile ==", file=stream)
+        print(f"total: {total:.3f}s", file=stream)
+        print("-- stack module loads(cumulative) --", file=stream)
+        for path, seconds in self.load_times:
+            print(f"{seconds:9.3f}s  {path}", file=stream)
+        print(f"-- slowest module imports(cumulative, top {top}) --", file=stream)
+        slowest = sorted(self.module_times.items(), key=lambda item: item[1], reverse=True)
+        for name, seconds in slowest[:top]:
+            print(f"{seconds:9.3f}s  {name}", file=stream)
+        print("-- construction and synth --", file=stream)
+        for name, seconds in self.stack_times:
+            print(f"{seconds:9.3f}s  {name}", file=stream)
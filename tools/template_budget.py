@@ -0,0 +1,329 @@
+'''
+    CloudFormation template budget
+    Reports resource, output, export, parameter and mapping counts and the template size
+    of every stack(and nested stack) of a cloud assembly against the CloudFormation quotas.
+
+    Usage(from the repository root, after cdk synth):
+        python3 -m tools.template_budget services/cdk.out
+        python3 -m tools.template_budget services/cdk.out --check --warn 0.8
+        python3 -m tools.template_budget services/cdk.out --split --split-above 400 --nested-size 100
+
+    --check exits 1 when a template uses more than --warn of a quota.
+
+    --split(opt-in) moves independent resource groups of large stacks into nested stacks,
+    which CloudFormation deploys in parallel. A group is a connected component of the
+    reference graph(Ref, Fn::GetAtt, Fn::Sub, DependsOn), so no reference crosses a nested
+    stack boundary. Groups stay in the parent stack when they are used by Outputs, use
+    Conditions or list parameters, contain nested stacks or have a Retain/Snapshot
+    DeletionPolicy(stateful resources).
+    Moving a resource into a nested stack replaces it on an already deployed stack,
+    split before the first deployment or only stacks with stateless resources.
+'''
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+
+from tools.assembly import CloudAssembly
+
+# CloudFormation quotas
+LIMITS = {
+    "resources":  500,
+    "bytes":      1000000,
+    "outputs":    200,
+    "parameters": 200,
+    "mappings":   200,
+}
+NESTED_STACK_TYPE = "AWS::CloudFormation::Stack"
+KEEP_POLICIES     = ("Retain", "Snapshot", "RetainExceptOnCreate")
+SUB_VARIABLE      = re.compile(r"\$\{([^!}][^}]*)\}")
+
+
+'''
+    Analyzer
+'''
+def template_stats(path: str) -> dict:
+    with open(path) as file:
+        template = json.load(file)
+    outputs = template.get("Outputs", dict())
+    return {
+        "resources":  len(template.get("Resources", dict())),
+        "bytes":      os.path.getsize(path),
+        "outputs":    len(outputs),
+        "exports":    sum(1 for output in outputs.values() if "Export" in output),
+        "parameters": len(template.get("Parameters", dict())),
+        "mappings":   len(template.get("Mappings", dict())),
+    }
+
+
+def nested_templates(stack) -> list:
+    '''
+        Nested stack template files published by the stack's asset manifest.
+    '''
+    assembly = stack.assembly
+    files    = list()
+    for dependency in stack.artifact.get("dependencies", list()):
+        artifact = assembly.artifacts.get(dependency, dict())
+        if artifact.get("type") != "cdk:asset-manifest":
+            continue
+        with open(os.path.join(assembly.directory, artifact["properties"]["file"])) as file:
+            assets = json.load(file)
+        for asset in assets.get("files", dict()).values():
+            if asset["source"]["path"].endswith(".nested.template.json"):
+                files.append(asset["source"]["path"])
+    return sorted(files)
+
+
+def analyze(assembly: CloudAssembly) -> dict:
+    report = dict()
+    for stack_id, stack in assembly.stacks.items():
+        report[stack_id] = template_stats(stack.template_file)
+        for path in nested_templates(stack):
+            report[f"{stack_id}/{path}"] = template_stats(os.path.join(assembly.directory, path))
+    return report
+
+
+def over_budget(report: dict, warn: float) -> list:
+    findings = list()
+    for name, stats in report.items():
+        for metric, limit in LIMITS.items():
+            if stats[metric] > limit * warn:
+                findings.append(f"{name}: {metric} {stats[metric]} of {limit}({stats[metric] / limit:.0%})")
+    return findings
+
+
+'''
+    Splitter
+'''
+def references(value, resources: set, parameters: set, found: dict) -> None:
+    '''
+        Collects resource/parameter names used by a template fragment into
+        found["resources"], found["parameters"] and marks found["conditions"].
+    '''
+    if isinstance(value, list):
+        for item in value:
+            references(item, resources, parameters, found)
+        return
+    if not isinstance(value, dict):
+        return
+    for key, item in value.items():
+        if key == "Ref" and isinstance(item, str):
+            if item in resources:
+                found["resources"].add(item)
+            elif item in parameters:
+                found["parameters"].add(item)
+        elif key == "Fn::GetAtt":
+            name = item.split(".", 1)[0] if isinstance(item, str) else item[0]
+            if name in resources:
+                found["resources"].add(name)
+        elif key == "Fn::Sub":
+            text, variables = (item, dict()) if isinstance(item, str) else (item[0], item[1])
+            for match in SUB_VARIABLE.findall(text):
+                name = match.split(".", 1)[0]
+                if name in variables:
+                    continue
+                if name in resources:
+                    found["resources"].add(name)
+                elif name in parameters:
+                    found["parameters"].add(name)
+            references(variables, resources, parameters, found)
+            continue
+        elif key in ("Fn::If", "Condition"):
+            found["conditions"] = True
+        references(item, resources, parameters, found)
+
+
+def resource_groups(template: dict) -> list:
+    '''
+        Connected components of the resource reference graph, in template order.
+    '''
+    resources  = template.get("Resources", dict())
+    parameters = set(template.get("Parameters", dict()))
+    parent     = { name: name for name in resources }
+
+    def find(name: str) -> str:
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    for name, resource in resources.items():
+        found = { "resources": set(), "parameters": set(), "conditions": False }
+        references(resource, set(resources), parameters, found)
+        depends_on = resource.get("DependsOn", list())
+        found["resources"].update([ depends_on ] if isinstance(depends_on, str) else depends_on)
+        for other in found["resources"]:
+            if other in parent:
+                parent[find(other)] = find(name)
+
+    groups = dict()
+    for name in resources:
+        groups.setdefault(find(name), list()).append(name)
+    return list(groups.values())
+
+
+def _movable(template: dict, group: list, pinned: set) -> tuple:
+    '''
+        Returns (movable, parameters the group uses).
+    '''
+    resources  = template["Resources"]
+    parameters = template.get("Parameters", dict())
+    found      = { "resources": set(), "parameters": set(), "conditions": False }
+    for name in group:
+        resource = resources[name]
+        if name in pinned or resource["Type"] == NESTED_STACK_TYPE or resource["Type"] == "AWS::CDK::Metadata":
+            return False, set()
+        if resource.get("DeletionPolicy") in KEEP_POLICIES or resource.get("UpdateReplacePolicy") in KEEP_POLICIES:
+            return False, set()
+        references(resource, set(resources), set(parameters), found)
+    if found["conditions"]:
+        return False, set()
+    for name in found["parameters"]:
+        if parameters[name].get("Type", "String").startswith("List") or \
+           parameters[name].get("Type", "String") == "CommaDelimitedList":
+            return False, set()
+    return True, found["parameters"]
+
+
+def plan_split(template: dict, nested_size: int) -> list:
+    '''
+        Packs movable groups into bins of at most nested_size resources(first fit decreasing).
+        Returns a list of (resource names, parameter names) per nested stack.
+    '''
+    outputs = { "resources": set(), "parameters": set(), "conditions": False }
+    references(template.get("Outputs", dict()), set(template.get("Resources", dict())),
+               set(template.get("Parameters", dict())), outputs)
+    movable = list()
+    for group in resource_groups(template):
+        ok, parameters = _movable(template, group, outputs["resources"])
+        if ok:
+            movable.append((group, parameters))
+    movable.sort(key=lambda item: len(item[0]), reverse=True)
+    bins = list()
+    for group, parameters in movable:
+        for resources, used in bins:
+            if len(resources) + len(group) <= nested_size:
+                resources.extend(group)
+                used.update(parameters)
+                break
+        else:
+            bins.append((list(group), set(parameters)))
+    # a nested stack of a single small group only adds deployment overhead
+    return [ item for item in bins if len(item[0]) > 1 ]
+
+
+def _write_json(path: str, document: dict) -> str:
+    # same layout as the cdk synthesizer
+    text = json.dumps(document, indent=1)
+    with open(path, "w") as file:
+        file.write(text)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def split_stack(stack, nested_size: int) -> int:
+    '''
+        Rewrites the stack template, its asset manifest and manifest.json in place.
+        Returns the number of nested stacks created.
+    '''
+    assembly = stack.assembly
+    template = stack.template()
+    bins     = plan_split(template, nested_size)
+    if not bins:
+        return 0
+
+    manifest_id   = next(dependency for dependency in stack.artifact.get("dependencies", list())
+                         if assembly.artifacts.get(dependency, dict()).get("type") == "cdk:asset-manifest")
+    assets_path   = os.path.join(assembly.directory, assembly.artifacts[manifest_id]["properties"]["file"])
+    with open(assets_path) as file:
+        assets = json.load(file)
+    template_file = stack.properties["templateFile"]
+    template_id   = next(asset_id for asset_id, asset in assets["files"].items()
+                         if asset["source"]["path"] == template_file)
+    template_asset = assets["files"].pop(template_id)
+
+    resources  = template["Resources"]
+    parameters = template.get("Parameters", dict())
+    for index, (names, used) in enumerate(bins, start=1):
+        nested = {
+            "Resources": { name: resources.pop(name) for name in names },
+        }
+        if used:
+            nested["Parameters"] = {
+                name: { "Type": "Number" if parameters[name].get("Type") == "Number" else "String" }
+                for name in sorted(used)
+            }
+        if "Mappings" in template:
+            nested["Mappings"] = template["Mappings"]
+        path   = f"{stack.id}.split{index}.nested.template.json"
+        digest = _write_json(os.path.join(assembly.directory, path), nested)
+        destinations = dict()
+        for destination_id, destination in template_asset["destinations"].items():
+            destinations[destination_id] = dict(destination, objectKey=f"{digest}.json")
+        assets["files"][digest] = { "source": { "path": path, "packaging": "file" }, "destinations": destinations }
+        bucket = next(iter(destinations.values()))["bucketName"]
+        nested_resource = {
+            "Type": NESTED_STACK_TYPE,
+            "Properties": {
+                "TemplateURL": { "Fn::Sub": f"https://s3.${{AWS::Region}}.${{AWS::URLSuffix}}/{bucket}/{digest}.json" },
+            },
+            "UpdateReplacePolicy": "Delete",
+            "DeletionPolicy": "Delete",
+        }
+        if used:
+            nested_resource["Properties"]["Parameters"] = { name: { "Ref": name } for name in sorted(used) }
+        resources[f"TemplateBudgetSplit{index}NestedStack"] = nested_resource
+
+    # the parent template changed, so it is published under a new content hash
+    digest = _write_json(stack.template_file, template)
+    destinations = dict()
+    for destination_id, destination in template_asset["destinations"].items():
+        destinations[destination_id] = dict(destination, objectKey=f"{digest}.json")
+    assets["files"][digest] = dict(template_asset, destinations=destinations)
+    with open(assets_path, "w") as file:
+        json.dump(assets, file, indent=2)
+
+    url = stack.properties.get("stackTemplateAssetObjectUrl")
+    if url:
+        stack.properties["stackTemplateAssetObjectUrl"] = url.replace(f"{template_id}.json", f"{digest}.json")
+        with open(os.path.join(assembly.directory, "manifest.json"), "w") as file:
+            json.dump(assembly.manifest, file, indent=2)
+    return len(bins)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="CloudFormation template budget of a cloud assembly")
+    parser.add_argument("assembly", help="cdk.out directory")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--warn", type=float, default=0.8, help="ratio of a quota reported as over budget")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a template is over budget")
+    parser.add_argument("--split", action="store_true", help="move independent resource groups into nested stacks")
+    parser.add_argument("--split-above", type=int, default=400, help="split stacks with more resources than this")
+    parser.add_argument("--nested-size", type=int, default=100, help="resources per nested stack")
+    args = parser.parse_args()
+
+    assembly = CloudAssembly(args.assembly)
+    if args.split:
+        for stack_id, stack in assembly.stacks.items():
+            if template_stats(stack.template_file)["resources"] <= args.split_above:
+                continue
+            count = split_stack(stack, args.nested_size)
+            print(f"{stack_id}: moved resources into {count} nested stack(s)", file=sys.stderr)
+
+    report   = analyze(assembly)
+    findings = over_budget(report, args.warn)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'template':72} {'resources':>9} {'bytes':>9} {'outputs':>7} {'exports':>7} {'params':>6} {'maps':>4}")
+        for name, stats in report.items():
+            print(f"{name:72} {stats['resources']:9} {stats['bytes']:9} {stats['outputs']:7}"
+                  f" {stats['exports']:7} {stats['parameters']:6} {stats['mappings']:4}")
+    for finding in findings:
+        print(f"OVER BUDGET {finding}", file=sys.stderr)
+    return 1 if args.check and findings else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,341 @@
+'''
+    Template diff
+    Compares two cloud assemblies(e.g. the cdk.out of the last deploy and a new one) stack by stack
+    in worker processes, and classifies every resource change:
+        no-op        only Metadata changed(aws:cdk:path, asset paths, ...)
+        update       in-place update
+        replacement  a property that requires replacement changed(REPLACEMENT_RULES),
+                     or a property references a resource that is replaced
+        may-replace  changed resource type without rules in REPLACEMENT_RULES
+        add / remove
+    Stacks with byte-identical templates are skipped without parsing them.
+
+    Usage(from the repository root):
+        python3 -m tools.template_diff old/cdk.out services/cdk.out
+        python3 -m tools.template_diff old/cdk.out services/cdk.out --json
+        stacks=$(python3 -m tools.template_diff old/cdk.out services/cdk.out --changed-only) && \
+            cdk deploy --exclusively $stacks
+        python3 -m tools.template_diff old/cdk.out services/cdk.out --fail-on-replacement
+
+    --changed-only exits 3(NOTHING_CHANGED) without output when no stack changed:
+    "cdk deploy --exclusively" without stack names deploys every stack, so the deploy
+    must only run on exit 0, never as "cdk deploy --exclusively $(... --changed-only)".
+'''
+import argparse
+import concurrent.futures
+import hashlib
+import json
+import sys
+
+from tools.assembly import CloudAssembly
+
+# Properties whose change requires replacement, per resource type(CloudFormation resource reference).
+# "*" means every property change replaces the resource.
+REPLACEMENT_RULES = {
+    "AWS::EC2::VPC":                            { "CidrBlock", "InstanceTenancy", "Ipv4IpamPoolId", "Ipv4NetmaskLength" },
+    "AWS::EC2::Subnet":                         { "AvailabilityZone", "AvailabilityZoneId", "CidrBlock", "VpcId",
+                                                  "Ipv4IpamPoolId", "Ipv4NetmaskLength", "OutpostArn" },
+    "AWS::EC2::InternetGateway":                set(),
+    "AWS::EC2::VPCGatewayAttachment":           { "VpcId" },
+    "AWS::EC2::EIP":                            { "Domain", "InstanceId", "NetworkBorderGroup" },
+    "AWS::EC2::NatGateway":                     { "AllocationId", "ConnectivityType", "PrivateIpAddress", "SubnetId" },
+    "AWS::EC2::RouteTable":                     { "VpcId" },
+    "AWS::EC2::Route":                          { "DestinationCidrBlock", "DestinationIpv6CidrBlock",
+                                                  "DestinationPrefixListId", "RouteTableId" },
+    "AWS::EC2::SubnetRouteTableAssociation":    { "SubnetId" },
+    "AWS::EC2::NetworkAcl":                     { "VpcId" },
+    "AWS::EC2::NetworkAclEntry":                { "Egress", "NetworkAclId", "RuleNumber" },
+    "AWS::EC2::SubnetNetworkAclAssociation":    { "NetworkAclId", "SubnetId" },
+    "AWS::EC2::SecurityGroup":                  { "GroupDescription", "GroupName", "VpcId" },
+    "AWS::EC2::SecurityGroupIngress":           "*",
+    "AWS::EC2::SecurityGroupEgress":            "*",
+    "AWS::EC2::VPCEndpoint":                    { "ServiceName", "VpcEndpointType", "VpcId" },
+    "AWS::EC2::Instance":                       { "AvailabilityZone", "ImageId", "KeyName", "SubnetId",
+                                                  "NetworkInterfaces", "PrivateIpAddress", "Tenancy",
+                                                  "HibernationOptions", "LaunchTemplate", "CpuOptions" },
+    "AWS::EC2::LaunchTemplate":                 { "LaunchTemplateName" },
+    "AWS::AutoScaling::AutoScalingGroup":       { "AutoScalingGroupName", "InstanceId" },
+    "AWS::AutoScaling::LaunchConfiguration":    "*",
+    "AWS::IAM::Role":                           { "Path", "RoleName" },
+    "AWS::IAM::Policy":                         set(),
+    "AWS::IAM::ManagedPolicy":                  { "ManagedPolicyName", "Path" },
+    "AWS::IAM::InstanceProfile":                { "InstanceProfileName", "Path" },
+    "AWS::KMS::Key":                            { "KeySpec", "KeyUsage", "MultiRegion" },
+    "AWS::KMS::Alias":                          { "AliasName" },
+    "AWS::S3::Bucket":                          { "BucketName", "ObjectLockEnabled" },
+    "AWS::S3::BucketPolicy":                    { "Bucket" },
+    "AWS::ECR::Repository":                     { "RepositoryName", "EncryptionConfiguration" },
+    "AWS::Lambda::Function":                    { "FunctionName", "PackageType" },
+    "AWS::Lambda::Permission":                  "*",
+    "AWS::Logs::LogGroup":                      { "LogGroupName" },
+    "AWS::ElasticLoadBalancingV2::LoadBalancer": { "Name", "Scheme", "Type" },
+    "AWS::ElasticLoadBalancingV2::TargetGroup": { "Name", "Port", "Protocol", "ProtocolVersion", "TargetType",
+                                                  "VpcId", "IpAddressType" },
+    "AWS::ElasticLoadBalancingV2::Listener":    { "LoadBalancerArn" },
+    "AWS::ElasticLoadBalancingV2::ListenerRule": { "ListenerArn" },
+    "AWS::ECS::Cluster":                        { "ClusterName" },
+    "AWS::ECS::Service":                        { "Cluster", "LaunchType", "Role", "SchedulingStrategy",
+                                                  "ServiceName", "DeploymentController" },
+    "AWS::ECS::TaskDefinition":                 "*",
+    "AWS::ECS::CapacityProvider":               { "Name" },
+    "AWS::EKS::Cluster":                        { "Name", "RoleArn", "EncryptionConfig", "KubernetesNetworkConfig",
+                                                  "OutpostConfig" },
+    "AWS::EKS::Nodegroup":                      { "AmiType", "CapacityType", "ClusterName", "DiskSize",
+                                                  "InstanceTypes", "NodeRole", "NodegroupName", "RemoteAccess",
+                                                  "Subnets" },
+    "AWS::RDS::DBCluster":                      { "DBClusterIdentifier", "DatabaseName", "Engine", "EngineMode",
+                                                  "KmsKeyId", "MasterUsername", "SnapshotIdentifier",
+                                                  "SourceDBClusterIdentifier", "StorageEncrypted",
+                                                  "DBSubnetGroupName", "AvailabilityZones" },
+    "AWS::RDS::DBInstance":                     { "DBInstanceIdentifier", "DBName", "KmsKeyId", "MasterUsername",
+                                                  "StorageEncrypted", "DBClusterIdentifier", "CharacterSetName",
+                                                  "Timezone" },
+    "AWS::RDS::DBSubnetGroup":                  { "DBSubnetGroupName" },
+    "AWS::RDS::DBClusterParameterGroup":        { "Description", "Family" },
+    "AWS::RDS::DBParameterGroup":               { "Description", "Family" },
+    "AWS::EFS::FileSystem":                     { "Encrypted", "KmsKeyId", "PerformanceMode", "AvailabilityZoneName" },
+    "AWS::EFS::MountTarget":                    { "FileSystemId", "IpAddress", "SubnetId" },
+    "AWS::ElastiCache::SubnetGroup":            { "CacheSubnetGroupName" },
+    "AWS::ElastiCache::ReplicationGroup":       { "ReplicationGroupId", "CacheSubnetGroupName", "Engine",
+                                                  "AtRestEncryptionEnabled", "KmsKeyId", "Port",
+                                                  "PreferredCacheClusterAZs", "TransitEncryptionEnabled",
+                                                  "NumNodeGroups" },
+    "AWS::ElastiCache::CacheCluster":           { "ClusterName", "CacheSubnetGroupName", "Engine", "Port",
+                                                  "PreferredAvailabilityZone", "SnapshotArns", "SnapshotName",
+                                                  "VpcSecurityGroupIds" },
+    "AWS::CloudFront::Distribution":            set(),
+    "AWS::CloudFront::CloudFrontOriginAccessIdentity": set(),
+    "AWS::CodeBuild::Project":                  { "Name" },
+    "AWS::CodePipeline::Pipeline":              { "Name" },
+    "AWS::Route53::HostedZone":                 { "Name" },
+    "AWS::Route53::RecordSet":                  { "HostedZoneId", "HostedZoneName", "Name" },
+    "AWS::ApiGateway::RestApi":                 set(),
+    "AWS::ApiGateway::Deployment":              { "RestApiId" },
+    "AWS::CloudFormation::Stack":               set(),
+    "AWS::CDK::Metadata":                       set(),
+}
+# Custom resources are replaced when their provider changes.
+CUSTOM_RESOURCE_RULES = { "ServiceToken" }
+# Exit code of --changed-only when there is nothing to deploy
+NOTHING_CHANGED = 3
+
+
+def _digest(path: str) -> str:
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def _references(value, found: set) -> None:
+    if isinstance(value, list):
+        for item in value:
+            _references(item, found)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key == "Ref" and isinstance(item, str):
+                found.add(item)
+            elif key == "Fn::GetAtt":
+                found.add(item.split(".", 1)[0] if isinstance(item, str) else item[0])
+            _references(item, found)
+
+
+def _rules(resource_type: str):
+    if resource_type.startswith("Custom::") or resource_type == "AWS::CloudFormation::CustomResource":
+        return CUSTOM_RESOURCE_RULES
+    return REPLACEMENT_RULES.get(resource_type)
+
+
+def classify(resource_type: str, properties: set) -> str:
+    rules = _rules(resource_type)
+    if rules == "*" or (rules and properties & rules):
+        return "replacement"
+    if rules is None and properties:
+        return "may-replace"
+    return "update"
+
+
+def diff_templates(old: dict, new: dict) -> dict:
+    '''
+        Returns { "resources": { logical id: change }, "stack": [ changed template sections ] }
+    '''
+    old_resources = old.get("Resources", dict())
+    new_resources = new.get("Resources", dict())
+    changes  = dict()
+    common   = dict()
+    replaced = set()
+    for logical_id, resource in new_resources.items():
+        before = old_resources.get(logical_id)
+        if before is None:
+            changes[logical_id] = { "type": resource["Type"], "change": "add", "properties": list() }
+            continue
+        if before["Type"] != resource["Type"]:
+            changes[logical_id] = { "type": resource["Type"], "change": "replacement", "properties": [ "Type" ] }
+            replaced.add(logical_id)
+            continue
+        old_properties = before.get("Properties", dict())
+        new_properties = resource.get("Properties", dict())
+        properties = {
+            name for name in set(old_properties) | set(new_properties)
+            if old_properties.get(name) != new_properties.get(name)
+        }
+        attributes = {
+            name for name in ("DependsOn", "Condition", "DeletionPolicy", "UpdateReplacePolicy",
+                              "UpdatePolicy", "CreationPolicy")
+            if before.get(name) != resource.get(name)
+        }
+        common[logical_id] = properties
+        if properties or attributes:
+            kind = classify(resource["Type"], properties)
+            changes[logical_id] = { "type": resource["Type"], "change": kind,
+                                    "properties": sorted(properties | attributes) }
+            if kind == "replacement":
+                replaced.add(logical_id)
+        elif before.get("Metadata") != resource.get("Metadata"):
+            changes[logical_id] = { "type": resource["Type"], "change": "no-op", "properties": [ "Metadata" ] }
+    for logical_id, resource in old_resources.items():
+        if logical_id not in new_resources:
+            changes[logical_id] = { "type": resource["Type"], "change": "remove", "properties": list() }
+
+    # A replaced resource gets a new physical id, so properties referencing it change too.
+    pending = bool(replaced)
+    while pending:
+        pending = False
+        for logical_id, properties in common.items():
+            if logical_id in replaced:
+                continue
+            resource = new_resources[logical_id]
+            affected = set()
+            for name, value in resource.get("Properties", dict()).items():
+                found = set()
+                _references(value, found)
+                if found & replaced:
+                    affected.add(name)
+            if not affected - properties:
+                continue
+            common[logical_id] = properties | affected
+            kind     = classify(resource["Type"], common[logical_id])
+            previous = changes.get(logical_id, { "properties": list() })
+            changes[logical_id] = { "type": resource["Type"], "change": kind,
+                                    "properties": sorted(set(previous["properties"]) | affected) }
+            if kind == "replacement":
+                replaced.add(logical_id)
+                pending = True
+
+    sections = [
+        section for section in ("Parameters", "Conditions", "Mappings", "Outputs", "Rules", "Transform")
+        if old.get(section) != new.get(section)
+    ]
+    # exports whose value changes because the resource behind them is replaced
+    replaced_exports = list()
+    for output in new.get("Outputs", dict()).values():
+        found = set()
+        _references(output.get("Value"), found)
+        if "Export" in output and found & replaced:
+            replaced_exports.append(output["Export"]["Name"])
+    return { "resources": changes, "stack": sections, "replaced_exports": replaced_exports }
+
+
+def _imports(value, found: set) -> None:
+    if isinstance(value, list):
+        for item in value:
+            _imports(item, found)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            if key == "Fn::ImportValue" and isinstance(item, str):
+                found.add(item)
+            _imports(item, found)
+
+
+def diff_stack(job: tuple) -> tuple:
+    stack_id, old_file, new_file = job
+    if old_file is None:
+        return stack_id, { "status": "new" }
+    if new_file is None:
+        return stack_id, { "status": "removed" }
+    if _digest(old_file) == _digest(new_file):
+        return stack_id, { "status": "unchanged" }
+    with open(old_file) as file:
+        old = json.load(file)
+    with open(new_file) as file:
+        new = json.load(file)
+    result  = diff_templates(old, new)
+    changes = [ change["change"] for change in result["resources"].values() ]
+    if any(change != "no-op" for change in changes) or result["stack"]:
+        status = "changed"
+    else:
+        status = "no-op"
+    result["status"] = status
+    return stack_id, result
+
+
+def diff_assemblies(old_dir: str, new_dir: str, workers: int = None) -> dict:
+    old  = CloudAssembly(old_dir)
+    new  = CloudAssembly(new_dir)
+    jobs = [
+        (stack_id, old.stacks[stack_id].template_file if stack_id in old.stacks else None, stack.template_file)
+        for stack_id, stack in new.stacks.items()
+    ] + [
+        (stack_id, stack.template_file, None) for stack_id, stack in old.stacks.items() if stack_id not in new.stacks
+    ]
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        result = dict(executor.map(diff_stack, jobs))
+
+    # Stacks importing a replaced export change at deploy time even if their template does not.
+    replaced_exports = { name for stack in result.values() for name in stack.get("replaced_exports", list()) }
+    if replaced_exports:
+        for stack_id, stack in result.items():
+            if stack["status"] not in ("unchanged", "no-op"):
+                continue
+            found = set()
+            _imports(new.stacks[stack_id].template(), found)
+            if found & replaced_exports:
+                stack["status"]  = "changed"
+                stack["imports"] = sorted(found & replaced_exports)
+    return result
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Resource level diff of two cloud assemblies")
+    parser.add_argument("old", help="cdk.out of the deployed version")
+    parser.add_argument("new", help="cdk.out to deploy")
+    parser.add_argument("--json", action="store_true", help="print the diff as JSON")
+    parser.add_argument("--changed-only", action="store_true", help=f"print the ids of stacks to deploy, one per line(exit {NOTHING_CHANGED} if none)")
+    parser.add_argument("--fail-on-replacement", action="store_true", help="exit 1 when a resource is replaced")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes(default: cpu count)")
+    args = parser.parse_args(argv)
+
+    result = diff_assemblies(args.old, args.new, args.workers)
+    replacements = [
+        f"{stack_id}/{logical_id}" for stack_id, stack in result.items()
+        for logical_id, change in stack.get("resources", dict()).items() if change["change"] == "replacement"
+    ]
+    if args.json:
+        print(json.dumps(result, indent=2))
+    elif args.changed_only:
+        changed = [ stack_id for stack_id, stack in result.items() if stack["status"] in ("changed", "new") ]
+        if not changed:
+            print("no stack changed", file=sys.stderr)
+            return NOTHING_CHANGED
+        for stack_id in changed:
+            print(stack_id)
+    else:
+        for stack_id, stack in result.items():
+            print(f"{stack_id}: {stack['status']}")
+            for section in stack.get("stack", list()):
+                print(f"    [{section}]")
+            for name in stack.get("replaced_exports", list()):
+                print(f"    export {name} changes(replaced resource)")
+            for name in stack.get("imports", list()):
+                print(f"    imports {name}, which changes")
+            for logical_id, change in stack.get("resources", dict()).items():
+                if change["change"] == "no-op":
+                    continue
+                properties = f"({', '.join(change['properties'])})" if change["properties"] else ""
+                print(f"    {change['change']:12} {change['type']:40} {logical_id} {properties}")
+    if args.fail_on_replacement and replacements:
+        print(f"replacement: {', '.join(replacements)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,43 @@
+'''
+    Tests of the post-synth tools, on small cloud assemblies written by the tests themselves(no CDK).
+
+        python3 -m pytest -q tools/tests      # from the repository root
+'''
+import json
+import os
+import sys
+
+import pytest
+
+REPOSITORY_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPOSITORY_DIR not in sys.path:
+    sys.path.append(REPOSITORY_DIR)
+
+
+def write_assembly(directory: str, stacks: dict) -> str:
+    '''
+        stacks: { stack id: (template, [ stack ids it depends on ]) }
+        Writes manifest.json and one template per stack, returns the directory.
+    '''
+    os.makedirs(directory, exist_ok=True)
+    artifacts = dict()
+    for stack_id, (template, dependencies) in stacks.items():
+        template_file = f"{stack_id}.template.json"
+        with open(os.path.join(directory, template_file), "w") as file:
+            json.dump(template, file, indent=1)
+        artifacts[stack_id] = {
+            "type": "aws:cloudformation:stack",
+            "environment": "aws://unknown-account/unknown-region",
+            "properties": { "templateFile": template_file },
+            "dependencies": list(dependencies),
+        }
+    with open(os.path.join(directory, "manifest.json"), "w") as file:
+        json.dump({ "version": "16.0.0", "artifacts": artifacts }, file, indent=1)
+    return directory
+
+
+@pytest.fixture
+def assembly_factory(tmp_path):
+    def factory(stacks: dict, name: str = "cdk.out") -> str:
+        return write_assembly(str(tmp_path / name), stacks)
+    return factory
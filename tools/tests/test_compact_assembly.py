@@ -0,0 +1,111 @@
+'''
+    Cloud assembly compaction(tools/compact_assembly.py)
+'''
+import hashlib
+import json
+import os
+
+from tools.compact_assembly import compact_assembly
+
+BUCKET = "cdk-hnb659fds-assets-111111111111-us-west-2"
+
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _write_json(path: str, document: dict) -> str:
+    text = json.dumps(document, indent=1)
+    with open(path, "w") as file:
+        file.write(text)
+    return _digest(text)
+
+
+def _asset(path: str, key: str) -> dict:
+    return { "source": { "path": path, "packaging": "file" },
+             "destinations": { "111111111111-us-west-2": { "bucketName": BUCKET, "objectKey": key } } }
+
+
+def _code(digest: str) -> dict:
+    return { "Type": "AWS::Lambda::Function",
+             "Properties": { "Code": { "S3Bucket": BUCKET, "S3Key": f"{digest}.zip" } },
+             "Metadata": { "aws:cdk:path": "app/Function/Resource", "aws:asset:path": f"asset.{digest}.zip" } }
+
+
+def write_assembly(directory: str) -> dict:
+    '''
+        One stack with a nested stack, two lambda zips with the same content under different digests.
+    '''
+    os.makedirs(directory)
+    first, second = _digest("first"), _digest("second")
+    for digest in (first, second):
+        with open(os.path.join(directory, f"asset.{digest}.zip"), "w") as file:
+            file.write("same bytes")
+    nested = _write_json(os.path.join(directory, "appnested.nested.template.json"),
+                         { "Resources": { "Function": _code(second) } })
+    parent = _write_json(os.path.join(directory, "app.template.json"), { "Resources": {
+        "Function": _code(first),
+        "Nested":   { "Type": "AWS::CloudFormation::Stack", "Properties": {
+            "TemplateURL": f"https://s3.us-west-2.amazonaws.com/{BUCKET}/{nested}.json" } },
+        "CDKMetadata": { "Type": "AWS::CDK::Metadata", "Properties": { "Analytics": "v2:deflate64:x" } },
+    } })
+    _write_json(os.path.join(directory, "app.assets.json"), { "version": "16.0.0", "files": {
+        first:  _asset(f"asset.{first}.zip", f"{first}.zip"),
+        second: _asset(f"asset.{second}.zip", f"{second}.zip"),
+        nested: _asset("appnested.nested.template.json", f"{nested}.json"),
+        parent: _asset("app.template.json", f"{parent}.json"),
+    } })
+    _write_json(os.path.join(directory, "manifest.json"), { "version": "16.0.0", "artifacts": {
+        "app.assets": { "type": "cdk:asset-manifest", "properties": { "file": "app.assets.json" } },
+        "app": { "type": "aws:cloudformation:stack", "environment": "aws://111111111111/us-west-2",
+                 "properties": { "templateFile": "app.template.json",
+                                 "stackTemplateAssetObjectUrl": f"s3://{BUCKET}/{parent}.json" },
+                 "dependencies": [ "app.assets" ] },
+    } })
+    return { "first": first, "second": second, "nested": nested, "parent": parent }
+
+
+def _read(directory: str, name: str) -> tuple:
+    with open(os.path.join(directory, name)) as file:
+        text = file.read()
+    return text, json.loads(text)
+
+
+def test_duplicate_assets_are_published_once(tmp_path):
+    directory = str(tmp_path / "cdk.out")
+    digests   = write_assembly(directory)
+    report    = compact_assembly(directory)
+    assert report["duplicate_assets"] == 1
+    kept, removed = sorted((digests["first"], digests["second"]))
+    assert not os.path.exists(os.path.join(directory, f"asset.{removed}.zip"))
+    _, assets = _read(directory, "app.assets.json")
+    assert kept in assets["files"] and removed not in assets["files"]
+    for name in ("app.template.json", "appnested.nested.template.json"):
+        text, _ = _read(directory, name)
+        assert removed not in text and f"{kept}.zip" in text
+
+
+def test_rewritten_templates_get_new_digests(tmp_path):
+    directory = str(tmp_path / "cdk.out")
+    digests   = write_assembly(directory)
+    compact_assembly(directory)
+    nested_text, _ = _read(directory, "appnested.nested.template.json")
+    parent_text, _ = _read(directory, "app.template.json")
+    nested, parent = _digest(nested_text), _digest(parent_text)
+    # minified, and every reference follows the content hash of the rewritten template
+    assert "\n" not in parent_text
+    assert f"{nested}.json" in parent_text and digests["nested"] not in parent_text
+    _, assets = _read(directory, "app.assets.json")
+    assert assets["files"][parent]["destinations"]["111111111111-us-west-2"]["objectKey"] == f"{parent}.json"
+    assert digests["parent"] not in assets["files"]
+    _, manifest = _read(directory, "manifest.json")
+    assert manifest["artifacts"]["app"]["properties"]["stackTemplateAssetObjectUrl"] == f"s3://{BUCKET}/{parent}.json"
+
+
+def test_strip_metadata(tmp_path):
+    directory = str(tmp_path / "cdk.out")
+    write_assembly(directory)
+    compact_assembly(directory, strip=True)
+    _, template = _read(directory, "app.template.json")
+    assert "CDKMetadata" not in template["Resources"]
+    assert "Metadata" not in template["Resources"]["Function"]
@@ -0,0 +1,73 @@
+'''
+    Offline context snapshot(tools/context_snapshot.py), prefetch against a stub app and resolver.
+'''
+import json
+import sys
+
+import pytest
+
+from tools import context_snapshot
+from tools.context_snapshot import SnapshotStore, prefetch
+
+AZ_KEY  = "availability-zones:account=111111111111:region=us-west-2"
+VPC_KEY = "vpc-provider:account=111111111111:filter.tag:Name=dev:region=us-west-2"
+PROPS   = { "account": "111111111111", "region": "us-west-2" }
+
+# Looks up the vpc only once the availability zones are known, like a stack built from a lookup.
+APP = f'''
+import json, os
+context = json.loads(os.environ["CDK_CONTEXT_JSON"])
+missing = list()
+if {AZ_KEY!r} not in context:
+    missing.append({{ "key": {AZ_KEY!r}, "provider": "availability-zones", "props": {PROPS!r} }})
+elif {VPC_KEY!r} not in context:
+    missing.append({{ "key": {VPC_KEY!r}, "provider": "vpc-provider", "props": {PROPS!r} }})
+with open(os.path.join(os.environ["CDK_OUTDIR"], "manifest.json"), "w") as file:
+    json.dump({{ "version": "16.0.0", "artifacts": {{}}, "missing": missing }}, file)
+'''
+
+
+class StubResolver:
+    def __init__(self) -> None:
+        self.resolved = list()
+
+    def resolve(self, missing: dict):
+        self.resolved.append(missing["provider"])
+        return { "availability-zones": ["us-west-2a", "us-west-2b"], "vpc-provider": { "vpcId": "vpc-1" } }[
+            missing["provider"]]
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "app.py").write_text(APP)
+    (tmp_path / "cdk.json").write_text(json.dumps({ "app": f"{sys.executable} app.py", "context": {} }))
+    return str(tmp_path)
+
+
+def test_prefetch_resolves_in_rounds(project):
+    resolver = StubResolver()
+    store    = SnapshotStore(project)
+    assert prefetch(project, store, resolver, workers=2) == 2
+    assert resolver.resolved == [ "availability-zones", "vpc-provider" ]
+    # saved per account/region, a new store reads it back
+    context = SnapshotStore(project).context()
+    assert context[AZ_KEY] == [ "us-west-2a", "us-west-2b" ]
+    assert context[VPC_KEY] == { "vpcId": "vpc-1" }
+    assert prefetch(project, SnapshotStore(project), resolver, workers=2) == 0
+
+
+def test_expired_lookups_are_fetched_again(project):
+    store = SnapshotStore(project)
+    prefetch(project, store, StubResolver(), workers=2)
+    entry = store.scopes["111111111111-us-west-2"][AZ_KEY]
+    entry["fetched_at"] -= entry["ttl"] + 1
+    assert AZ_KEY not in store.context()
+    resolver = StubResolver()
+    assert prefetch(project, store, resolver, workers=2) == 1
+    assert resolver.resolved == [ "availability-zones" ]
+
+
+def test_prefetch_gives_up_after_max_rounds(project, monkeypatch):
+    monkeypatch.setattr(context_snapshot, "MAX_ROUNDS", 1)
+    with pytest.raises(RuntimeError):
+        prefetch(project, SnapshotStore(project), StubResolver(), workers=2)
@@ -0,0 +1,61 @@
+'''
+    CIDR allocator(tools/ipam.py)
+'''
+import random
+
+import pytest
+
+from tools.ipam import CidrPool, IntervalTree, max_pods, pod_addresses, prefix_for_hosts, split_prefix
+
+
+def test_interval_tree_matches_brute_force():
+    rng, tree, intervals = random.Random(7), IntervalTree(), dict()
+    for index in range(2000):
+        start = rng.randrange(100000)
+        if start in intervals:
+            continue
+        intervals[start] = (start, start + rng.randrange(1, 50), index)
+        tree.add(*intervals[start])
+        if index % 3 == 0:
+            tree.remove(intervals.pop(rng.choice(list(intervals)))[0])
+    assert list(tree) == sorted(intervals.values())
+    for _ in range(200):
+        start = rng.randrange(100000)
+        end   = start + rng.randrange(1, 100)
+        assert tree.overlaps(start, end) == [ item for item in sorted(intervals.values())
+                                              if item[0] < end and item[1] > start ]
+
+
+def test_pool_allocates_aligned_free_blocks():
+    pool = CidrPool("10.0.0.0/8")
+    pool.reserve("10.0.0.0/16", "usdev")
+    assert str(pool.allocate(16, "apdev")) == "10.1.0.0/16"
+    assert str(pool.allocate(12, "big")) == "10.16.0.0/12"
+    assert str(pool.allocate(16, "uswsi")) == "10.2.0.0/16"
+    pool.release("10.1.0.0/16")
+    assert str(pool.allocate(16, "again")) == "10.1.0.0/16"
+
+
+def test_pool_rejects_overlaps_and_exhaustion():
+    pool = CidrPool("10.10.0.0/16")
+    pool.reserve("10.10.0.0/20", "private")
+    with pytest.raises(ValueError, match="overlaps 10.10.0.0/20"):
+        pool.reserve("10.10.8.0/24", "data")
+    with pytest.raises(ValueError):
+        pool.reserve("10.20.0.0/24", "outside")
+    with pytest.raises(ValueError, match="no free /16"):
+        pool.allocate(16)
+
+
+def test_subnet_sizing():
+    # 5 addresses are reserved by AWS: /24 holds 251, /22 holds 1019
+    assert prefix_for_hosts(251) == 24
+    assert prefix_for_hosts(252) == 23
+    assert prefix_for_hosts(900, headroom=0.25) == 21
+    # t3.xlarge: 4 ENIs * 15 addresses, 58 pods per node
+    assert max_pods(4, 15) == 58
+    assert pod_addresses(20, 4, 15) == 1200
+    assert split_prefix("100.64.0.0/16", 3) == 18
+    with pytest.raises(ValueError):
+        prefix_for_hosts(70000)
+
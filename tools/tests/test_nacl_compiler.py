@@ -0,0 +1,60 @@
+'''
+    NACL rule compiler(tools/nacl_compiler.py)
+'''
+import ipaddress
+import random
+
+import pytest
+
+from tools.nacl_compiler import compile_acl, evaluate, evaluate_spec, expand, number, optimize
+
+NAMES = { "any": [ "0.0.0.0/0" ], "private": [ "10.0.32.0/20", "10.0.48.0/20" ] }
+
+
+def test_adjacent_ports_and_cidrs_merge():
+    entries = optimize(expand([
+        { "protocol": "tcp", "ports": [8000, 8080], "cidrs": ["private"] },
+        { "protocol": "tcp", "ports": [8081, 8090], "cidrs": ["private"] },
+        { "protocol": "tcp", "ports": 8085,         "cidrs": ["10.0.40.0/24"] },
+    ], NAMES))
+    assert [ (str(entry.cidr), entry.ports) for entry in entries ] == [ ("10.0.32.0/19", (8000, 8090)) ]
+
+
+def test_deny_first_then_allow_by_weight():
+    entries = number(optimize(expand([
+        { "protocol": "tcp", "ports": 80,  "cidrs": ["any"], "weight": 10 },
+        { "protocol": "tcp", "ports": 443, "cidrs": ["any"], "weight": 90 },
+        { "protocol": "all", "cidrs": ["198.51.100.0/24"], "action": "deny" },
+    ], NAMES)))
+    assert [ (entry.rule_number, entry.action, entry.ports) for entry in entries ] == [
+        (100, "deny", None), (110, "allow", (443, 443)), (120, "allow", (80, 80)) ]
+    assert evaluate(entries, 6, "198.51.100.7", 443) == "deny"
+    assert evaluate(entries, 6, "203.0.113.7", 443) == "allow"
+
+
+def test_rule_limit():
+    rules = [ { "protocol": "tcp", "ports": port * 10, "cidrs": ["any"] } for port in range(1, 23) ]
+    with pytest.raises(ValueError):
+        compile_acl({ "ingress": rules })
+
+
+def test_reference_flow_mismatch():
+    spec = { "ingress": [ { "protocol": "tcp", "ports": [1024, 65535], "cidrs": ["any"] } ],
+             "flows": [ { "direction": "ingress", "protocol": "tcp", "port": 3306, "address": "any", "expect": "deny" } ] }
+    with pytest.raises(ValueError, match="compiled allow"):
+        compile_acl(spec, NAMES)
+
+
+def test_compiled_rules_match_spec_on_random_flows():
+    rng   = random.Random(11)
+    rules = [
+        { "protocol": rng.choice(["tcp", "udp"]), "ports": sorted([rng.randrange(0, 2000), rng.randrange(0, 2000)]),
+          "cidrs": [ f"10.0.{rng.randrange(0, 8) * 16}.0/20" ], "action": rng.choice(["allow", "allow", "deny"]),
+          "weight": rng.randrange(1, 10) }
+        for _ in range(15)
+    ]
+    spec     = expand(rules)
+    compiled = number(optimize(expand(rules)), limit=len(spec))
+    for _ in range(2000):
+        flow = (rng.choice([6, 17]), ipaddress.ip_address(rng.randrange(0x0A000000, 0x0A008000)), rng.randrange(0, 2000))
+        assert evaluate(compiled, *flow) == evaluate_spec(spec, *flow)
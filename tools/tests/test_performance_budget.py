@@ -0,0 +1,56 @@
+'''
+    Performance budget(tools/performance_budget.py), the checks the services tests do not reach.
+'''
+import json
+import os
+
+from tools.assembly import CloudAssembly
+from tools.performance_budget import check_assembly, check_template
+
+BUDGET = { "max_health_check_grace_seconds": 120, "min_cache_ttl": 3600, "cloudfront_compress": True }
+
+
+def _distribution(compress: bool, ttl: int = None) -> dict:
+    behavior = { "Compress": compress }
+    if ttl is not None:
+        behavior["DefaultTTL"] = ttl
+    return { "Type": "AWS::CloudFront::Distribution",
+             "Properties": { "DistributionConfig": { "DefaultCacheBehavior": behavior } } }
+
+
+def test_cloudfront_compression_and_ttl():
+    template = { "Resources": {
+        "Cdn":    _distribution(compress=False, ttl=60),
+        "Policy": { "Type": "AWS::CloudFront::CachePolicy", "Properties": { "CachePolicyConfig": {
+            "DefaultTTL": 86400,
+            "ParametersInCacheKeyAndForwardedToOrigin": { "EnableAcceptEncodingGzip": True } } } },
+    } }
+    assert sorted(property for _, property, _ in check_template(template, BUDGET)) == [
+        "Properties.CachePolicyConfig.ParametersInCacheKeyAndForwardedToOrigin.EnableAcceptEncodingBrotli",
+        "Properties.DistributionConfig.DefaultCacheBehavior.Compress",
+        "Properties.DistributionConfig.DefaultCacheBehavior.DefaultTTL",
+    ]
+    assert check_template({ "Resources": { "Cdn": _distribution(compress=True) } }, BUDGET) == []
+
+
+def test_health_check_grace():
+    template = { "Resources": {
+        "Asg":     { "Type": "AWS::AutoScaling::AutoScalingGroup", "Properties": { "HealthCheckGracePeriod": 300 } },
+        "Service": { "Type": "AWS::ECS::Service", "Properties": { "HealthCheckGracePeriodSeconds": 60 } },
+    } }
+    assert check_template(template, BUDGET) == [ ("Asg", "Properties.HealthCheckGracePeriod", "300s exceeds 120s") ]
+
+
+def test_violation_names_the_construct_path(assembly_factory):
+    directory = assembly_factory({ "dev-cdn": ({ "Resources": { "Cdn": _distribution(compress=False) } }, []) })
+    path = os.path.join(directory, "manifest.json")
+    with open(path) as file:
+        manifest = json.load(file)
+    manifest["artifacts"]["dev-cdn"]["metadata"] = {
+        "/dev-cdn/distribution/Resource": [ { "type": "aws:cdk:logicalId", "data": "Cdn" } ] }
+    with open(path, "w") as file:
+        json.dump(manifest, file)
+    violations = check_assembly(CloudAssembly(directory), BUDGET)
+    assert [ str(violation) for violation in violations ] == [
+        "/dev-cdn/distribution/Resource(Cdn) Properties.DistributionConfig.DefaultCacheBehavior.Compress: "
+        "compression is off" ]
@@ -0,0 +1,73 @@
+'''
+    Security group graph compiler(tools/sg_graph.py)
+'''
+import pytest
+
+from tools.sg_graph import SecurityGroupGraph
+
+NAMES = { "any": [ "0.0.0.0/0" ], "private": [ "10.0.32.0/20", "10.0.48.0/20" ] }
+
+
+def webapp_graph(**kwargs) -> SecurityGroupGraph:
+    graph = SecurityGroupGraph(names=NAMES, **kwargs)
+    for name in ("alb", "app", "rds"):
+        graph.tier(name)
+    graph.flow("any", "alb", 443)
+    graph.flow("alb", "app", 8080)
+    graph.flow("alb", "app", [8081, 8090])
+    graph.flow("app", "rds", 3306)
+    graph.flow("app", "rds", 3306)
+    return graph
+
+
+def test_flows_compile_to_both_ends_with_merged_ports():
+    compiled = webapp_graph().compile()
+    assert [ (rule.peer, rule.ports) for rule in compiled["app"]["ingress"] ] == [ ("alb", (8080, 8090)) ]
+    assert [ (rule.peer, rule.ports) for rule in compiled["alb"]["egress"] ] == [ ("app", (8080, 8090)) ]
+    assert len(compiled["rds"]["ingress"]) == 1
+
+
+def test_inline_rules_avoid_cycles_and_self_references():
+    graph = webapp_graph()
+    graph.flow("app", "app", protocol="all")
+    rules = [ rule for directions in graph.compile().values() for direction in directions.values()
+              for rule in direction ]
+    references = { (rule.group, rule.peer) for rule in rules if rule.inline and rule.peer in graph.tiers }
+    assert not { (peer, group) for group, peer in references } & references
+    assert not [ rule for rule in rules if rule.inline and rule.peer == rule.group ]
+    assert graph.quota()["app"]["resources"] == 3
+    assert not [ rule for rule in webapp_graph(inline_groups=False).compile()["rds"]["ingress"] if rule.inline ]
+
+
+def test_covered_rules_are_dropped():
+    graph = SecurityGroupGraph(names=NAMES)
+    graph.tier("app", cidrs=[ "10.0.40.0/24" ], allow_all_outbound=True)
+    graph.tier("cache")
+    graph.flow("app", "cache", 6379)
+    graph.flow("private", "cache", [6000, 7000])
+    graph.flow("10.0.33.0/24", "cache", 6500)
+    compiled = graph.compile()
+    assert [ (str(rule.peer), rule.ports) for rule in compiled["cache"]["ingress"] ] == [ ("10.0.32.0/19", (6000, 7000)) ]
+    assert compiled["app"]["egress"] == list()
+
+
+def test_can_reach():
+    graph = webapp_graph()
+    assert graph.can_reach("203.0.113.10", "alb", 443)
+    assert graph.can_reach("alb", "app", 8085)
+    assert not graph.can_reach("alb", "app", 8091)
+    assert not graph.can_reach("alb", "rds", 3306)
+    assert not graph.can_reach("rds", "app", 8080)
+    assert not graph.can_reach("203.0.113.10", "app", 8080)
+
+
+def test_quota():
+    graph = SecurityGroupGraph(names=NAMES, limit=5)
+    graph.tier("app")
+    for port in range(1, 6):
+        graph.flow("any", "app", port * 10)
+    assert graph.quota()["app"]["headroom"] == 0
+    graph.flow("any", "app", 100)
+    with pytest.raises(ValueError):
+        graph.compile()
+
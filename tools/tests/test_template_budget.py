@@ -0,0 +1,59 @@
+'''
+    CloudFormation template budget(tools/template_budget.py)
+'''
+from tools.assembly import CloudAssembly
+from tools.template_budget import analyze, over_budget, plan_split, resource_groups
+
+
+def _topic(**properties) -> dict:
+    return { "Type": "AWS::SNS::Topic", "Properties": properties }
+
+
+def test_report_counts_every_quota(assembly_factory):
+    template = {
+        "Parameters": { "Env": { "Type": "String" } },
+        "Resources":  { f"Topic{index}": _topic() for index in range(3) },
+        "Outputs":    {
+            "Name":     { "Value": { "Ref": "Topic0" } },
+            "Exported": { "Value": { "Ref": "Topic1" }, "Export": { "Name": "topic" } },
+        },
+    }
+    report = analyze(CloudAssembly(assembly_factory({ "sns": (template, []) })))
+    stats  = report["sns"]
+    assert (stats["resources"], stats["outputs"], stats["exports"], stats["parameters"], stats["mappings"]) == \
+        (3, 2, 1, 1, 0)
+    assert stats["bytes"] > 0
+
+
+def test_over_budget_reports_the_metric():
+    stats = { "resources": 450, "bytes": 1000, "outputs": 0, "exports": 0, "parameters": 0, "mappings": 0 }
+    assert over_budget({ "eks": stats }, 0.8) == [ "eks: resources 450 of 500(90%)" ]
+    assert over_budget({ "eks": stats }, 0.95) == []
+
+
+def test_groups_follow_references():
+    template = { "Resources": {
+        "Topic":        _topic(),
+        "Subscription": { "Type": "AWS::SNS::Subscription", "Properties": { "TopicArn": { "Ref": "Topic" } } },
+        "Queue":        { "Type": "AWS::SQS::Queue", "DependsOn": "Other" },
+        "Other":        _topic(DisplayName={ "Fn::Sub": "${Topic.TopicName}-other" }),
+        "Alone":        _topic(),
+    } }
+    groups = sorted(sorted(group) for group in resource_groups(template))
+    assert groups == [ ["Alone"], ["Other", "Queue", "Subscription", "Topic"] ]
+
+
+def test_split_keeps_pinned_and_stateful_groups():
+    template = {
+        "Resources": {
+            **{ f"Free{index}": _topic(DisplayName={ "Ref": f"Free{index - 1}" } if index else "free")
+                for index in range(4) },
+            "Output":   _topic(),
+            "Bucket":   { "Type": "AWS::S3::Bucket", "DeletionPolicy": "Retain" },
+            "BucketUser": _topic(DisplayName={ "Ref": "Bucket" }),
+        },
+        "Outputs": { "Topic": { "Value": { "Ref": "Output" } } },
+    }
+    bins = plan_split(template, 10)
+    # Output is used by Outputs, Bucket is retained, single resource groups are not worth a nested stack
+    assert [ sorted(resources) for resources, _ in bins ] == [ ["Free0", "Free1", "Free2", "Free3"] ]
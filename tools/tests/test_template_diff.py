@@ -0,0 +1,71 @@
+'''
+    Template diff(tools/template_diff.py)
+'''
+import copy
+
+from tools.template_diff import NOTHING_CHANGED, diff_templates, main
+
+OLD = {
+    "Resources": {
+        "Vpc":    { "Type": "AWS::EC2::VPC", "Properties": { "CidrBlock": "10.0.0.0/16" } },
+        "Subnet": { "Type": "AWS::EC2::Subnet", "Properties": {
+            "VpcId": { "Ref": "Vpc" }, "CidrBlock": "10.0.0.0/24", "MapPublicIpOnLaunch": False } },
+        "Topic":  { "Type": "AWS::SNS::Topic", "Properties": { "DisplayName": "old" },
+                    "Metadata": { "aws:cdk:path": "stack/Topic/Resource" } },
+        "Queue":  { "Type": "AWS::SQS::Queue", "Properties": {} },
+        "Widget": { "Type": "AWS::Example::Widget", "Properties": { "Size": 1 } },
+    },
+    "Outputs": {
+        "VpcId": { "Value": { "Ref": "Vpc" }, "Export": { "Name": "dev-vpc" } },
+    },
+}
+
+
+def _changes(new: dict) -> dict:
+    return { logical_id: change["change"] for logical_id, change in diff_templates(OLD, new)["resources"].items() }
+
+
+def test_identical_templates_have_no_changes():
+    result = diff_templates(OLD, copy.deepcopy(OLD))
+    assert result == { "resources": {}, "stack": [], "replaced_exports": [] }
+
+
+def test_changes_are_classified():
+    new = copy.deepcopy(OLD)
+    new["Resources"]["Subnet"]["Properties"]["MapPublicIpOnLaunch"] = True
+    new["Resources"]["Topic"]["Metadata"]["aws:cdk:path"] = "stack/Renamed/Resource"
+    new["Resources"]["Widget"]["Properties"]["Size"] = 2
+    new["Resources"]["Bucket"] = { "Type": "AWS::S3::Bucket" }
+    del new["Resources"]["Queue"]
+    assert _changes(new) == {
+        "Subnet": "update",
+        "Topic":  "no-op",
+        "Widget": "may-replace",
+        "Bucket": "add",
+        "Queue":  "remove",
+    }
+
+
+def test_replacement_spreads_to_references_and_exports():
+    new = copy.deepcopy(OLD)
+    new["Resources"]["Vpc"]["Properties"]["CidrBlock"] = "10.1.0.0/16"
+    result = diff_templates(OLD, new)
+    # the subnet references the replaced vpc through VpcId, which requires replacement too
+    assert { logical_id: change["change"] for logical_id, change in result["resources"].items() } == \
+        { "Vpc": "replacement", "Subnet": "replacement" }
+    assert result["resources"]["Subnet"]["properties"] == [ "VpcId" ]
+    assert result["replaced_exports"] == [ "dev-vpc" ]
+
+
+def test_changed_only_fails_when_nothing_changed(assembly_factory, capsys):
+    old = assembly_factory({ "vpc": (OLD, []) }, "old")
+    new = assembly_factory({ "vpc": (OLD, []) }, "new")
+    # an empty list would make "cdk deploy --exclusively" deploy every stack
+    assert main([ old, new, "--changed-only", "--workers", "1" ]) == NOTHING_CHANGED
+    assert capsys.readouterr().out == ""
+
+    changed = copy.deepcopy(OLD)
+    changed["Resources"]["Queue"]["Properties"]["DelaySeconds"] = 5
+    new = assembly_factory({ "vpc": (changed, []) }, "changed")
+    assert main([ old, new, "--changed-only", "--workers", "1" ]) == 0
+    assert capsys.readouterr().out == "vpc\n"
@@ -0,0 +1,58 @@
+'''
+    Deployment wave planner(tools/waves.py)
+'''
+from tools.assembly import CloudAssembly
+from tools.waves import critical_path, dependency_graph, main, plan_waves, split_cdk_args
+
+EMPTY = { "Resources": {} }
+
+
+def chain_assembly(assembly_factory) -> str:
+    # vpc <- security-group <- eks, vpc <- rds, s3 alone
+    return assembly_factory({
+        "vpc":            (EMPTY, []),
+        "security-group": (EMPTY, ["vpc"]),
+        "eks":            (EMPTY, ["vpc", "security-group"]),
+        "rds":            (EMPTY, ["vpc"]),
+        "s3":             (EMPTY, []),
+    })
+
+
+def test_waves_follow_dependencies(assembly_factory):
+    graph = dependency_graph(CloudAssembly(chain_assembly(assembly_factory)))
+    assert plan_waves(graph) == [ ["vpc", "s3"], ["security-group", "rds"], ["eks"] ]
+
+
+def test_selection_pulls_in_dependencies(assembly_factory):
+    graph = dependency_graph(CloudAssembly(chain_assembly(assembly_factory)), ["eks"])
+    assert list(graph) == [ "vpc", "security-group", "eks" ]
+
+
+def test_critical_path_is_weighted():
+    graph = { "vpc": [], "security-group": ["vpc"], "rds": ["vpc"], "eks": ["security-group"] }
+    assert critical_path(graph) == ([ "vpc", "security-group", "eks" ], 3.0)
+    assert critical_path(graph, { "rds": 10 }) == ([ "vpc", "rds" ], 11.0)
+
+
+def test_cycle_is_reported():
+    try:
+        plan_waves({ "a": ["b"], "b": ["a"] })
+    except ValueError as error:
+        assert "cycle" in str(error)
+    else:
+        raise AssertionError("cycle not detected")
+
+
+def test_cdk_args_are_split_on_double_dash():
+    assert split_cdk_args([ "cdk.out", "--deploy", "eks", "--", "--profile", "dev" ]) == \
+        ([ "cdk.out", "--deploy", "eks" ], [ "--profile", "dev" ])
+    assert split_cdk_args([ "cdk.out", "eks" ]) == ([ "cdk.out", "eks" ], [])
+
+
+def test_deploy_selected_stack_with_cdk_args(assembly_factory, capsys):
+    assembly = chain_assembly(assembly_factory)
+    assert main([ assembly, "--deploy", "rds", "--dry-run", "--", "--profile", "dev" ]) == 0
+    commands = [ line for line in capsys.readouterr().out.splitlines() if line.startswith("$ ") ]
+    # only rds and its dependency, every command ends with the cdk arguments
+    assert [ command.split()[3] for command in commands ] == [ "vpc", "rds" ]
+    assert all(command.endswith("--profile dev") for command in commands)
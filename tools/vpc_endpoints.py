@@ -0,0 +1,70 @@
+'''
+    VPC endpoint presets
+    AWS API calls of the workloads(image pulls, logs, STS, KMS, secrets) go through interface endpoints
+    with private DNS instead of the NAT gateways: no NAT data processing charge, no cross-AZ hop,
+    no shared NAT bottleneck. S3 and DynamoDB use gateway endpoints(route table entries, no charge).
+
+    Presets name the endpoints a workload needs, a bundle is the union of the selected presets:
+        ecs     ECR(api, dkr), ECS agent/telemetry, logs, secrets, parameters, KMS, STS
+        eks     ECR(api, dkr), EC2, ELB, autoscaling(cluster autoscaler), logs, KMS, STS
+        lambda  lambda, logs, secrets, parameters, KMS, STS, X-Ray
+        asg     session manager(ssm, ssmmessages, ec2messages), logs, metrics, STS
+
+    Selected with context(services) or per region in regions.json(cfn-services):
+        cdk synth -c vpc-endpoints=ecs,eks
+        cdk synth -c vpc-endpoints=all
+'''
+import json
+import os
+
+CONTEXT_KEY      = "vpc-endpoints"
+GATEWAY_SERVICES = ("s3", "dynamodb")
+PRESETS = {
+    "ecs":    ("ecr.api", "ecr.dkr", "ecs", "ecs-agent", "ecs-telemetry", "logs", "secretsmanager", "ssm", "kms", "sts"),
+    "eks":    ("ecr.api", "ecr.dkr", "ec2", "elasticloadbalancing", "autoscaling", "logs", "kms", "sts"),
+    "lambda": ("lambda", "logs", "secretsmanager", "ssm", "kms", "sts", "xray"),
+    "asg":    ("ssm", "ssmmessages", "ec2messages", "logs", "monitoring", "sts"),
+}
+
+
+def parse_presets(value) -> list:
+    '''
+        "ecs,eks", ["ecs", "eks"], "all" or None(no interface endpoints) -> preset names
+    '''
+    if value in (None, False, "", "false", "none", 0):
+        return list()
+    if value in (True, "true", "all"):
+        return list(PRESETS)
+    names = [ name.strip() for name in value.split(",") ] if isinstance(value, str) else list(value)
+    for name in names:
+        if name not in PRESETS:
+            raise ValueError(f"unknown vpc endpoint preset '{name}', presets: {', '.join(PRESETS)}")
+    return [ name for name in names if name ]
+
+
+def context_presets() -> list:
+    '''
+        "vpc-endpoints" context(cdk -c vpc-endpoints=...), read before App() is created.
+    '''
+    return parse_presets(json.loads(os.environ.get("CDK_CONTEXT_JSON", "{}")).get(CONTEXT_KEY))
+
+
+def endpoint_services(presets: list) -> list:
+    '''
+        Interface endpoint services of the presets, each once, in preset order.
+    '''
+    services = list()
+    for preset in parse_presets(presets):
+        for service in PRESETS[preset]:
+            if service not in services:
+                services.append(service)
+    return services
+
+
+def service_name(region: str, service: str) -> str:
+    return f"com.amazonaws.{region}.{service}"
+
+
+def logical_name(service: str) -> str:
+    # "ecr.api" -> "EcrApi", "ecs-agent" -> "EcsAgent", used in logical ids
+    return "".join(part.capitalize() for part in service.replace("-", ".").split("."))
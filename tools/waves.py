@@ -0,0 +1,203 @@
+'''
+    Deployment wave planner
+    Builds the stack dependency graph of a cloud assembly and groups the stacks into waves.
+    Every stack of a wave depends only on stacks of earlier waves, so a wave can deploy at once.
+    The critical path is the longest dependency chain, it bounds a full rollout.
+
+    Usage(from the repository root, after cdk synth):
+        python3 -m tools.waves services/cdk.out
+        python3 -m tools.waves services/cdk.out --durations durations.json --json
+        python3 -m tools.waves services/cdk.out --deploy --concurrency 4 --record durations.json
+        python3 -m tools.waves services/cdk.out --deploy dev-cdkworkshop-ecs -- --profile dev
+
+    durations.json maps stack id to seconds, unknown stacks count as 1.
+    Everything after "--" is passed to every "cdk deploy" as is.
+    --deploy starts "cdk deploy --exclusively" for a stack as soon as all of its dependencies are
+    deployed(not only when the whole wave is done) and stops starting new stacks after a failure.
+'''
+import argparse
+import concurrent.futures
+import json
+import os
+import subprocess
+import sys
+import time
+
+from tools.assembly import CloudAssembly
+
+
+def dependency_graph(assembly: CloudAssembly, selected: list = None) -> dict:
+    '''
+        Returns { stack id: [ stack ids it depends on ] } of the selected stacks
+        and everything they depend on(all stacks if nothing is selected).
+    '''
+    if not selected:
+        return { stack_id: stack.dependencies for stack_id, stack in assembly.stacks.items() }
+    graph   = dict()
+    pending = [ assembly.stack(name).id for name in selected ]
+    while pending:
+        stack_id = pending.pop()
+        if stack_id in graph:
+            continue
+        graph[stack_id] = assembly.stacks[stack_id].dependencies
+        pending.extend(graph[stack_id])
+    # keep manifest order
+    return { stack_id: graph[stack_id] for stack_id in assembly.stacks if stack_id in graph }
+
+
+def plan_waves(graph: dict) -> list:
+    '''
+        Wave of a stack = 1 + highest wave of its dependencies.
+    '''
+    wave_of = dict()
+    visiting = set()
+
+    def visit(stack_id: str) -> int:
+        if stack_id in wave_of:
+            return wave_of[stack_id]
+        if stack_id in visiting:
+            raise ValueError(f"dependency cycle through stack '{stack_id}'")
+        visiting.add(stack_id)
+        wave_of[stack_id] = 1 + max((visit(dependency) for dependency in graph[stack_id]), default=-1)
+        visiting.discard(stack_id)
+        return wave_of[stack_id]
+
+    for stack_id in graph:
+        visit(stack_id)
+    waves = [ list() for _ in range(max(wave_of.values(), default=-1) + 1) ]
+    for stack_id in graph:
+        waves[wave_of[stack_id]].append(stack_id)
+    return waves
+
+
+def critical_path(graph: dict, durations: dict = None) -> tuple:
+    '''
+        Returns (stack ids of the longest weighted chain, its total duration).
+    '''
+    durations = durations or dict()
+    finish    = dict()
+    previous  = dict()
+    for wave in plan_waves(graph):
+        for stack_id in wave:
+            start = 0.0
+            previous[stack_id] = None
+            for dependency in graph[stack_id]:
+                if finish[dependency] > start:
+                    start = finish[dependency]
+                    previous[stack_id] = dependency
+            finish[stack_id] = start + float(durations.get(stack_id, 1))
+    if not finish:
+        return list(), 0.0
+    last = max(finish, key=finish.get)
+    path = list()
+    while last is not None:
+        path.append(last)
+        last = previous[last]
+    path.reverse()
+    return path, finish[path[-1]]
+
+
+def deploy(graph: dict, assembly_dir: str, concurrency: int, cdk_args: list = (), dry_run: bool = False) -> tuple:
+    '''
+        Deploys every stack of the graph with at most `concurrency` cdk processes.
+        Returns (failed stack ids, { stack id: seconds }).
+    '''
+    remaining = { stack_id: set(dependencies) for stack_id, dependencies in graph.items() }
+    done      = set()
+    failed    = list()
+    durations = dict()
+    running   = dict()
+
+    def run(stack_id: str) -> tuple:
+        command = [ "cdk", "deploy", stack_id, "--app", assembly_dir, "--exclusively",
+                    "--require-approval", "never" ] + list(cdk_args)
+        print("$ " + " ".join(command), flush=True)
+        if dry_run:
+            return stack_id, 0, 0.0
+        start = time.perf_counter()
+        code  = subprocess.call(command)
+        return stack_id, code, time.perf_counter() - start
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=concurrency) as executor:
+        while remaining or running:
+            if not failed:
+                ready = [ stack_id for stack_id, dependencies in remaining.items() if dependencies <= done ]
+                for stack_id in ready[:concurrency - len(running)]:
+                    del remaining[stack_id]
+                    running[executor.submit(run, stack_id)] = stack_id
+            if not running:
+                break
+            finished, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in finished:
+                del running[future]
+                stack_id, code, seconds = future.result()
+                if code != 0:
+                    print(f"deploy of {stack_id} failed(exit {code})", file=sys.stderr, flush=True)
+                    failed.append(stack_id)
+                    continue
+                done.add(stack_id)
+                durations[stack_id] = round(seconds, 1)
+    return failed, durations
+
+
+def split_cdk_args(argv: list) -> tuple:
+    '''
+        Returns (own arguments, cdk arguments after "--").
+        Split before parsing, argparse would give stack names and "--" to the positional stacks
+        or to the unknown arguments depending on their order. The rest is parsed intermixed,
+        so stack names may follow options("--deploy eks").
+    '''
+    if "--" not in argv:
+        return list(argv), list()
+    index = argv.index("--")
+    return list(argv[:index]), list(argv[index + 1:])
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(description="Deployment waves of a cloud assembly")
+    parser.add_argument("assembly", help="cdk.out directory")
+    parser.add_argument("stacks", nargs="*", help="stacks to plan/deploy with their dependencies(default: all)")
+    parser.add_argument("--durations", default=None, help="JSON file of stack id to seconds")
+    parser.add_argument("--json", action="store_true", help="print the plan as JSON")
+    parser.add_argument("--deploy", action="store_true", help="cdk deploy every stack right after its dependencies")
+    parser.add_argument("--concurrency", type=int, default=4, help="cdk deploy processes at once")
+    parser.add_argument("--dry-run", action="store_true", help="print the cdk commands only")
+    parser.add_argument("--record", default=None, help="write measured deploy durations to this JSON file")
+    own_args, cdk_args = split_cdk_args(sys.argv[1:] if argv is None else argv)
+    args = parser.parse_intermixed_args(own_args)
+
+    durations = dict()
+    if args.durations and os.path.exists(args.durations):
+        with open(args.durations) as file:
+            durations = json.load(file)
+    assembly = CloudAssembly(args.assembly)
+    try:
+        graph = dependency_graph(assembly, args.stacks)
+        waves = plan_waves(graph)
+    except (KeyError, ValueError) as error:
+        parser.error(error.args[0])
+    path, total = critical_path(graph, durations)
+
+    if args.json:
+        print(json.dumps({ "waves": waves, "critical_path": path, "critical_path_duration": total }, indent=2))
+    else:
+        for index, wave in enumerate(waves, start=1):
+            print(f"wave {index}: {', '.join(wave)}")
+        print(f"critical path({total:g}): {' -> '.join(path)}")
+        print(f"{len(graph)} stack(s) in {len(waves)} wave(s), widest wave {max(map(len, waves), default=0)}")
+
+    if not args.deploy:
+        return 0
+    failed, measured = deploy(graph, assembly.directory, max(1, args.concurrency), cdk_args, args.dry_run)
+    if args.record and not args.dry_run:
+        durations.update(measured)
+        with open(args.record, "w") as file:
+            json.dump(durations, file, indent=2, sort_keys=True)
+    if failed:
+        print(f"failed: {', '.join(failed)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())